@@ -30,9 +30,9 @@ def constraint_exists(table_name: str, constraint_name: str) -> bool:
     )
 
 
-def safe_drop_index(index_name: str, table_name: str) -> None:
+def safe_drop_index(index_name: str, table_name: str, concurrently: bool = False) -> None:
     if index_exists(table_name, index_name):
-        op.drop_index(index_name, table_name=table_name)
+        op.drop_index(index_name, table_name=table_name, postgresql_concurrently=concurrently)
 
 
 def safe_drop_column(table_name: str, column_name: str) -> None:
@@ -45,6 +45,9 @@ def safe_drop_constraint(constraint_name: str, table_name: str, constraint_type:
         op.drop_constraint(constraint_name, table_name, type_=constraint_type)
 
 
-def safe_create_index(index_name: str, table_name: str, columns: list[str], unique: bool = False) -> None:
+def safe_create_index(
+    index_name: str, table_name: str, columns: list[str], unique: bool = False, concurrently: bool = False
+) -> None:
+    """With ``concurrently``, call inside ``op.get_context().autocommit_block()``."""
     if not index_exists(table_name, index_name):
-        op.create_index(index_name, table_name, columns, unique=unique)
+        op.create_index(index_name, table_name, columns, unique=unique, postgresql_concurrently=concurrently)
@@ -0,0 +1,61 @@
+"""add stock reorder alerts
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-19 18:00:00.000000
+
+Products already below their minimum get no alert here; run
+scripts/dispatch_reorder_alerts.py --scan once to open and send them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "a3b4c5d6e7f8"
+down_revision: Union[str, None] = "f2a3b4c5d6e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("stock_reorder_alerts"):
+        return
+
+    op.create_table(
+        "stock_reorder_alerts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("alertType", sa.String(16), nullable=False, server_default="low_stock"),
+        sa.Column("status", sa.String(16), nullable=False, server_default="pending"),
+        sa.Column("stockQuantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("minStockLevel", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("suggestedQuantity", sa.Integer(), nullable=True),
+        sa.Column("purchaseOrderId", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("triggeredAt", sa.DateTime(), nullable=True),
+        sa.Column("notifiedAt", sa.DateTime(), nullable=True),
+        sa.Column("resolvedAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["purchaseOrderId"], ["purchase_orders.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_stock_reorder_alerts_product", "stock_reorder_alerts", ["tenant_id", "productId"], unique=True
+    )
+    op.create_index(
+        "idx_stock_reorder_alerts_pending",
+        "stock_reorder_alerts",
+        ["tenant_id", "triggeredAt"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    if table_exists("stock_reorder_alerts"):
+        op.drop_table("stock_reorder_alerts")
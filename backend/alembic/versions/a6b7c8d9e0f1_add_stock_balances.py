@@ -0,0 +1,92 @@
+"""add per-warehouse, per-lot stock balances
+
+Revision ID: a6b7c8d9e0f1
+Revises: z5a6b7c8d9e0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "a6b7c8d9e0f1"
+down_revision: Union[str, None] = "z5a6b7c8d9e0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SIGNED_QUANTITY_SQL = """
+    CASE
+        WHEN COALESCE(m.status, '') IN ('cancelled', 'failed') THEN 0
+        WHEN lower(m."movementType") IN ('inbound', 'instock') THEN m.quantity
+        WHEN lower(m."movementType") IN ('outbound', 'damage', 'expiry') THEN -m.quantity
+        WHEN lower(m."movementType") = 'return' AND m."referenceType" = 'supplier_return' THEN -m.quantity
+        WHEN lower(m."movementType") = 'return' THEN m.quantity
+        WHEN lower(m."movementType") IN ('adjustment', 'cycle_count') THEN m.quantity
+        ELSE 0
+    END
+"""
+
+
+def upgrade() -> None:
+    if table_exists("stock_balances"):
+        return
+
+    op.create_table(
+        "stock_balances",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("locationId", sa.String(), nullable=False, server_default=""),
+        sa.Column("batchNumber", sa.String(), nullable=False, server_default=""),
+        sa.Column("expiryDate", sa.DateTime(), nullable=True),
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updatedAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_stock_balances_key",
+        "stock_balances",
+        ["tenant_id", "productId", "warehouseId", "locationId", "batchNumber"],
+        unique=True,
+    )
+    op.create_index("idx_stock_balances_tenant_warehouse", "stock_balances", ["tenant_id", "warehouseId"])
+    op.create_index("idx_stock_balances_tenant_expiry", "stock_balances", ["tenant_id", "expiryDate"])
+
+    # Backfill from the movement ledger. Product.stockQuantity is left as is;
+    # stock that predates the ledger shows up in the drift report and can be
+    # adopted with scripts/rebuild_stock_balances.py --post-opening.
+    op.execute(f"""
+        INSERT INTO stock_balances
+            (id, tenant_id, "productId", "warehouseId", "locationId", "batchNumber", "expiryDate", quantity, "updatedAt")
+        SELECT gen_random_uuid(), l.tenant_id, l.product_id, l.warehouse_id, l.location_id, l.batch_number,
+               l.expiry_date, l.quantity, now()
+        FROM (
+            SELECT
+                m.tenant_id,
+                p.id AS product_id,
+                m."warehouseId" AS warehouse_id,
+                COALESCE(m."locationId", '') AS location_id,
+                COALESCE(m."batchNumber", '') AS batch_number,
+                MIN(m."expiryDate") FILTER (WHERE ({SIGNED_QUANTITY_SQL}) > 0) AS expiry_date,
+                SUM({SIGNED_QUANTITY_SQL})::integer AS quantity
+            FROM stock_movements m
+            JOIN products p ON p.id::text = lower(m."productId") AND p.tenant_id = m.tenant_id
+            GROUP BY m.tenant_id, p.id, m."warehouseId", COALESCE(m."locationId", ''), COALESCE(m."batchNumber", '')
+        ) l
+        WHERE l.quantity <> 0
+    """)
+
+
+def downgrade() -> None:
+    if table_exists("stock_balances"):
+        op.drop_table("stock_balances")
@@ -0,0 +1,100 @@
+"""add pos sales rollups
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-20 09:00:00.000000
+
+Backfills hour and day rollups from the existing pos_transactions; from
+then on sales, voids and refunds keep them current.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "a9b0c1d2e3f4"
+down_revision: Union[str, None] = "f8a9b0c1d2e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("pos_sales_rollups"):
+        return
+
+    money = sa.Numeric(14, 2)
+    op.create_table(
+        "pos_sales_rollups",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("grain", sa.String(8), nullable=False),
+        sa.Column("bucketStart", sa.DateTime(), nullable=False),
+        sa.Column("shiftId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("cashierId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("paymentMethod", sa.String(), nullable=False),
+        sa.Column("transactionCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("salesTotal", money, nullable=False, server_default="0"),
+        sa.Column("discountTotal", money, nullable=False, server_default="0"),
+        sa.Column("taxTotal", money, nullable=False, server_default="0"),
+        sa.Column("refundCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refundTotal", money, nullable=False, server_default="0"),
+        sa.Column("voidCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("voidTotal", money, nullable=False, server_default="0"),
+        sa.Column("updatedAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["shiftId"], ["pos_shifts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_pos_sales_rollups_bucket",
+        "pos_sales_rollups",
+        ["tenant_id", "grain", "bucketStart", "shiftId", "cashierId", "paymentMethod"],
+        unique=True,
+    )
+    op.create_index("idx_pos_sales_rollups_tenant_shift", "pos_sales_rollups", ["tenant_id", "shiftId"])
+
+    op.execute(
+        """
+        INSERT INTO pos_sales_rollups (
+            id, tenant_id, grain, "bucketStart", "shiftId", "cashierId", "paymentMethod",
+            "transactionCount", "salesTotal", "discountTotal", "taxTotal",
+            "refundCount", "refundTotal", "voidCount", "voidTotal", "updatedAt"
+        )
+        SELECT gen_random_uuid(), tx.tenant_id, g.grain, date_trunc(g.grain, tx."createdAt"),
+               tx."shiftId", tx.cashier, tx."paymentMethod",
+               count(*) FILTER (WHERE tx.kind = 'sale'),
+               coalesce(sum(tx.total) FILTER (WHERE tx.kind = 'sale'), 0),
+               coalesce(sum(tx.discount) FILTER (WHERE tx.kind = 'sale'), 0),
+               coalesce(sum(tx.tax) FILTER (WHERE tx.kind = 'sale'), 0),
+               count(*) FILTER (WHERE tx.kind = 'refund'),
+               coalesce(sum(tx.total) FILTER (WHERE tx.kind = 'refund'), 0),
+               count(*) FILTER (WHERE tx.kind = 'void'),
+               coalesce(sum(tx.total) FILTER (WHERE tx.kind = 'void'), 0),
+               now() AT TIME ZONE 'utc'
+        FROM (
+            SELECT t.tenant_id, t."createdAt", t."shiftId", s."employeeId" AS cashier, t."paymentMethod",
+                   CASE
+                       WHEN t."paymentStatus" IN ('void', 'cancelled') THEN 'void'
+                       WHEN t."paymentStatus" = 'refunded' THEN 'refund'
+                       ELSE 'sale'
+                   END AS kind,
+                   CAST(t.total AS numeric(14, 2)) AS total,
+                   CAST(coalesce(t.discount, 0) AS numeric(14, 2)) AS discount,
+                   CAST(coalesce(t."taxAmount", 0) AS numeric(14, 2)) AS tax
+            FROM pos_transactions t
+            JOIN pos_shifts s ON s.id = t."shiftId"
+            WHERE t."createdAt" IS NOT NULL
+        ) tx
+        CROSS JOIN (VALUES ('hour'), ('day')) AS g(grain)
+        GROUP BY tx.tenant_id, g.grain, date_trunc(g.grain, tx."createdAt"), tx."shiftId", tx.cashier, tx."paymentMethod"
+        """
+    )
+
+
+def downgrade() -> None:
+    if table_exists("pos_sales_rollups"):
+        op.drop_table("pos_sales_rollups")
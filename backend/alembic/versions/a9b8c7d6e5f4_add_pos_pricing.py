@@ -0,0 +1,105 @@
+"""add pos price lists and promotions
+
+Revision ID: a9b8c7d6e5f4
+Revises: f7a8b9c0d1e3
+Create Date: 2026-10-22 09:00:00.000000
+
+Store- and customer-group price lists, promotions, and the record of the
+rules applied to each POS sale. Sales rung up before this revision have no
+appliedPromotions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import column_exists, safe_drop_column, table_exists
+
+
+revision: str = "a9b8c7d6e5f4"
+down_revision: Union[str, None] = "f7a8b9c0d1e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not table_exists("pos_price_lists"):
+        op.create_table(
+            "pos_price_lists",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("customerGroup", sa.String(64), nullable=True),
+            sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("startsAt", sa.DateTime(), nullable=True),
+            sa.Column("endsAt", sa.DateTime(), nullable=True),
+            sa.Column("isActive", sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.Column("createdAt", sa.DateTime(), nullable=True),
+            sa.Column("updatedAt", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("idx_pos_price_lists_tenant_active", "pos_price_lists", ["tenant_id", "isActive"])
+
+    if not table_exists("pos_price_list_items"):
+        op.create_table(
+            "pos_price_list_items",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("priceListId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("minQuantity", sa.Integer(), nullable=False, server_default="1"),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["priceListId"], ["pos_price_lists.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "uq_pos_price_list_items_entry",
+            "pos_price_list_items",
+            ["priceListId", "productId", "minQuantity"],
+            unique=True,
+        )
+        op.create_index("idx_pos_price_list_items_product", "pos_price_list_items", ["productId"])
+
+    if not table_exists("pos_promotions"):
+        op.create_table(
+            "pos_promotions",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("kind", sa.String(16), nullable=False),
+            sa.Column("value", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("buyQuantity", sa.Integer(), nullable=True),
+            sa.Column("getQuantity", sa.Integer(), nullable=True),
+            sa.Column("minQuantity", sa.Integer(), nullable=False, server_default="1"),
+            sa.Column("productIds", sa.JSON(), nullable=False),
+            sa.Column("categories", sa.JSON(), nullable=False),
+            sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("customerGroup", sa.String(64), nullable=True),
+            sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("stackable", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("startsAt", sa.DateTime(), nullable=True),
+            sa.Column("endsAt", sa.DateTime(), nullable=True),
+            sa.Column("isActive", sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.Column("createdAt", sa.DateTime(), nullable=True),
+            sa.Column("updatedAt", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("idx_pos_promotions_tenant_active", "pos_promotions", ["tenant_id", "isActive"])
+
+    if not column_exists("pos_transactions", "appliedPromotions"):
+        op.add_column("pos_transactions", sa.Column("appliedPromotions", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    safe_drop_column("pos_transactions", "appliedPromotions")
+    for table in ("pos_promotions", "pos_price_list_items", "pos_price_lists"):
+        if table_exists(table):
+            op.drop_table(table)
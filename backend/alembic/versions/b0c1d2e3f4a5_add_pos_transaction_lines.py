@@ -0,0 +1,66 @@
+"""add pos transaction lines
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-20 11:00:00.000000
+
+Lines of existing transactions are derived from their items JSON by
+scripts/backfill_pos_transaction_lines.py (batched, restartable), so the
+migration itself stays quick on large tables.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "b0c1d2e3f4a5"
+down_revision: Union[str, None] = "a9b0c1d2e3f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("pos_transaction_lines"):
+        return
+
+    op.create_table(
+        "pos_transaction_lines",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("transactionId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("lineNumber", sa.Integer(), nullable=False),
+        sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("productName", sa.String(), nullable=True),
+        sa.Column("sku", sa.String(), nullable=True),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unitPrice", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("discount", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("taxRate", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("lineTotal", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("unitCost", sa.Numeric(14, 4), nullable=True),
+        sa.Column("createdAt", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["transactionId"], ["pos_transactions.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_pos_transaction_lines_line", "pos_transaction_lines", ["transactionId", "lineNumber"], unique=True
+    )
+    op.create_index(
+        "idx_pos_transaction_lines_tenant_product_created",
+        "pos_transaction_lines",
+        ["tenant_id", "productId", "createdAt"],
+    )
+    op.create_index(
+        "idx_pos_transaction_lines_tenant_created", "pos_transaction_lines", ["tenant_id", "createdAt"]
+    )
+
+
+def downgrade() -> None:
+    if table_exists("pos_transaction_lines"):
+        op.drop_table("pos_transaction_lines")
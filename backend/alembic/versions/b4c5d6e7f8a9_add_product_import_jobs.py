@@ -0,0 +1,60 @@
+"""add product import jobs
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "b4c5d6e7f8a9"
+down_revision: Union[str, None] = "a3b4c5d6e7f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("product_import_jobs"):
+        return
+
+    op.create_table(
+        "product_import_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("createdBy", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("fileName", sa.String(), nullable=False),
+        sa.Column("filePath", sa.String(), nullable=False),
+        sa.Column("fileFormat", sa.String(8), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False, server_default="pending"),
+        sa.Column("totalRows", sa.Integer(), nullable=True),
+        sa.Column("processedRows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("createdCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updatedCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failedCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("movementCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("createdAt", sa.DateTime(), nullable=True),
+        sa.Column("updatedAt", sa.DateTime(), nullable=True),
+        sa.Column("finishedAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["createdBy"], ["users.id"]),
+        sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_product_import_jobs_tenant_created", "product_import_jobs", ["tenant_id", "createdAt"]
+    )
+
+
+def downgrade() -> None:
+    if table_exists("product_import_jobs"):
+        op.drop_table("product_import_jobs")
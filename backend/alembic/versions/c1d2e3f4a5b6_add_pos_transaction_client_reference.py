@@ -0,0 +1,39 @@
+"""add pos transaction client reference
+
+Revision ID: c1d2e3f4a5b6
+Revises: b0c1d2e3f4a5
+Create Date: 2026-10-20 14:00:00.000000
+
+Idempotency key chosen by the till, unique per tenant where present, so a
+retried or re-synced sale is recognised instead of written twice.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migration_utils import column_exists, index_exists, safe_drop_column, safe_drop_index
+
+
+revision: str = "c1d2e3f4a5b6"
+down_revision: Union[str, None] = "b0c1d2e3f4a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not column_exists("pos_transactions", "clientReference"):
+        op.add_column("pos_transactions", sa.Column("clientReference", sa.String(64), nullable=True))
+    if not index_exists("pos_transactions", "uq_pos_transactions_client_reference"):
+        op.create_index(
+            "uq_pos_transactions_client_reference",
+            "pos_transactions",
+            ["tenant_id", "clientReference"],
+            unique=True,
+            postgresql_where=sa.text('"clientReference" IS NOT NULL'),
+        )
+
+
+def downgrade() -> None:
+    safe_drop_index("uq_pos_transactions_client_reference", "pos_transactions")
+    safe_drop_column("pos_transactions", "clientReference")
@@ -0,0 +1,58 @@
+"""add pos receipt templates
+
+Revision ID: c4d5e6f7a8b2
+Revises: a9b8c7d6e5f4
+Create Date: 2026-10-23 09:00:00.000000
+
+Tenant receipt layouts. Tenants without a default template keep printing
+the built-in layout.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "c4d5e6f7a8b2"
+down_revision: Union[str, None] = "a9b8c7d6e5f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("pos_receipt_templates"):
+        return
+    op.create_table(
+        "pos_receipt_templates",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("paperWidth", sa.Integer(), nullable=False, server_default="80"),
+        sa.Column("header", sa.Text(), nullable=True),
+        sa.Column("footer", sa.Text(), nullable=True),
+        sa.Column("currency", sa.String(8), nullable=True),
+        sa.Column("showSku", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("showSavings", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("isDefault", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("createdAt", sa.DateTime(), nullable=True),
+        sa.Column("updatedAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_pos_receipt_templates_tenant", "pos_receipt_templates", ["tenant_id"])
+    op.create_index(
+        "uq_pos_receipt_templates_default",
+        "pos_receipt_templates",
+        ["tenant_id"],
+        unique=True,
+        postgresql_where=sa.text('"isDefault"'),
+    )
+
+
+def downgrade() -> None:
+    if table_exists("pos_receipt_templates"):
+        op.drop_table("pos_receipt_templates")
@@ -0,0 +1,52 @@
+"""add stock movement history indexes
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-19 20:00:00.000000
+
+Every filter of the movement history gets a (tenant_id, <filter>, createdAt,
+id) index so keyset pages are index range scans. The product index replaces
+idx_stock_movements_tenant_product, which is its prefix. Indexes are built
+and dropped CONCURRENTLY outside the migration transaction, so stock
+movements stay writable meanwhile.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migration_utils import safe_create_index, safe_drop_index
+
+
+revision: str = "c5d6e7f8a9b0"
+down_revision: Union[str, None] = "b4c5d6e7f8a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        safe_create_index(
+            "idx_stock_movements_tenant_product_created",
+            "stock_movements",
+            ["tenant_id", "product_uuid", "createdAt", "id"],
+            concurrently=True,
+        )
+        safe_create_index(
+            "idx_stock_movements_tenant_warehouse_created",
+            "stock_movements",
+            ["tenant_id", "warehouseId", "createdAt", "id"],
+            concurrently=True,
+        )
+        safe_drop_index("idx_stock_movements_tenant_product", "stock_movements", concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        safe_create_index(
+            "idx_stock_movements_tenant_product",
+            "stock_movements",
+            ["tenant_id", "product_uuid"],
+            concurrently=True,
+        )
+        safe_drop_index("idx_stock_movements_tenant_warehouse_created", "stock_movements", concurrently=True)
+        safe_drop_index("idx_stock_movements_tenant_product_created", "stock_movements", concurrently=True)
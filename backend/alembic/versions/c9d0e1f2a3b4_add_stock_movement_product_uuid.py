@@ -0,0 +1,64 @@
+"""add stock_movements.product_uuid and listing indexes
+
+Revision ID: c9d0e1f2a3b4
+Revises: a6b7c8d9e0f1
+Create Date: 2026-10-19 13:00:00.000000
+
+Only adds the nullable column and an unvalidated FK, then builds the
+indexes CONCURRENTLY outside the migration transaction, so stock movements
+stay writable while they build. Existing rows are resolved afterwards by
+scripts/backfill_stock_movement_products.py, which works in small committed
+batches and validates the FK at the end.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import column_exists, safe_create_index, safe_drop_index, safe_drop_column
+
+
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, None] = "a6b7c8d9e0f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not column_exists("stock_movements", "product_uuid"):
+        op.add_column("stock_movements", sa.Column("product_uuid", postgresql.UUID(as_uuid=True), nullable=True))
+        op.execute(
+            "ALTER TABLE stock_movements ADD CONSTRAINT fk_stock_movements_product_uuid "
+            "FOREIGN KEY (product_uuid) REFERENCES products (id) ON DELETE SET NULL NOT VALID"
+        )
+
+    with op.get_context().autocommit_block():
+        safe_create_index(
+            "idx_stock_movements_tenant_product",
+            "stock_movements",
+            ["tenant_id", "product_uuid"],
+            concurrently=True,
+        )
+        safe_create_index(
+            "idx_stock_movements_tenant_type_created",
+            "stock_movements",
+            ["tenant_id", "movementType", "createdAt", "id"],
+            concurrently=True,
+        )
+        safe_create_index(
+            "idx_stock_movements_tenant_reftype_created",
+            "stock_movements",
+            ["tenant_id", "referenceType", "createdAt", "id"],
+            concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        safe_drop_index("idx_stock_movements_tenant_reftype_created", "stock_movements", concurrently=True)
+        safe_drop_index("idx_stock_movements_tenant_type_created", "stock_movements", concurrently=True)
+        safe_drop_index("idx_stock_movements_tenant_product", "stock_movements", concurrently=True)
+    if column_exists("stock_movements", "product_uuid"):
+        op.execute("ALTER TABLE stock_movements DROP CONSTRAINT IF EXISTS fk_stock_movements_product_uuid")
+    safe_drop_column("stock_movements", "product_uuid")
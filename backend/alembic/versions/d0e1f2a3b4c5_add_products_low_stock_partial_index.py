@@ -0,0 +1,36 @@
+"""add partial index for low-stock products
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-19 15:00:00.000000
+
+Covers the dashboard's low-stock list and the low-stock product listing;
+only active products at or below their minimum level are indexed, so the
+index stays small however large the catalogue grows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migration_utils import index_exists, safe_drop_index
+
+
+revision: str = "d0e1f2a3b4c5"
+down_revision: Union[str, None] = "c9d0e1f2a3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not index_exists("products", "idx_products_tenant_low_stock"):
+        op.create_index(
+            "idx_products_tenant_low_stock",
+            "products",
+            ["tenant_id", "stockQuantity"],
+            postgresql_where=sa.text('"isActive" AND "stockQuantity" <= "minStockLevel"'),
+        )
+
+
+def downgrade() -> None:
+    safe_drop_index("idx_products_tenant_low_stock", "products")
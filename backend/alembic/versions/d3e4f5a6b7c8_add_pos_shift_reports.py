@@ -0,0 +1,63 @@
+"""add pos shift reports
+
+Revision ID: d3e4f5a6b7c8
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-20 16:00:00.000000
+
+Z-report snapshots written when a shift is closed. Shifts closed before
+this revision have none; their figures stay available from the sales
+rollups.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "d3e4f5a6b7c8"
+down_revision: Union[str, None] = "c1d2e3f4a5b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("pos_shift_reports"):
+        return
+
+    op.create_table(
+        "pos_shift_reports",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("shiftId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("shiftNumber", sa.String(), nullable=True),
+        sa.Column("cashierId", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("openedAt", sa.DateTime(), nullable=False),
+        sa.Column("closedAt", sa.DateTime(), nullable=False),
+        sa.Column("transactionCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("salesTotal", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("discountTotal", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("taxTotal", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("refundCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refundTotal", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("voidCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("voidTotal", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("openingCash", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("expectedCash", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("countedCash", sa.Numeric(14, 2), nullable=True),
+        sa.Column("cashDifference", sa.Numeric(14, 2), nullable=True),
+        sa.Column("paymentMethods", sa.JSON(), nullable=False),
+        sa.Column("createdAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["shiftId"], ["pos_shifts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("uq_pos_shift_reports_shift", "pos_shift_reports", ["shiftId"], unique=True)
+    op.create_index("idx_pos_shift_reports_tenant_closed", "pos_shift_reports", ["tenant_id", "closedAt"])
+
+
+def downgrade() -> None:
+    if table_exists("pos_shift_reports"):
+        op.drop_table("pos_shift_reports")
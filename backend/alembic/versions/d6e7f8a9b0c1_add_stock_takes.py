@@ -0,0 +1,79 @@
+"""add stock takes
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "d6e7f8a9b0c1"
+down_revision: Union[str, None] = "c5d6e7f8a9b0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not table_exists("stock_takes"):
+        op.create_table(
+            "stock_takes",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("reference", sa.String(), nullable=False),
+            sa.Column("status", sa.String(16), nullable=False, server_default="open"),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("lineCount", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("countedCount", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("varianceCount", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("varianceValue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("uploadBatches", sa.JSON(), nullable=True),
+            sa.Column("createdBy", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("postedBy", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("createdAt", sa.DateTime(), nullable=True),
+            sa.Column("updatedAt", sa.DateTime(), nullable=True),
+            sa.Column("postedAt", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"]),
+            sa.ForeignKeyConstraint(["createdBy"], ["users.id"]),
+            sa.ForeignKeyConstraint(["postedBy"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("idx_stock_takes_tenant_created", "stock_takes", ["tenant_id", "createdAt"])
+
+    if not table_exists("stock_take_lines"):
+        op.create_table(
+            "stock_take_lines",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("stockTakeId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("expectedQuantity", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("countedQuantity", sa.Integer(), nullable=True),
+            sa.Column("unitCost", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("countedBy", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("countedAt", sa.DateTime(), nullable=True),
+            sa.Column("movementId", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["stockTakeId"], ["stock_takes.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["countedBy"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "uq_stock_take_lines_product", "stock_take_lines", ["stockTakeId", "productId"], unique=True
+        )
+
+
+def downgrade() -> None:
+    if table_exists("stock_take_lines"):
+        op.drop_table("stock_take_lines")
+    if table_exists("stock_takes"):
+        op.drop_table("stock_takes")
@@ -0,0 +1,41 @@
+"""add document_sequences
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-19 16:00:00.000000
+
+Rows are created lazily on the first allocation of each period and seeded
+from the numbers already issued, so no backfill is needed here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, None] = "d0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not table_exists("document_sequences"):
+        op.create_table(
+            "document_sequences",
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("document_type", sa.String(length=32), nullable=False),
+            sa.Column("period_key", sa.String(length=16), nullable=False, server_default=""),
+            sa.Column("last_value", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("template", sa.String(length=64), nullable=True),
+            sa.Column("updatedAt", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("tenant_id", "document_type", "period_key"),
+        )
+
+
+def downgrade() -> None:
+    if table_exists("document_sequences"):
+        op.drop_table("document_sequences")
@@ -0,0 +1,63 @@
+"""add product codes
+
+Revision ID: e5f6a7b8c9d1
+Revises: d3e4f5a6b7c8
+Create Date: 2026-10-21 09:00:00.000000
+
+Alternate scan codes of products and the stored outcome of external barcode
+lookups, one row per (tenant, code).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "e5f6a7b8c9d1"
+down_revision: Union[str, None] = "d3e4f5a6b7c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists("product_codes"):
+        return
+
+    op.create_table(
+        "product_codes",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("code", sa.String(128), nullable=False),
+        sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(16), nullable=False, server_default="alternate"),
+        sa.Column("source", sa.String(32), nullable=True),
+        sa.Column("suggested", sa.JSON(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("retryAfter", sa.DateTime(), nullable=True),
+        sa.Column("createdAt", sa.DateTime(), nullable=True),
+        sa.Column("updatedAt", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("uq_product_codes_tenant_code", "product_codes", ["tenant_id", "code"], unique=True)
+    op.create_index(
+        "idx_product_codes_product",
+        "product_codes",
+        ["productId"],
+        postgresql_where=sa.text('"productId" IS NOT NULL'),
+    )
+    op.create_index(
+        "idx_product_codes_pending",
+        "product_codes",
+        ["tenant_id", "createdAt"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    if table_exists("product_codes"):
+        op.drop_table("product_codes")
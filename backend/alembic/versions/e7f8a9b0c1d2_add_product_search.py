@@ -0,0 +1,129 @@
+"""add product search document and indexes
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-19 22:00:00.000000
+
+products."searchDocument" is kept current by triggers on products and
+suppliers; existing rows are filled here in id-ordered batches, each
+committed on its own, before the GIN indexes are built concurrently.
+Needs the pg_trgm extension (part of contrib).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migration_utils import column_exists, safe_create_index, safe_drop_index, safe_drop_column
+
+
+revision: str = "e7f8a9b0c1d2"
+down_revision: Union[str, None] = "d6e7f8a9b0c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    if not column_exists("products", "searchDocument"):
+        op.add_column("products", sa.Column("searchDocument", sa.Text(), nullable=True))
+
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION product_search_document(
+            p_name text, p_sku text, p_barcode text, p_brand text, p_category text, p_type text, p_supplier uuid
+        ) RETURNS text LANGUAGE sql STABLE AS $$
+            SELECT lower(btrim(regexp_replace(
+                concat_ws(' ', p_name, p_sku, p_barcode, p_brand, p_category, p_type,
+                          (SELECT s.name FROM suppliers s WHERE s.id = p_supplier)),
+                '\s+', ' ', 'g'
+            )))
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION products_search_document_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW."searchDocument" := product_search_document(
+                NEW.name, NEW.sku, NEW.barcode, NEW.brand, NEW.category, NEW."productType", NEW."supplierId"
+            );
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION suppliers_search_document_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NEW.name IS DISTINCT FROM OLD.name THEN
+                UPDATE products
+                SET "searchDocument" = product_search_document(
+                    name, sku, barcode, brand, category, "productType", "supplierId"
+                )
+                WHERE "supplierId" = NEW.id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("DROP TRIGGER IF EXISTS products_search_document ON products")
+    op.execute("""
+        CREATE TRIGGER products_search_document
+        BEFORE INSERT OR UPDATE OF name, sku, barcode, brand, category, "productType", "supplierId" ON products
+        FOR EACH ROW EXECUTE FUNCTION products_search_document_trigger()
+    """)
+    op.execute("DROP TRIGGER IF EXISTS suppliers_search_document ON suppliers")
+    op.execute("""
+        CREATE TRIGGER suppliers_search_document
+        AFTER UPDATE OF name ON suppliers
+        FOR EACH ROW EXECUTE FUNCTION suppliers_search_document_trigger()
+    """)
+
+    # Backfill and index outside the migration transaction: each batch
+    # commits on its own and the indexes are built CONCURRENTLY, so the
+    # catalogue stays writable. Rows written meanwhile are kept current by
+    # the triggers above.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        after = "00000000-0000-0000-0000-000000000000"
+        while True:
+            after = bind.execute(
+                sa.text("""
+                    WITH batch AS (
+                        SELECT id FROM products WHERE id > CAST(:after AS uuid) ORDER BY id LIMIT :size
+                    ), updated AS (
+                        UPDATE products p
+                        SET "searchDocument" = product_search_document(
+                            p.name, p.sku, p.barcode, p.brand, p.category, p."productType", p."supplierId"
+                        )
+                        FROM batch
+                        WHERE p.id = batch.id
+                    )
+                    SELECT CAST(id AS text) FROM batch ORDER BY id DESC LIMIT 1
+                """),
+                {"after": after, "size": BACKFILL_BATCH_SIZE},
+            ).scalar()
+            if after is None:
+                break
+
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_search_trgm
+            ON products USING gin ("searchDocument" gin_trgm_ops)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_search_tsv
+            ON products USING gin (to_tsvector('simple', coalesce("searchDocument", '')))
+        """)
+        safe_create_index("idx_products_tenant_barcode", "products", ["tenant_id", "barcode"], concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        safe_drop_index("idx_products_tenant_barcode", "products", concurrently=True)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_products_search_tsv")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_products_search_trgm")
+    op.execute("DROP TRIGGER IF EXISTS suppliers_search_document ON suppliers")
+    op.execute("DROP TRIGGER IF EXISTS products_search_document ON products")
+    op.execute("DROP FUNCTION IF EXISTS suppliers_search_document_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS products_search_document_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS product_search_document(text, text, text, text, text, text, uuid)")
+    safe_drop_column("products", "searchDocument")
@@ -0,0 +1,126 @@
+"""add FIFO cost layers and stock valuations
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-19 17:00:00.000000
+
+The tables start empty; run scripts/rebuild_stock_valuation.py per tenant
+to derive layers and values from the existing movement ledger.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import column_exists, index_exists, safe_drop_column, safe_drop_index, table_exists
+
+
+revision: str = "f2a3b4c5d6e7"
+down_revision: Union[str, None] = "e1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for column in ("fifoValue", "averageValue"):
+        if not column_exists("stock_movements", column):
+            op.add_column("stock_movements", sa.Column(column, sa.Float(), nullable=True))
+    if not index_exists("stock_movements", "idx_stock_movements_tenant_created"):
+        op.create_index(
+            "idx_stock_movements_tenant_created", "stock_movements", ["tenant_id", "createdAt", "id"]
+        )
+
+    if not table_exists("stock_cost_layers"):
+        op.create_table(
+            "stock_cost_layers",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("movementId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("receivedAt", sa.DateTime(), nullable=False),
+            sa.Column("originalQuantity", sa.Integer(), nullable=False),
+            sa.Column("remainingQuantity", sa.Integer(), nullable=False),
+            sa.Column("unitCost", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "idx_stock_cost_layers_open",
+            "stock_cost_layers",
+            ["tenant_id", "productId", "warehouseId", "receivedAt", "id"],
+            postgresql_where=sa.text('"remainingQuantity" > 0'),
+        )
+        op.create_index("idx_stock_cost_layers_movement", "stock_cost_layers", ["movementId"])
+
+    if not table_exists("stock_cost_consumptions"):
+        op.create_table(
+            "stock_cost_consumptions",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("movementId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("layerId", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("unitCost", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["layerId"], ["stock_cost_layers.id"], ondelete="SET NULL"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("idx_stock_cost_consumptions_movement", "stock_cost_consumptions", ["movementId"])
+
+    if not table_exists("stock_valuations"):
+        op.create_table(
+            "stock_valuations",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("averageCost", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("averageValue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("fifoValue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("updatedAt", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "uq_stock_valuations_key", "stock_valuations", ["tenant_id", "productId", "warehouseId"], unique=True
+        )
+
+    if not table_exists("stock_valuation_snapshots"):
+        op.create_table(
+            "stock_valuation_snapshots",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("productId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("warehouseId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("snapshotDate", sa.Date(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("fifoValue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("averageValue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("createdAt", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["productId"], ["products.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["warehouseId"], ["warehouses.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "uq_stock_valuation_snapshots_key",
+            "stock_valuation_snapshots",
+            ["tenant_id", "snapshotDate", "productId", "warehouseId"],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    for table in ("stock_valuation_snapshots", "stock_valuations", "stock_cost_consumptions", "stock_cost_layers"):
+        if table_exists(table):
+            op.drop_table(table)
+    safe_drop_index("idx_stock_movements_tenant_created", "stock_movements")
+    for column in ("averageValue", "fifoValue"):
+        safe_drop_column("stock_movements", column)
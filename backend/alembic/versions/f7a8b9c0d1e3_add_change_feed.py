@@ -0,0 +1,100 @@
+"""add change feed for pos transactions, invoices and payments
+
+Revision ID: f7a8b9c0d1e3
+Revises: e5f6a7b8c9d1
+Create Date: 2026-10-21 12:00:00.000000
+
+Every insert or update of an exported row stamps "changeTxid" with the
+writing transaction's id (and "updatedAt" from the database clock), so the
+(changeTxid, id) export cursor moves forward whatever code path wrote the
+row, and deletes leave a change_feed_tombstones row. Existing rows start at
+changeTxid 0. Rows without "updatedAt" are filled from "createdAt" before
+the triggers exist, so their times are kept.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import column_exists, safe_create_index, safe_drop_column, safe_drop_index, table_exists
+
+
+revision: str = "f7a8b9c0d1e3"
+down_revision: Union[str, None] = "e5f6a7b8c9d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FEED_TABLES = ("pos_transactions", "invoices", "payments")
+
+
+def upgrade() -> None:
+    if not table_exists("change_feed_tombstones"):
+        op.create_table(
+            "change_feed_tombstones",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("entity", sa.String(32), nullable=False),
+            sa.Column("recordId", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("deletedAt", sa.DateTime(), nullable=False),
+            sa.Column("changeTxid", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "idx_change_feed_tombstones_feed",
+            "change_feed_tombstones",
+            ["tenant_id", "entity", "changeTxid", "recordId"],
+        )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION change_feed_touch() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW."updatedAt" := clock_timestamp() AT TIME ZONE 'utc';
+            NEW."changeTxid" := txid_current();
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION change_feed_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO change_feed_tombstones (id, tenant_id, entity, "recordId", "deletedAt", "changeTxid")
+            VALUES (gen_random_uuid(), OLD.tenant_id, TG_TABLE_NAME, OLD.id,
+                    clock_timestamp() AT TIME ZONE 'utc', txid_current());
+            RETURN OLD;
+        END
+        $$
+    """)
+
+    for table in FEED_TABLES:
+        op.execute(f"""
+            UPDATE {table} SET "updatedAt" = coalesce("createdAt", now() AT TIME ZONE 'utc')
+            WHERE "updatedAt" IS NULL
+        """)
+        if not column_exists(table, "changeTxid"):
+            op.add_column(table, sa.Column("changeTxid", sa.BigInteger(), nullable=False, server_default="0"))
+        safe_create_index(f"idx_{table}_change_feed", table, ["tenant_id", "changeTxid", "id"])
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_feed_touch ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_feed_touch
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION change_feed_touch()
+        """)
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_feed_tombstone ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_feed_tombstone
+            AFTER DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION change_feed_tombstone()
+        """)
+
+
+def downgrade() -> None:
+    for table in FEED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_feed_tombstone ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_feed_touch ON {table}")
+        safe_drop_index(f"idx_{table}_change_feed", table)
+        safe_drop_column(table, "changeTxid")
+    op.execute("DROP FUNCTION IF EXISTS change_feed_tombstone()")
+    op.execute("DROP FUNCTION IF EXISTS change_feed_touch()")
+    if table_exists("change_feed_tombstones"):
+        op.drop_table("change_feed_tombstones")
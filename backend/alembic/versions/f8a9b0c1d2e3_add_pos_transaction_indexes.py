@@ -0,0 +1,48 @@
+"""add pos transaction listing indexes
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-19 23:00:00.000000
+
+The transaction list filters and keyset-pages in SQL; these indexes serve
+the newest-first page, the per-shift lookup and the payment method filter.
+They are built CONCURRENTLY outside the migration transaction, so sales
+can still be rung up while they build.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migration_utils import safe_create_index, safe_drop_index
+
+
+revision: str = "f8a9b0c1d2e3"
+down_revision: Union[str, None] = "e7f8a9b0c1d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        safe_create_index(
+            "idx_pos_transactions_tenant_created",
+            "pos_transactions",
+            ["tenant_id", "createdAt", "id"],
+            concurrently=True,
+        )
+        safe_create_index(
+            "idx_pos_transactions_tenant_shift", "pos_transactions", ["tenant_id", "shiftId"], concurrently=True
+        )
+        safe_create_index(
+            "idx_pos_transactions_tenant_payment_created",
+            "pos_transactions",
+            ["tenant_id", "paymentMethod", "createdAt"],
+            concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        safe_drop_index("idx_pos_transactions_tenant_payment_created", "pos_transactions", concurrently=True)
+        safe_drop_index("idx_pos_transactions_tenant_shift", "pos_transactions", concurrently=True)
+        safe_drop_index("idx_pos_transactions_tenant_created", "pos_transactions", concurrently=True)
@@ -0,0 +1,121 @@
+"""add bank account opening_balance and running-balance order indexes
+
+Revision ID: x3y4z5a6b7c8
+Revises: b7c8d9e0f1a2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migration_utils import column_exists, safe_create_index, safe_drop_index, safe_drop_column
+
+
+revision: str = "x3y4z5a6b7c8"
+down_revision: Union[str, None] = "b7c8d9e0f1a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BANK_DELTA_SQL = """
+    CASE
+        WHEN lower(t.transaction_type) IN ('deposit', 'transfer_in', 'refund', 'interest') THEN t.base_amount
+        WHEN lower(t.transaction_type) IN ('withdrawal', 'transfer_out', 'payment', 'fee') THEN -t.base_amount
+        WHEN lower(t.transaction_type) = 'adjustment' THEN t.amount * COALESCE(t.exchange_rate, 1.0)
+        ELSE t.base_amount
+    END
+"""
+
+TILL_DELTA_SQL = """
+    CASE WHEN lower(t.transaction_type::text) = 'withdrawal' THEN -t.amount ELSE t.amount END
+"""
+
+
+def upgrade() -> None:
+    if not column_exists("bank_accounts", "opening_balance"):
+        op.add_column(
+            "bank_accounts",
+            sa.Column("opening_balance", sa.Float(), server_default="0", nullable=True),
+        )
+
+        # The first posted row was written as opening + delta, so the opening
+        # balance is recovered from it; accounts without rows keep their
+        # entered balance.
+        op.execute("UPDATE bank_accounts SET opening_balance = COALESCE(current_balance, 0)")
+        op.execute(
+            f"""
+            UPDATE bank_accounts a
+            SET opening_balance = f.running_balance - f.delta
+            FROM (
+                SELECT DISTINCT ON (t.bank_account_id)
+                    t.bank_account_id, t.running_balance, {BANK_DELTA_SQL} AS delta
+                FROM bank_transactions t
+                ORDER BY t.bank_account_id, t.transaction_date, t.created_at, t.id
+            ) f
+            WHERE f.bank_account_id = a.id
+            """
+        )
+
+    safe_create_index(
+        "idx_bank_transactions_account_order",
+        "bank_transactions",
+        ["bank_account_id", "transaction_date", "created_at"],
+    )
+    safe_create_index(
+        "idx_till_transactions_till_order",
+        "till_transactions",
+        ["till_id", "transaction_date", "created_at"],
+    )
+
+    op.execute(
+        f"""
+        UPDATE bank_transactions x
+        SET running_balance = w.balance
+        FROM (
+            SELECT t.id, a.opening_balance + SUM({BANK_DELTA_SQL}) OVER (
+                PARTITION BY t.bank_account_id ORDER BY t.transaction_date, t.created_at, t.id
+            ) AS balance
+            FROM bank_transactions t
+            JOIN bank_accounts a ON a.id = t.bank_account_id
+        ) w
+        WHERE x.id = w.id AND x.running_balance IS DISTINCT FROM w.balance
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE bank_accounts a
+        SET current_balance = a.opening_balance + COALESCE(
+            (SELECT SUM({BANK_DELTA_SQL}) FROM bank_transactions t WHERE t.bank_account_id = a.id), 0
+        )
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE till_transactions x
+        SET running_balance = w.balance
+        FROM (
+            SELECT t.id, COALESCE(l.initial_balance, 0) + SUM({TILL_DELTA_SQL}) OVER (
+                PARTITION BY t.till_id ORDER BY t.transaction_date, t.created_at, t.id
+            ) AS balance
+            FROM till_transactions t
+            JOIN tills l ON l.id = t.till_id
+        ) w
+        WHERE x.id = w.id AND x.running_balance IS DISTINCT FROM w.balance
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE tills l
+        SET current_balance = COALESCE(l.initial_balance, 0) + COALESCE(
+            (SELECT SUM({TILL_DELTA_SQL}) FROM till_transactions t WHERE t.till_id = l.id), 0
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    safe_drop_index("idx_till_transactions_till_order", "till_transactions")
+    safe_drop_index("idx_bank_transactions_account_order", "bank_transactions")
+    safe_drop_column("bank_accounts", "opening_balance")
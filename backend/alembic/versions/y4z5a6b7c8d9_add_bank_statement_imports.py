@@ -0,0 +1,95 @@
+"""add bank statement imports and lines
+
+Revision ID: y4z5a6b7c8d9
+Revises: x3y4z5a6b7c8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists
+
+
+revision: str = "y4z5a6b7c8d9"
+down_revision: Union[str, None] = "x3y4z5a6b7c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not table_exists("bank_statement_imports"):
+        op.create_table(
+            "bank_statement_imports",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("bank_account_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("file_name", sa.String(), nullable=True),
+            sa.Column("file_format", sa.String(length=16), nullable=False),
+            sa.Column("period_start", sa.DateTime(), nullable=True),
+            sa.Column("period_end", sa.DateTime(), nullable=True),
+            sa.Column("total_lines", sa.Integer(), nullable=True),
+            sa.Column("matched_count", sa.Integer(), nullable=True),
+            sa.Column("review_count", sa.Integer(), nullable=True),
+            sa.Column("unmatched_count", sa.Integer(), nullable=True),
+            sa.Column("imported_by", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["bank_account_id"], ["bank_accounts.id"]),
+            sa.ForeignKeyConstraint(["imported_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_bank_statement_imports_id", "bank_statement_imports", ["id"])
+        op.create_index(
+            "idx_bank_statement_imports_tenant_account",
+            "bank_statement_imports",
+            ["tenant_id", "bank_account_id"],
+        )
+
+    if not table_exists("bank_statement_lines"):
+        op.create_table(
+            "bank_statement_lines",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("import_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("bank_account_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("line_number", sa.Integer(), nullable=False),
+            sa.Column("transaction_date", sa.DateTime(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("reference", sa.String(), nullable=True),
+            sa.Column("payee", sa.String(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("external_id", sa.String(), nullable=True),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("match_score", sa.Float(), nullable=True),
+            sa.Column("matched_transaction_id", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("resolved_by", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("resolved_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.ForeignKeyConstraint(["import_id"], ["bank_statement_imports.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["bank_account_id"], ["bank_accounts.id"]),
+            sa.ForeignKeyConstraint(["matched_transaction_id"], ["bank_transactions.id"], ondelete="SET NULL"),
+            sa.ForeignKeyConstraint(["resolved_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_bank_statement_lines_id", "bank_statement_lines", ["id"])
+        op.create_index(
+            "idx_bank_statement_lines_import_status",
+            "bank_statement_lines",
+            ["import_id", "status"],
+        )
+        op.create_index(
+            "idx_bank_statement_lines_tenant_account_status",
+            "bank_statement_lines",
+            ["tenant_id", "bank_account_id", "status"],
+        )
+
+
+def downgrade() -> None:
+    if table_exists("bank_statement_lines"):
+        op.drop_table("bank_statement_lines")
+    if table_exists("bank_statement_imports"):
+        op.drop_table("bank_statement_imports")
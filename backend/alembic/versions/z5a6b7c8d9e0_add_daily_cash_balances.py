@@ -0,0 +1,76 @@
+"""add daily cash balance rollups
+
+Revision ID: z5a6b7c8d9e0
+Revises: y4z5a6b7c8d9
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_utils import table_exists, safe_create_index, safe_drop_index
+
+
+revision: str = "z5a6b7c8d9e0"
+down_revision: Union[str, None] = "y4z5a6b7c8d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not table_exists("daily_cash_balances"):
+        op.create_table(
+            "daily_cash_balances",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("source_type", sa.String(length=16), nullable=False),
+            sa.Column("source_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("position_date", sa.Date(), nullable=False),
+            sa.Column("opening_balance", sa.Float(), nullable=False),
+            sa.Column("inflow", sa.Float(), nullable=False),
+            sa.Column("outflow", sa.Float(), nullable=False),
+            sa.Column("closing_balance", sa.Float(), nullable=False),
+            sa.Column("transaction_count", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "uq_daily_cash_balances_source_date",
+            "daily_cash_balances",
+            ["tenant_id", "source_type", "source_id", "position_date"],
+            unique=True,
+        )
+        op.create_index(
+            "idx_daily_cash_balances_tenant_date",
+            "daily_cash_balances",
+            ["tenant_id", "position_date"],
+        )
+
+    if not table_exists("cash_rollup_state"):
+        op.create_table(
+            "cash_rollup_state",
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("source_type", sa.String(length=16), nullable=False),
+            sa.Column("source_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("high_water_mark", sa.DateTime(), nullable=True),
+            sa.Column("dirty_from", sa.Date(), nullable=True),
+            sa.Column("last_run_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.PrimaryKeyConstraint("tenant_id", "source_type", "source_id"),
+        )
+
+    safe_create_index("idx_bank_transactions_tenant_updated", "bank_transactions", ["tenant_id", "updated_at"])
+    safe_create_index("idx_till_transactions_tenant_updated", "till_transactions", ["tenant_id", "updated_at"])
+
+
+def downgrade() -> None:
+    safe_drop_index("idx_till_transactions_tenant_updated", "till_transactions")
+    safe_drop_index("idx_bank_transactions_tenant_updated", "bank_transactions")
+    if table_exists("cash_rollup_state"):
+        op.drop_table("cash_rollup_state")
+    if table_exists("daily_cash_balances"):
+        op.drop_table("daily_cash_balances")
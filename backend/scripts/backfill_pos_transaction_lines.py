@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Derive pos_transaction_lines for existing POS transactions from their items JSON.
+
+Runs in batches, committing after each; safe to stop and re-run (transactions
+that already have lines are skipped). Costs are the products' current cost
+prices, as the historical cost of those sales is not recorded. Stock is not
+touched.
+
+    DATABASE_URL=... python scripts/backfill_pos_transaction_lines.py [--tenant-id <uuid>] [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from src.config.database import SessionLocal
+from src.api.v1.pos.transaction_lines import BACKFILL_BATCH_SIZE, backfill_transaction_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill POS transaction lines")
+    parser.add_argument("--tenant-id", help="Only this tenant")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Transactions per batch")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    transactions = lines = 0
+    try:
+        for batch in backfill_transaction_lines(db, tenant_id=args.tenant_id, batch_size=args.batch_size):
+            transactions += batch["transactions"]
+            lines += batch["lines"]
+            print(f"  {transactions} transactions, {lines} lines")
+    finally:
+        db.close()
+    print(f"Done: {transactions} transactions, {lines} lines in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Resolve legacy stock_movements.productId (UUID or SKU) into product_uuid.
+
+Walks the table in primary-key order, a small batch per transaction, so no
+lock is held for long and the app keeps writing meanwhile. Rows whose
+product cannot be found stay NULL and are reported. Safe to re-run; when
+nothing is left to resolve the product FK is validated.
+
+    DATABASE_URL=... python scripts/backfill_stock_movement_products.py --batch-size 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+
+UUID_PATTERN = "^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$"
+
+NEXT_BATCH_SQL = text("""
+    SELECT id FROM stock_movements
+    WHERE product_uuid IS NULL AND (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+    ORDER BY id
+    LIMIT :batch_size
+""")
+
+RESOLVE_BATCH_SQL = text("""
+    UPDATE stock_movements m
+    SET product_uuid = COALESCE(
+        (
+            SELECT p.id FROM products p
+            WHERE p.tenant_id = m.tenant_id
+              AND p.id = CASE WHEN m."productId" ~* :uuid_pattern THEN CAST(m."productId" AS uuid) END
+        ),
+        (
+            SELECT p.id FROM products p
+            WHERE p.tenant_id = m.tenant_id AND p.sku = m."productId"
+            ORDER BY p."createdAt"
+            LIMIT 1
+        )
+    )
+    WHERE m.id = ANY(CAST(:ids AS uuid[])) AND m.product_uuid IS NULL
+""")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill stock_movements.product_uuid")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    after = None
+    scanned = 0
+    resolved = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            ids = [str(row[0]) for row in db.execute(
+                NEXT_BATCH_SQL, {"after": after, "batch_size": args.batch_size}
+            ).fetchall()]
+            if not ids:
+                break
+            result = db.execute(RESOLVE_BATCH_SQL, {"ids": ids, "uuid_pattern": UUID_PATTERN})
+            db.commit()
+            scanned += len(ids)
+            resolved += int(result.rowcount or 0)
+            after = ids[-1]
+            print(f"scanned {scanned}, resolved {resolved}")
+            if args.pause:
+                time.sleep(args.pause)
+
+        unresolved = db.execute(text("SELECT count(*) FROM stock_movements WHERE product_uuid IS NULL")).scalar()
+        elapsed = time.perf_counter() - started
+        print(f"done in {elapsed:.1f}s: {resolved} resolved, {unresolved} without a matching product")
+
+        # Unresolvable rows are NULL and do not block validation
+        db.execute(text("ALTER TABLE stock_movements VALIDATE CONSTRAINT fk_stock_movements_product_uuid"))
+        db.commit()
+        print("fk_stock_movements_product_uuid validated")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark for invoice PDF rendering, before and after render caching.
+
+Renders --renders synthetic invoices of --items lines each, three ways:
+
+- before: per render, colours and ParagraphStyles are rebuilt and the logo
+  is downloaded, resized with PIL and written to a temp file, as
+  generate_modern_invoice_pdf used to;
+- after, cold: the tenant's cached RenderContext and the stored logo are
+  reused, the PDF itself is laid out;
+- after, warm: invoices still in the PDF cache, rendered again.
+
+The logo is served from a local HTTP server, so the download is a loopback
+round trip; against S3 the "before" numbers are worse. The three tenant
+queries generate_modern_invoice_pdf used to run per render are not counted,
+as no database is needed.
+
+    python scripts/bench_invoice_pdf.py --renders 200 --items 15
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from types import SimpleNamespace
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+os.environ.setdefault("ASSET_CACHE_DIR", tempfile.mkdtemp(prefix="bench-assets-"))
+
+import requests
+from PIL import Image as PILImage
+
+from src.api.v1 import pdf_generator_modern
+from src.services.asset_store import StoredImage, get_image
+from src.services.invoice_rendering import PDF_CACHE_SIZE, RenderContext, build_render_context, cached_invoice_pdf
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_logo(directory):
+    image = PILImage.new("RGB", (1200, 600), (30, 64, 175))
+    image.save(os.path.join(directory, "logo.png"), format="PNG")
+    server = HTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/logo.png"
+
+
+def legacy_load_company_logo(logo_url):
+    response = requests.get(logo_url, timeout=10)
+    response.raise_for_status()
+    pil_img = PILImage.open(io.BytesIO(response.content))
+    pil_img.thumbnail((200, 100), PILImage.Resampling.LANCZOS)
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_file:
+        pil_img.save(tmp_file.name, format="PNG")
+        return StoredImage(tmp_file.name, min(pil_img.width, 200), min(pil_img.height, 100))
+
+
+def make_customization(logo_url):
+    return {
+        "company_name": "Corner Garage Ltd",
+        "company_logo_url": logo_url,
+        "company_address": "12 High Street\nSpringfield",
+        "company_phone": "+44 20 7946 0000",
+        "company_email": "accounts@example.com",
+        "company_website": "example.com",
+        "bank_sort_code": "12-34-56",
+        "bank_account_number": "12345678",
+        "payment_instructions": "Bank transfer within 30 days",
+        "primary_color": "#1e40af",
+        "secondary_color": "#6b7280",
+        "accent_color": "#f3f4f6",
+        "show_vehicle_info": True,
+        "show_parts_section": True,
+        "show_labour_section": True,
+        "show_comments_section": True,
+        "footer_text": None,
+        "show_contact_info_in_footer": True,
+        "footer_background_color": "#1e3a8a",
+        "grid_color": "#cccccc",
+        "thank_you_message": "Thank you for your business!",
+        "enquiry_message": "Should you have any enquiries concerning this invoice,",
+        "contact_message": "please contact us at your convenience.",
+        "default_payment_instructions": "Make all payments to your company name",
+        "default_currency": "GBP",
+    }
+
+
+def make_invoice(number, item_count, tenant_id):
+    issued = datetime(2026, 1, 5) + timedelta(days=number % 300)
+    items = [
+        {
+            "description": f"Part {random.randint(1, 5000)} fitted",
+            "productSku": f"SKU-{random.randint(1, 99999):05d}",
+            "quantity": random.randint(1, 4),
+            "salePrice": round(random.uniform(5, 250), 2),
+            "discount": random.choice((0, 0, 5, 10)),
+        }
+        for _ in range(item_count)
+    ]
+    subtotal = round(sum(i["quantity"] * i["salePrice"] * (1 - i["discount"] / 100) for i in items), 2)
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        tenant_id=tenant_id,
+        updatedAt=issued,
+        invoiceNumber=f"INV-{number:06d}",
+        issueDate=issued,
+        dueDate=issued + timedelta(days=30),
+        orderNumber=None,
+        orderTime=None,
+        customerName="Jane Smith",
+        customerEmail="jane@example.com",
+        customerPhone="07700 900000",
+        billingAddress="1 Station Road",
+        customerCity="Springfield",
+        customerState=None,
+        customerPostalCode="SP1 1AA",
+        customerCountry="UK",
+        vehicleReg="AB12 CDE",
+        items=items,
+        terms="Payment due within 30 days.",
+        subtotal=subtotal,
+        labourCost=0.0,
+        vatRate=0.2,
+        taxAmount=round(subtotal * 0.2, 2),
+        total=round(subtotal * 1.2, 2),
+    )
+
+
+def rate(count, seconds):
+    return f"{count / seconds:8.1f} renders/s  ({seconds / count * 1000:6.2f} ms each)"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--items", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    customization = make_customization(serve_logo(tempfile.mkdtemp(prefix="bench-logo-")))
+    tenant_id = uuid.uuid4()
+    invoices = [make_invoice(i, args.items, tenant_id) for i in range(args.renders)]
+
+    started = time.perf_counter()
+    for invoice in invoices:
+        colors = pdf_generator_modern.get_customization_colors(customization)
+        context = RenderContext(
+            (None, None), 0.0, customization, None, colors,
+            pdf_generator_modern.create_styles(colors), customization["default_currency"],
+            legacy_load_company_logo(customization["company_logo_url"]),
+        )
+        pdf_generator_modern.render_invoice_pdf(invoice, context)
+    before = time.perf_counter() - started
+
+    context = build_render_context(customization, logo=get_image(customization["company_logo_url"]))
+    started = time.perf_counter()
+    for invoice in invoices:
+        cached_invoice_pdf(invoice, context, pdf_generator_modern.render_invoice_pdf)
+    cold = time.perf_counter() - started
+
+    warm_invoices = invoices[-PDF_CACHE_SIZE:]  # the ones still in the cache
+    started = time.perf_counter()
+    for invoice in warm_invoices:
+        cached_invoice_pdf(invoice, context, pdf_generator_modern.render_invoice_pdf)
+    warm = time.perf_counter() - started
+
+    print(f"before:       {rate(args.renders, before)}")
+    print(f"after, cold:  {rate(args.renders, cold)}")
+    print(f"after, cache: {rate(len(warm_invoices), warm)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the POS pricing engine.
+
+Compiles --rules active rules over a catalogue of --products products and
+prices --baskets baskets of --lines lines, reporting compile time and
+latency percentiles per basket. Rules are a mix like a real chain's:
+
+- price list entries, chain-wide or for one store, some for a customer
+  group, some tiered by quantity, some time-bound;
+- percent_off, amount_off, fixed_price and buy_x_get_y promotions on
+  products, on categories and a few on the whole catalogue, some stackable.
+
+The engine is measured on its own: rules are generated in memory in the
+shape the loader produces, so no database is needed.
+
+    python scripts/bench_pos_pricing.py --rules 5000 --lines 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from src.services.pos_pricing import (
+    AMOUNT_OFF,
+    BUY_X_GET_Y,
+    FIXED_PRICE,
+    PERCENT_OFF,
+    PriceRule,
+    PromotionRule,
+    compile_index,
+)
+
+GROUPS = ("wholesale", "staff", "loyalty")
+CATEGORIES = [f"category-{i}" for i in range(40)]
+
+
+def make_catalogue(product_count):
+    products = [str(uuid.uuid4()) for _ in range(product_count)]
+    categories = {}
+    for i, product_id in enumerate(products):
+        categories.setdefault(CATEGORIES[i % len(CATEGORIES)], []).append(product_id)
+    return products, categories
+
+
+def make_rules(rule_count, products, stores, now):
+    price_rows = []
+    promotion_rows = []
+    for i in range(rule_count):
+        store = random.choice(stores) if random.random() < 0.3 else None
+        group = random.choice(GROUPS) if random.random() < 0.2 else None
+        starts_at, ends_at = None, None
+        if random.random() < 0.3:
+            starts_at = now - timedelta(days=random.randint(0, 10))
+            ends_at = now + timedelta(days=random.randint(-2, 10))
+        if i % 5 < 3:
+            price_rows.append((
+                random.choice(products),
+                store,
+                PriceRule(
+                    price_list_id=f"list-{i % 50}",
+                    name=f"List {i % 50}",
+                    price=round(random.uniform(1, 100), 2),
+                    min_quantity=random.choice((1, 1, 1, 6, 12)),
+                    priority=random.randint(0, 5),
+                    store_specific=store is not None,
+                    customer_group=group,
+                    starts_at=starts_at,
+                    ends_at=ends_at,
+                ),
+            ))
+            continue
+        kind = random.choice((PERCENT_OFF, AMOUNT_OFF, FIXED_PRICE, BUY_X_GET_Y))
+        rule = PromotionRule(
+            id=f"promo-{i}",
+            name=f"Promotion {i}",
+            kind=kind,
+            value=round(random.uniform(1, 30), 2) if kind != BUY_X_GET_Y else 100.0,
+            buy_quantity=random.randint(1, 3),
+            get_quantity=1,
+            min_quantity=random.choice((1, 1, 2, 3)),
+            priority=random.randint(0, 5),
+            stackable=random.random() < 0.2,
+            customer_group=group,
+            starts_at=starts_at,
+            ends_at=ends_at,
+        )
+        roll = random.random()
+        if roll < 0.01:
+            targets, categories = frozenset(), ()
+        elif roll < 0.05:
+            targets, categories = frozenset(), (random.choice(CATEGORIES),)
+        else:
+            targets, categories = frozenset(random.sample(products, random.randint(1, 5))), ()
+        promotion_rows.append((store, targets, categories, rule))
+    return price_rows, promotion_rows
+
+
+def make_basket(lines, products):
+    return [
+        {
+            "productId": product_id,
+            "productName": "item",
+            "sku": "sku",
+            "quantity": quantity,
+            "unitPrice": 10.0,
+            "discount": 0.0,
+            "taxRate": 0.0,
+            "total": 10.0 * quantity,
+        }
+        for product_id, quantity in (
+            (random.choice(products), random.randint(1, 12)) for _ in range(lines)
+        )
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--baskets", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    now = datetime.utcnow()
+    products, category_products = make_catalogue(args.products)
+    stores = [str(uuid.uuid4()) for _ in range(args.stores)]
+    # Baskets lean towards products that have rules, as promoted items sell more.
+    price_rows, promotion_rows = make_rules(args.rules, products, stores, now)
+    ruled = list({row[0] for row in price_rows} | {pid for row in promotion_rows for pid in row[1]})
+
+    started = time.perf_counter()
+    index = compile_index(price_rows, promotion_rows, category_products, stores[0])
+    print(
+        f"compile {len(price_rows)} price entries + {len(promotion_rows)} promotions: "
+        f"{(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+
+    baskets = [
+        (make_basket(args.lines, ruled if random.random() < 0.7 else products), random.choice((None,) + GROUPS))
+        for _ in range(args.baskets)
+    ]
+    for items, group in baskets[:50]:  # warm up
+        index.price_basket(items, group, now)
+
+    timings = []
+    applied = []
+    for items, group in baskets:
+        started = time.perf_counter()
+        priced = index.price_basket(items, group, now)
+        timings.append((time.perf_counter() - started) * 1e6)
+        applied.append(len(priced.applied))
+
+    timings.sort()
+    print(
+        f"{args.lines}-line basket: median {statistics.median(timings):7.1f} us  "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:7.1f} us  "
+        f"p99 {timings[int(len(timings) * 0.99) - 1]:7.1f} us  max {timings[-1]:7.1f} us"
+    )
+    print(
+        f"per line: median {statistics.median(timings) / args.lines:.2f} us  "
+        f"avg rules applied per basket {statistics.mean(applied):.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bulk product import.
+
+Creates a scratch tenant with one warehouse and a supplier, writes a CSV of
+--rows products (name, SKU, prices, category, supplier, opening stock) and
+times:
+
+- the first import (inserts plus opening-stock movements),
+- a second import of the same file (updates only; no movements, as stock
+  already matches),
+- a price-only file covering every SKU.
+
+Everything the run created is deleted at the end unless --keep is given.
+
+    DATABASE_URL=... python scripts/bench_product_import.py --rows 100000
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.config.hrm_models import Supplier
+from src.config.inventory_models import ProductImportJob, Warehouse
+from src.models.user_models import Tenant
+from src.services.product_import import create_import_job, run_import_job
+
+
+def bootstrap(db):
+    user_id = db.execute(text("SELECT id FROM users LIMIT 1")).scalar()
+    if not user_id:
+        raise RuntimeError("Need at least one user in the database")
+    suffix = uuid.uuid4().hex[:12]
+    tenant = Tenant(id=uuid.uuid4(), name=f"bench-import-{suffix}", domain=f"bench-import-{suffix}")
+    db.add(tenant)
+    db.flush()
+    warehouse = Warehouse(
+        id=uuid.uuid4(), tenant_id=tenant.id, createdBy=str(user_id),
+        name="Bench warehouse", code=f"BENCH-{suffix}",
+    )
+    supplier = Supplier(id=uuid.uuid4(), tenant_id=tenant.id, name="Bench supplier", createdBy=user_id)
+    db.add_all([warehouse, supplier])
+    db.commit()
+    return str(tenant.id), str(warehouse.id), str(user_id), suffix
+
+
+def write_csv(path, rows, suffix, prices_only=False):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        if prices_only:
+            writer.writerow(["SKU", "Sale Price"])
+            for i in range(rows):
+                writer.writerow([f"BENCH-{suffix}-{i}", 16 + i % 9])
+            return
+        writer.writerow(["SKU", "Name", "Category", "Supplier", "Cost Price", "Sale Price", "Min Stock", "Opening Stock"])
+        for i in range(rows):
+            writer.writerow([
+                f"BENCH-{suffix}-{i}", f"Bench product {i}", "electronics" if i % 2 else "other",
+                "Bench supplier", 10 + i % 7, 15 + i % 9, 5, i % 50,
+            ])
+
+
+def run(db, tenant_id, warehouse_id, user_id, path, label, rows):
+    with open(path, "rb") as handle:
+        job = create_import_job(db, tenant_id, user_id, os.path.basename(path), handle, warehouse_id=warehouse_id)
+    started = time.perf_counter()
+    run_import_job(job.id)
+    elapsed = time.perf_counter() - started
+    db.expire_all()
+    job = db.get(ProductImportJob, job.id)
+    print(
+        f"{label}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s) - status {job.status}, "
+        f"{job.createdCount} created, {job.updatedCount} updated, {job.failedCount} failed, "
+        f"{job.movementCount} movements"
+    )
+    if job.message:
+        print(f"    {job.message}")
+    return job
+
+
+def cleanup(db, tenant_id, jobs):
+    params = {"t": tenant_id}
+    for job in jobs:
+        if job is not None and os.path.exists(job.filePath):
+            os.remove(job.filePath)
+    for table in (
+        "product_import_jobs", "stock_reorder_alerts", "stock_valuations", "stock_cost_consumptions",
+        "stock_cost_layers", "stock_balances", "stock_movements", "products", "pos_product_categories",
+        "suppliers", "warehouses",
+    ):
+        db.execute(text(f"DELETE FROM {table} WHERE tenant_id = CAST(:t AS uuid)"), params)
+    db.execute(text("DELETE FROM tenants WHERE id = CAST(:t AS uuid)"), params)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant_id, warehouse_id, user_id, suffix = bootstrap(db)
+    jobs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        full = os.path.join(workdir, "products.csv")
+        prices = os.path.join(workdir, "prices.csv")
+        write_csv(full, args.rows, suffix)
+        write_csv(prices, args.rows, suffix, prices_only=True)
+        try:
+            jobs.append(run(db, tenant_id, warehouse_id, user_id, full, "first import", args.rows))
+            jobs.append(run(db, tenant_id, warehouse_id, user_id, full, "re-import", args.rows))
+            jobs.append(run(db, tenant_id, warehouse_id, user_id, prices, "price update", args.rows))
+        finally:
+            if not args.keep:
+                db.rollback()
+                cleanup(db, tenant_id, jobs)
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
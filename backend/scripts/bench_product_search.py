@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POS product search.
+
+Creates a scratch tenant with --products products whose names are built
+from a small vocabulary (so queries match many rows, as on a real
+catalogue), then runs --queries searches of mixed kinds and reports latency
+percentiles per kind:
+
+- exact barcode and exact SKU,
+- one- and two-character prefixes (typed first keystrokes),
+- three-to-six-character fragments of a name,
+- two-word queries.
+
+Everything the run created is deleted at the end unless --keep is given.
+
+    DATABASE_URL=... python scripts/bench_product_search.py --products 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.models.user_models import Tenant
+from src.services.product_search import search_product_ids
+
+WORDS = (
+    "coca cola pepsi sprite fanta water juice mango apple orange milk bread butter cheese rice sugar salt "
+    "tea coffee biscuit chips soap shampoo paste brush tissue battery bulb cable charger oil filter brake "
+    "tyre wiper lamp spark plug belt chain"
+).split()
+BRANDS = ("nestle", "unilever", "pg", "bosch", "philips", "shell", "castrol", "denso")
+
+
+def bootstrap(db, product_count):
+    suffix = uuid.uuid4().hex[:12]
+    tenant = Tenant(id=uuid.uuid4(), name=f"bench-search-{suffix}", domain=f"bench-search-{suffix}")
+    db.add(tenant)
+    db.commit()
+    db.execute(text("""
+        INSERT INTO products
+            (id, tenant_id, name, sku, barcode, brand, category, "productType", "costPerUnitPrice", "salePrice",
+             "stockQuantity", "minStockLevel", "isActive", "createdAt", "updatedAt")
+        SELECT gen_random_uuid(), CAST(:tenant_id AS uuid),
+               initcap(w.words[1 + g % :n] || ' ' || w.words[1 + (g / 7) % :n] || ' ' || (50 + g % 950) || 'ml'),
+               :prefix || '-' || g, lpad((6000000000000 + g)::text, 13, '0'),
+               w.brands[1 + g % :b], 'other', 'retail', 10, 15, 10, 2, true, now(), now()
+        FROM generate_series(1, :count) g,
+             (SELECT CAST(:words AS text[]) AS words, CAST(:brands AS text[]) AS brands) w
+    """), {
+        "tenant_id": str(tenant.id), "prefix": f"SKU{suffix[:6]}", "count": product_count,
+        "words": list(WORDS), "brands": list(BRANDS), "n": len(WORDS), "b": len(BRANDS),
+    })
+    db.commit()
+    db.execute(text("ANALYZE products"))
+    return str(tenant.id), f"SKU{suffix[:6]}"
+
+
+def make_queries(count, product_count, sku_prefix):
+    queries = []
+    for i in range(count):
+        kind = i % 6
+        n = random.randint(1, product_count)
+        word = random.choice(WORDS)
+        if kind == 0:
+            queries.append(("barcode", str(6000000000000 + n).zfill(13)))
+        elif kind == 1:
+            queries.append(("sku", f"{sku_prefix}-{n}"))
+        elif kind == 2:
+            queries.append(("1-2 chars", word[:random.randint(1, 2)]))
+        elif kind == 3:
+            start = random.randint(0, max(0, len(word) - 3))
+            queries.append(("fragment", word[start:start + random.randint(3, 6)]))
+        elif kind == 4:
+            queries.append(("two words", f"{word} {random.choice(WORDS)[:3]}"))
+        else:
+            queries.append(("brand", random.choice(BRANDS)[:4]))
+    return queries
+
+
+def cleanup(db, tenant_id):
+    db.execute(text("DELETE FROM products WHERE tenant_id = CAST(:t AS uuid)"), {"t": tenant_id})
+    db.execute(text("DELETE FROM tenants WHERE id = CAST(:t AS uuid)"), {"t": tenant_id})
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=3000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    tenant_id, sku_prefix = bootstrap(db, args.products)
+    print(f"generate {args.products} products: {time.perf_counter() - started:.2f}s")
+    try:
+        timings = defaultdict(list)
+        totals = defaultdict(list)
+        queries = make_queries(args.queries, args.products, sku_prefix)
+        for kind, query in queries[:50]:  # warm the cache
+            search_product_ids(db, tenant_id, query, limit=args.limit)
+        for kind, query in queries:
+            started = time.perf_counter()
+            ids, total = search_product_ids(db, tenant_id, query, limit=args.limit)
+            timings[kind].append((time.perf_counter() - started) * 1000)
+            totals[kind].append(total)
+            if kind in ("barcode", "sku") and total < 1:
+                print(f"    no hit for {kind} {query}")
+
+        overall = sorted(t for values in timings.values() for t in values)
+        for kind, values in sorted(timings.items()):
+            values.sort()
+            p95 = values[int(len(values) * 0.95) - 1]
+            print(
+                f"{kind:>10}: median {statistics.median(values):6.2f} ms  p95 {p95:6.2f} ms  "
+                f"max {values[-1]:6.2f} ms  avg matches {statistics.mean(totals[kind]):.0f}"
+            )
+        print(f"{'all':>10}: p95 {overall[int(len(overall) * 0.95) - 1]:.2f} ms over {len(overall)} queries")
+    finally:
+        if not args.keep:
+            db.rollback()
+            cleanup(db, tenant_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
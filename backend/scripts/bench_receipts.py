@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POS receipt rendering.
+
+Compiles a receipt template once and renders --receipts synthetic sales of
+--lines lines each, one at a time as a till prints them and as one batch as
+a shift reprint does, for every output format. Reports receipts per second
+on one core, plus the time to compile the template.
+
+Sales are built in memory in the shape of POS transaction rows, so no
+database is needed.
+
+    python scripts/bench_receipts.py --receipts 2000 --paper 80
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from src.services.receipts import (
+    COMPANY_FIELDS,
+    DEFAULT_FOOTER,
+    DEFAULT_HEADER,
+    RECEIPT_FORMATS,
+    CompiledReceipt,
+    receipt_data,
+)
+
+COMPANY = {
+    "company_name": "Corner Hardware Ltd",
+    "company_address": "12 High Street, Springfield",
+    "company_phone": "+1 555 0100",
+    "company_email": "shop@example.com",
+    "company_website": "example.com",
+}
+
+
+def make_transaction(number, lines, started):
+    items = []
+    for i in range(lines):
+        quantity = random.randint(1, 6)
+        unit_price = round(random.uniform(0.5, 80), 2)
+        discount = round(unit_price * quantity * 0.1, 2) if random.random() < 0.2 else 0.0
+        items.append({
+            "productName": f"Product {random.randint(1, 20000)} {'x' * random.randint(0, 30)}",
+            "sku": f"SKU-{random.randint(1, 99999):05d}",
+            "quantity": quantity,
+            "unitPrice": unit_price,
+            "discount": discount,
+            "total": round(unit_price * quantity - discount, 2),
+        })
+    subtotal = round(sum(item["total"] for item in items), 2)
+    tax = round(subtotal * 0.08, 2)
+    savings = [{"discount": item["discount"]} for item in items if item["discount"]]
+    return SimpleNamespace(
+        transactionNumber=f"POS-{number:06d}",
+        createdAt=started + timedelta(seconds=number * 40),
+        customerName=random.choice((None, "Walk-in", "Jane Smith")),
+        paymentMethod=random.choice(("cash", "credit_card", "mobile_payment")),
+        items=items,
+        appliedPromotions=savings,
+        subtotal=subtotal,
+        discount=0.0,
+        taxAmount=tax,
+        total=round(subtotal + tax, 2),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--receipts", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=8)
+    parser.add_argument("--paper", type=int, default=80, choices=(58, 80))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    header = DEFAULT_HEADER + "\n{company_website}\nShift {shift_number}"
+    footer = DEFAULT_FOOTER + "\nReturns within 30 days with this receipt."
+
+    started = time.perf_counter()
+    compiled = CompiledReceipt(args.paper, header, footer, "USD", True, True, COMPANY)
+    print(f"compile template: {(time.perf_counter() - started) * 1e6:.0f} us ({len(COMPANY_FIELDS)} company fields)")
+
+    opened = datetime(2026, 1, 5, 8, 0)
+    transactions = [make_transaction(i, args.lines, opened) for i in range(args.receipts)]
+
+    for fmt in RECEIPT_FORMATS:
+        compiled.render([receipt_data(transactions[0], "Sam Cashier", "SH-001")], fmt)  # warm up
+
+        started = time.perf_counter()
+        size = 0
+        for transaction in transactions:
+            size += len(compiled.render([receipt_data(transaction, "Sam Cashier", "SH-001")], fmt))
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = compiled.render((receipt_data(t, "Sam Cashier", "SH-001") for t in transactions), fmt)
+        batched = time.perf_counter() - started
+
+        print(
+            f"{fmt:>6}: {args.receipts / single:8.0f} receipts/s single  "
+            f"{args.receipts / batched:8.0f} receipts/s batched  "
+            f"avg {size / args.receipts / 1024:.1f} KiB, batch {len(batch) / 1024:.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the statement matching engine in memory.
+
+Generates N book entries and N statement lines (dates jittered by up to two
+days, a third without references, a small share with no counterpart) and
+times match_lines.
+
+    python scripts/bench_statement_matching.py --lines 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from src.api.v1.banking.reconciliation import match_lines
+
+
+def build(count, seed):
+    rnd = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    entries, lines = [], []
+    for i in range(count):
+        amount = round(rnd.uniform(-2500, 2500), 2)
+        when = start + timedelta(days=rnd.randint(0, 30))
+        reference = f"INV-{i:06d}" if i % 3 else None
+        entries.append({
+            "id": i,
+            "date": when,
+            "amount": amount,
+            "reference": reference,
+            "external_reference": None,
+            "payee": f"Counterparty {i % 900}",
+            "description": "book entry",
+        })
+        if i % 50 == 0:
+            amount += 1.0
+        lines.append({
+            "transaction_date": when + timedelta(days=rnd.randint(-2, 2)),
+            "amount": amount,
+            "reference": reference,
+            "payee": f"COUNTERPARTY {i % 900}",
+            "description": None,
+            "external_id": None,
+        })
+    rnd.shuffle(lines)
+    return lines, entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    lines, entries = build(args.lines, args.seed)
+    started = time.perf_counter()
+    results = match_lines(lines, entries)
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.lines} lines x {len(entries)} entries matched in {elapsed:.2f}s")
+    print(dict(Counter(r["status"] for r in results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark for keyset paging of the stock movement history.
+
+Creates a scratch tenant with two warehouses and a set of products, writes
+--movements movements with generate_series, then pages through the whole
+history with the cursor and reports per-page latency by depth (it should
+stay flat), followed by filtered walks (one product, one movement type,
+one warehouse and a date range) and, for comparison, offset pages at the
+same depths.
+
+Everything the run created is deleted at the end unless --keep is given.
+
+    DATABASE_URL=... python scripts/bench_stock_movement_history.py --movements 2000000 --page-size 100
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.config.inventory_crud import list_stock_movements
+from src.config.inventory_models import Product, Warehouse
+from src.models.user_models import Tenant
+
+SPAN_DAYS = 365
+BUCKETS = 10
+
+
+def bootstrap(db, product_count):
+    user_id = db.execute(text("SELECT id FROM users LIMIT 1")).scalar()
+    if not user_id:
+        raise RuntimeError("Need at least one user in the database")
+    suffix = uuid.uuid4().hex[:12]
+    tenant = Tenant(id=uuid.uuid4(), name=f"bench-history-{suffix}", domain=f"bench-history-{suffix}")
+    db.add(tenant)
+    db.flush()
+    warehouses = [
+        Warehouse(
+            id=uuid.uuid4(), tenant_id=tenant.id, createdBy=str(user_id),
+            name=f"Bench warehouse {i}", code=f"BENCH-{suffix}-{i}",
+        )
+        for i in range(2)
+    ]
+    db.add_all(warehouses)
+    now = datetime.utcnow()
+    for i in range(product_count):
+        db.add(Product(
+            id=uuid.uuid4(), tenant_id=tenant.id, name=f"bench-product-{i}", sku=f"BENCH-{suffix}-{i}",
+            costPerUnitPrice=10.0, salePrice=15.0, stockQuantity=0, isActive=True, createdAt=now, updatedAt=now,
+        ))
+    db.commit()
+    return str(tenant.id), [str(w.id) for w in warehouses], str(user_id)
+
+
+def generate_movements(db, tenant_id, warehouse_ids, user_id, count, product_count, start):
+    # Rows go straight into the ledger: stock balances and valuation are not
+    # involved in reading the history.
+    step = SPAN_DAYS * 86400.0 / count
+    db.execute(text("""
+        INSERT INTO stock_movements
+            (id, tenant_id, "productId", product_uuid, "warehouseId", "movementType", quantity, "unitCost",
+             "referenceType", status, "createdBy", "createdAt", "updatedAt")
+        SELECT gen_random_uuid(), CAST(:tenant_id AS uuid), p.id::text, p.id,
+               CASE WHEN g % 2 = 0 THEN CAST(:warehouse_a AS uuid) ELSE CAST(:warehouse_b AS uuid) END,
+               (ARRAY['inbound', 'outbound', 'outbound', 'adjustment', 'damage'])[1 + g % 5],
+               1 + g % 9, 10, CASE WHEN g % 5 = 0 THEN 'PO' END,
+               'completed', CAST(:user_id AS uuid),
+               :start + g * make_interval(secs => :step), now()
+        FROM generate_series(0, :count - 1) g
+        JOIN LATERAL (
+            SELECT (ARRAY(
+                SELECT id FROM products WHERE tenant_id = CAST(:tenant_id AS uuid) ORDER BY id
+            ))[1 + (g / 7) % :products] AS id
+        ) p ON true
+    """), {
+        "tenant_id": tenant_id, "warehouse_a": warehouse_ids[0], "warehouse_b": warehouse_ids[1],
+        "user_id": user_id, "count": count, "products": product_count, "start": start, "step": step,
+    })
+    db.commit()
+    db.execute(text("ANALYZE stock_movements"))
+
+
+def walk(db, tenant_id, label, page_size, max_pages=None, **filters):
+    timings = []
+    cursor = None
+    rows_seen = 0
+    while True:
+        started = time.perf_counter()
+        rows, _, cursor = list_stock_movements(db, tenant_id, cursor=cursor, limit=page_size, **filters)
+        timings.append((time.perf_counter() - started) * 1000)
+        rows_seen += len(rows)
+        db.expunge_all()
+        if cursor is None or (max_pages and len(timings) >= max_pages):
+            break
+    report(label, timings, rows_seen)
+    return len(timings)
+
+
+def report(label, timings, rows_seen):
+    print(f"{label}: {len(timings)} pages, {rows_seen} rows")
+    size = max(1, len(timings) // BUCKETS)
+    for i in range(0, len(timings), size):
+        bucket = timings[i:i + size]
+        print(f"    pages {i + 1:>6}-{i + len(bucket):<6} median {statistics.median(bucket):7.2f} ms  max {max(bucket):7.2f} ms")
+
+
+def offset_pages(db, tenant_id, page_size, total_pages):
+    print("offset paging for comparison:")
+    for depth in (0.0, 0.25, 0.5, 0.75, 0.99):
+        page = int(total_pages * depth)
+        started = time.perf_counter()
+        list_stock_movements(db, tenant_id, skip=page * page_size, limit=page_size)
+        print(f"    page {page + 1:>6}: {(time.perf_counter() - started) * 1000:7.2f} ms")
+        db.expunge_all()
+
+
+def cleanup(db, tenant_id):
+    params = {"t": tenant_id}
+    for table in ("stock_movements", "products", "warehouses"):
+        db.execute(text(f"DELETE FROM {table} WHERE tenant_id = CAST(:t AS uuid)"), params)
+    db.execute(text("DELETE FROM tenants WHERE id = CAST(:t AS uuid)"), params)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movements", type=int, default=2000000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--filtered-pages", type=int, default=500, help="Pages per filtered walk")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant_id, warehouse_ids, user_id = bootstrap(db, args.products)
+    start = datetime.utcnow() - timedelta(days=SPAN_DAYS + 1)
+    try:
+        started = time.perf_counter()
+        generate_movements(db, tenant_id, warehouse_ids, user_id, args.movements, args.products, start)
+        print(f"generate {args.movements} movements: {time.perf_counter() - started:.2f}s")
+
+        pages = walk(db, tenant_id, "full history", args.page_size)
+        product_id = db.execute(
+            text("SELECT id FROM products WHERE tenant_id = CAST(:t AS uuid) ORDER BY id LIMIT 1"), {"t": tenant_id}
+        ).scalar()
+        walk(db, tenant_id, "one product", args.page_size, args.filtered_pages, product_id=str(product_id))
+        walk(db, tenant_id, "movementType=damage", args.page_size, args.filtered_pages, movement_type="damage")
+        walk(db, tenant_id, "one warehouse", args.page_size, args.filtered_pages, warehouse_id=warehouse_ids[1])
+        walk(
+            db, tenant_id, "referenceType=PO, one month", args.page_size, args.filtered_pages,
+            reference_type="PO", date_from=(start + timedelta(days=100)).date(),
+            date_to=(start + timedelta(days=130)).date(),
+        )
+        offset_pages(db, tenant_id, args.page_size, pages)
+    finally:
+        if not args.keep:
+            db.rollback()
+            cleanup(db, tenant_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the stock take workflow.
+
+Creates a scratch tenant with one warehouse and --lines products with
+opening stock, then times opening the count sheet, recording the counts in
+handheld-sized uploads (about a third of them off by a few units) and
+posting all variances in one transaction.
+
+Everything the run created is deleted at the end unless --keep is given.
+
+    DATABASE_URL=... python scripts/bench_stock_take.py --lines 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.config.inventory_models import Product, StockMovement, Warehouse
+from src.models.user_models import Tenant
+from src.services.stock_balances import apply_movement_balances
+from src.services.stock_takes import open_stock_take, post_stock_take, record_counts
+
+UPLOAD_SIZE = 1000
+
+
+def bootstrap(db, product_count):
+    user_id = db.execute(text("SELECT id FROM users LIMIT 1")).scalar()
+    if not user_id:
+        raise RuntimeError("Need at least one user in the database")
+    suffix = uuid.uuid4().hex[:12]
+    tenant = Tenant(id=uuid.uuid4(), name=f"bench-stocktake-{suffix}", domain=f"bench-stocktake-{suffix}")
+    db.add(tenant)
+    db.flush()
+    warehouse = Warehouse(
+        id=uuid.uuid4(), tenant_id=tenant.id, createdBy=str(user_id),
+        name="Bench warehouse", code=f"BENCH-{suffix}",
+    )
+    db.add(warehouse)
+    now = datetime.utcnow()
+    products = []
+    for i in range(product_count):
+        product = Product(
+            id=uuid.uuid4(), tenant_id=tenant.id, name=f"bench-product-{i}", sku=f"BENCH-{suffix}-{i}",
+            costPerUnitPrice=10.0, salePrice=15.0, stockQuantity=0, isActive=True, createdAt=now, updatedAt=now,
+        )
+        db.add(product)
+        products.append(product)
+    db.flush()
+
+    # Opening stock through the ledger so balances and valuation line up.
+    movements = [
+        {
+            "id": uuid.uuid4(), "tenant_id": tenant.id, "productId": str(product.id), "product_uuid": product.id,
+            "warehouseId": warehouse.id, "movementType": "inbound", "quantity": 20 + i % 30, "unitCost": 10.0,
+            "status": "completed", "createdBy": user_id, "createdAt": now, "updatedAt": now,
+        }
+        for i, product in enumerate(products)
+    ]
+    apply_movement_balances(db, [(movement, 1) for movement in movements], update_products=True)
+    db.execute(StockMovement.__table__.insert(), movements)
+    db.commit()
+    return str(tenant.id), str(warehouse.id), str(user_id), [product.sku for product in products]
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label}: {time.perf_counter() - started:.2f}s")
+    return result
+
+
+def record_all(db, tenant_id, stock_take_id, user_id, skus):
+    counts = [
+        {"sku": sku, "quantity": 20 + i % 30 + (i % 7 - 3 if i % 3 == 0 else 0)}
+        for i, sku in enumerate(skus)
+    ]
+    for start in range(0, len(counts), UPLOAD_SIZE):
+        record_counts(
+            db, tenant_id, stock_take_id, user_id, counts[start:start + UPLOAD_SIZE],
+            batch_id=f"bench-{start}",
+        )
+
+
+def cleanup(db, tenant_id):
+    params = {"t": tenant_id}
+    for table in (
+        "stock_take_lines", "stock_takes", "document_sequences", "stock_reorder_alerts", "stock_valuations",
+        "stock_cost_consumptions", "stock_cost_layers", "stock_balances", "stock_movements", "products", "warehouses",
+    ):
+        db.execute(text(f"DELETE FROM {table} WHERE tenant_id = CAST(:t AS uuid)"), params)
+    db.execute(text("DELETE FROM tenants WHERE id = CAST(:t AS uuid)"), params)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant_id, warehouse_id, user_id, skus = timed(
+        f"bootstrap {args.lines} products", lambda: bootstrap(db, args.lines)
+    )
+    try:
+        take = timed("open count sheet", lambda: open_stock_take(db, tenant_id, warehouse_id, user_id))
+        print(f"    {take.reference}: {take.lineCount} lines")
+        timed(
+            f"record counts in uploads of {UPLOAD_SIZE}",
+            lambda: record_all(db, tenant_id, str(take.id), user_id, skus),
+        )
+        posted = timed("post variances", lambda: post_stock_take(db, tenant_id, str(take.id), user_id))
+        print(f"    {posted.varianceCount} variance movements, value {posted.varianceValue:.2f}")
+    finally:
+        if not args.keep:
+            db.rollback()
+            cleanup(db, tenant_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
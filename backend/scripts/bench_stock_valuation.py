@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the stock valuation engine on a large synthetic ledger.
+
+Creates a scratch tenant with one warehouse and a set of products, writes
+--movements inbound/outbound movements spread over a year with
+generate_series, then times:
+
+- the full rebuild of cost layers and valuations from the ledger,
+- the as-of valuation report without a snapshot (scans every movement) and
+  with a snapshot taken the day before (scans one day),
+- incremental booking of single movements, one transaction each.
+
+Everything the run created is deleted at the end unless --keep is given.
+
+    DATABASE_URL=... python scripts/bench_stock_valuation.py --movements 1000000 --products 200
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.config.inventory_models import Product, StockMovement, Warehouse
+from src.models.user_models import Tenant
+from src.services.stock_balances import apply_movement_balances
+from src.services.stock_valuation import (
+    get_valuation_as_of,
+    rebuild_stock_valuation,
+    take_valuation_snapshot,
+)
+
+SPAN_DAYS = 365
+
+
+def bootstrap(db, product_count):
+    user_id = db.execute(text("SELECT id FROM users LIMIT 1")).scalar()
+    if not user_id:
+        raise RuntimeError("Need at least one user in the database")
+    suffix = uuid.uuid4().hex[:12]
+    tenant = Tenant(id=uuid.uuid4(), name=f"bench-valuation-{suffix}", domain=f"bench-valuation-{suffix}")
+    db.add(tenant)
+    db.flush()
+    warehouse = Warehouse(
+        id=uuid.uuid4(), tenant_id=tenant.id, createdBy=str(user_id),
+        name="Bench warehouse", code=f"BENCH-{suffix}",
+    )
+    db.add(warehouse)
+    now = datetime.utcnow()
+    for i in range(product_count):
+        db.add(Product(
+            id=uuid.uuid4(),
+            tenant_id=tenant.id,
+            name=f"bench-product-{i}",
+            sku=f"BENCH-{suffix}-{i}",
+            costPerUnitPrice=10.0,
+            salePrice=15.0,
+            stockQuantity=0,
+            isActive=True,
+            createdAt=now,
+            updatedAt=now,
+        ))
+    db.commit()
+    return str(tenant.id), str(warehouse.id), str(user_id)
+
+
+def generate_movements(db, tenant_id, warehouse_id, user_id, count, product_count, start):
+    # Two receipts of 25 for every three issues of 1..5: stock grows slowly,
+    # so issues draw on several layers and some products briefly run short.
+    step = SPAN_DAYS * 86400.0 / count
+    db.execute(text("""
+        INSERT INTO stock_movements
+            (id, tenant_id, "productId", product_uuid, "warehouseId", "movementType", quantity, "unitCost",
+             status, "createdBy", "createdAt", "updatedAt")
+        SELECT gen_random_uuid(), CAST(:tenant_id AS uuid), p.id::text, p.id, CAST(:warehouse_id AS uuid),
+               CASE WHEN g % 5 < 2 THEN 'inbound' ELSE 'outbound' END,
+               CASE WHEN g % 5 < 2 THEN 25 ELSE 1 + g % 5 END,
+               8 + (g % 7),
+               'completed', CAST(:user_id AS uuid),
+               :start + g * make_interval(secs => :step), now()
+        FROM generate_series(0, :count - 1) g
+        JOIN LATERAL (
+            SELECT (ARRAY(
+                SELECT id FROM products WHERE tenant_id = CAST(:tenant_id AS uuid) ORDER BY id
+            ))[1 + (g / 5) % :products] AS id
+        ) p ON true
+    """), {
+        "tenant_id": tenant_id, "warehouse_id": warehouse_id, "user_id": user_id,
+        "count": count, "products": product_count, "start": start, "step": step,
+    })
+    db.commit()
+    db.execute(text("ANALYZE stock_movements"))
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label}: {time.perf_counter() - started:.2f}s")
+    return result
+
+
+def bench_incremental(db, tenant_id, warehouse_id, user_id, count):
+    product_ids = [
+        row[0] for row in db.execute(
+            text("SELECT id FROM products WHERE tenant_id = CAST(:t AS uuid) ORDER BY id LIMIT 20"),
+            {"t": tenant_id},
+        )
+    ]
+    started = time.perf_counter()
+    for i in range(count):
+        product_id = product_ids[i % len(product_ids)]
+        inbound = i % 3 == 0
+        movement = StockMovement(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            productId=str(product_id),
+            product_uuid=product_id,
+            warehouseId=warehouse_id,
+            movementType="inbound" if inbound else "outbound",
+            quantity=10 if inbound else 3,
+            unitCost=9.5,
+            status="completed",
+            createdBy=user_id,
+            createdAt=datetime.utcnow(),
+        )
+        db.add(movement)
+        apply_movement_balances(db, [(movement, 1)])
+        db.commit()
+    elapsed = time.perf_counter() - started
+    print(f"incremental: {count} movements in {elapsed:.2f}s ({elapsed / count * 1000:.1f} ms each)")
+
+
+def cleanup(db, tenant_id):
+    params = {"t": tenant_id}
+    for table in (
+        "stock_valuation_snapshots", "stock_valuations", "stock_cost_consumptions", "stock_cost_layers",
+        "stock_balances", "stock_movements", "products", "warehouses",
+    ):
+        db.execute(text(f"DELETE FROM {table} WHERE tenant_id = CAST(:t AS uuid)"), params)
+    db.execute(text("DELETE FROM tenants WHERE id = CAST(:t AS uuid)"), params)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movements", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--incremental", type=int, default=500)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant_id, warehouse_id, user_id = bootstrap(db, args.products)
+    start = datetime.utcnow() - timedelta(days=SPAN_DAYS + 1)
+    try:
+        timed(
+            f"generate {args.movements} movements",
+            lambda: generate_movements(db, tenant_id, warehouse_id, user_id, args.movements, args.products, start),
+        )
+        summary = timed("rebuild", lambda: rebuild_stock_valuation(db, tenant_id))
+        print(f"    {summary}")
+
+        as_of = (start + timedelta(days=SPAN_DAYS - 1)).date()
+        full = timed(f"as-of {as_of} without snapshot", lambda: get_valuation_as_of(db, tenant_id, as_of))
+        timed("snapshot", lambda: take_valuation_snapshot(db, tenant_id, as_of - timedelta(days=1)))
+        anchored = timed(f"as-of {as_of} from snapshot", lambda: get_valuation_as_of(db, tenant_id, as_of))
+        assert abs(full["totalFifoValue"] - anchored["totalFifoValue"]) < 0.01, (
+            full["totalFifoValue"], anchored["totalFifoValue"]
+        )
+        print(f"    FIFO value {anchored['totalFifoValue']:.2f}, average value {anchored['totalAverageValue']:.2f}")
+
+        bench_incremental(db, tenant_id, warehouse_id, user_id, args.incremental)
+    finally:
+        if not args.keep:
+            db.rollback()
+            cleanup(db, tenant_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Send pending low-stock / reorder alerts as digest notifications.
+
+Alerts are normally dispatched a few seconds after the stock change that
+raised them; run this from cron as a safety net (worker restarts) or with
+REORDER_ALERTS_AUTO_DISPATCH=0.
+
+    DATABASE_URL=... python scripts/dispatch_reorder_alerts.py [--tenant-id <uuid>] [--scan]
+
+--scan   first open alerts for products already below their minimum level
+"""
+
+import argparse
+import os
+import sys
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.services.reorder_alerts import dispatch_reorder_alerts, scan_reorder_alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dispatch reorder alerts")
+    parser.add_argument("--tenant-id", help="Only this tenant")
+    parser.add_argument("--scan", action="store_true", help="Open alerts for products already below minimum")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.tenant_id:
+            tenant_ids = [args.tenant_id]
+        elif args.scan:
+            tenant_ids = [str(row[0]) for row in db.execute(text("SELECT id FROM tenants")).fetchall()]
+        else:
+            tenant_ids = [
+                str(row[0]) for row in db.execute(
+                    text("SELECT DISTINCT tenant_id FROM stock_reorder_alerts WHERE status = 'pending'")
+                ).fetchall()
+            ]
+
+        for tenant_id in tenant_ids:
+            opened = scan_reorder_alerts(db, tenant_id) if args.scan else 0
+            sent = dispatch_reorder_alerts(db, tenant_id)
+            if opened or sent:
+                print(f"{tenant_id}: {opened} alerts opened, {sent} dispatched")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
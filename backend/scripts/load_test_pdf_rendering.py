@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Load test for the PDF rendering pool (services.pdf_rendering).
+
+Serves a small FastAPI app with uvicorn in this process and measures the
+latency of a trivial endpoint (/ping, polled every --interval seconds)
+while --clients threads download invoice PDFs as fast as they can. Each
+phase runs for --seconds:
+
+- idle:       no PDF load, the baseline;
+- event loop: PDFs laid out in an ``async def`` handler, as the prescription
+              download used to;
+- threadpool: PDFs laid out in a sync handler in the request threadpool,
+              as the other downloads used to;
+- pool:       PDFs laid out in the rendering pool via render_pdf();
+- hung:       the pool phase plus one client asking, again and again, for an
+              invoice of --hang-items lines, which renders for far longer
+              than its timeout. Runs for twice the invoice timeout plus
+              --seconds, so several of those renders time out.
+
+Invoices are synthetic (see bench_invoice_pdf.py) and the PDF cache is
+bypassed, so every request is a full render. With the pool, /ping p99
+should stay close to idle; requests past PDF_MAX_PENDING get 503. In the
+hung phase the oversized renders get 504 and their pool is replaced (a few
+ordinary renders caught in it get 503), so ordinary invoices keep rendering
+instead of the hung renders taking every worker one after another.
+
+    python scripts/load_test_pdf_rendering.py --clients 8 --seconds 10
+"""
+
+import argparse
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+import requests
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from bench_invoice_pdf import make_customization, make_invoice
+from src.api.v1.pdf_generator_modern import render_invoice_pdf
+from src.services import pdf_rendering
+from src.services.invoice_rendering import build_render_context, invoice_document
+
+
+def build_app(invoices, hung_invoice, context):
+    app = FastAPI()
+
+    def pick():
+        return random.choice(invoices)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/pdf/event-loop")
+    async def pdf_event_loop():
+        return Response(render_invoice_pdf(pick(), context), media_type="application/pdf")
+
+    @app.get("/pdf/threadpool")
+    def pdf_threadpool():
+        return Response(render_invoice_pdf(pick(), context), media_type="application/pdf")
+
+    @app.get("/pdf/pool")
+    def pdf_pool():
+        pdf_bytes = pdf_rendering.render_pdf(pdf_rendering.INVOICE, invoice_document(pick(), context))
+        return Response(pdf_bytes, media_type="application/pdf")
+
+    @app.get("/pdf/hung")
+    def pdf_hung():
+        pdf_bytes = pdf_rendering.render_pdf(pdf_rendering.INVOICE, invoice_document(hung_invoice, context))
+        return Response(pdf_bytes, media_type="application/pdf")
+
+    return app
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def pdf_client(url, stop, statuses, lock):
+    session = requests.Session()
+    while not stop.is_set():
+        response = session.get(url, timeout=60)
+        with lock:
+            statuses[response.status_code] += 1
+        if response.status_code == 503:
+            time.sleep(0.05)  # a real client would honour Retry-After
+
+
+def run_phase(base_url, paths, seconds, interval):
+    """``paths`` is a list of (path, clients) downloading PDFs while /ping is measured."""
+    stop = threading.Event()
+    statuses = Counter()
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=pdf_client, args=(base_url + path, stop, statuses, lock), daemon=True)
+        for path, clients in paths
+        for _ in range(clients)
+    ]
+    if threads:
+        for t in threads:
+            t.start()
+        time.sleep(0.5)  # let the load build up
+
+    session = requests.Session()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        session.get(base_url + "/ping", timeout=60)
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, statuses
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between /ping requests")
+    parser.add_argument("--items", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hang-items", type=int, default=20000, help="lines of the invoice that outlives its timeout")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    tenant_id = uuid.uuid4()
+    invoices = [make_invoice(i, args.items, tenant_id) for i in range(200)]
+    hung_invoice = make_invoice(200, args.hang_items, tenant_id)
+    context = build_render_context(make_customization(None))
+
+    print(f"pool: {pdf_rendering.PDF_WORKERS} workers, {pdf_rendering.PDF_MAX_PENDING} pending at most")
+    pdf_rendering.warm_up()
+    pdf_rendering.render_pdf(pdf_rendering.INVOICE, invoice_document(invoices[0], context))
+
+    port = free_port()
+    server = start_server(build_app(invoices, hung_invoice, context), port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    pool_clients = [("/pdf/pool", args.clients)]
+    phases = [
+        ("idle", [], args.seconds),
+        ("event loop", [("/pdf/event-loop", args.clients)], args.seconds),
+        ("threadpool", [("/pdf/threadpool", args.clients)], args.seconds),
+        ("pool", pool_clients, args.seconds),
+        (
+            "hung",
+            pool_clients + [("/pdf/hung", 1)],
+            2 * pdf_rendering.TIMEOUTS[pdf_rendering.INVOICE] + args.seconds,
+        ),
+    ]
+    print(f"{'phase':<12} {'ping p50':>9} {'ping p99':>9} {'ping max':>9} {'PDFs/s':>7} {'503s':>6} {'504s':>6}")
+    for name, paths, seconds in phases:
+        latencies, statuses = run_phase(base_url, paths, seconds, args.interval)
+        print(
+            f"{name:<12} {statistics.median(latencies):7.1f}ms {percentile(latencies, 99):7.1f}ms "
+            f"{max(latencies):7.1f}ms {statuses[200] / seconds:7.1f} {statuses[503]:6d} {statuses[504]:6d}"
+        )
+
+    server.should_exit = True
+    pdf_rendering.shutdown()
+
+
+if __name__ == "__main__":
+    main()
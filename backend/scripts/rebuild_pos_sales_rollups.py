@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Recompute POS sales rollups from pos_transactions, or check them.
+
+Rollups are maintained with every sale, void and refund; run this after
+editing pos_transactions by hand, or with --check to compare the daily
+rollups with a full aggregate of the transactions.
+
+    DATABASE_URL=... python scripts/rebuild_pos_sales_rollups.py [--tenant-id <uuid>] [--check]
+"""
+
+import argparse
+import os
+import sys
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.api.v1.pos.sales_rollups import rebuild_sales_rollups, sales_totals
+
+RAW_DAILY_SQL = """
+    SELECT date("createdAt") AS day,
+           count(*) FILTER (WHERE kind = 'sale') AS transactions,
+           coalesce(sum(total) FILTER (WHERE kind = 'sale'), 0) AS sales
+    FROM (
+        SELECT "createdAt", CAST(total AS numeric(14, 2)) AS total,
+               CASE
+                   WHEN "paymentStatus" IN ('void', 'cancelled') THEN 'void'
+                   WHEN "paymentStatus" = 'refunded' THEN 'refund'
+                   ELSE 'sale'
+               END AS kind
+        FROM pos_transactions
+        WHERE tenant_id = CAST(:tenant_id AS uuid) AND "createdAt" IS NOT NULL
+    ) tx
+    GROUP BY date("createdAt")
+"""
+
+
+def check(db, tenant_id) -> int:
+    rollups = {row["day"]: row for row in sales_totals(db, tenant_id, group_by=("day",))}
+    mismatches = 0
+    for row in db.execute(text(RAW_DAILY_SQL), {"tenant_id": tenant_id}).fetchall():
+        rolled = rollups.get(row.day.isoformat(), {})
+        expected = (int(row.transactions), round(float(row.sales), 2))
+        actual = (rolled.get("transactionCount", 0), rolled.get("salesTotal", 0.0))
+        if expected != actual:
+            mismatches += 1
+            print(f"  {row.day}: transactions {actual[0]} (expected {expected[0]}), "
+                  f"sales {actual[1]:.2f} (expected {expected[1]:.2f})")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or check POS sales rollups")
+    parser.add_argument("--tenant-id", help="Only this tenant")
+    parser.add_argument("--check", action="store_true", help="Compare rollups with the transactions, change nothing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.tenant_id:
+            tenant_ids = [args.tenant_id]
+        else:
+            tenant_ids = [
+                str(row[0]) for row in db.execute(text("SELECT DISTINCT tenant_id FROM pos_transactions")).fetchall()
+            ]
+
+        failed = 0
+        for tenant_id in tenant_ids:
+            if args.check:
+                mismatches = check(db, tenant_id)
+                print(f"{tenant_id}: {'ok' if not mismatches else f'{mismatches} days differ'}")
+                failed += 1 if mismatches else 0
+            else:
+                rows = rebuild_sales_rollups(db, tenant_id)
+                print(f"{tenant_id}: {rows} rollup rows written")
+        if failed:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Rebuild stock_balances from the stock movement ledger, or check for drift.
+
+    DATABASE_URL=... python scripts/rebuild_stock_balances.py --check
+    DATABASE_URL=... python scripts/rebuild_stock_balances.py [--tenant-id <uuid>] [--post-opening] [--sync-products]
+
+--check          only report drift, change nothing
+--post-opening   record an opening adjustment for stock that predates the ledger
+--sync-products  reset Product.stockQuantity to the sum of its balances
+"""
+
+import argparse
+import os
+import sys
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.services.stock_balances import (
+    check_stock_balance_drift, post_opening_balances, rebuild_stock_balances,
+)
+
+
+def tenant_user(db, tenant_id):
+    row = db.execute(
+        text('SELECT id FROM users WHERE tenant_id = CAST(:tenant_id AS uuid) ORDER BY "createdAt" LIMIT 1'),
+        {"tenant_id": tenant_id},
+    ).fetchone()
+    return str(row[0]) if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild / check stock balances")
+    parser.add_argument("--tenant-id", help="Only this tenant")
+    parser.add_argument("--check", action="store_true", help="Report drift only")
+    parser.add_argument("--post-opening", action="store_true")
+    parser.add_argument("--sync-products", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    drifting = 0
+    try:
+        if args.tenant_id:
+            tenant_ids = [args.tenant_id]
+        else:
+            tenant_ids = [str(row[0]) for row in db.execute(text("SELECT id FROM tenants")).fetchall()]
+
+        for tenant_id in tenant_ids:
+            if not args.check:
+                summary = rebuild_stock_balances(db, tenant_id)
+                line = f"{tenant_id}: {summary['balances']} balances rebuilt"
+                if args.post_opening:
+                    user_id = tenant_user(db, tenant_id)
+                    if user_id:
+                        opening = post_opening_balances(db, tenant_id, user_id)
+                        line += f", {opening['posted']} opening adjustments"
+                    else:
+                        line += ", no user to post opening adjustments"
+                if args.sync_products:
+                    summary = rebuild_stock_balances(db, tenant_id, sync_products=True)
+                    line += f", {summary['products_synced']} products synced"
+                print(line)
+
+            drift = check_stock_balance_drift(db, tenant_id)
+            if drift["balanceDrift"] or drift["productDrift"]:
+                drifting += 1
+                print(
+                    f"{tenant_id}: DRIFT {len(drift['balanceDrift'])} balance rows, "
+                    f"{len(drift['productDrift'])} products"
+                )
+                for row in drift["productDrift"][:10]:
+                    print(f"    {row['productName']}: stock {row['stockQuantity']} vs balances {row['balanceQuantity']}")
+    finally:
+        db.close()
+
+    sys.exit(1 if args.check and drifting else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Rebuild FIFO cost layers and stock valuations from the movement ledger, and
+optionally store a closing snapshot.
+
+    DATABASE_URL=... python scripts/rebuild_stock_valuation.py [--tenant-id <uuid>]
+    DATABASE_URL=... python scripts/rebuild_stock_valuation.py --snapshot-only [--date 2026-10-18]
+
+Run once per tenant after the stock valuation migration. The snapshot is
+meant for a daily cron: as-of reports start from the latest snapshot.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.services.stock_valuation import rebuild_stock_valuation, take_valuation_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild stock valuation / take snapshots")
+    parser.add_argument("--tenant-id", help="Only this tenant")
+    parser.add_argument("--snapshot-only", action="store_true", help="Skip the rebuild, only take a snapshot")
+    parser.add_argument("--no-snapshot", action="store_true", help="Do not take a snapshot after rebuilding")
+    parser.add_argument("--date", type=date.fromisoformat, help="Snapshot date (default yesterday)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.tenant_id:
+            tenant_ids = [args.tenant_id]
+        else:
+            tenant_ids = [str(row[0]) for row in db.execute(text("SELECT id FROM tenants")).fetchall()]
+
+        for tenant_id in tenant_ids:
+            line = f"{tenant_id}:"
+            if not args.snapshot_only:
+                summary = rebuild_stock_valuation(db, tenant_id)
+                line += (
+                    f" {summary['movements']} movements, {summary['layers']} layers,"
+                    f" {summary['valuations']} valuations"
+                )
+            if not args.no_snapshot:
+                rows = take_valuation_snapshot(db, tenant_id, args.date)
+                line += f" {rows} snapshot rows"
+            print(line)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Run the incremental daily cash rollup for every tenant (or one).
+
+Safe to schedule from cron at any interval: each run only rebuilds the days
+touched since the previous one.
+
+    DATABASE_URL=... python scripts/run_cash_rollups.py [--tenant-id <uuid>]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.api.v1.banking.cash_rollups import run_cash_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run daily cash rollups")
+    parser.add_argument("--tenant-id", help="Only roll up this tenant")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.tenant_id:
+            tenant_ids = [args.tenant_id]
+        else:
+            tenant_ids = [str(row[0]) for row in db.execute(text("SELECT id FROM tenants")).fetchall()]
+
+        for tenant_id in tenant_ids:
+            started = time.perf_counter()
+            try:
+                summary = run_cash_rollups(db, tenant_id)
+            except Exception as e:
+                db.rollback()
+                print(f"{tenant_id}: FAILED {e}")
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{tenant_id}: {summary['sources']} sources, {summary['days']} days in {elapsed:.0f} ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
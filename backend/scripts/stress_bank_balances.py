@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Concurrent-insert stress test for bank / till running balances.
+
+Posts deposits and withdrawals from many threads against one bank account and
+one till, then checks that current_balance equals opening + sum(deltas) and
+that every running_balance matches a replay of the ordered history. Finishes
+with a back-dated insert and a delete to check that later rows re-flow.
+
+    DATABASE_URL=... python scripts/stress_bank_balances.py --threads 16 --per-thread 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.api.v1.banking import logic
+from src.models.banking import BankTransaction, TillTransaction, TillTransactionType
+
+
+def bootstrap(db):
+    row = db.execute(text("SELECT u.id, u.tenant_id FROM users u WHERE u.tenant_id IS NOT NULL LIMIT 1")).fetchone()
+    if not row:
+        raise RuntimeError("Need at least one tenant user in the database")
+    user_id, tenant_id = str(row[0]), str(row[1])
+    account = logic.create_bank_account(
+        {
+            "id": str(uuid.uuid4()),
+            "tenant_id": tenant_id,
+            "account_name": "stress-test",
+            "account_number": uuid.uuid4().hex[:12],
+            "bank_name": "Stress Bank",
+            "account_type": "checking",
+            "current_balance": 1000.0,
+            "created_by": user_id,
+        },
+        db,
+    )
+    till = logic.create_till(
+        {
+            "id": str(uuid.uuid4()),
+            "tenant_id": tenant_id,
+            "name": "stress-test",
+            "initial_balance": 500.0,
+            "created_by": user_id,
+        },
+        db,
+    )
+    return tenant_id, user_id, str(account.id), str(till.id)
+
+
+def bank_worker(tenant_id, user_id, account_id, count, seed, errors):
+    rnd = random.Random(seed)
+    db = SessionLocal()
+    try:
+        for _ in range(count):
+            kind = rnd.choice(("deposit", "withdrawal"))
+            amount = round(rnd.uniform(1, 100), 2)
+            logic.create_bank_transaction(
+                {
+                    "id": str(uuid.uuid4()),
+                    "tenant_id": tenant_id,
+                    "bank_account_id": account_id,
+                    "transaction_number": f"ST-{uuid.uuid4().hex[:12]}",
+                    "transaction_date": datetime.utcnow(),
+                    "transaction_type": kind,
+                    "status": "completed",
+                    "amount": amount,
+                    "description": "stress",
+                    "created_by": user_id,
+                },
+                db,
+            )
+    except Exception as e:
+        errors.append(e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def till_worker(tenant_id, user_id, till_id, count, seed, errors):
+    rnd = random.Random(seed)
+    db = SessionLocal()
+    try:
+        for _ in range(count):
+            kind = rnd.choice((TillTransactionType.DEPOSIT, TillTransactionType.WITHDRAWAL))
+            logic.create_till_transaction(
+                {
+                    "id": str(uuid.uuid4()),
+                    "tenant_id": tenant_id,
+                    "till_id": till_id,
+                    "transaction_number": f"STT-{uuid.uuid4().hex[:12]}",
+                    "transaction_date": datetime.utcnow(),
+                    "transaction_type": kind,
+                    "amount": round(rnd.uniform(1, 50), 2),
+                    "description": "stress",
+                    "performed_by": user_id,
+                },
+                db,
+            )
+    except Exception as e:
+        errors.append(e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def check_bank(db, tenant_id, account_id):
+    account = logic.get_bank_account_by_id(account_id, db, tenant_id)
+    rows = (
+        db.query(BankTransaction)
+        .filter(BankTransaction.bank_account_id == account_id)
+        .order_by(BankTransaction.transaction_date, BankTransaction.created_at, BankTransaction.id)
+        .all()
+    )
+    balance = float(account.opening_balance)
+    for row in rows:
+        balance += logic._signed_base_delta_for_bank_transaction(
+            row.transaction_type, row.amount, row.exchange_rate, row.base_amount
+        )
+        assert abs(row.running_balance - balance) < 1e-6, (row.id, row.running_balance, balance)
+    assert abs(account.current_balance - balance) < 1e-6, (account.current_balance, balance)
+    return len(rows), balance
+
+
+def check_till(db, tenant_id, till_id):
+    till = logic.get_till_by_id(till_id, db, tenant_id)
+    rows = (
+        db.query(TillTransaction)
+        .filter(TillTransaction.till_id == till_id)
+        .order_by(TillTransaction.transaction_date, TillTransaction.created_at, TillTransaction.id)
+        .all()
+    )
+    balance = float(till.initial_balance)
+    for row in rows:
+        balance += -row.amount if row.transaction_type == TillTransactionType.WITHDRAWAL else row.amount
+        assert abs(row.running_balance - balance) < 1e-6, (row.id, row.running_balance, balance)
+    assert abs(till.current_balance - balance) < 1e-6, (till.current_balance, balance)
+    return len(rows), balance
+
+
+def cleanup(db, tenant_id, account_id, till_id):
+    db.execute(text("DELETE FROM bank_transactions WHERE bank_account_id = :id"), {"id": account_id})
+    db.execute(text("DELETE FROM bank_accounts WHERE id = :id"), {"id": account_id})
+    db.execute(text("DELETE FROM till_transactions WHERE till_id = :id"), {"id": till_id})
+    db.execute(text("DELETE FROM tills WHERE id = :id"), {"id": till_id})
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--per-thread", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant_id, user_id, account_id, till_id = bootstrap(db)
+    errors = []
+    try:
+        threads = []
+        for i in range(args.threads):
+            threads.append(threading.Thread(
+                target=bank_worker, args=(tenant_id, user_id, account_id, args.per_thread, i, errors)
+            ))
+            threads.append(threading.Thread(
+                target=till_worker, args=(tenant_id, user_id, till_id, args.per_thread, 1000 + i, errors)
+            ))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+        db.expire_all()
+        count, balance = check_bank(db, tenant_id, account_id)
+        print(f"bank: {count} rows, closing {balance:.2f} OK")
+        count, balance = check_till(db, tenant_id, till_id)
+        print(f"till: {count} rows, closing {balance:.2f} OK")
+
+        back_dated = logic.create_bank_transaction(
+            {
+                "id": str(uuid.uuid4()),
+                "tenant_id": tenant_id,
+                "bank_account_id": account_id,
+                "transaction_number": f"ST-{uuid.uuid4().hex[:12]}",
+                "transaction_date": datetime.utcnow() - timedelta(days=30),
+                "transaction_type": "deposit",
+                "status": "completed",
+                "amount": 250.0,
+                "description": "back-dated",
+                "created_by": user_id,
+            },
+            db,
+        )
+        db.expire_all()
+        check_bank(db, tenant_id, account_id)
+        logic.delete_bank_transaction(str(back_dated.id), db, tenant_id)
+        db.expire_all()
+        check_bank(db, tenant_id, account_id)
+        print("back-dated insert / delete re-flow OK")
+    finally:
+        if not args.keep:
+            cleanup(db, tenant_id, account_id, till_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for the document_sequences allocator.
+
+Many threads allocate invoice numbers for a throw-away tenant scope, each
+allocation in its own transaction; a share of the transactions roll back
+instead of committing. Afterwards checks that the committed numbers are
+exactly 1..N (no duplicates, no gaps) and that the counter row agrees.
+A second phase draws numbers through SequenceBlockAllocator and checks
+they are unique.
+
+    DATABASE_URL=... python scripts/stress_document_sequences.py --threads 32 --total 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.services.document_sequences import (
+    INVOICE,
+    SequenceBlockAllocator,
+    allocate_document_numbers,
+)
+
+
+def transactional_worker(tenant_id, count, rollback_rate, seed, committed, errors, lock):
+    rnd = random.Random(seed)
+    db = SessionLocal()
+    try:
+        done = 0
+        while done < count:
+            number, _, _, _ = allocate_document_numbers(db, tenant_id, INVOICE)
+            if rnd.random() < rollback_rate:
+                db.rollback()
+                continue
+            db.commit()
+            done += 1
+            with lock:
+                committed.append(number)
+    except Exception as e:
+        errors.append(e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def block_worker(allocator, tenant_id, count, issued, errors, lock):
+    try:
+        numbers = [allocator.next_number(tenant_id, INVOICE) for _ in range(count)]
+        with lock:
+            issued.extend(numbers)
+    except Exception as e:
+        errors.append(e)
+
+
+def run_threads(target, args_for, threads):
+    workers = [threading.Thread(target=target, args=args_for(i)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--total", type=int, default=10000)
+    parser.add_argument("--rollback-rate", type=float, default=0.05)
+    parser.add_argument("--block-size", type=int, default=50)
+    args = parser.parse_args()
+
+    tenant_id = str(uuid.uuid4())
+    block_tenant = str(uuid.uuid4())
+    per_thread = args.total // args.threads
+    total = per_thread * args.threads
+    lock = threading.Lock()
+    db = SessionLocal()
+    try:
+        committed, errors = [], []
+        elapsed = run_threads(
+            transactional_worker,
+            lambda i: (tenant_id, per_thread, args.rollback_rate, i, committed, errors, lock),
+            args.threads,
+        )
+        if errors:
+            raise errors[0]
+        assert len(committed) == total, (len(committed), total)
+        assert len(set(committed)) == total, "duplicate numbers issued"
+        assert sorted(committed) == list(range(1, total + 1)), "gap in committed numbers"
+        last_value = db.execute(
+            text("SELECT sum(last_value) FROM document_sequences WHERE tenant_id = CAST(:t AS uuid)"),
+            {"t": tenant_id},
+        ).scalar()
+        assert int(last_value) == total, (last_value, total)
+        print(f"in-transaction: {total} numbers in {elapsed:.1f}s, no duplicates, no gaps OK")
+
+        allocator = SequenceBlockAllocator(SessionLocal, block_size=args.block_size)
+        issued, errors = [], []
+        elapsed = run_threads(
+            block_worker,
+            lambda i: (allocator, block_tenant, per_thread, issued, errors, lock),
+            args.threads,
+        )
+        if errors:
+            raise errors[0]
+        assert len(set(issued)) == len(issued) == total, "duplicate block-allocated numbers"
+        print(f"block allocator: {total} numbers in {elapsed:.1f}s, no duplicates OK")
+    finally:
+        db.execute(
+            text("DELETE FROM document_sequences WHERE tenant_id IN (CAST(:a AS uuid), CAST(:b AS uuid))"),
+            {"a": tenant_id, "b": block_tenant},
+        )
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Oversell stress test for InventorySyncService stock deduction.
+
+Creates a handful of products with little stock, then lets many threads
+deduct multi-line "invoices" (random products, random line order) at the
+same time. Afterwards checks that:
+
+- no product went below zero,
+- every product's stock equals initial stock minus the successful deductions,
+- failed invoices left no partial deduction and no stock movements,
+- no thread hit a deadlock.
+
+    DATABASE_URL=... python scripts/stress_stock_oversell.py --threads 16 --per-thread 40
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime
+
+backend_dir = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, backend_dir)
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from sqlalchemy import text
+
+from src.config.database import SessionLocal
+from src.config.inventory_models import Product, StockMovement
+from src.services.inventory_sync_service import InventorySyncService, INVOICE_REFERENCE_TYPE
+
+
+def bootstrap(db, product_count, initial_stock):
+    row = db.execute(text("SELECT u.id, u.tenant_id FROM users u WHERE u.tenant_id IS NOT NULL LIMIT 1")).fetchone()
+    if not row:
+        raise RuntimeError("Need at least one tenant user in the database")
+    user_id, tenant_id = str(row[0]), str(row[1])
+    product_ids = []
+    for i in range(product_count):
+        product = Product(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            name=f"stress-product-{i}",
+            sku=f"STRESS-{uuid.uuid4().hex[:12]}",
+            costPerUnitPrice=1.0,
+            salePrice=2.0,
+            stockQuantity=initial_stock,
+            isActive=True,
+            createdAt=datetime.utcnow(),
+            updatedAt=datetime.utcnow(),
+        )
+        db.add(product)
+        product_ids.append(str(product.id))
+    db.commit()
+    return tenant_id, user_id, product_ids
+
+
+def worker(tenant_id, user_id, product_ids, count, seed, outcomes, errors, lock):
+    rnd = random.Random(seed)
+    db = SessionLocal()
+    try:
+        for _ in range(count):
+            lines = rnd.sample(product_ids, rnd.randint(1, min(4, len(product_ids))))
+            rnd.shuffle(lines)
+            items = [{"productId": pid, "quantity": rnd.randint(1, 3)} for pid in lines]
+            invoice_id = str(uuid.uuid4())
+            result = InventorySyncService(db).deduct_invoice_stock(
+                invoice_id, tenant_id, user_id, items=items, skip_deducted=False,
+            )
+            if result["success"]:
+                db.commit()
+            else:
+                db.rollback()
+            with lock:
+                outcomes.append((invoice_id, items, result["success"]))
+    except Exception as e:
+        errors.append(e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def check(db, tenant_id, product_ids, initial_stock, outcomes):
+    expected = {pid: initial_stock for pid in product_ids}
+    failed_invoices = []
+    for invoice_id, items, success in outcomes:
+        if not success:
+            failed_invoices.append(invoice_id)
+            continue
+        for item in items:
+            expected[item["productId"]] -= item["quantity"]
+
+    for product in db.query(Product).filter(Product.id.in_(product_ids)):
+        pid = str(product.id)
+        assert product.stockQuantity >= 0, (pid, product.stockQuantity)
+        assert product.stockQuantity == expected[pid], (pid, product.stockQuantity, expected[pid])
+
+    if failed_invoices:
+        leaked = db.query(StockMovement).filter(
+            StockMovement.tenant_id == tenant_id,
+            StockMovement.referenceType == INVOICE_REFERENCE_TYPE,
+            StockMovement.referenceNumber.in_(failed_invoices),
+        ).count()
+        assert leaked == 0, f"{leaked} movements recorded for failed invoices"
+
+    succeeded = len(outcomes) - len(failed_invoices)
+    return succeeded, len(failed_invoices), expected
+
+
+def cleanup(db, tenant_id, product_ids, outcomes):
+    invoice_ids = [invoice_id for invoice_id, _, _ in outcomes]
+    if invoice_ids:
+        db.query(StockMovement).filter(
+            StockMovement.tenant_id == tenant_id,
+            StockMovement.referenceType == INVOICE_REFERENCE_TYPE,
+            StockMovement.referenceNumber.in_(invoice_ids),
+        ).delete(synchronize_session=False)
+    db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--per-thread", type=int, default=40)
+    parser.add_argument("--products", type=int, default=6)
+    parser.add_argument("--initial-stock", type=int, default=100)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant_id, user_id, product_ids = bootstrap(db, args.products, args.initial_stock)
+    outcomes = []
+    errors = []
+    lock = threading.Lock()
+    try:
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(tenant_id, user_id, product_ids, args.per_thread, i, outcomes, errors, lock),
+            )
+            for i in range(args.threads)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+        db.expire_all()
+        succeeded, rejected, remaining = check(db, tenant_id, product_ids, args.initial_stock, outcomes)
+        print(f"{succeeded} invoices deducted, {rejected} rejected for insufficient stock")
+        print(f"remaining stock: {sorted(remaining.values())}")
+        print("no oversell, no partial deductions OK")
+    finally:
+        if not args.keep:
+            cleanup(db, tenant_id, product_ids, outcomes)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ Banking API Endpoints
 import uuid
 from typing import Optional, Any, Dict
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 
@@ -27,8 +27,13 @@ from .schemas import (
     TransactionType, TransactionStatus,
     TillCreate, TillUpdate, TillResponse, TillsResponse,
     TillTransactionCreate, TillTransactionUpdate, TillTransactionResponse, TillTransactionsResponse,
+    BankStatementImport as BankStatementImportSchema, BankStatementLine as BankStatementLineSchema,
+    BankStatementImportResponse, BankStatementImportsResponse,
+    BankStatementLineResponse, BankStatementLinesResponse, StatementLineResolve,
+    CashFlowResponse,
 )
-from . import logic
+from . import logic, reconciliation, cash_rollups
+from .statements import SUPPORTED_FORMATS, StatementParseError
 from .logic import _normalize_enum_input
 
 router = APIRouter(prefix="/banking", tags=["Banking"])
@@ -367,6 +372,54 @@ def get_cash_position_by_date_endpoint(
         raise HTTPException(status_code=500, detail=f"Failed to fetch cash position: {str(e)}")
 
 
+# Cash Flow Endpoints
+@router.get("/cash-flow", response_model=CashFlowResponse)
+def get_cash_flow_endpoint(
+    start_date: date = Query(..., alias="startDate"),
+    end_date: date = Query(..., alias="endDate"),
+    source_type: Optional[str] = Query(None, alias="sourceType", pattern="^(bank|till)$"),
+    source_id: Optional[str] = Query(None, alias="sourceId"),
+    include_positions: bool = Query(False, alias="includePositions"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Daily cash flow from the per-day rollups (refreshed first when more than a minute old)"""
+    try:
+        if end_date < start_date:
+            raise HTTPException(status_code=400, detail="endDate must not be before startDate")
+        if (end_date - start_date).days > 366:
+            raise HTTPException(status_code=400, detail="Date range cannot exceed 366 days")
+
+        tenant_id = str(tenant_context["tenant_id"])
+        cash_rollups.refresh_cash_rollups_for_read(db, tenant_id)
+        series = cash_rollups.get_cash_flow_series(db, tenant_id, start_date, end_date, source_type, source_id)
+        positions = []
+        if include_positions:
+            positions = cash_rollups.get_daily_cash_balances(db, tenant_id, start_date, end_date, source_type, source_id)
+
+        return CashFlowResponse(start_date=start_date, end_date=end_date, series=series, positions=positions)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch cash flow: {str(e)}")
+
+
+@router.post("/cash-flow/rollup")
+def run_cash_rollup_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Run the incremental daily cash rollup for the current tenant"""
+    try:
+        return cash_rollups.run_cash_rollups(db, str(tenant_context["tenant_id"]))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to run cash rollup: {str(e)}")
+
+
 # Dashboard Endpoint
 @router.get("/dashboard", response_model=BankingDashboard)
 def get_banking_dashboard_endpoint(
@@ -411,6 +464,27 @@ def get_account_balance_endpoint(
         raise HTTPException(status_code=500, detail=f"Failed to calculate account balance: {str(e)}")
 
 
+@router.post("/accounts/{account_id}/recompute-balances", response_model=BankAccountResponse)
+def recompute_account_balances_endpoint(
+    account_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Re-flow running balances for a bank account (e.g. after a bulk back-dated import)"""
+    try:
+        account = logic.recompute_bank_account_balances(account_id, db, str(tenant_context["tenant_id"]))
+        if not account:
+            raise HTTPException(status_code=404, detail="Bank account not found")
+
+        return BankAccountResponse(bank_account=_pydantic_bank_account_from_orm(account))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to recompute account balances: {str(e)}")
+
+
 # Reconciliation Endpoint
 @router.get("/reconciliation/summary", response_model=ReconciliationSummary)
 def get_reconciliation_summary_endpoint(
@@ -455,6 +529,136 @@ def get_reconciliation_summary_endpoint(
         raise HTTPException(status_code=500, detail=f"Failed to fetch reconciliation summary: {str(e)}")
 
 
+# Statement Import Endpoints
+@router.post(
+    "/accounts/{account_id}/statements",
+    response_model=BankStatementImportResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def import_bank_statement_endpoint(
+    account_id: str,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Form(None, alias="fileFormat"),
+    date_tolerance_days: int = Form(reconciliation.DEFAULT_DATE_TOLERANCE_DAYS, ge=0, le=31, alias="dateToleranceDays"),
+    auto_reconcile: bool = Form(True, alias="autoReconcile"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Import a CSV / OFX / QIF / CAMT.053 statement and reconcile it against the book"""
+    tenant_id = str(tenant_context["tenant_id"])
+    account = logic.get_bank_account_by_id(account_id, db, tenant_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Bank account not found")
+    if file_format and file_format.lower() not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported statement format. Use one of: {', '.join(SUPPORTED_FORMATS)}",
+        )
+
+    try:
+        content = file.file.read()
+        statement = reconciliation.import_statement(
+            db,
+            tenant_id,
+            account,
+            str(current_user.id),
+            content,
+            file_name=file.filename,
+            file_format=file_format.lower() if file_format else None,
+            date_tolerance_days=date_tolerance_days,
+            auto_reconcile=auto_reconcile,
+        )
+        return BankStatementImportResponse(
+            statement_import=BankStatementImportSchema.model_validate(statement)
+        )
+
+    except StatementParseError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to import bank statement: {str(e)}")
+
+
+@router.get("/statements", response_model=BankStatementImportsResponse)
+def get_bank_statements_endpoint(
+    account_id: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Get statement imports"""
+    try:
+        imports = logic.get_statement_imports(db, str(tenant_context["tenant_id"]), account_id, skip, limit)
+        serialized = [BankStatementImportSchema.model_validate(i) for i in imports]
+        return BankStatementImportsResponse(statement_imports=serialized, total=len(serialized))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch bank statements: {str(e)}")
+
+
+@router.get("/statements/{import_id}/lines", response_model=BankStatementLinesResponse)
+def get_bank_statement_lines_endpoint(
+    import_id: str,
+    line_status: Optional[str] = Query(None, alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Get statement lines, e.g. ``status=review`` for the review queue"""
+    try:
+        tenant_id = str(tenant_context["tenant_id"])
+        if not logic.get_statement_import_by_id(import_id, db, tenant_id):
+            raise HTTPException(status_code=404, detail="Statement import not found")
+
+        lines, total = logic.get_statement_lines(import_id, db, tenant_id, line_status, skip, limit)
+        return BankStatementLinesResponse(
+            statement_lines=[BankStatementLineSchema.model_validate(line) for line in lines],
+            total=total,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch statement lines: {str(e)}")
+
+
+@router.post("/statement-lines/{line_id}/resolve", response_model=BankStatementLineResponse)
+def resolve_bank_statement_line_endpoint(
+    line_id: str,
+    resolution: StatementLineResolve,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Confirm the suggested match, pick another transaction, or ignore a statement line"""
+    try:
+        tenant_id = str(tenant_context["tenant_id"])
+        line = logic.get_statement_line_by_id(line_id, db, tenant_id)
+        if not line:
+            raise HTTPException(status_code=404, detail="Statement line not found")
+        if resolution.transaction_id and not logic.get_bank_transaction_by_id(resolution.transaction_id, db, tenant_id):
+            raise HTTPException(status_code=404, detail="Bank transaction not found")
+
+        line = reconciliation.resolve_statement_line(
+            db, tenant_id, line, str(current_user.id),
+            transaction_id=resolution.transaction_id, ignore=resolution.ignore,
+        )
+        return BankStatementLineResponse(statement_line=BankStatementLineSchema.model_validate(line))
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to resolve statement line: {str(e)}")
+
+
 # ========================================
 # Till Endpoints
 # ========================================
@@ -518,6 +722,27 @@ def get_till_endpoint(
         raise HTTPException(status_code=500, detail=f"Failed to fetch till: {str(e)}")
 
 
+@router.post("/tills/{till_id}/recompute-balances", response_model=TillResponse)
+def recompute_till_balances_endpoint(
+    till_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context)
+):
+    """Re-flow running balances for a till"""
+    try:
+        till = logic.recompute_till_balances(till_id, db, str(tenant_context["tenant_id"]))
+        if not till:
+            raise HTTPException(status_code=404, detail="Till not found")
+
+        return TillResponse(till=till)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to recompute till balances: {str(e)}")
+
+
 @router.put("/tills/{till_id}", response_model=TillResponse)
 def update_till_endpoint(
     till_id: str,
@@ -0,0 +1,222 @@
+"""
+Banking balance maintenance
+
+Running balances on bank and till transactions are derived state. Every
+writer that touches a transaction serializes on the owning BankAccount / Till
+row (``SELECT ... FOR UPDATE``) so concurrent postings on the same account
+cannot read the same prior balance.
+
+- Appends (the common case) move ``current_balance`` with a single
+  ``balance = balance + :delta`` UPDATE and use the returned value as the
+  new row's running balance.
+- Back-dated inserts, edits and deletes re-flow every later row with one
+  set-based ``SUM() OVER (ORDER BY transaction_date, created_at, id)``
+  UPDATE anchored on the last unaffected row.
+"""
+
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, case, cast, func, or_, select, tuple_, update, String
+from sqlalchemy.orm import Session
+
+from ....models.banking import BankAccount, BankTransaction, Till, TillTransaction
+
+BANK_INFLOW_TYPES = ("deposit", "transfer_in", "refund", "interest")
+BANK_OUTFLOW_TYPES = ("withdrawal", "transfer_out", "payment", "fee")
+
+
+def bank_signed_delta_expr():
+    """SQL expression mirroring ``_signed_base_delta_for_bank_transaction``."""
+    tt = func.lower(cast(BankTransaction.transaction_type, String))
+    return case(
+        (tt.in_(BANK_INFLOW_TYPES), BankTransaction.base_amount),
+        (tt.in_(BANK_OUTFLOW_TYPES), -BankTransaction.base_amount),
+        (tt == "adjustment", BankTransaction.amount * func.coalesce(BankTransaction.exchange_rate, 1.0)),
+        else_=BankTransaction.base_amount,
+    )
+
+
+def till_signed_delta_expr():
+    """SQL expression mirroring the till deposit / withdrawal sign rules."""
+    tt = func.lower(cast(TillTransaction.transaction_type, String))
+    return case(
+        (tt == "withdrawal", -TillTransaction.amount),
+        else_=TillTransaction.amount,
+    )
+
+
+def till_signed_delta(transaction_type: Any, amount: float) -> float:
+    key = str(getattr(transaction_type, "value", transaction_type) or "").split(".")[-1].lower()
+    if key == "withdrawal":
+        return -float(amount)
+    return float(amount)
+
+
+# ------------------------------------------------------------------ #
+# Row locks
+# ------------------------------------------------------------------ #
+def lock_bank_account(db: Session, account_id: Any, tenant_id: Any) -> Optional[BankAccount]:
+    """Take the per-account write lock; held until the caller commits."""
+    return (
+        db.query(BankAccount)
+        .filter(and_(BankAccount.id == account_id, BankAccount.tenant_id == tenant_id))
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
+def lock_till(db: Session, till_id: Any, tenant_id: Any) -> Optional[Till]:
+    """Take the per-till write lock; held until the caller commits."""
+    return (
+        db.query(Till)
+        .filter(and_(Till.id == till_id, Till.tenant_id == tenant_id))
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
+def lock_bank_accounts(db: Session, account_ids, tenant_id: Any) -> None:
+    """Lock several accounts in id order so two movers never deadlock."""
+    for account_id in sorted({str(a) for a in account_ids if a}):
+        lock_bank_account(db, account_id, tenant_id)
+
+
+# ------------------------------------------------------------------ #
+# Appends
+# ------------------------------------------------------------------ #
+def _apply_delta(db: Session, model, row_id: Any, delta: float) -> float:
+    stmt = (
+        update(model)
+        .where(model.id == row_id)
+        .values(current_balance=func.coalesce(model.current_balance, 0.0) + delta, updated_at=datetime.utcnow())
+        .returning(model.current_balance)
+    )
+    return float(db.execute(stmt, execution_options={"synchronize_session": False}).scalar_one())
+
+
+def apply_bank_balance_delta(db: Session, account_id: Any, delta: float) -> float:
+    """Atomically move ``BankAccount.current_balance`` and return the new value."""
+    return _apply_delta(db, BankAccount, account_id, delta)
+
+
+def apply_till_balance_delta(db: Session, till_id: Any, delta: float) -> float:
+    """Atomically move ``Till.current_balance`` and return the new value."""
+    return _apply_delta(db, Till, till_id, delta)
+
+
+def _has_later_rows(db: Session, model, owner_col, owner_id: Any, when: datetime, created_at: datetime) -> bool:
+    return db.query(
+        db.query(model.id)
+        .filter(
+            owner_col == owner_id,
+            or_(
+                model.transaction_date > when,
+                and_(model.transaction_date == when, model.created_at > created_at),
+            ),
+        )
+        .exists()
+    ).scalar()
+
+
+def is_back_dated_bank_transaction(db: Session, account_id: Any, when: datetime, created_at: datetime) -> bool:
+    return _has_later_rows(db, BankTransaction, BankTransaction.bank_account_id, account_id, when, created_at)
+
+
+def is_back_dated_till_transaction(db: Session, till_id: Any, when: datetime, created_at: datetime) -> bool:
+    return _has_later_rows(db, TillTransaction, TillTransaction.till_id, till_id, when, created_at)
+
+
+# ------------------------------------------------------------------ #
+# Set-based recompute
+# ------------------------------------------------------------------ #
+def _recompute(
+    db: Session,
+    model,
+    owner_col,
+    owner_id: Any,
+    opening: float,
+    delta_expr,
+    from_date: Optional[datetime],
+) -> Tuple[float, int]:
+    order_cols = (model.transaction_date, model.created_at, model.id)
+    anchor = opening
+    scope = [owner_col == owner_id]
+
+    if from_date is not None:
+        prior = (
+            db.query(model.running_balance, *order_cols)
+            .filter(owner_col == owner_id, model.transaction_date < from_date)
+            .order_by(*(c.desc() for c in order_cols))
+            .first()
+        )
+        if prior is not None:
+            anchor = float(prior[0] or 0.0)
+            scope.append(tuple_(*order_cols) > tuple_(*prior[1:]))
+
+    window = (
+        select(
+            model.id.label("id"),
+            (anchor + func.sum(delta_expr).over(order_by=order_cols)).label("balance"),
+        )
+        .where(*scope)
+        .subquery()
+    )
+    result = db.execute(
+        update(model)
+        .where(model.id == window.c.id)
+        .where(model.running_balance.is_distinct_from(window.c.balance))
+        .values(running_balance=window.c.balance),
+        execution_options={"synchronize_session": False},
+    )
+
+    last = (
+        db.query(model.running_balance)
+        .filter(owner_col == owner_id)
+        .order_by(*(c.desc() for c in order_cols))
+        .first()
+    )
+    closing = float(last[0]) if last and last[0] is not None else float(opening)
+    return closing, int(result.rowcount or 0)
+
+
+def recompute_bank_running_balances(
+    db: Session, account: BankAccount, from_date: Optional[datetime] = None,
+) -> float:
+    """
+    Re-flow running balances for ``account`` from ``from_date`` onward (or the
+    whole history) and store the closing balance on the account. The caller
+    must hold the account lock.
+    """
+    closing, _ = _recompute(
+        db,
+        BankTransaction,
+        BankTransaction.bank_account_id,
+        account.id,
+        float(account.opening_balance or 0.0),
+        bank_signed_delta_expr(),
+        from_date,
+    )
+    account.current_balance = closing
+    account.updated_at = datetime.utcnow()
+    return closing
+
+
+def recompute_till_running_balances(
+    db: Session, till: Till, from_date: Optional[datetime] = None,
+) -> float:
+    """Till counterpart of :func:`recompute_bank_running_balances`."""
+    closing, _ = _recompute(
+        db,
+        TillTransaction,
+        TillTransaction.till_id,
+        till.id,
+        float(till.initial_balance or 0.0),
+        till_signed_delta_expr(),
+        from_date,
+    )
+    till.current_balance = closing
+    till.updated_at = datetime.utcnow()
+    return closing
@@ -0,0 +1,343 @@
+"""
+Daily cash-position rollups
+
+Derives one DailyCashBalance row per (bank account | till, day) from the
+transaction tables. The job is incremental: per source it finds the earliest
+day whose transactions changed since the source's high-water mark on
+``updated_at`` (or that was flagged dirty by a delete), and rebuilds that day
+and every later day with one windowed aggregate anchored on the previous
+day's closing balance. Cash-flow queries read the rollup rows only.
+
+Runs for one tenant are serialized with a transaction-level advisory lock,
+as the rebuild deletes and re-inserts rows. scripts/run_cash_rollups.py
+keeps the rollups current; a cash-flow read only refreshes them when the
+last run is older than REFRESH_ON_READ_AFTER, and skips the refresh rather
+than wait when another run holds the lock.
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func, literal, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ....models.banking import (
+    BankAccount, BankTransaction, Till, TillTransaction, DailyCashBalance, CashRollupState,
+)
+from .balances import bank_signed_delta_expr, till_signed_delta_expr
+
+SOURCE_BANK = "bank"
+SOURCE_TILL = "till"
+# cash_rollup_state row (source_id = tenant id) whose last_run_at is stamped by
+# every run, including runs that found nothing to rebuild
+SOURCE_TENANT_RUN = "run"
+
+# Rows committed by transactions that started before the previous run can
+# carry an updated_at slightly behind its high-water mark; re-reading a short
+# overlap is harmless because the rebuild is idempotent.
+ROLLUP_OVERLAP = timedelta(minutes=5)
+REFRESH_ON_READ_AFTER = timedelta(minutes=1)
+
+
+def _sources():
+    return {
+        SOURCE_BANK: {
+            "model": BankTransaction,
+            "owner": BankTransaction.bank_account_id,
+            "delta": bank_signed_delta_expr,
+            "parent": BankAccount,
+            "opening": BankAccount.opening_balance,
+        },
+        SOURCE_TILL: {
+            "model": TillTransaction,
+            "owner": TillTransaction.till_id,
+            "delta": till_signed_delta_expr,
+            "parent": Till,
+            "opening": Till.initial_balance,
+        },
+    }
+
+
+def mark_cash_rollup_dirty(db: Session, tenant_id: Any, source_type: str, source_id: Any, from_day) -> None:
+    """
+    Flag a source for re-flow from ``from_day``. Needed where a change leaves
+    no row behind to advance ``updated_at`` (deletes, moved dates, rebases).
+    Runs inside the caller's transaction.
+    """
+    if from_day is None or source_id is None:
+        return
+    if isinstance(from_day, datetime):
+        from_day = from_day.date()
+    stmt = pg_insert(CashRollupState).values(
+        tenant_id=tenant_id, source_type=source_type, source_id=source_id, dirty_from=from_day,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CashRollupState.tenant_id, CashRollupState.source_type, CashRollupState.source_id],
+        set_={"dirty_from": func.least(func.coalesce(CashRollupState.dirty_from, from_day), from_day)},
+    )
+    db.execute(stmt)
+
+
+def _touched_sources(db: Session, tenant_id: Any, source_type: str, spec: Dict[str, Any]) -> Dict[Any, date]:
+    """Earliest changed day per source since its high-water mark, merged with pending dirty marks."""
+    model, owner = spec["model"], spec["owner"]
+    states = {
+        row.source_id: row
+        for row in db.query(CashRollupState).filter(
+            CashRollupState.tenant_id == tenant_id, CashRollupState.source_type == source_type,
+        )
+    }
+
+    state_join = and_(
+        CashRollupState.tenant_id == model.tenant_id,
+        CashRollupState.source_type == source_type,
+        CashRollupState.source_id == owner,
+    )
+    query = (
+        db.query(owner, func.min(func.date(model.transaction_date)))
+        .outerjoin(CashRollupState, state_join)
+        .filter(model.tenant_id == tenant_id)
+        .filter(
+            or_(
+                CashRollupState.high_water_mark.is_(None),
+                model.updated_at > CashRollupState.high_water_mark - ROLLUP_OVERLAP,
+            )
+        )
+        .group_by(owner)
+    )
+
+    touched: Dict[Any, date] = {source_id: day for source_id, day in query.all()}
+    for source_id, state in states.items():
+        if state.dirty_from is not None:
+            current = touched.get(source_id)
+            touched[source_id] = state.dirty_from if current is None else min(current, state.dirty_from)
+    return touched
+
+
+def _rebuild_source(
+    db: Session, tenant_id: Any, source_type: str, spec: Dict[str, Any], source_id: Any, from_day: date,
+) -> int:
+    model, owner = spec["model"], spec["owner"]
+
+    db.query(DailyCashBalance).filter(
+        DailyCashBalance.tenant_id == tenant_id,
+        DailyCashBalance.source_type == source_type,
+        DailyCashBalance.source_id == source_id,
+        DailyCashBalance.position_date >= from_day,
+    ).delete(synchronize_session=False)
+
+    previous = (
+        db.query(DailyCashBalance.closing_balance)
+        .filter(
+            DailyCashBalance.tenant_id == tenant_id,
+            DailyCashBalance.source_type == source_type,
+            DailyCashBalance.source_id == source_id,
+            DailyCashBalance.position_date < from_day,
+        )
+        .order_by(DailyCashBalance.position_date.desc())
+        .first()
+    )
+    if previous is not None:
+        anchor = float(previous[0] or 0.0)
+    else:
+        opening = db.query(spec["opening"]).filter(spec["parent"].id == source_id).scalar()
+        anchor = float(opening or 0.0)
+        from_day = date.min
+
+    delta = spec["delta"]()
+    day = func.date(model.transaction_date).label("position_date")
+    daily = (
+        select(
+            day,
+            func.sum(func.greatest(delta, 0.0)).label("inflow"),
+            func.sum(func.greatest(-delta, 0.0)).label("outflow"),
+            func.count().label("transaction_count"),
+        )
+        .where(owner == source_id, model.tenant_id == tenant_id, func.date(model.transaction_date) >= from_day)
+        .group_by(day)
+        .subquery()
+    )
+    closing = anchor + func.sum(daily.c.inflow - daily.c.outflow).over(order_by=daily.c.position_date)
+    windowed = select(
+        daily.c.position_date,
+        daily.c.inflow,
+        daily.c.outflow,
+        daily.c.transaction_count,
+        closing.label("closing_balance"),
+    ).subquery()
+
+    now = datetime.utcnow()
+    rows = select(
+        func.gen_random_uuid(),
+        literal(uuid.UUID(str(tenant_id)), DailyCashBalance.tenant_id.type),
+        literal(source_type, DailyCashBalance.source_type.type),
+        literal(uuid.UUID(str(source_id)), DailyCashBalance.source_id.type),
+        windowed.c.position_date,
+        windowed.c.closing_balance - (windowed.c.inflow - windowed.c.outflow),
+        windowed.c.inflow,
+        windowed.c.outflow,
+        windowed.c.closing_balance,
+        windowed.c.transaction_count,
+        literal(now, DailyCashBalance.updated_at.type),
+    )
+    result = db.execute(
+        pg_insert(DailyCashBalance).from_select(
+            [
+                "id", "tenant_id", "source_type", "source_id", "position_date", "opening_balance",
+                "inflow", "outflow", "closing_balance", "transaction_count", "updated_at",
+            ],
+            rows,
+        )
+    )
+    return int(result.rowcount or 0)
+
+
+def _lock_tenant(db: Session, tenant_id: Any, wait: bool) -> bool:
+    """Per-tenant advisory lock, released when the transaction ends."""
+    params = {"key": f"cash_rollups:{tenant_id}"}
+    if wait:
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), params)
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), params).scalar())
+
+
+def run_cash_rollups(db: Session, tenant_id: Any, wait: bool = True) -> Dict[str, Any]:
+    """
+    Bring the tenant's daily cash rollups up to date and commit. With
+    ``wait=False`` returns at once, with ``skipped`` set, when another run
+    for the tenant is in progress.
+    """
+    summary = {"sources": 0, "days": 0, "skipped": False}
+    if not _lock_tenant(db, tenant_id, wait):
+        summary["skipped"] = True
+        return summary
+    started = datetime.utcnow()
+    for source_type, spec in _sources().items():
+        for source_id, from_day in _touched_sources(db, tenant_id, source_type, spec).items():
+            summary["days"] += _rebuild_source(db, tenant_id, source_type, spec, source_id, from_day)
+            summary["sources"] += 1
+            stmt = pg_insert(CashRollupState).values(
+                tenant_id=tenant_id,
+                source_type=source_type,
+                source_id=source_id,
+                high_water_mark=started,
+                dirty_from=None,
+                last_run_at=started,
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[CashRollupState.tenant_id, CashRollupState.source_type, CashRollupState.source_id],
+                set_={"high_water_mark": started, "dirty_from": None, "last_run_at": started},
+            ))
+    stmt = pg_insert(CashRollupState).values(
+        tenant_id=tenant_id, source_type=SOURCE_TENANT_RUN, source_id=tenant_id, last_run_at=started,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[CashRollupState.tenant_id, CashRollupState.source_type, CashRollupState.source_id],
+        set_={"last_run_at": started},
+    ))
+    db.commit()
+    return summary
+
+
+def refresh_cash_rollups_for_read(db: Session, tenant_id: Any) -> None:
+    """Run the rollups before a read only when the last run is stale and no other run is in progress."""
+    last_run = (
+        db.query(CashRollupState.last_run_at)
+        .filter(
+            CashRollupState.tenant_id == tenant_id,
+            CashRollupState.source_type == SOURCE_TENANT_RUN,
+            CashRollupState.source_id == tenant_id,
+        )
+        .scalar()
+    )
+    if last_run is not None and datetime.utcnow() - last_run < REFRESH_ON_READ_AFTER:
+        return
+    run_cash_rollups(db, tenant_id, wait=False)
+
+
+# ------------------------------------------------------------------ #
+# Reads
+# ------------------------------------------------------------------ #
+def get_daily_cash_balances(
+    db: Session,
+    tenant_id: Any,
+    start_date: date,
+    end_date: date,
+    source_type: Optional[str] = None,
+    source_id: Optional[str] = None,
+) -> List[DailyCashBalance]:
+    query = db.query(DailyCashBalance).filter(
+        DailyCashBalance.tenant_id == tenant_id,
+        DailyCashBalance.position_date >= start_date,
+        DailyCashBalance.position_date <= end_date,
+    )
+    if source_type:
+        query = query.filter(DailyCashBalance.source_type == source_type)
+    if source_id:
+        query = query.filter(DailyCashBalance.source_id == source_id)
+    return query.order_by(DailyCashBalance.position_date, DailyCashBalance.source_type).all()
+
+
+def get_cash_flow_series(
+    db: Session,
+    tenant_id: Any,
+    start_date: date,
+    end_date: date,
+    source_type: Optional[str] = None,
+    source_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One point per calendar day with tenant-wide (or filtered) opening,
+    inflow, outflow and closing. Sources without activity on a day carry
+    their last closing balance forward.
+    """
+    scope = [DailyCashBalance.tenant_id == tenant_id]
+    if source_type:
+        scope.append(DailyCashBalance.source_type == source_type)
+    if source_id:
+        scope.append(DailyCashBalance.source_id == source_id)
+
+    carried = (
+        db.query(DailyCashBalance.source_type, DailyCashBalance.source_id, DailyCashBalance.closing_balance)
+        .filter(*scope, DailyCashBalance.position_date < start_date)
+        .distinct(DailyCashBalance.source_type, DailyCashBalance.source_id)
+        .order_by(
+            DailyCashBalance.source_type,
+            DailyCashBalance.source_id,
+            DailyCashBalance.position_date.desc(),
+        )
+        .all()
+    )
+    balances = {(row[0], row[1]): float(row[2] or 0.0) for row in carried}
+
+    rows = get_daily_cash_balances(db, tenant_id, start_date, end_date, source_type, source_id)
+    by_day: Dict[date, List[DailyCashBalance]] = {}
+    for row in rows:
+        by_day.setdefault(row.position_date, []).append(row)
+
+    series = []
+    day = start_date
+    while day <= end_date:
+        opening = sum(balances.values())
+        inflow = outflow = 0.0
+        count = 0
+        for row in by_day.get(day, ()):
+            key = (row.source_type, row.source_id)
+            opening += float(row.opening_balance) - balances.get(key, 0.0)
+            balances[key] = float(row.closing_balance)
+            inflow += float(row.inflow)
+            outflow += float(row.outflow)
+            count += int(row.transaction_count or 0)
+        series.append({
+            "date": day,
+            "opening_balance": opening,
+            "inflow": inflow,
+            "outflow": outflow,
+            "net_cash_flow": inflow - outflow,
+            "closing_balance": sum(balances.values()),
+            "transaction_count": count,
+        })
+        day += timedelta(days=1)
+    return series
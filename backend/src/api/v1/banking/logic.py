@@ -2,7 +2,7 @@
 Banking business logic / CRUD operations
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date
 from enum import Enum as StdEnum
 from sqlalchemy.orm import Session, selectinload
@@ -10,9 +10,18 @@ from sqlalchemy import and_, func, desc, asc, cast, String
 
 from ....models.banking import (
     BankAccount, BankTransaction, CashPosition, Till, TillTransaction,
+    BankStatementImport, BankStatementLine,
     TransactionType, TransactionStatus, PaymentMethod, TillTransactionType,
     bank_account_type_slug,
 )
+from .balances import (
+    lock_bank_account, lock_bank_accounts, lock_till,
+    apply_bank_balance_delta, apply_till_balance_delta,
+    is_back_dated_bank_transaction, is_back_dated_till_transaction,
+    recompute_bank_running_balances, recompute_till_running_balances,
+    till_signed_delta,
+)
+from .cash_rollups import SOURCE_BANK, SOURCE_TILL, mark_cash_rollup_dirty
 
 
 def _bank_txn_status_text_eq(value: str):
@@ -73,6 +82,8 @@ def create_bank_account(account_data: Dict[str, Any], db: Session) -> BankAccoun
     data = dict(account_data)
     if "account_type" in data and data.get("account_type") is not None:
         data["account_type"] = bank_account_type_slug(data["account_type"])
+    if data.get("opening_balance") is None:
+        data["opening_balance"] = float(data.get("current_balance") or 0.0)
     db_account = BankAccount(**data)
     db.add(db_account)
     db.commit()
@@ -192,32 +203,33 @@ def create_bank_transaction(transaction_data: Dict[str, Any], db: Session) -> Ba
         transaction_data["base_amount"] = amount * exchange_rate
     bank_account_id = transaction_data.get("bank_account_id")
     tenant_id = transaction_data.get("tenant_id")
-    last = (
-        db.query(BankTransaction)
-        .filter(
-            and_(
-                BankTransaction.bank_account_id == bank_account_id,
-                BankTransaction.tenant_id == tenant_id,
-            ),
-        )
-        .order_by(desc(BankTransaction.transaction_date), desc(BankTransaction.created_at))
-        .first()
-    )
-    account = None
-    if bank_account_id and tenant_id:
-        account = get_bank_account_by_id(str(bank_account_id), db, str(tenant_id))
-    prior = float(last.running_balance) if last and last.running_balance is not None else (
-        float(account.current_balance) if account else 0.0
-    )
+    account = lock_bank_account(db, bank_account_id, tenant_id)
+    if not account:
+        raise ValueError(f"Bank account {bank_account_id} not found")
+
     delta = _signed_base_delta_for_bank_transaction(
         transaction_data.get("transaction_type"),
         amount,
         exchange_rate,
         transaction_data.get("base_amount"),
     )
-    transaction_data["running_balance"] = prior + delta
-    db_transaction = BankTransaction(**transaction_data)
-    db.add(db_transaction)
+    if transaction_data.get("created_at") is None:
+        transaction_data["created_at"] = datetime.utcnow()
+    transaction_date = transaction_data.get("transaction_date")
+    back_dated = is_back_dated_bank_transaction(
+        db, account.id, transaction_date, transaction_data["created_at"],
+    )
+
+    if back_dated:
+        transaction_data["running_balance"] = 0.0
+        db_transaction = BankTransaction(**transaction_data)
+        db.add(db_transaction)
+        db.flush()
+        recompute_bank_running_balances(db, account, from_date=transaction_date)
+    else:
+        transaction_data["running_balance"] = apply_bank_balance_delta(db, account.id, delta)
+        db_transaction = BankTransaction(**transaction_data)
+        db.add(db_transaction)
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
@@ -297,6 +309,11 @@ def get_unreconciled_transactions(db: Session, tenant_id: str) -> List[BankTrans
     ).order_by(desc(BankTransaction.transaction_date)).all()
 
 
+_BANK_BALANCE_FIELDS = (
+    "amount", "base_amount", "exchange_rate", "transaction_type", "transaction_date", "bank_account_id",
+)
+
+
 def update_bank_transaction(transaction_id: str, transaction_data: Dict[str, Any], db: Session, tenant_id: str) -> Optional[BankTransaction]:
     """Update bank transaction"""
     db_transaction = get_bank_transaction_by_id(transaction_id, db, tenant_id)
@@ -315,10 +332,30 @@ def update_bank_transaction(transaction_id: str, transaction_data: Dict[str, Any
         if _k in transaction_data and transaction_data.get(_k) is not None:
             transaction_data[_k] = _bank_enum_storage_str(transaction_data[_k])
 
+    affects_balance = any(
+        key in transaction_data and transaction_data[key] != getattr(db_transaction, key)
+        for key in _BANK_BALANCE_FIELDS
+    )
+    old_account_id = db_transaction.bank_account_id
+    old_date = db_transaction.transaction_date
+    if affects_balance:
+        lock_bank_accounts(db, [old_account_id, transaction_data.get("bank_account_id")], tenant_id)
+
     for key, value in transaction_data.items():
         if hasattr(db_transaction, key):
             setattr(db_transaction, key, value)
 
+    if affects_balance:
+        if "amount" in transaction_data and "base_amount" not in transaction_data:
+            db_transaction.base_amount = float(db_transaction.amount or 0) * float(db_transaction.exchange_rate or 1.0)
+        db.flush()
+        from_date = min(d for d in (old_date, db_transaction.transaction_date) if d is not None)
+        for account_id in {str(old_account_id), str(db_transaction.bank_account_id)}:
+            account = get_bank_account_by_id(account_id, db, tenant_id)
+            if account:
+                recompute_bank_running_balances(db, account, from_date=from_date)
+                mark_cash_rollup_dirty(db, tenant_id, SOURCE_BANK, account.id, from_date)
+
     db_transaction.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_transaction)
@@ -331,7 +368,13 @@ def delete_bank_transaction(transaction_id: str, db: Session, tenant_id: str) ->
     if not db_transaction:
         return False
 
+    account = lock_bank_account(db, db_transaction.bank_account_id, tenant_id)
+    from_date = db_transaction.transaction_date
     db.delete(db_transaction)
+    db.flush()
+    if account:
+        recompute_bank_running_balances(db, account, from_date=from_date)
+        mark_cash_rollup_dirty(db, tenant_id, SOURCE_BANK, account.id, from_date)
     db.commit()
     return True
 
@@ -354,6 +397,58 @@ def reconcile_transaction(transaction_id: str, reconciled_by: str, notes: Option
     return db_transaction
 
 
+# Statement Import Operations
+def get_statement_imports(db: Session, tenant_id: str, account_id: Optional[str] = None,
+                          skip: int = 0, limit: int = 100) -> List[BankStatementImport]:
+    """Get statement imports, newest first"""
+    query = db.query(BankStatementImport).filter(BankStatementImport.tenant_id == tenant_id)
+    if account_id:
+        query = query.filter(BankStatementImport.bank_account_id == account_id)
+    return query.order_by(desc(BankStatementImport.created_at)).offset(skip).limit(limit).all()
+
+
+def get_statement_import_by_id(import_id: str, db: Session, tenant_id: str) -> Optional[BankStatementImport]:
+    """Get statement import by ID"""
+    return db.query(BankStatementImport).filter(
+        and_(
+            BankStatementImport.id == import_id,
+            BankStatementImport.tenant_id == tenant_id
+        )
+    ).first()
+
+
+def get_statement_lines(
+    import_id: str,
+    db: Session,
+    tenant_id: str,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> Tuple[List[BankStatementLine], int]:
+    """Get the lines of a statement import with the total for the filter"""
+    query = db.query(BankStatementLine).filter(
+        and_(
+            BankStatementLine.import_id == import_id,
+            BankStatementLine.tenant_id == tenant_id
+        )
+    )
+    if status:
+        query = query.filter(BankStatementLine.status == status)
+    total = query.count()
+    lines = query.order_by(asc(BankStatementLine.line_number)).offset(skip).limit(limit).all()
+    return lines, total
+
+
+def get_statement_line_by_id(line_id: str, db: Session, tenant_id: str) -> Optional[BankStatementLine]:
+    """Get statement line by ID"""
+    return db.query(BankStatementLine).filter(
+        and_(
+            BankStatementLine.id == line_id,
+            BankStatementLine.tenant_id == tenant_id
+        )
+    ).first()
+
+
 # Cash Position CRUD Operations
 def create_cash_position(position_data: Dict[str, Any], db: Session) -> CashPosition:
     """Create a new cash position"""
@@ -593,10 +688,21 @@ def update_till(till_id: str, till_data: Dict[str, Any], db: Session, tenant_id:
     if not db_till:
         return None
 
+    rebase = (
+        till_data.get("initial_balance") is not None
+        and till_data["initial_balance"] != db_till.initial_balance
+    )
+    if rebase:
+        db_till = lock_till(db, till_id, tenant_id)
+
     for key, value in till_data.items():
         if hasattr(db_till, key):
             setattr(db_till, key, value)
 
+    if rebase:
+        recompute_till_running_balances(db, db_till)
+        mark_cash_rollup_dirty(db, tenant_id, SOURCE_TILL, db_till.id, date.min)
+
     db_till.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_till)
@@ -635,30 +741,29 @@ def create_till_transaction(transaction_data: Dict[str, Any], db: Session) -> Ti
     """Create a new till transaction with running balance calculation"""
     till_id = transaction_data.get("till_id")
     tenant_id = transaction_data.get("tenant_id")
-    transaction_type = transaction_data.get("transaction_type")
-    amount = transaction_data.get("amount")
-
-    current_balance = calculate_till_balance(till_id, db, tenant_id)
 
-    if transaction_type == TillTransactionType.DEPOSIT:
-        new_balance = current_balance + amount
-    elif transaction_type == TillTransactionType.WITHDRAWAL:
-        new_balance = current_balance - amount
+    till = lock_till(db, till_id, tenant_id)
+    if not till:
+        raise ValueError(f"Till {till_id} not found")
+
+    delta = till_signed_delta(transaction_data.get("transaction_type"), transaction_data.get("amount") or 0)
+    if transaction_data.get("created_at") is None:
+        transaction_data["created_at"] = datetime.utcnow()
+    transaction_date = transaction_data.get("transaction_date")
+
+    if is_back_dated_till_transaction(db, till.id, transaction_date, transaction_data["created_at"]):
+        transaction_data["running_balance"] = 0.0
+        db_transaction = TillTransaction(**transaction_data)
+        db.add(db_transaction)
+        db.flush()
+        recompute_till_running_balances(db, till, from_date=transaction_date)
     else:
-        new_balance = current_balance + amount
-
-    transaction_data["running_balance"] = new_balance
-
-    db_transaction = TillTransaction(**transaction_data)
-    db.add(db_transaction)
+        transaction_data["running_balance"] = apply_till_balance_delta(db, till.id, delta)
+        db_transaction = TillTransaction(**transaction_data)
+        db.add(db_transaction)
     db.commit()
     db.refresh(db_transaction)
 
-    till = get_till_by_id(till_id, db, tenant_id)
-    till.current_balance = new_balance
-    till.updated_at = datetime.utcnow()
-    db.commit()
-
     return db_transaction
 
 
@@ -689,6 +794,9 @@ def get_all_till_transactions(db: Session, tenant_id: str, till_id: Optional[str
     return query.order_by(TillTransaction.transaction_date.desc()).offset(skip).limit(limit).all()
 
 
+_TILL_BALANCE_FIELDS = ("amount", "transaction_type", "transaction_date")
+
+
 def update_till_transaction(transaction_id: str, transaction_data: Dict[str, Any],
                             db: Session, tenant_id: str) -> Optional[TillTransaction]:
     """Update till transaction"""
@@ -696,18 +804,22 @@ def update_till_transaction(transaction_id: str, transaction_data: Dict[str, Any
     if not db_transaction:
         return None
 
+    old_date = db_transaction.transaction_date
+    affects_balance = any(key in transaction_data for key in _TILL_BALANCE_FIELDS)
+    till = lock_till(db, db_transaction.till_id, tenant_id) if affects_balance else None
+
     for key, value in transaction_data.items():
         if hasattr(db_transaction, key):
             setattr(db_transaction, key, value)
 
-    db.commit()
-    db.refresh(db_transaction)
+    if till:
+        db.flush()
+        from_date = min(d for d in (old_date, db_transaction.transaction_date) if d is not None)
+        recompute_till_running_balances(db, till, from_date=from_date)
+        mark_cash_rollup_dirty(db, tenant_id, SOURCE_TILL, till.id, from_date)
 
-    till = get_till_by_id(str(db_transaction.till_id), db, tenant_id)
-    current_balance = calculate_till_balance(str(db_transaction.till_id), db, tenant_id)
-    till.current_balance = current_balance
-    till.updated_at = datetime.utcnow()
     db.commit()
+    db.refresh(db_transaction)
 
     return db_transaction
 
@@ -718,14 +830,40 @@ def delete_till_transaction(transaction_id: str, db: Session, tenant_id: str) ->
     if not db_transaction:
         return False
 
-    till_id = str(db_transaction.till_id)
+    till = lock_till(db, db_transaction.till_id, tenant_id)
+    from_date = db_transaction.transaction_date
     db.delete(db_transaction)
+    db.flush()
+    if till:
+        recompute_till_running_balances(db, till, from_date=from_date)
+        mark_cash_rollup_dirty(db, tenant_id, SOURCE_TILL, till.id, from_date)
     db.commit()
 
-    till = get_till_by_id(till_id, db, tenant_id)
-    current_balance = calculate_till_balance(till_id, db, tenant_id)
-    till.current_balance = current_balance
-    till.updated_at = datetime.utcnow()
+    return True
+
+
+# Balance maintenance
+def recompute_bank_account_balances(account_id: str, db: Session, tenant_id: str) -> Optional[BankAccount]:
+    """Re-flow every running balance of a bank account from its opening balance"""
+    account = lock_bank_account(db, account_id, tenant_id)
+    if not account:
+        return None
+
+    recompute_bank_running_balances(db, account)
+    mark_cash_rollup_dirty(db, tenant_id, SOURCE_BANK, account.id, date.min)
     db.commit()
+    db.refresh(account)
+    return account
 
-    return True
+
+def recompute_till_balances(till_id: str, db: Session, tenant_id: str) -> Optional[Till]:
+    """Re-flow every running balance of a till from its initial balance"""
+    till = lock_till(db, till_id, tenant_id)
+    if not till:
+        return None
+
+    recompute_till_running_balances(db, till)
+    mark_cash_rollup_dirty(db, tenant_id, SOURCE_TILL, till.id, date.min)
+    db.commit()
+    db.refresh(till)
+    return till
@@ -0,0 +1,410 @@
+"""
+Statement reconciliation
+
+Matches imported statement lines against unreconciled book entries.
+
+Book entries are loaded once per import as plain tuples and indexed in memory
+by signed amount in cents; each bucket is kept sorted by date so the date
+window is a bisect. Candidates are scored on exact amount, date distance and
+fuzzy reference / payee similarity, then assigned greedily one-to-one by
+score. Confident matches are reconciled in one bulk UPDATE; the rest are
+stored on the statement line for review.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session
+
+from ....models.banking import BankAccount, BankTransaction, BankStatementImport, BankStatementLine
+from .balances import bank_signed_delta_expr
+from .statements import detect_format, parse_statement
+
+DEFAULT_DATE_TOLERANCE_DAYS = 3
+AUTO_MATCH_THRESHOLD = 0.85
+REVIEW_THRESHOLD = 0.5
+
+AMOUNT_WEIGHT = 0.55
+DATE_WEIGHT = 0.2
+TEXT_WEIGHT = 0.25
+UNIQUE_BONUS = 0.1
+REFERENCE_ONLY_WEIGHT = 0.3
+
+_BULK_CHUNK = 5000
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+
+
+def _cents(amount: float) -> int:
+    return int(round(float(amount) * 100))
+
+
+def _norm(value: Optional[str]) -> str:
+    return _NON_ALNUM.sub("", (value or "").upper())
+
+
+def _text_similarity(line: Dict[str, Any], entry: Dict[str, Any]) -> float:
+    line_ref = _norm(line.get("reference")) or _norm(line.get("external_id"))
+    entry_refs = [r for r in (entry["reference"], entry["external_reference"]) if r]
+    if line_ref and entry_refs:
+        for ref in entry_refs:
+            if len(ref) >= 3 and (ref in line_ref or line_ref in ref):
+                return 1.0
+        haystack = _norm(line.get("description"))
+        if any(len(ref) >= 4 and ref in haystack for ref in entry_refs):
+            return 1.0
+
+    line_text = _norm(line.get("payee")) or _norm(line.get("description"))
+    entry_text = entry["payee"] or entry["description"]
+    if not line_text or not entry_text:
+        return 0.0
+    matcher = SequenceMatcher(None, line_text, entry_text, autojunk=False)
+    if matcher.real_quick_ratio() < 0.4 or matcher.quick_ratio() < 0.4:
+        return 0.0
+    return matcher.ratio()
+
+
+class BookIndex:
+    """In-memory index of unreconciled entries by (amount, date) and reference."""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+        buckets: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        by_reference: Dict[str, List[int]] = defaultdict(list)
+        for position, entry in enumerate(entries):
+            buckets[entry["cents"]].append((entry["day"], position))
+            for ref in (entry["reference"], entry["external_reference"]):
+                if ref and len(ref) >= 4:
+                    by_reference[ref].append(position)
+        self.days: Dict[int, List[int]] = {}
+        self.positions: Dict[int, List[int]] = {}
+        for cents, rows in buckets.items():
+            rows.sort()
+            self.days[cents] = [day for day, _ in rows]
+            self.positions[cents] = [position for _, position in rows]
+        self.by_reference = by_reference
+
+    def amount_candidates(self, cents: int, day: int, tolerance: int) -> List[int]:
+        days = self.days.get(cents)
+        if not days:
+            return []
+        lo = bisect_left(days, day - tolerance)
+        hi = bisect_right(days, day + tolerance)
+        return self.positions[cents][lo:hi]
+
+    def reference_candidates(self, line: Dict[str, Any]) -> List[int]:
+        ref = _norm(line.get("reference")) or _norm(line.get("external_id"))
+        return list(self.by_reference.get(ref, ())) if ref else []
+
+
+def match_lines(
+    lines: List[Dict[str, Any]],
+    entries: List[Dict[str, Any]],
+    date_tolerance_days: int = DEFAULT_DATE_TOLERANCE_DAYS,
+    auto_threshold: float = AUTO_MATCH_THRESHOLD,
+    review_threshold: float = REVIEW_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Score and assign statement lines to book entries.
+
+    ``entries`` are dicts with ``id``, ``date``, ``amount`` (signed),
+    ``reference``, ``external_reference``, ``payee`` and ``description``.
+    Returns one result per line: ``{"status", "transaction_id", "score"}``
+    where status is ``matched``, ``review`` or ``unmatched``.
+    """
+    for entry in entries:
+        entry["cents"] = _cents(entry["amount"])
+        entry["day"] = entry["date"].toordinal()
+        entry["reference"] = _norm(entry.get("reference"))
+        entry["external_reference"] = _norm(entry.get("external_reference"))
+        entry["payee"] = _norm(entry.get("payee"))
+        entry["description"] = _norm(entry.get("description"))
+    index = BookIndex(entries)
+    tolerance = max(0, int(date_tolerance_days))
+
+    candidates: List[List[Tuple[float, int]]] = []
+    entry_demand: Dict[int, int] = defaultdict(int)
+    for line in lines:
+        cents = _cents(line["amount"])
+        day = line["transaction_date"].toordinal()
+        scored: Dict[int, float] = {}
+        for position in index.amount_candidates(cents, day, tolerance):
+            entry = entries[position]
+            closeness = 1.0 - abs(entry["day"] - day) / (tolerance + 1)
+            scored[position] = (
+                AMOUNT_WEIGHT + DATE_WEIGHT * closeness + TEXT_WEIGHT * _text_similarity(line, entry)
+            )
+        for position in index.reference_candidates(line):
+            if position not in scored:
+                entry = entries[position]
+                closeness = max(0.0, 1.0 - abs(entry["day"] - day) / (tolerance + 1))
+                scored[position] = REFERENCE_ONLY_WEIGHT + DATE_WEIGHT * closeness
+        ranked = sorted(((score, position) for position, score in scored.items()), reverse=True)
+        candidates.append(ranked)
+        for _, position in ranked:
+            entry_demand[position] += 1
+
+    pairs = []
+    for line_index, ranked in enumerate(candidates):
+        for score, position in ranked:
+            if len(ranked) == 1 and entry_demand[position] == 1:
+                score = min(1.0, score + UNIQUE_BONUS)
+            if score >= review_threshold:
+                pairs.append((score, line_index, position))
+    pairs.sort(key=lambda p: (-p[0], p[1]))
+
+    results = [{"status": "unmatched", "transaction_id": None, "score": None} for _ in lines]
+    taken_lines = set()
+    taken_entries = set()
+    for score, line_index, position in pairs:
+        if line_index in taken_lines or position in taken_entries:
+            continue
+        taken_lines.add(line_index)
+        taken_entries.add(position)
+        results[line_index] = {
+            "status": "matched" if score >= auto_threshold else "review",
+            "transaction_id": entries[position]["id"],
+            "score": round(score, 4),
+        }
+    return results
+
+
+# ------------------------------------------------------------------ #
+# Persistence
+# ------------------------------------------------------------------ #
+def load_unreconciled_entries(
+    db: Session, tenant_id: str, account_id: str, start: datetime, end: datetime,
+) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(
+            BankTransaction.id,
+            BankTransaction.transaction_date,
+            bank_signed_delta_expr(),
+            BankTransaction.reference_number,
+            BankTransaction.external_reference,
+            BankTransaction.counterparty_name,
+            BankTransaction.description,
+        )
+        .filter(
+            and_(
+                BankTransaction.tenant_id == tenant_id,
+                BankTransaction.bank_account_id == account_id,
+                BankTransaction.is_reconciled == False,
+                BankTransaction.transaction_date >= start,
+                BankTransaction.transaction_date < end,
+            )
+        )
+        .all()
+    )
+    return [
+        {
+            "id": row[0],
+            "date": row[1],
+            "amount": float(row[2] or 0.0),
+            "reference": row[3],
+            "external_reference": row[4],
+            "payee": row[5],
+            "description": row[6],
+        }
+        for row in rows
+    ]
+
+
+def bulk_reconcile(
+    db: Session, tenant_id: str, account_id: Any, transaction_ids: List[Any], user_id: str,
+) -> set:
+    """Reconcile the still unreconciled transactions of ``account_id``; returns the ids actually updated."""
+    now = datetime.utcnow()
+    updated = set()
+    for i in range(0, len(transaction_ids), _BULK_CHUNK):
+        chunk = transaction_ids[i:i + _BULK_CHUNK]
+        result = db.execute(
+            update(BankTransaction)
+            .where(
+                BankTransaction.tenant_id == tenant_id,
+                BankTransaction.bank_account_id == account_id,
+                BankTransaction.id.in_(chunk),
+                BankTransaction.is_reconciled == False,
+            )
+            .values(is_reconciled=True, reconciled_date=now, reconciled_by=user_id, updated_at=now)
+            .returning(BankTransaction.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated.update(row[0] for row in result)
+    return updated
+
+
+def _unreconcile(db: Session, tenant_id: str, transaction_id: Any) -> None:
+    db.query(BankTransaction).filter(
+        BankTransaction.tenant_id == tenant_id,
+        BankTransaction.id == transaction_id,
+    ).update(
+        {
+            BankTransaction.is_reconciled: False,
+            BankTransaction.reconciled_date: None,
+            BankTransaction.reconciled_by: None,
+            BankTransaction.updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+
+
+def import_statement(
+    db: Session,
+    tenant_id: str,
+    account: BankAccount,
+    user_id: str,
+    content: bytes,
+    file_name: Optional[str] = None,
+    file_format: Optional[str] = None,
+    date_tolerance_days: int = DEFAULT_DATE_TOLERANCE_DAYS,
+    auto_reconcile: bool = True,
+) -> BankStatementImport:
+    """Parse a statement file, match it and persist the lines in one transaction."""
+    file_format = file_format or detect_format(file_name, content)
+    lines = parse_statement(content, file_format)
+
+    statement = BankStatementImport(
+        tenant_id=tenant_id,
+        bank_account_id=account.id,
+        file_name=file_name,
+        file_format=file_format,
+        imported_by=user_id,
+        total_lines=len(lines),
+    )
+    db.add(statement)
+    db.flush()
+
+    results: List[Dict[str, Any]] = []
+    if lines:
+        dates = [line["transaction_date"] for line in lines]
+        statement.period_start = min(dates)
+        statement.period_end = max(dates)
+        window = timedelta(days=date_tolerance_days + 1)
+        entries = load_unreconciled_entries(
+            db, tenant_id, account.id, statement.period_start - window, statement.period_end + window,
+        )
+        results = match_lines(lines, entries, date_tolerance_days)
+
+    if not auto_reconcile:
+        for result in results:
+            if result["status"] == "matched":
+                result["status"] = "review"
+
+    matched_ids = [r["transaction_id"] for r in results if r["status"] == "matched"]
+    if matched_ids:
+        reconciled = bulk_reconcile(db, tenant_id, account.id, matched_ids, user_id)
+        for result in results:
+            if result["status"] == "matched" and result["transaction_id"] not in reconciled:
+                # Reconciled by someone else since the entries were loaded
+                result.update(status="unmatched", transaction_id=None, score=None)
+
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(
+        BankStatementLine,
+        [
+            {
+                "tenant_id": tenant_id,
+                "import_id": statement.id,
+                "bank_account_id": account.id,
+                "line_number": line["line_number"],
+                "transaction_date": line["transaction_date"],
+                "amount": line["amount"],
+                "reference": line.get("reference"),
+                "payee": line.get("payee"),
+                "description": line.get("description"),
+                "external_id": line.get("external_id"),
+                "status": result["status"],
+                "match_score": result["score"],
+                "matched_transaction_id": result["transaction_id"],
+                "resolved_by": user_id if result["status"] == "matched" else None,
+                "resolved_at": now if result["status"] == "matched" else None,
+            }
+            for line, result in zip(lines, results)
+        ],
+    )
+
+    statement.matched_count = sum(1 for r in results if r["status"] == "matched")
+    statement.review_count = sum(1 for r in results if r["status"] == "review")
+    statement.unmatched_count = sum(1 for r in results if r["status"] == "unmatched")
+    db.commit()
+    db.refresh(statement)
+    return statement
+
+
+def _count_delta(statement: BankStatementImport, status: str, delta: int) -> None:
+    field = {"matched": "matched_count", "review": "review_count", "unmatched": "unmatched_count"}.get(status)
+    if field:
+        setattr(statement, field, max(0, (getattr(statement, field) or 0) + delta))
+
+
+def resolve_statement_line(
+    db: Session,
+    tenant_id: str,
+    line: BankStatementLine,
+    user_id: str,
+    transaction_id: Optional[str] = None,
+    ignore: bool = False,
+) -> BankStatementLine:
+    """
+    Confirm a suggested (or manually chosen) match, or ignore the line.
+    A line that was matched releases its transaction when it is ignored or
+    matched to another one. Raises 404 when the transaction is not on the
+    statement's account and 409 when it is already reconciled.
+    """
+    line = (
+        db.query(BankStatementLine)
+        .filter(BankStatementLine.id == line.id, BankStatementLine.tenant_id == tenant_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    statement = line.statement_import
+    previous = line.status
+    previous_transaction = line.matched_transaction_id if previous == "matched" else None
+    now = datetime.utcnow()
+    if ignore:
+        if previous_transaction:
+            _unreconcile(db, tenant_id, previous_transaction)
+        line.status = "ignored"
+        line.matched_transaction_id = None
+    else:
+        target = transaction_id or line.matched_transaction_id
+        if not target:
+            raise ValueError("No transaction to match this statement line to")
+        if str(target) != str(previous_transaction):
+            transaction = (
+                db.query(BankTransaction)
+                .filter(
+                    BankTransaction.tenant_id == tenant_id,
+                    BankTransaction.bank_account_id == line.bank_account_id,
+                    BankTransaction.id == target,
+                )
+                .with_for_update()
+                .first()
+            )
+            if transaction is None:
+                raise HTTPException(status_code=404, detail="Bank transaction not found on this account")
+            if transaction.is_reconciled:
+                raise HTTPException(status_code=409, detail="Bank transaction is already reconciled")
+            if previous_transaction:
+                _unreconcile(db, tenant_id, previous_transaction)
+            if not bulk_reconcile(db, tenant_id, line.bank_account_id, [transaction.id], user_id):
+                raise HTTPException(status_code=409, detail="Bank transaction is already reconciled")
+            target = transaction.id
+        line.status = "matched"
+        line.matched_transaction_id = target
+    line.resolved_by = user_id
+    line.resolved_at = now
+
+    if statement is not None and previous != line.status:
+        _count_delta(statement, previous, -1)
+        _count_delta(statement, line.status, 1)
+    db.commit()
+    db.refresh(line)
+    return line
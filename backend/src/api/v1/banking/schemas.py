@@ -4,7 +4,7 @@ Banking Pydantic Schemas for API
 
 import math
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, field_validator
 
@@ -569,3 +569,141 @@ class TillTransactionsResponse(BaseModel):
 
     class Config:
         populate_by_name = True
+
+
+# Statement Import Schemas
+class BankStatementImport(BaseModel):
+    id: str
+    bank_account_id: str = Field(alias="bankAccountId")
+    file_name: Optional[str] = Field(alias="fileName", default=None)
+    file_format: str = Field(alias="fileFormat")
+    period_start: Optional[datetime] = Field(alias="periodStart", default=None)
+    period_end: Optional[datetime] = Field(alias="periodEnd", default=None)
+    total_lines: int = Field(alias="totalLines", default=0)
+    matched_count: int = Field(alias="matchedCount", default=0)
+    review_count: int = Field(alias="reviewCount", default=0)
+    unmatched_count: int = Field(alias="unmatchedCount", default=0)
+    imported_by: str = Field(alias="importedBy")
+    created_at: datetime = Field(alias="createdAt")
+
+    @field_validator('id', 'bank_account_id', 'imported_by', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, uuid.UUID):
+            return str(v)
+        return v
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class BankStatementLine(BaseModel):
+    id: str
+    import_id: str = Field(alias="importId")
+    line_number: int = Field(alias="lineNumber")
+    transaction_date: datetime = Field(alias="transactionDate")
+    amount: float
+    reference: Optional[str] = None
+    payee: Optional[str] = None
+    description: Optional[str] = None
+    external_id: Optional[str] = Field(alias="externalId", default=None)
+    status: str
+    match_score: Optional[float] = Field(alias="matchScore", default=None)
+    matched_transaction_id: Optional[str] = Field(alias="matchedTransactionId", default=None)
+    resolved_at: Optional[datetime] = Field(alias="resolvedAt", default=None)
+
+    @field_validator('id', 'import_id', 'matched_transaction_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, uuid.UUID):
+            return str(v)
+        return v
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class BankStatementImportResponse(BaseModel):
+    statement_import: BankStatementImport = Field(alias="statementImport")
+
+    class Config:
+        populate_by_name = True
+
+
+class BankStatementImportsResponse(BaseModel):
+    statement_imports: List[BankStatementImport] = Field(alias="statementImports")
+    total: int
+
+    class Config:
+        populate_by_name = True
+
+
+class BankStatementLinesResponse(BaseModel):
+    statement_lines: List[BankStatementLine] = Field(alias="statementLines")
+    total: int
+
+    class Config:
+        populate_by_name = True
+
+
+class BankStatementLineResponse(BaseModel):
+    statement_line: BankStatementLine = Field(alias="statementLine")
+
+    class Config:
+        populate_by_name = True
+
+
+class StatementLineResolve(BaseModel):
+    transaction_id: Optional[str] = Field(alias="transactionId", default=None)
+    ignore: bool = False
+
+    class Config:
+        populate_by_name = True
+
+
+# Cash Flow Schemas
+class DailyCashBalance(BaseModel):
+    source_type: str = Field(alias="sourceType")
+    source_id: str = Field(alias="sourceId")
+    position_date: date = Field(alias="positionDate")
+    opening_balance: float = Field(alias="openingBalance")
+    inflow: float
+    outflow: float
+    closing_balance: float = Field(alias="closingBalance")
+    transaction_count: int = Field(alias="transactionCount")
+
+    @field_validator('source_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, uuid.UUID):
+            return str(v)
+        return v
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class CashFlowPoint(BaseModel):
+    date: date
+    opening_balance: float = Field(alias="openingBalance")
+    inflow: float
+    outflow: float
+    net_cash_flow: float = Field(alias="netCashFlow")
+    closing_balance: float = Field(alias="closingBalance")
+    transaction_count: int = Field(alias="transactionCount")
+
+    class Config:
+        populate_by_name = True
+
+
+class CashFlowResponse(BaseModel):
+    start_date: date = Field(alias="startDate")
+    end_date: date = Field(alias="endDate")
+    series: List[CashFlowPoint]
+    positions: List[DailyCashBalance] = []
+
+    class Config:
+        populate_by_name = True
@@ -0,0 +1,277 @@
+"""
+Bank statement parsers
+
+Turns CSV, OFX, QIF and CAMT.053 statement files into plain line dicts:
+
+    {"line_number", "transaction_date", "amount", "reference", "payee",
+     "description", "external_id"}
+
+``amount`` is signed from the account holder's point of view (credits
+positive, debits negative). Everything is parsed locally; nothing leaves the
+process.
+"""
+
+import csv
+import io
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from dateutil import parser as date_parser
+
+SUPPORTED_FORMATS = ("csv", "ofx", "qif", "camt053")
+
+_CSV_DATE_KEYS = ("date", "transaction date", "booking date", "posted", "posting date", "value date")
+_CSV_AMOUNT_KEYS = ("amount", "transaction amount", "value")
+_CSV_CREDIT_KEYS = ("credit", "paid in", "deposit", "deposits", "money in")
+_CSV_DEBIT_KEYS = ("debit", "paid out", "withdrawal", "withdrawals", "money out")
+_CSV_REFERENCE_KEYS = ("reference", "ref", "check number", "cheque number", "transaction id", "id")
+_CSV_PAYEE_KEYS = ("payee", "name", "counterparty", "beneficiary", "merchant")
+_CSV_DESCRIPTION_KEYS = ("description", "details", "memo", "narrative", "particulars")
+
+
+class StatementParseError(ValueError):
+    pass
+
+
+def detect_format(file_name: Optional[str], content: bytes) -> str:
+    name = (file_name or "").lower()
+    if name.endswith(".qif"):
+        return "qif"
+    if name.endswith((".ofx", ".qfx")):
+        return "ofx"
+    if name.endswith(".csv"):
+        return "csv"
+    head = content[:2048].decode("utf-8", errors="ignore")
+    if "camt.053" in head or "<BkToCstmrStmt" in head:
+        return "camt053"
+    if "OFXHEADER" in head or "<OFX>" in head.upper():
+        return "ofx"
+    if head.lstrip().startswith("!Type"):
+        return "qif"
+    if name.endswith(".xml"):
+        return "camt053"
+    return "csv"
+
+
+def parse_statement(content: bytes, file_format: str) -> List[Dict[str, Any]]:
+    parsers = {
+        "csv": _parse_csv,
+        "ofx": _parse_ofx,
+        "qif": _parse_qif,
+        "camt053": _parse_camt053,
+    }
+    if file_format not in parsers:
+        raise StatementParseError(f"Unsupported statement format: {file_format}")
+    lines = []
+    for number, line in enumerate(parsers[file_format](content), start=1):
+        if line.get("transaction_date") is None or line.get("amount") is None:
+            continue
+        line["line_number"] = number
+        lines.append(line)
+    return lines
+
+
+# ------------------------------------------------------------------ #
+# helpers
+# ------------------------------------------------------------------ #
+def _decode(content: bytes) -> str:
+    for encoding in ("utf-8-sig", "cp1252", "latin-1"):
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return content.decode("utf-8", errors="replace")
+
+
+def _parse_amount(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    text = re.sub(r"[^\d,.\-+]", "", text)
+    if "," in text and "." in text:
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        head, _, tail = text.rpartition(",")
+        text = f"{head.replace(',', '')}.{tail}" if len(tail) in (1, 2) else text.replace(",", "")
+    try:
+        amount = float(text)
+    except ValueError:
+        return None
+    return -abs(amount) if negative else amount
+
+
+def _parse_date(value: Any, dayfirst: bool = False) -> Optional[datetime]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if re.fullmatch(r"\d{8}(\d{6})?(\.\d+)?(\[.*\])?", text):
+        return datetime.strptime(text[:8], "%Y%m%d")
+    try:
+        return date_parser.parse(text, dayfirst=dayfirst).replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _clean(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = " ".join(str(value).split())
+    return text or None
+
+
+# ------------------------------------------------------------------ #
+# CSV
+# ------------------------------------------------------------------ #
+def _pick(row: Dict[str, str], keys) -> Optional[str]:
+    for key in keys:
+        if row.get(key) not in (None, ""):
+            return row[key]
+    return None
+
+
+def _parse_csv(content: bytes) -> Iterator[Dict[str, Any]]:
+    text = _decode(content)
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+    header = None
+    for raw in reader:
+        if not any(cell.strip() for cell in raw):
+            continue
+        if header is None:
+            header = [cell.strip().lower() for cell in raw]
+            if not any(h in header for h in _CSV_DATE_KEYS):
+                raise StatementParseError("CSV statement needs a date column")
+            continue
+        row = {header[i]: cell.strip() for i, cell in enumerate(raw) if i < len(header)}
+        amount = _parse_amount(_pick(row, _CSV_AMOUNT_KEYS))
+        if amount is None:
+            credit = _parse_amount(_pick(row, _CSV_CREDIT_KEYS)) or 0.0
+            debit = _parse_amount(_pick(row, _CSV_DEBIT_KEYS)) or 0.0
+            amount = abs(credit) - abs(debit) if (credit or debit) else None
+        yield {
+            "transaction_date": _parse_date(_pick(row, _CSV_DATE_KEYS)),
+            "amount": amount,
+            "reference": _clean(_pick(row, _CSV_REFERENCE_KEYS)),
+            "payee": _clean(_pick(row, _CSV_PAYEE_KEYS)),
+            "description": _clean(_pick(row, _CSV_DESCRIPTION_KEYS)),
+            "external_id": _clean(row.get("transaction id") or row.get("id")),
+        }
+
+
+# ------------------------------------------------------------------ #
+# OFX / QFX (SGML and XML flavours)
+# ------------------------------------------------------------------ #
+_OFX_TXN = re.compile(r"<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))", re.S | re.I)
+_OFX_TAG = re.compile(r"<([A-Z0-9.]+)>([^<\r\n]*)", re.I)
+
+
+def _parse_ofx(content: bytes) -> Iterator[Dict[str, Any]]:
+    text = _decode(content)
+    for block in _OFX_TXN.findall(text):
+        tags = {name.upper(): value.strip() for name, value in _OFX_TAG.findall(block)}
+        yield {
+            "transaction_date": _parse_date(tags.get("DTPOSTED") or tags.get("DTUSER")),
+            "amount": _parse_amount(tags.get("TRNAMT")),
+            "reference": _clean(tags.get("CHECKNUM") or tags.get("REFNUM")),
+            "payee": _clean(tags.get("NAME") or tags.get("PAYEE")),
+            "description": _clean(tags.get("MEMO")),
+            "external_id": _clean(tags.get("FITID")),
+        }
+
+
+# ------------------------------------------------------------------ #
+# QIF
+# ------------------------------------------------------------------ #
+def _parse_qif(content: bytes) -> Iterator[Dict[str, Any]]:
+    record: Dict[str, str] = {}
+    for raw in _decode(content).splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            if record:
+                yield {
+                    "transaction_date": _parse_date(record.get("D", "").replace("'", "/")),
+                    "amount": _parse_amount(record.get("T") or record.get("U")),
+                    "reference": _clean(record.get("N")),
+                    "payee": _clean(record.get("P")),
+                    "description": _clean(record.get("M")),
+                    "external_id": None,
+                }
+            record = {}
+        elif code not in record:
+            record[code] = value
+
+
+# ------------------------------------------------------------------ #
+# ISO 20022 CAMT.053
+# ------------------------------------------------------------------ #
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(element, path: str):
+    node = element
+    for part in path.split("/"):
+        if node is None:
+            return None
+        node = next((child for child in node if _local(child.tag) == part), None)
+    return node
+
+
+def _find_text(element, *paths: str) -> Optional[str]:
+    for path in paths:
+        node = _find(element, path)
+        if node is not None and node.text and node.text.strip():
+            return node.text.strip()
+    return None
+
+
+def _parse_camt053(content: bytes) -> Iterator[Dict[str, Any]]:
+    try:
+        for _, element in ET.iterparse(io.BytesIO(content), events=("end",)):
+            if _local(element.tag) != "Ntry":
+                continue
+            debit = _find_text(element, "CdtDbtInd") == "DBIT"
+            amount = _parse_amount(_find_text(element, "Amt"))
+            if amount is not None and debit:
+                amount = -abs(amount)
+            party = "Cdtr" if debit else "Dbtr"
+            yield {
+                "transaction_date": _parse_date(
+                    _find_text(element, "BookgDt/Dt", "BookgDt/DtTm", "ValDt/Dt", "ValDt/DtTm")
+                ),
+                "amount": amount,
+                "reference": _clean(_find_text(
+                    element,
+                    "NtryDtls/TxDtls/Refs/EndToEndId",
+                    "NtryDtls/TxDtls/RmtInf/Strd/CdtrRefInf/Ref",
+                    "NtryRef",
+                )),
+                "payee": _clean(_find_text(
+                    element,
+                    f"NtryDtls/TxDtls/RltdPties/{party}/Nm",
+                    f"NtryDtls/TxDtls/RltdPties/{party}/Pty/Nm",
+                )),
+                "description": _clean(_find_text(
+                    element, "NtryDtls/TxDtls/RmtInf/Ustrd", "AddtlNtryInf",
+                )),
+                "external_id": _clean(_find_text(element, "AcctSvcrRef", "NtryDtls/TxDtls/Refs/AcctSvcrRef")),
+            }
+            element.clear()
+    except ET.ParseError as e:
+        raise StatementParseError(f"Invalid CAMT.053 document: {e}") from e
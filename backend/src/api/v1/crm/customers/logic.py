@@ -2,12 +2,13 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import String, and_, cast, desc, func, or_
+from sqlalchemy import String, and_, cast, func, or_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .....models.crm import Customer, CustomerGuarantor
 from .....config.job_card_models import JobCard
+from .....services.document_sequences import next_document_number, CUSTOMER
 from ..db_common import (
     attachment_item_to_dict,
     attachment_url_from_stored,
@@ -282,37 +283,7 @@ def get_customer_stats(db: Session, tenant_id: str, scope_user_id: Optional[str]
 
 def _generate_customer_id(db: Session, tenant_id: str) -> str:
     """Generate unique customer ID"""
-    last_customer = db.query(Customer).filter(
-        Customer.tenant_id == tenant_id
-    ).order_by(desc(Customer.customerId)).first()
-    
-    if last_customer and last_customer.customerId:
-        try:
-            last_number = int(last_customer.customerId.replace("CUST", ""))
-            new_number = last_number + 1
-        except ValueError:
-            new_number = 1
-    else:
-        new_number = 1
-    
-    max_attempts = 1000
-    attempts = 0
-    
-    while attempts < max_attempts:
-        candidate_id = f"CUST{new_number:03d}"
-        
-        existing_customer = db.query(Customer).filter(
-            Customer.tenant_id == tenant_id,
-            Customer.customerId == candidate_id
-        ).first()
-        
-        if not existing_customer:
-            return candidate_id
-        
-        new_number += 1
-        attempts += 1
-    
-    return f"CUST{str(uuid.uuid4())[:8].upper()}"
+    return next_document_number(db, tenant_id, CUSTOMER)
 
 def search_customers(
     db: Session, 
@@ -1,5 +1,6 @@
 import io
 from datetime import datetime
+from types import SimpleNamespace
 from typing import Optional, Dict, Any, List
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -9,8 +10,6 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.lib.utils import ImageReader
 from sqlalchemy.orm import Session
-import requests
-from PIL import Image as PILImage
 
 from ...config.installment_models import InstallmentPlan, Installment
 from ...config.installment_crud import get_installment_plan_by_id, get_installments_by_plan
@@ -19,6 +18,7 @@ from ...api.v1.invoices.items.logic import get_invoice_by_id
 from ...api.v1.crm.customers.logic import get_customer_by_id
 from ...api.v1.crm.guarantors.logic import get_guarantors_by_customer
 from ...core.currency import format_currency
+from .pdf_generator_modern import logo_image
 
 FRONTEND_COLORS = {
     'primary': '#1e40af',
@@ -34,25 +34,19 @@ def hex_to_color(hex_color: str):
     return colors.Color(r/255.0, g/255.0, b/255.0)
 
 
-def load_customer_image(image_url: Optional[str]) -> Optional[Image]:
+CUSTOMER_IMAGE_BOX = (int(1.2 * inch), int(1.2 * inch))
+
+
+def _customer_image(image_url: Optional[str]):
+    from ...services.asset_store import get_image
+
     if not image_url or not (image_url.startswith("http://") or image_url.startswith("https://")):
         return None
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        img_data = io.BytesIO(response.content)
-        pil_img = PILImage.open(img_data)
-        w, h = 1.2 * inch, 1.2 * inch
-        pil_img.thumbnail((int(w), int(h)), PILImage.Resampling.LANCZOS)
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            pil_img.save(tmp.name, format='PNG')
-            return Image(tmp.name, width=min(pil_img.width, int(w)), height=min(pil_img.height, int(h)))
-    except Exception:
-        return None
+    return get_image(image_url, CUSTOMER_IMAGE_BOX)
 
 
-def generate_customer_info_pdf(plan_id: str, db: Session, tenant_id: str) -> bytes:
+def customer_info_document(plan_id: str, db: Session, tenant_id: str) -> Dict[str, Any]:
+    """Everything render_customer_info_pdf() draws, read from the database as plain data."""
     plan = get_installment_plan_by_id(plan_id, db, tenant_id)
     if not plan:
         raise ValueError("Installment plan not found")
@@ -71,7 +65,7 @@ def generate_customer_info_pdf(plan_id: str, db: Session, tenant_id: str) -> byt
         if inst.payment_id:
             pay = db.query(Payment).filter(Payment.id == inst.payment_id, Payment.tenant_id == tenant_id).first()
             if pay:
-                payments_by_id[str(inst.id)] = pay
+                payments_by_id[str(inst.id)] = {"id": str(pay.id), "paymentDate": pay.paymentDate, "reference": pay.reference}
 
     customization = None
     try:
@@ -84,7 +78,78 @@ def generate_customer_info_pdf(plan_id: str, db: Session, tenant_id: str) -> byt
             customization = {"company_name": getattr(cust_obj, "company_name", "Company")}
     except Exception:
         pass
-    company_name = (customization or {}).get("company_name", "Company")
+
+    customer_img = _customer_image(getattr(customer, 'image_url', None) if customer else None)
+    return {
+        "company_name": (customization or {}).get("company_name", "Company"),
+        "generated_at": datetime.utcnow(),
+        "customer_image": vars(customer_img) if customer_img else None,
+        "plan": {
+            "currency": plan.currency,
+            "total_amount": plan.total_amount,
+            "number_of_installments": plan.number_of_installments,
+            "status": plan.status,
+        },
+        "invoice": {
+            "customerName": invoice.customerName,
+            "customerPhone": invoice.customerPhone,
+            "billingAddress": invoice.billingAddress,
+            "total": invoice.total,
+            "totalPaid": invoice.totalPaid,
+            "balance": invoice.balance,
+            "items": invoice.items,
+        },
+        "customer": {
+            "customerId": customer.customerId,
+            "firstName": customer.firstName,
+            "lastName": customer.lastName,
+            "mobile": customer.mobile,
+            "address": customer.address,
+            "cnic": customer.cnic,
+        } if customer else None,
+        "guarantors": [
+            {
+                "name": g.name,
+                "mobile": g.mobile,
+                "cnic": g.cnic,
+                "residential_address": g.residential_address,
+                "official_address": g.official_address,
+                "occupation": g.occupation,
+                "relation": g.relation,
+            }
+            for g in guarantors
+        ],
+        "installments": [
+            {
+                "id": str(inst.id),
+                "sequence_number": inst.sequence_number,
+                "due_date": inst.due_date,
+                "amount": inst.amount,
+                "paid_amount": inst.paid_amount,
+            }
+            for inst in installments
+        ],
+        "payments": payments_by_id,
+    }
+
+
+def generate_customer_info_pdf(plan_id: str, db: Session, tenant_id: str) -> bytes:
+    from ...services.pdf_rendering import CUSTOMER_INFO, render_pdf
+
+    return render_pdf(CUSTOMER_INFO, customer_info_document(plan_id, db, tenant_id))
+
+
+def render_customer_info_pdf(data: Dict[str, Any]) -> bytes:
+    """Lays out a customer_info_document(); runs in the PDF pool."""
+    from ...services.asset_store import StoredImage
+
+    plan = SimpleNamespace(**data["plan"])
+    invoice = SimpleNamespace(**data["invoice"])
+    customer = SimpleNamespace(**data["customer"]) if data["customer"] else None
+    guarantors = [SimpleNamespace(**g) for g in data["guarantors"]]
+    installments = [SimpleNamespace(**i) for i in data["installments"]]
+    payments_by_id = {inst_id: SimpleNamespace(**pay) for inst_id, pay in data["payments"].items()}
+    company_name = data["company_name"]
 
     styles = getSampleStyleSheet()
     title_style = ParagraphStyle(
@@ -104,14 +169,12 @@ def generate_customer_info_pdf(plan_id: str, db: Session, tenant_id: str) -> byt
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=0.5*inch, leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
     story = []
 
-    customer_img = None
-    if customer and getattr(customer, 'image_url', None):
-        customer_img = load_customer_image(customer.image_url)
+    customer_img = logo_image(StoredImage(**data["customer_image"])) if data["customer_image"] else None
 
     header_left = [
         Paragraph(company_name, title_style),
         Paragraph("Customer Information Form", header_style),
-        Paragraph(f"Date: {datetime.utcnow().strftime('%d-%b-%Y')}", small_style),
+        Paragraph(f"Date: {data['generated_at'].strftime('%d-%b-%Y')}", small_style),
     ]
     if customer:
         header_left.append(Paragraph(f"Account No.: {customer.customerId or ''}", small_style))
@@ -200,7 +263,7 @@ def generate_customer_info_pdf(plan_id: str, db: Session, tenant_id: str) -> byt
     for inst in installments:
         pay = payments_by_id.get(str(inst.id))
         date_str = pay.paymentDate.strftime('%d-%b-%Y') if pay and pay.paymentDate else (inst.due_date.strftime('%d-%b-%Y') if inst.due_date else "-")
-        receipt = (pay.reference if pay and pay.reference else (str(pay.id)[:8] if pay else "")) or "-"
+        receipt = (pay.reference if pay and pay.reference else (pay.id[:8] if pay else "")) or "-"
         pre_bal = running_bal
         inst_amt = float(inst.amount or 0)
         paid_amt = float(inst.paid_amount or 0)
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from ..dependencies import get_current_user, get_tenant_context, require_permission
+from ...services.change_feed import (
+    DEFAULT_LIMIT, FEEDS, MAX_LIMIT, decode_change_cursor, iter_changes, ndjson_lines, resolve_fields
+)
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+def _stream(feed_name: str, tenant_id, cursor: Optional[str], fields, limit: int):
+    # The request's session is closed before the response body is sent.
+    from ...config.database_config import SessionLocal
+
+    db = SessionLocal()
+    try:
+        yield from ndjson_lines(iter_changes(db, FEEDS[feed_name], tenant_id, cursor, fields, limit))
+    finally:
+        db.close()
+
+
+def _export(feed_name: str, tenant_context: Optional[dict], cursor: Optional[str], fields: Optional[str], limit: int):
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    feed = FEEDS[feed_name]
+    try:
+        columns = resolve_fields(feed, fields)
+        if cursor:
+            decode_change_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        _stream(feed_name, tenant_context["tenant_id"], cursor, columns, limit),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/pos-transactions")
+async def export_pos_transactions(
+    cursor: Optional[str] = Query(None, description="cursor of the last line already processed"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to include"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:view")),
+):
+    return _export("pos_transactions", tenant_context, cursor, fields, limit)
+
+
+@router.get("/invoices")
+async def export_invoices(
+    cursor: Optional[str] = Query(None, description="cursor of the last line already processed"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to include"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("sales:invoices:view")),
+):
+    return _export("invoices", tenant_context, cursor, fields, limit)
+
+
+@router.get("/payments")
+async def export_payments(
+    cursor: Optional[str] = Query(None, description="cursor of the last line already processed"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to include"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("sales:invoices:view")),
+):
+    return _export("payments", tenant_context, cursor, fields, limit)
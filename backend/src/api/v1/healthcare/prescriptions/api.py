@@ -78,7 +78,7 @@ async def delete_prescription_endpoint(
 
 
 @router.get("/prescriptions/{prescription_id}/download")
-async def download_prescription_pdf(
+def download_prescription_pdf(
     prescription_id: str,
     db: Session = Depends(get_db),
     tenant_context: dict = Depends(get_tenant_context),
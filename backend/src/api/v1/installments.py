@@ -136,6 +136,8 @@ def download_customer_info_pdf(
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename=customer-info-{plan_id}.pdf"},
         )
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc, Integer
+from sqlalchemy import and_, func, desc
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 import re
 
@@ -15,18 +15,32 @@ from ...models.inventory_models import (
     StorageLocation, StorageLocationCreate, StorageLocationUpdate, StorageLocationResponse, StorageLocationsResponse,
     StockMovement, StockMovementCreate, StockMovementUpdate, StockMovementResponse, StockMovementsResponse,
     StockMovementWithProduct, StockMovementsWithProductResponse,
+    StockBalancesResponse, StockBalanceDriftResponse,
+    StockValuationResponse, StockValuationAsOfResponse, ReorderAlertsResponse,
+    ProductImportJobResponse, ProductImportJobsResponse,
+    StockTakeCreate, StockTakeCountsUpload, StockTakeCountResult, StockTakeResponse, StockTakesResponse,
+    StockTakeLinesResponse,
     PurchaseOrderCreate, PurchaseOrderUpdate, PurchaseOrderResponse, PurchaseOrdersResponse,
     PurchaseOrderStatus,
     Receiving, ReceivingCreate, ReceivingUpdate, ReceivingResponse, ReceivingsResponse,
     InventoryDashboardStats, StockAlert
 )
 from ...config.inventory_models import PurchaseOrder as PurchaseOrderDB
+from ...config.inventory_models import ProductImportJob as ProductImportJobDB
+from ...config.inventory_models import StockTake as StockTakeDB
 from ...config.hrm_models import Supplier
 from ...services.inventory_sync_service import InventorySyncService
+from ...services import stock_balances as stock_balance_service
+from ...services import stock_valuation as stock_valuation_service
+from ...services import reorder_alerts as reorder_alert_service
+from ...services import product_import as product_import_service
+from ...services import stock_takes as stock_take_service
+from ...services.document_sequences import next_document_number, PURCHASE_ORDER
 from ...config.database import (
     get_warehouses, get_warehouse_by_id, create_warehouse, update_warehouse, delete_warehouse,
     get_storage_locations, get_storage_locations_by_warehouse, get_storage_location_by_id, create_storage_location, update_storage_location, delete_storage_location,
-    get_stock_movements, get_stock_movement_by_id, create_stock_movement, update_stock_movement, delete_stock_movement,
+    get_stock_movement_by_id, create_stock_movement, update_stock_movement, delete_stock_movement,
+    list_stock_movements, list_stock_movements_with_product,
     get_purchase_orders, get_purchase_orders_by_status, get_purchase_order_by_id, create_purchase_order, update_purchase_order, delete_purchase_order,
     get_receivings, get_receiving_by_id, create_receiving, update_receiving, delete_receiving,
     get_inventory_dashboard_stats
@@ -111,34 +125,8 @@ def inventory_health_check():
     return {"status": "ok", "module": "inventory", "message": "Inventory endpoints are accessible"}
 
 def generate_purchase_order_number(tenant_id: str, db: Session) -> str:
-    """Generate unique purchase order number with proper race condition handling"""
-    year = datetime.now().year
-    month = datetime.now().month
-    prefix = f"PO-{year:04d}{month:02d}"
-
-    max_retries = 100
-    for attempt in range(max_retries):
-        max_suffix = db.query(
-            func.max(func.cast(func.split_part(PurchaseOrderDB.poNumber, "-", 3), Integer))
-        ).filter(PurchaseOrderDB.poNumber.like(f"{prefix}-%")).scalar()
-
-        new_number = (max_suffix or 0) + 1 + attempt
-        po_number = f"{prefix}-{new_number:04d}"
-
-        existing_po = db.query(PurchaseOrderDB).filter(
-            PurchaseOrderDB.poNumber == po_number
-        ).first()
-
-        if not existing_po:
-            return po_number
-
-        if attempt == max_retries - 1:
-            raise HTTPException(
-                status_code=500,
-                detail="Unable to generate unique purchase order number after multiple attempts"
-            )
-
-    return po_number
+    """Allocate the next purchase order number in the caller's transaction"""
+    return next_document_number(db, tenant_id, PURCHASE_ORDER)
 
 
 
@@ -431,6 +419,12 @@ def delete_storage_location_endpoint(
 def read_stock_movements(
     product_id: Optional[str] = Query(None),
     warehouse_id: Optional[str] = Query(None),
+    movement_type: Optional[str] = Query(None, alias="movementType"),
+    reference_type: Optional[str] = Query(None, alias="referenceType"),
+    date_from: Optional[date] = Query(None, alias="dateFrom"),
+    date_to: Optional[date] = Query(None, alias="dateTo"),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(False, alias="includeTotal"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
@@ -438,8 +432,28 @@ def read_stock_movements(
     tenant_context: dict = Depends(get_tenant_context),
     _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
 ):
-    """Get all stock movements for the current tenant"""
-    movements = get_stock_movements(db, str(tenant_context["tenant_id"]), product_id, warehouse_id, skip, limit)
+    """
+    Stock movement history for the current tenant, newest first. Pass the
+    previous page's nextCursor to page on; the total counts every match only
+    with includeTotal, otherwise it is the page size.
+    """
+    try:
+        movements, total, next_cursor = list_stock_movements(
+            db,
+            str(tenant_context["tenant_id"]),
+            product_id=product_id,
+            warehouse_id=warehouse_id,
+            movement_type=movement_type,
+            reference_type=reference_type,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Convert each movement to response format (convert UUIDs to strings)
     response_movements = []
@@ -453,6 +467,8 @@ def read_stock_movements(
             "movementType": movement.movementType,
             "quantity": movement.quantity,
             "unitCost": movement.unitCost,
+            "fifoValue": movement.fifoValue,
+            "averageValue": movement.averageValue,
             "referenceNumber": movement.referenceNumber,
             "referenceType": movement.referenceType,
             "notes": movement.notes,
@@ -466,8 +482,9 @@ def read_stock_movements(
         }
         response_movements.append(response_data)
     
-    total = len(response_movements)
-    return StockMovementsResponse(stockMovements=response_movements, total=total)
+    if total is None:
+        total = len(response_movements)
+    return StockMovementsResponse(stockMovements=response_movements, total=total, nextCursor=next_cursor)
 
 @router.get("/stock-movements/{movement_id}", response_model=StockMovementResponse)
 def read_stock_movement(
@@ -492,6 +509,8 @@ def read_stock_movement(
         "movementType": movement.movementType,
         "quantity": movement.quantity,
         "unitCost": movement.unitCost,
+        "fifoValue": movement.fifoValue,
+        "averageValue": movement.averageValue,
         "referenceNumber": movement.referenceNumber,
         "referenceType": movement.referenceType,
         "notes": movement.notes,
@@ -532,7 +551,10 @@ def create_stock_movement_endpoint(
         "updatedAt": datetime.utcnow()
     })
     
-    db_movement = create_stock_movement(movement_data, db)
+    try:
+        db_movement = create_stock_movement(movement_data, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Convert to response format (convert UUIDs to strings)
     response_data = {
@@ -544,6 +566,8 @@ def create_stock_movement_endpoint(
         "movementType": db_movement.movementType,
         "quantity": db_movement.quantity,
         "unitCost": db_movement.unitCost,
+        "fifoValue": db_movement.fifoValue,
+        "averageValue": db_movement.averageValue,
         "referenceNumber": db_movement.referenceNumber,
         "referenceType": db_movement.referenceType,
         "notes": db_movement.notes,
@@ -574,7 +598,10 @@ def update_stock_movement_endpoint(
     if "expiryDate" in movement_update and movement_update["expiryDate"] == "":
         movement_update["expiryDate"] = None
     
-    db_movement = update_stock_movement(movement_id, movement_update, db, str(tenant_context["tenant_id"]))
+    try:
+        db_movement = update_stock_movement(movement_id, movement_update, db, str(tenant_context["tenant_id"]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not db_movement:
         raise HTTPException(status_code=404, detail="Stock movement not found")
     
@@ -588,6 +615,8 @@ def update_stock_movement_endpoint(
         "movementType": db_movement.movementType,
         "quantity": db_movement.quantity,
         "unitCost": db_movement.unitCost,
+        "fifoValue": db_movement.fifoValue,
+        "averageValue": db_movement.averageValue,
         "referenceNumber": db_movement.referenceNumber,
         "referenceType": db_movement.referenceType,
         "notes": db_movement.notes,
@@ -611,12 +640,423 @@ def delete_stock_movement_endpoint(
     _: dict = Depends(require_permission(ModulePermission.INVENTORY_DELETE.value))
 ):
     """Delete a stock movement"""
-    success = delete_stock_movement(movement_id, db, str(tenant_context["tenant_id"]))
+    try:
+        success = delete_stock_movement(movement_id, db, str(tenant_context["tenant_id"]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not success:
         raise HTTPException(status_code=404, detail="Stock movement not found")
     return {"message": "Stock movement deleted successfully"}
 
 
+# Stock Balance Endpoints
+@router.get("/stock-balances", response_model=StockBalancesResponse)
+def read_stock_balances(
+    product_id: Optional[str] = Query(None, alias="productId"),
+    warehouse_id: Optional[str] = Query(None, alias="warehouseId"),
+    expiring_before: Optional[datetime] = Query(None, alias="expiringBefore"),
+    include_zero: bool = Query(False, alias="includeZero"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """On-hand quantity per product, warehouse, location and batch"""
+    balances, total = stock_balance_service.get_stock_balances(
+        db,
+        str(tenant_context["tenant_id"]),
+        product_id=product_id,
+        warehouse_id=warehouse_id,
+        expiring_before=expiring_before,
+        include_zero=include_zero,
+        skip=skip,
+        limit=limit,
+    )
+    return StockBalancesResponse(stockBalances=balances, total=total)
+
+@router.get("/stock-balances/drift", response_model=StockBalanceDriftResponse)
+def read_stock_balance_drift(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Report where stock balances, the movement ledger and product stock disagree"""
+    drift = stock_balance_service.check_stock_balance_drift(db, str(tenant_context["tenant_id"]))
+    return StockBalanceDriftResponse(**drift)
+
+@router.post("/stock-balances/rebuild")
+def rebuild_stock_balances_endpoint(
+    post_opening: bool = Query(False, alias="postOpening"),
+    sync_products: bool = Query(False, alias="syncProducts"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Re-derive stock balances from the movement ledger"""
+    tenant_id = str(tenant_context["tenant_id"])
+    result = {"rebuild": stock_balance_service.rebuild_stock_balances(db, tenant_id, sync_products=sync_products)}
+    if post_opening:
+        result["opening"] = stock_balance_service.post_opening_balances(db, tenant_id, str(current_user.id))
+    return result
+
+
+# Stock Valuation Endpoints
+@router.get("/valuation", response_model=StockValuationResponse)
+def read_stock_valuation(
+    product_id: Optional[str] = Query(None, alias="productId"),
+    warehouse_id: Optional[str] = Query(None, alias="warehouseId"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Current FIFO and moving-average stock value per product and warehouse"""
+    return stock_valuation_service.get_stock_valuation(
+        db,
+        str(tenant_context["tenant_id"]),
+        warehouse_id=warehouse_id,
+        product_id=product_id,
+        skip=skip,
+        limit=limit,
+    )
+
+@router.get("/valuation/as-of", response_model=StockValuationAsOfResponse)
+def read_stock_valuation_as_of(
+    as_of: date = Query(..., alias="date"),
+    warehouse_id: Optional[str] = Query(None, alias="warehouseId"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Stock quantity and value at the end of a past day"""
+    return stock_valuation_service.get_valuation_as_of(
+        db, str(tenant_context["tenant_id"]), as_of, warehouse_id=warehouse_id
+    )
+
+@router.post("/valuation/snapshot")
+def take_stock_valuation_snapshot(
+    snapshot_date: Optional[date] = Query(None, alias="date"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Store the closing valuation of a day (default yesterday) to speed up as-of reports"""
+    rows = stock_valuation_service.take_valuation_snapshot(db, str(tenant_context["tenant_id"]), snapshot_date)
+    return {"rows": rows}
+
+@router.post("/valuation/rebuild")
+def rebuild_stock_valuation_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Re-derive cost layers and stock values from the movement ledger"""
+    return {"rebuild": stock_valuation_service.rebuild_stock_valuation(db, str(tenant_context["tenant_id"]))}
+
+
+# Reorder Alert Endpoints
+@router.get("/reorder-alerts", response_model=ReorderAlertsResponse)
+def read_reorder_alerts(
+    status: Optional[str] = Query(None, description="pending, notified or resolved; default open alerts"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Products that crossed their minimum stock level, with suggested reorder quantities"""
+    return reorder_alert_service.list_reorder_alerts(
+        db, str(tenant_context["tenant_id"]), status=status, skip=skip, limit=limit
+    )
+
+@router.post("/reorder-alerts/scan")
+def scan_reorder_alerts_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Open alerts for products already below their minimum and send pending alerts now"""
+    tenant_id = str(tenant_context["tenant_id"])
+    opened = reorder_alert_service.scan_reorder_alerts(db, tenant_id)
+    dispatched = reorder_alert_service.dispatch_reorder_alerts(db, tenant_id)
+    return {"opened": opened, "dispatched": dispatched}
+
+@router.post("/reorder-alerts/draft-purchase-orders")
+def draft_reorder_purchase_orders_endpoint(
+    warehouse_id: Optional[str] = Query(None, alias="warehouseId"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_CREATE.value))
+):
+    """Draft one purchase order per supplier for open reorder alerts"""
+    try:
+        drafts = reorder_alert_service.draft_reorder_purchase_orders(
+            db, str(tenant_context["tenant_id"]), str(current_user.id), warehouse_id=warehouse_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"purchaseOrders": drafts, "total": len(drafts)}
+
+
+# Product Import Endpoints
+def _get_import_job(db: Session, tenant_id: str, job_id: str) -> ProductImportJobDB:
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Import not found")
+    job = db.query(ProductImportJobDB).filter(
+        ProductImportJobDB.id == job_uuid, ProductImportJobDB.tenant_id == tenant_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+@router.post("/product-imports", response_model=ProductImportJobResponse)
+def create_product_import(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    warehouse_id: Optional[str] = Query(None, alias="warehouseId"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_CREATE.value))
+):
+    """Upload a CSV/XLSX product catalogue; it is imported in the background"""
+    tenant_id = str(tenant_context["tenant_id"])
+    if warehouse_id and not get_warehouse_by_id(warehouse_id, db, tenant_id):
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+    try:
+        job = product_import_service.create_import_job(
+            db, tenant_id, str(current_user.id), file.filename, file.file, warehouse_id=warehouse_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(product_import_service.run_import_job, job.id)
+    return product_import_service.serialize_import_job(job)
+
+@router.get("/product-imports", response_model=ProductImportJobsResponse)
+def list_product_imports(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Recent product imports with their progress (row errors omitted)"""
+    query = db.query(ProductImportJobDB).filter(ProductImportJobDB.tenant_id == str(tenant_context["tenant_id"]))
+    total = query.count()
+    jobs = query.order_by(desc(ProductImportJobDB.createdAt)).offset(skip).limit(limit).all()
+    return {
+        "jobs": [product_import_service.serialize_import_job(job, include_errors=False) for job in jobs],
+        "total": total,
+    }
+
+@router.get("/product-imports/{job_id}", response_model=ProductImportJobResponse)
+def get_product_import(
+    job_id: str,
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Progress and per-row validation report of a product import"""
+    job = _get_import_job(db, str(tenant_context["tenant_id"]), job_id)
+    return product_import_service.serialize_import_job(job)
+
+@router.post("/product-imports/{job_id}/resume", response_model=ProductImportJobResponse)
+def resume_product_import(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_CREATE.value))
+):
+    """Resume a failed or stalled import from its last committed chunk"""
+    job = _get_import_job(db, str(tenant_context["tenant_id"]), job_id)
+    if job.status == "completed":
+        raise HTTPException(status_code=400, detail="Import already completed")
+    background_tasks.add_task(product_import_service.run_import_job, job.id)
+    return product_import_service.serialize_import_job(job, include_errors=False)
+
+
+# Stock Take Endpoints
+@router.post("/stock-takes", response_model=StockTakeResponse)
+def open_stock_take_endpoint(
+    stock_take: StockTakeCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_CREATE.value))
+):
+    """Open a count sheet with the expected quantities of a warehouse"""
+    try:
+        take = stock_take_service.open_stock_take(
+            db,
+            str(tenant_context["tenant_id"]),
+            stock_take.warehouseId,
+            str(current_user.id),
+            notes=stock_take.notes,
+            category=stock_take.category,
+            product_ids=stock_take.productIds,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stock_take_service.serialize_stock_take(take)
+
+@router.get("/stock-takes", response_model=StockTakesResponse)
+def list_stock_takes(
+    status: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Stock takes of the current tenant, newest first"""
+    query = db.query(StockTakeDB).filter(StockTakeDB.tenant_id == str(tenant_context["tenant_id"]))
+    if status:
+        query = query.filter(StockTakeDB.status == status)
+    total = query.count()
+    takes = query.order_by(desc(StockTakeDB.createdAt)).offset(skip).limit(limit).all()
+    return {"stockTakes": [stock_take_service.serialize_stock_take(take) for take in takes], "total": total}
+
+@router.get("/stock-takes/{stock_take_id}", response_model=StockTakeResponse)
+def read_stock_take(
+    stock_take_id: str,
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Get a stock take with its counting progress"""
+    try:
+        take = stock_take_service.get_stock_take(db, str(tenant_context["tenant_id"]), stock_take_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return stock_take_service.serialize_stock_take(take)
+
+@router.get("/stock-takes/{stock_take_id}/lines", response_model=StockTakeLinesResponse)
+def read_stock_take_lines(
+    stock_take_id: str,
+    variances_only: bool = Query(False, alias="variancesOnly"),
+    uncounted_only: bool = Query(False, alias="uncountedOnly"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Count sheet lines with expected, counted and variance"""
+    try:
+        return stock_take_service.list_stock_take_lines(
+            db, str(tenant_context["tenant_id"]), stock_take_id,
+            variances_only=variances_only, uncounted_only=uncounted_only, skip=skip, limit=limit,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/stock-takes/{stock_take_id}/counts", response_model=StockTakeCountResult)
+def record_stock_take_counts(
+    stock_take_id: str,
+    upload: StockTakeCountsUpload,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Record counted quantities in bulk; batchId makes a retried upload a no-op"""
+    try:
+        return stock_take_service.record_counts(
+            db,
+            str(tenant_context["tenant_id"]),
+            stock_take_id,
+            str(current_user.id),
+            [count.dict() for count in upload.counts],
+            mode=upload.mode,
+            batch_id=upload.batchId,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/stock-takes/{stock_take_id}/counts/upload", response_model=StockTakeCountResult)
+def upload_stock_take_counts(
+    stock_take_id: str,
+    file: UploadFile = File(...),
+    mode: str = Query("set"),
+    batch_id: Optional[str] = Query(None, alias="batchId"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Record counts from a handheld CSV export (sku/barcode/productId, quantity)"""
+    try:
+        counts = stock_take_service.parse_count_file(file.file.read())
+        return stock_take_service.record_counts(
+            db,
+            str(tenant_context["tenant_id"]),
+            stock_take_id,
+            str(current_user.id),
+            counts,
+            mode=mode,
+            batch_id=batch_id,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/stock-takes/{stock_take_id}/post", response_model=StockTakeResponse)
+def post_stock_take_endpoint(
+    stock_take_id: str,
+    zero_uncounted: bool = Query(False, alias="zeroUncounted"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Post all variances as adjustment movements in one transaction"""
+    try:
+        take = stock_take_service.post_stock_take(
+            db, str(tenant_context["tenant_id"]), stock_take_id, str(current_user.id), zero_uncounted=zero_uncounted
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stock_take_service.serialize_stock_take(take)
+
+@router.post("/stock-takes/{stock_take_id}/cancel", response_model=StockTakeResponse)
+def cancel_stock_take_endpoint(
+    stock_take_id: str,
+    db: Session = Depends(get_db),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_UPDATE.value))
+):
+    """Cancel an open stock take; nothing is posted"""
+    try:
+        take = stock_take_service.cancel_stock_take(db, str(tenant_context["tenant_id"]), stock_take_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stock_take_service.serialize_stock_take(take)
+
+
 # Purchase Order Endpoints
 @router.get("/purchase-orders", response_model=PurchaseOrdersResponse)
 def read_purchase_orders(
@@ -820,29 +1260,30 @@ def update_purchase_order_endpoint(
         order_update["totalAmount"] = po_subtotal
 
     order_update["updatedAt"] = datetime.utcnow()
-    
-    db_order = update_purchase_order(order_id, order_update, db, str(tenant_context["tenant_id"]))
 
     if "items" in order_update:
-        sync_service = InventorySyncService(db)
-        reconciliation = sync_service.reconcile_purchase_order_stock(
-            po_id=str(db_order.id),
-            tenant_id=str(tenant_context["tenant_id"]),
-            user_id=str(current_user.id),
-            new_items=order_update.get("items") or [],
-            warehouse_id=str(db_order.warehouseId) if db_order.warehouseId else None,
-        )
-        if not reconciliation["success"]:
-            sync_service.reverse_purchase_order_stock(
-                str(db_order.id), str(tenant_context["tenant_id"])
+        # Stock first: update_purchase_order commits, so a refused
+        # reconciliation must leave the order untouched as well.
+        warehouse_id = order_update.get("warehouseId") or existing_order.warehouseId
+        try:
+            reconciliation = InventorySyncService(db).reconcile_purchase_order_stock(
+                po_id=str(existing_order.id),
+                tenant_id=str(tenant_context["tenant_id"]),
+                user_id=str(current_user.id),
+                new_items=order_update.get("items") or [],
+                warehouse_id=str(warehouse_id) if warehouse_id else None,
             )
+        except ValueError as exc:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(exc))
+        if not reconciliation["success"]:
             db.rollback()
             raise HTTPException(
                 status_code=400,
                 detail="; ".join(reconciliation.get("errors", [])) or "Failed to reconcile stock",
             )
-        db.commit()
-        db.refresh(db_order)
+
+    db_order = update_purchase_order(order_id, order_update, db, str(tenant_context["tenant_id"]))
 
     if db_order and "jobCardId" in order_update:
         from ...config.workshop_document_links import sync_workshop_document_links
@@ -876,15 +1317,17 @@ def delete_purchase_order_endpoint(
 ):
     """Delete a purchase order"""
     try:
-        success = delete_purchase_order(order_id, db, str(tenant_context["tenant_id"]))
-        if not success:
-            raise HTTPException(status_code=404, detail="Purchase order not found")
+        # Reverse first; delete_purchase_order commits it with the delete.
         InventorySyncService(db).reverse_purchase_order_stock(
             order_id, str(tenant_context["tenant_id"])
         )
-        db.commit()
+        success = delete_purchase_order(order_id, db, str(tenant_context["tenant_id"]))
+        if not success:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Purchase order not found")
         return {"message": "Purchase order deleted successfully"}
     except ValueError as exc:
+        db.rollback()
         raise HTTPException(status_code=400, detail=str(exc))
 
 # Receiving Endpoints
@@ -1046,68 +1489,15 @@ def get_inventory_dashboard(
     return get_inventory_dashboard_stats(db, str(tenant_context["tenant_id"]))
 
 # Dumps Endpoints
-@router.get("/dumps", response_model=StockMovementsWithProductResponse)
-def get_dumps(
-    warehouse_id: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    tenant_context: dict = Depends(get_tenant_context),
-    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
-):
-    """Get all damaged items (dumps) for the current tenant"""
-    from sqlalchemy.orm import joinedload
-    
-    # Query stock movements with product information
-    from ...config.inventory_models import StockMovement, Product
-    query = db.query(StockMovement).filter(
-        StockMovement.tenant_id == tenant_context["tenant_id"],
-        StockMovement.movementType == "damage"
-    )
-    
-    if warehouse_id:
-        query = query.filter(StockMovement.warehouseId == warehouse_id)
-    
-    movements = query.order_by(StockMovement.createdAt.desc()).offset(skip).limit(limit).all()
-    
-    # Convert each movement to response format with product details
+def _movements_with_product_response(db: Session, tenant_id: str, **filters) -> StockMovementsWithProductResponse:
+    try:
+        rows, total, next_cursor = list_stock_movements_with_product(db, tenant_id, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     response_movements = []
-    for movement in movements:
-        # Get product details - convert string productId to UUID for comparison
-        product = None
-        try:
-            from uuid import UUID
-            product_uuid = UUID(movement.productId)
-            
-            # First try with the movement's tenant_id (more reliable)
-            product = db.query(Product).filter(
-                Product.id == product_uuid,
-                Product.tenant_id == movement.tenant_id
-            ).first()
-            
-            # If not found, try with the context tenant_id
-            if not product:
-                product = db.query(Product).filter(
-                    Product.id == product_uuid,
-                    Product.tenant_id == tenant_context["tenant_id"]
-                ).first()
-                    
-        except (ValueError, TypeError):
-            # If productId is not a valid UUID, try to find by SKU
-            product = db.query(Product).filter(
-                Product.sku == movement.productId,
-                Product.tenant_id == movement.tenant_id
-            ).first()
-            
-            # If not found, try with context tenant_id
-            if not product:
-                product = db.query(Product).filter(
-                    Product.sku == movement.productId,
-                    Product.tenant_id == tenant_context["tenant_id"]
-                ).first()
-        
-        response_data = {
+    for movement, product in rows:
+        response_movements.append({
             "id": str(movement.id),
             "tenant_id": str(movement.tenant_id),
             "productId": movement.productId,
@@ -1119,6 +1509,8 @@ def get_dumps(
             "movementType": movement.movementType,
             "quantity": movement.quantity,
             "unitCost": movement.unitCost,
+            "fifoValue": movement.fifoValue,
+            "averageValue": movement.averageValue,
             "referenceNumber": movement.referenceNumber,
             "referenceType": movement.referenceType,
             "notes": movement.notes,
@@ -1129,17 +1521,39 @@ def get_dumps(
             "createdBy": str(movement.createdBy),
             "createdAt": movement.createdAt,
             "updatedAt": movement.updatedAt
-        }
-        
-        response_movements.append(response_data)
-    
-    total = len(response_movements)
-    return StockMovementsWithProductResponse(stockMovements=response_movements, total=total)
+        })
+
+    return StockMovementsWithProductResponse(
+        stockMovements=response_movements, total=total, nextCursor=next_cursor
+    )
+
+@router.get("/dumps", response_model=StockMovementsWithProductResponse)
+def get_dumps(
+    warehouse_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tenant_context: dict = Depends(get_tenant_context),
+    _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
+):
+    """Get all damaged items (dumps) for the current tenant"""
+    return _movements_with_product_response(
+        db,
+        str(tenant_context["tenant_id"]),
+        movement_type="damage",
+        warehouse_id=warehouse_id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+    )
 
 # Customer Returns Endpoints
 @router.get("/customer-returns", response_model=StockMovementsWithProductResponse)
 def get_customer_returns(
     warehouse_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
@@ -1148,81 +1562,15 @@ def get_customer_returns(
     _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
 ):
     """Get all customer returns for the current tenant"""
-    from ...config.inventory_models import StockMovement, Product
-    
-    query = db.query(StockMovement).filter(
-        StockMovement.tenant_id == tenant_context["tenant_id"],
-        StockMovement.referenceType == "customer_return"
+    return _movements_with_product_response(
+        db,
+        str(tenant_context["tenant_id"]),
+        reference_type="customer_return",
+        warehouse_id=warehouse_id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
     )
-    
-    if warehouse_id:
-        query = query.filter(StockMovement.warehouseId == warehouse_id)
-    
-    movements = query.order_by(StockMovement.createdAt.desc()).offset(skip).limit(limit).all()
-    
-    # Convert each movement to response format with product details
-    response_movements = []
-    for movement in movements:
-        # Get product details - convert string productId to UUID for comparison
-        product = None
-        try:
-            from uuid import UUID
-            product_uuid = UUID(movement.productId)
-            
-            # First try with the movement's tenant_id (more reliable)
-            product = db.query(Product).filter(
-                Product.id == product_uuid,
-                Product.tenant_id == movement.tenant_id
-            ).first()
-            
-            # If not found, try with the context tenant_id
-            if not product:
-                product = db.query(Product).filter(
-                    Product.id == product_uuid,
-                    Product.tenant_id == tenant_context["tenant_id"]
-                ).first()
-                    
-        except (ValueError, TypeError):
-            # If productId is not a valid UUID, try to find by SKU
-            product = db.query(Product).filter(
-                Product.sku == movement.productId,
-                Product.tenant_id == movement.tenant_id
-            ).first()
-            
-            # If not found, try with context tenant_id
-            if not product:
-                product = db.query(Product).filter(
-                    Product.sku == movement.productId,
-                    Product.tenant_id == tenant_context["tenant_id"]
-                ).first()
-        
-        response_data = {
-            "id": str(movement.id),
-            "tenant_id": str(movement.tenant_id),
-            "productId": movement.productId,
-            "productName": product.name if product else "Unknown Product",
-            "productSku": product.sku if product else "N/A",
-            "productCategory": product.category if product else "N/A",
-            "warehouseId": str(movement.warehouseId),
-            "locationId": movement.locationId,
-            "movementType": movement.movementType,
-            "quantity": movement.quantity,
-            "unitCost": movement.unitCost,
-            "referenceNumber": movement.referenceNumber,
-            "referenceType": movement.referenceType,
-            "notes": movement.notes,
-            "batchNumber": movement.batchNumber,
-            "serialNumber": movement.serialNumber,
-            "expiryDate": movement.expiryDate.isoformat() if movement.expiryDate else None,
-            "status": movement.status,
-            "createdBy": str(movement.createdBy),
-            "createdAt": movement.createdAt,
-            "updatedAt": movement.updatedAt
-        }
-        response_movements.append(response_data)
-    
-    total = len(response_movements)
-    return StockMovementsWithProductResponse(stockMovements=response_movements, total=total)
 
 @router.post("/customer-returns", response_model=StockMovementResponse)
 def create_customer_return(
@@ -1250,7 +1598,10 @@ def create_customer_return(
         "updatedAt": datetime.utcnow()
     })
     
-    movement = create_stock_movement(movement_data, db)
+    try:
+        movement = create_stock_movement(movement_data, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     response_data = {
         "id": str(movement.id),
         "tenant_id": str(movement.tenant_id),
@@ -1260,6 +1611,8 @@ def create_customer_return(
         "movementType": movement.movementType,
         "quantity": movement.quantity,
         "unitCost": movement.unitCost,
+        "fifoValue": movement.fifoValue,
+        "averageValue": movement.averageValue,
         "referenceNumber": movement.referenceNumber,
         "referenceType": movement.referenceType,
         "notes": movement.notes,
@@ -1277,6 +1630,7 @@ def create_customer_return(
 @router.get("/supplier-returns", response_model=StockMovementsWithProductResponse)
 def get_supplier_returns(
     warehouse_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
@@ -1285,81 +1639,15 @@ def get_supplier_returns(
     _: dict = Depends(require_permission(ModulePermission.INVENTORY_VIEW.value))
 ):
     """Get all supplier returns for the current tenant"""
-    from ...config.inventory_models import StockMovement, Product
-    
-    query = db.query(StockMovement).filter(
-        StockMovement.tenant_id == tenant_context["tenant_id"],
-        StockMovement.referenceType == "supplier_return"
+    return _movements_with_product_response(
+        db,
+        str(tenant_context["tenant_id"]),
+        reference_type="supplier_return",
+        warehouse_id=warehouse_id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
     )
-    
-    if warehouse_id:
-        query = query.filter(StockMovement.warehouseId == warehouse_id)
-    
-    movements = query.order_by(StockMovement.createdAt.desc()).offset(skip).limit(limit).all()
-    
-    # Convert each movement to response format with product details
-    response_movements = []
-    for movement in movements:
-        # Get product details - convert string productId to UUID for comparison
-        product = None
-        try:
-            from uuid import UUID
-            product_uuid = UUID(movement.productId)
-            
-            # First try with the movement's tenant_id (more reliable)
-            product = db.query(Product).filter(
-                Product.id == product_uuid,
-                Product.tenant_id == movement.tenant_id
-            ).first()
-            
-            # If not found, try with the context tenant_id
-            if not product:
-                product = db.query(Product).filter(
-                    Product.id == product_uuid,
-                    Product.tenant_id == tenant_context["tenant_id"]
-                ).first()
-                    
-        except (ValueError, TypeError):
-            # If productId is not a valid UUID, try to find by SKU
-            product = db.query(Product).filter(
-                Product.sku == movement.productId,
-                Product.tenant_id == movement.tenant_id
-            ).first()
-            
-            # If not found, try with context tenant_id
-            if not product:
-                product = db.query(Product).filter(
-                    Product.sku == movement.productId,
-                    Product.tenant_id == tenant_context["tenant_id"]
-                ).first()
-        
-        response_data = {
-            "id": str(movement.id),
-            "tenant_id": str(movement.tenant_id),
-            "productId": movement.productId,
-            "productName": product.name if product else "Unknown Product",
-            "productSku": product.sku if product else "N/A",
-            "productCategory": product.category if product else "N/A",
-            "warehouseId": str(movement.warehouseId),
-            "locationId": movement.locationId,
-            "movementType": movement.movementType,
-            "quantity": movement.quantity,
-            "unitCost": movement.unitCost,
-            "referenceNumber": movement.referenceNumber,
-            "referenceType": movement.referenceType,
-            "notes": movement.notes,
-            "batchNumber": movement.batchNumber,
-            "serialNumber": movement.serialNumber,
-            "expiryDate": movement.expiryDate.isoformat() if movement.expiryDate else None,
-            "status": movement.status,
-            "createdBy": str(movement.createdBy),
-            "createdAt": movement.createdAt,
-            "updatedAt": movement.updatedAt
-        }
-        response_movements.append(response_data)
-    
-    total = len(response_movements)
-    return StockMovementsWithProductResponse(stockMovements=response_movements, total=total)
 
 @router.post("/supplier-returns", response_model=StockMovementResponse)
 def create_supplier_return(
@@ -1387,7 +1675,10 @@ def create_supplier_return(
         "updatedAt": datetime.utcnow()
     })
     
-    movement = create_stock_movement(movement_data, db)
+    try:
+        movement = create_stock_movement(movement_data, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     response_data = {
         "id": str(movement.id),
         "tenant_id": str(movement.tenant_id),
@@ -1397,6 +1688,8 @@ def create_supplier_return(
         "movementType": movement.movementType,
         "quantity": movement.quantity,
         "unitCost": movement.unitCost,
+        "fifoValue": movement.fifoValue,
+        "averageValue": movement.averageValue,
         "referenceNumber": movement.referenceNumber,
         "referenceType": movement.referenceType,
         "notes": movement.notes,
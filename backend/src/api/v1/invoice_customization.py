@@ -12,6 +12,7 @@ from ...models.invoice_models import (
 )
 from ...config.database import User
 from ...config.invoice_customization_models import InvoiceCustomization as InvoiceCustomizationModel
+from ...services.invoice_rendering import invalidate_render_context
 
 router = APIRouter(prefix="/invoice-customization", tags=["Invoice Customization"])
 
@@ -56,6 +57,7 @@ def get_invoice_customization(
             db.add(default_customization)
             db.commit()
             db.refresh(default_customization)
+            invalidate_render_context(tenant_id)
             customization = default_customization
         
         from ...models.invoice_models import InvoiceCustomization as PydanticInvoiceCustomization
@@ -140,6 +142,7 @@ def create_invoice_customization(
             db.add(customization)
             db.commit()
             db.refresh(customization)
+        invalidate_render_context(tenant_id)
         
         from ...models.invoice_models import InvoiceCustomization as PydanticInvoiceCustomization
         pydantic_customization = PydanticInvoiceCustomization(
@@ -211,6 +214,7 @@ def update_invoice_customization(
         customization.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(customization)
+        invalidate_render_context(tenant_id)
         
         from ...models.invoice_models import InvoiceCustomization as PydanticInvoiceCustomization
         pydantic_customization = PydanticInvoiceCustomization(
@@ -280,6 +284,7 @@ def delete_invoice_customization(
         customization.is_active = False
         customization.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_render_context(tenant_id)
         
         return {"message": "Invoice customization deleted successfully"}
         
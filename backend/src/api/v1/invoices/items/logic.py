@@ -259,7 +259,6 @@ def create_invoice_endpoint(
         db_invoice.items = invoice_items
 
         from .....services.inventory_sync_service import InventorySyncService
-        from .....config.inventory_models import Product as ProductORM
 
         stock_items = [
             {
@@ -271,20 +270,6 @@ def create_invoice_endpoint(
         ]
         if stock_items:
             sync_service = InventorySyncService(db)
-            for stock_item in stock_items:
-                product = db.query(ProductORM).filter(
-                    ProductORM.id == stock_item["productId"],
-                    ProductORM.tenant_id == tenant_id,
-                ).first()
-                if product and product.stockQuantity < stock_item["quantity"]:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=(
-                            f"Insufficient stock for product {product.name}. "
-                            f"Available: {product.stockQuantity}, "
-                            f"Required: {stock_item['quantity']}"
-                        ),
-                    )
             deduction = sync_service.deduct_invoice_stock(
                 invoice_id=str(db_invoice.id),
                 tenant_id=tenant_id,
@@ -1,13 +1,11 @@
 import json
 import logging
-import time
-from datetime import datetime
 from typing import List
 
-from sqlalchemy import and_, desc, func
 from sqlalchemy.orm import Session
 
 from ....models.invoices import Invoice
+from ....services.document_sequences import next_document_number, INVOICE, ORDER
 from ..crm.customers.logic import get_customer_by_id
 from ..crm.db_common import resolve_phone_from_customer
 from .items.schemas import Invoice as PydanticInvoice, InvoiceItem
@@ -30,94 +28,11 @@ def resolve_invoice_customer_phone(db, tenant_id: str, invoice_data, customer=No
 
 
 def generate_invoice_number(tenant_id: str, db: Session) -> str:
-    now = datetime.now()
-    prefix = f"INV-{now.year:04d}{now.month:02d}{now.day:02d}"
-    max_retries = 100
-    for attempt in range(max_retries):
-        highest_invoice = db.query(Invoice).filter(
-            and_(
-                Invoice.tenant_id == tenant_id,
-                Invoice.invoiceNumber.like(f"{prefix}-%"),
-            )
-        ).order_by(desc(Invoice.invoiceNumber)).first()
-
-        if highest_invoice and highest_invoice.invoiceNumber:
-            try:
-                new_number = int(highest_invoice.invoiceNumber.split("-")[-1]) + 1
-            except (ValueError, IndexError):
-                count = db.query(Invoice).filter(
-                    and_(
-                        Invoice.tenant_id == tenant_id,
-                        Invoice.invoiceNumber.like(f"{prefix}-%"),
-                    )
-                ).count()
-                new_number = count + 1
-        else:
-            new_number = 1
-
-        candidate = f"{prefix}-{new_number:04d}"
-        existing_invoice = db.query(Invoice).filter(
-            and_(
-                Invoice.tenant_id == tenant_id,
-                Invoice.invoiceNumber == candidate,
-            )
-        ).first()
-
-        if not existing_invoice:
-            return candidate
-
-        if attempt < max_retries - 1:
-            continue
-        timestamp = int(time.time() * 1000) % 10000
-        return f"{prefix}-{timestamp:04d}"
-
-    timestamp = int(time.time() * 1000) % 10000
-    return f"{prefix}-{timestamp:04d}"
+    return next_document_number(db, tenant_id, INVOICE)
 
 
 def generate_order_number(tenant_id: str, db: Session) -> str:
-    now = datetime.now()
-    prefix = f"ORD-{now.year:04d}{now.month:02d}{now.day:02d}"
-    max_retries = 100
-    for attempt in range(max_retries):
-        highest_order = db.query(Invoice).filter(
-            and_(
-                Invoice.tenant_id == tenant_id,
-                Invoice.orderNumber.like(f"{prefix}-%"),
-            )
-        ).order_by(desc(Invoice.orderNumber)).first()
-
-        if highest_order and highest_order.orderNumber:
-            try:
-                new_number = int(highest_order.orderNumber.split("-")[-1]) + 1
-            except (ValueError, IndexError):
-                count = db.query(Invoice).filter(
-                    and_(
-                        Invoice.tenant_id == tenant_id,
-                        Invoice.orderNumber.like(f"{prefix}-%"),
-                    )
-                ).count()
-                new_number = count + 1
-        else:
-            new_number = 1
-
-        candidate = f"{prefix}-{new_number:04d}"
-        existing = db.query(Invoice).filter(
-            and_(
-                Invoice.tenant_id == tenant_id,
-                Invoice.orderNumber == candidate,
-            )
-        ).first()
-        if not existing:
-            return candidate
-
-        if attempt < max_retries - 1:
-            continue
-        timestamp = int(time.time() * 1000) % 10000
-        return f"{prefix}-{timestamp:04d}"
-
-    timestamp = int(time.time() * 1000) % 10000
-    return f"{prefix}-{timestamp:04d}"
+    return next_document_number(db, tenant_id, ORDER)
 
 
 def calculate_invoice_totals(
@@ -1,5 +1,6 @@
 import io
 from datetime import datetime
+from types import SimpleNamespace
 from typing import Any, Dict, List
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
@@ -13,7 +14,7 @@ from ...config.job_card_crud import get_job_card_by_id
 from ...config.core_crud import get_user_by_id
 from ...core.currency import format_currency
 from .pdf_utils import hex_to_color, safe_str, format_date, normalize_items
-from .pdf_generator_modern import load_company_logo
+from .pdf_generator_modern import logo_image
 
 PAGE_WIDTH, PAGE_HEIGHT = letter
 MARGIN = 0.5 * inch
@@ -82,25 +83,30 @@ def _job_card_styles():
     }
 
 
-def _company_header(db: Session, tenant_id: str, styles: Dict) -> List:
+JOB_CARD_FIELDS = (
+    "job_card_number",
+    "status",
+    "description",
+    "vehicle_info",
+    "items",
+    "labor_estimate",
+    "parts_estimate",
+    "vat_rate",
+    "planned_date",
+    "created_at",
+    "updated_at",
+    "completed_at",
+)
+COMPANY_FIELDS = ("company_name", "company_address", "company_phone", "company_email", "company_website")
+
+
+def _company_header(company: Dict, logo, styles: Dict) -> List:
     elements: List = []
-    customization = None
-    try:
-        from ...config.invoice_customization_models import InvoiceCustomization
-        customization = db.query(InvoiceCustomization).filter(
-            InvoiceCustomization.tenant_id == tenant_id,
-            InvoiceCustomization.is_active == True,
-        ).first()
-    except Exception:
-        customization = None
-
-    logo = load_company_logo(getattr(customization, "company_logo_url", None) if customization else None)
-
-    company_name = (getattr(customization, "company_name", None) if customization else None) or "Your Company"
-    company_address = getattr(customization, "company_address", None) if customization else None
-    company_phone = getattr(customization, "company_phone", None) if customization else None
-    company_email = getattr(customization, "company_email", None) if customization else None
-    company_website = getattr(customization, "company_website", None) if customization else None
+    company_name = company.get("company_name") or "Your Company"
+    company_address = company.get("company_address")
+    company_phone = company.get("company_phone")
+    company_email = company.get("company_email")
+    company_website = company.get("company_website")
 
     company_info: List = []
     if logo:
@@ -132,17 +138,15 @@ def _company_header(db: Session, tenant_id: str, styles: Dict) -> List:
     return elements
 
 
-def _tenant_currency(db: Session, tenant_id: str) -> str:
+def _customization(db: Session, tenant_id: str):
     try:
         from ...config.invoice_customization_models import InvoiceCustomization
-        customization = db.query(InvoiceCustomization).filter(
+        return db.query(InvoiceCustomization).filter(
             InvoiceCustomization.tenant_id == tenant_id,
             InvoiceCustomization.is_active == True,
         ).first()
-        currency = (getattr(customization, "default_currency", None) or "USD").strip() or "USD"
-        return currency
     except Exception:
-        return "USD"
+        return None
 
 
 def _info_table(jc: Any, styles: Dict) -> Table:
@@ -288,10 +292,32 @@ def _totals_table(subtotal: float, labour_total: float, vat_rate: float = 0.15,
     return t, before_vat, vat_val, total_val
 
 
-def generate_job_card_pdf(job_card_id: str, db: Session, tenant_id: str) -> bytes:
+def job_card_document(job_card_id: str, db: Session, tenant_id: str) -> Dict[str, Any]:
+    """Everything render_job_card_pdf() draws, read from the database as plain data."""
+    from ...services.asset_store import get_image
+
     jc = get_job_card_by_id(job_card_id, db, tenant_id)
     if not jc:
         raise ValueError("Job card not found")
+    customization = _customization(db, tenant_id)
+    logo = get_image(
+        getattr(customization, "company_logo_url", None) if customization else None,
+        version=(str(customization.id), customization.updated_at) if customization else None,
+    )
+    return {
+        "job_card": {name: getattr(jc, name, None) for name in JOB_CARD_FIELDS},
+        "company": {name: getattr(customization, name, None) if customization else None for name in COMPANY_FIELDS},
+        "currency": (getattr(customization, "default_currency", None) or "USD").strip() or "USD",
+        "logo": vars(logo) if logo else None,
+    }
+
+
+def render_job_card_pdf(data: Dict[str, Any]) -> bytes:
+    """Lays out a job_card_document(); runs in the PDF pool."""
+    from ...services.asset_store import StoredImage
+
+    jc = SimpleNamespace(**data["job_card"])
+    currency = data["currency"]
     styles = _job_card_styles()
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(
@@ -304,7 +330,8 @@ def generate_job_card_pdf(job_card_id: str, db: Session, tenant_id: str) -> byte
     )
     story = []
 
-    story.extend(_company_header(db, tenant_id, styles))
+    logo = logo_image(StoredImage(**data["logo"])) if data["logo"] else None
+    story.extend(_company_header(data["company"], logo, styles))
 
     story.append(Paragraph("VEHICLE JOB CARD", styles["title"]))
     story.append(Spacer(1, 8))
@@ -319,7 +346,6 @@ def generate_job_card_pdf(job_card_id: str, db: Session, tenant_id: str) -> byte
     story.append(Spacer(1, 14))
 
     story.append(Paragraph("Parts & Labour", styles["header"]))
-    currency = _tenant_currency(db, tenant_id)
     parts_tbl, subtotal, labour_total = _parts_table(jc, styles, currency)
     story.append(parts_tbl)
     story.append(Spacer(1, 12))
@@ -339,3 +365,9 @@ def generate_job_card_pdf(job_card_id: str, db: Session, tenant_id: str) -> byte
     pdf_bytes = buffer.getvalue()
     buffer.close()
     return pdf_bytes
+
+
+def generate_job_card_pdf(job_card_id: str, db: Session, tenant_id: str) -> bytes:
+    from ...services.pdf_rendering import JOB_CARD, render_pdf
+
+    return render_pdf(JOB_CARD, job_card_document(job_card_id, db, tenant_id))
@@ -95,6 +95,8 @@ def download_job_card_pdf(
     try:
         from .job_card_pdf import generate_job_card_pdf
         pdf_bytes = generate_job_card_pdf(job_card_id, db, tenant_id)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -808,7 +808,8 @@ async def get_profit_loss_dashboard(
     """Get comprehensive profit/loss dashboard data"""
     try:
         from ...models.invoices import Invoice, Payment
-        from ...config.inventory_models import PurchaseOrder, StockMovement, Product
+        from ...config.inventory_models import PurchaseOrder, StockMovement
+        from ...services.inventory_dashboard import get_inventory_dashboard
         from ...config.sales_models import Quote, Contract
         
         tenant_id = tenant_context["tenant_id"]
@@ -862,27 +863,27 @@ async def get_profit_loss_dashboard(
         )
         total_payments_received = payments_query.with_entities(func.sum(Payment.amount)).scalar() or 0
         
-        # Purchase/Expense Data
-        purchase_orders_query = db.query(PurchaseOrder).filter(
+        # Purchase/Expense Data (one conditional aggregation)
+        purchase_totals = db.query(
+            func.count(PurchaseOrder.id),
+            func.sum(PurchaseOrder.totalAmount),
+            func.count(PurchaseOrder.id).filter(PurchaseOrder.status == "received"),
+            func.count(PurchaseOrder.id).filter(PurchaseOrder.status.in_(["draft", "submitted", "approved", "ordered"])),
+        ).filter(
             PurchaseOrder.tenant_id == tenant_id,
             PurchaseOrder.createdAt >= start_datetime,
             PurchaseOrder.createdAt <= end_datetime
-        )
+        ).one()
         
-        total_purchase_orders = purchase_orders_query.count()
-        total_purchases = purchase_orders_query.with_entities(func.sum(PurchaseOrder.totalAmount)).scalar() or 0
-        completed_purchases = purchase_orders_query.filter(PurchaseOrder.status == "received").count()
-        pending_purchases = purchase_orders_query.filter(PurchaseOrder.status.in_(["draft", "submitted", "approved", "ordered"])).count()
+        total_purchase_orders = purchase_totals[0]
+        total_purchases = purchase_totals[1] or 0
+        completed_purchases = purchase_totals[2]
+        pending_purchases = purchase_totals[3]
         
-        # Inventory Value
-        inventory_query = db.query(Product).filter(
-            Product.tenant_id == tenant_id,
-            Product.isActive == True
-        )
-        total_inventory_value = inventory_query.with_entities(
-            func.sum(Product.stockQuantity * Product.costPerUnitPrice)
-        ).scalar() or 0
-        total_products = inventory_query.count()
+        # Inventory Value (shared, cached aggregate with the inventory dashboard)
+        inventory_stats = get_inventory_dashboard(db, tenant_id)
+        total_inventory_value = inventory_stats["totalStockValue"]
+        total_products = inventory_stats["totalProducts"]
         
         # Stock Movements
         stock_movements_query = db.query(StockMovement).filter(
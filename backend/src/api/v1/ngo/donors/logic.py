@@ -1,10 +1,11 @@
 from typing import List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import desc, or_
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from .....models.ngo import Donor
+from .....services.document_sequences import next_document_number, DONOR
 from ...repository import create_entity, delete_by_id, get_by_id
 from ..shared import donor_to_schema
 from ...healthcare.logic_common import create_payload, update_record, paginated_list
@@ -24,20 +25,7 @@ def get_donor_by_email(tenant_id: str, email: str, db: Session):
 
 
 def _generate_donor_code(db: Session, tenant_id: str) -> str:
-    last = (
-        db.query(Donor)
-        .filter(Donor.tenant_id == tenant_id)
-        .order_by(desc(Donor.donor_code))
-        .first()
-    )
-    if last and last.donor_code and last.donor_code.startswith("DON"):
-        try:
-            num = int(last.donor_code.replace("DON", ""))
-            return f"DON{num + 1:03d}"
-        except ValueError:
-            pass
-    count = db.query(Donor).filter(Donor.tenant_id == tenant_id).count()
-    return f"DON{count + 1:03d}"
+    return next_document_number(db, tenant_id, DONOR)
 
 
 def get_donors(
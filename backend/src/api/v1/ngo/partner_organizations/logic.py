@@ -1,10 +1,11 @@
 from typing import List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import desc, or_
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from .....models.ngo import PartnerOrganization
+from .....services.document_sequences import next_document_number, PARTNER
 from ...repository import create_entity, delete_by_id, get_by_id
 from ..shared import partner_to_schema
 from ...healthcare.logic_common import create_payload, update_record, paginated_list
@@ -24,20 +25,7 @@ def get_partner_by_email(tenant_id: str, email: str, db: Session):
 
 
 def _generate_partner_code(db: Session, tenant_id: str) -> str:
-    last = (
-        db.query(PartnerOrganization)
-        .filter(PartnerOrganization.tenant_id == tenant_id)
-        .order_by(desc(PartnerOrganization.partner_code))
-        .first()
-    )
-    if last and last.partner_code and last.partner_code.startswith("PTR"):
-        try:
-            num = int(last.partner_code.replace("PTR", ""))
-            return f"PTR{num + 1:03d}"
-        except ValueError:
-            pass
-    count = db.query(PartnerOrganization).filter(PartnerOrganization.tenant_id == tenant_id).count()
-    return f"PTR{count + 1:03d}"
+    return next_document_number(db, tenant_id, PARTNER)
 
 
 def get_partners(
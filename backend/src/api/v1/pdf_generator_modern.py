@@ -13,8 +13,7 @@ from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from sqlalchemy.orm import Session
-import requests
-from PIL import Image as PILImage
+from fastapi import HTTPException
 import base64
 from ...core.currency import format_currency
 
@@ -191,38 +190,18 @@ def create_styles(colors: Dict[str, Any]) -> Dict[str, ParagraphStyle]:
         'footer': footer_style
     }
 
-def load_company_logo(logo_url: Optional[str]) -> Optional[Image]:
-    if not logo_url:
-        return None
-    
-    try:
-        if logo_url.startswith('/static/'):
-            # Handle local static files (backward compatibility)
-            file_path = logo_url.replace('/static/', '')
-            with open(file_path, 'rb') as f:
-                img_data = io.BytesIO(f.read())
-        else:
-            # Handle S3 URLs and other external URLs
-            print(f"Loading logo from URL: {logo_url}")  # Debug log
-            response = requests.get(logo_url, timeout=10)
-            response.raise_for_status()
-            img_data = io.BytesIO(response.content)
-        
-        pil_img = PILImage.open(img_data)
-        max_width, max_height = 200, 100
-        pil_img.thumbnail((max_width, max_height), PILImage.Resampling.LANCZOS)
-        
-        # Save to a temporary file and use that
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-            pil_img.save(tmp_file.name, format='PNG')
-            return Image(tmp_file.name, width=min(pil_img.width, max_width), height=min(pil_img.height, max_height))
-            
-    except Exception as e:
-        print(f"Error loading logo from {logo_url}: {str(e)}")  # Debug log
+def logo_image(stored) -> Optional[Image]:
+    """A flowable for a services.asset_store.StoredImage; a new one per document."""
+    if stored is None:
         return None
+    return Image(stored.path, width=stored.width, height=stored.height)
+
+def load_company_logo(logo_url: Optional[str]) -> Optional[Image]:
+    from ...services.asset_store import get_image
 
-def create_invoice_header(invoice, customization: Optional[Dict[str, Any]], styles: Dict[str, ParagraphStyle], colors: Dict[str, tuple]) -> List:
+    return logo_image(get_image(logo_url))
+
+def create_invoice_header(invoice, customization: Optional[Dict[str, Any]], styles: Dict[str, ParagraphStyle], colors: Dict[str, tuple], logo: Optional[Image] = None) -> List:
     elements = []
     
     company_name = customization.get('company_name', 'Your Company') if customization else 'Your Company'
@@ -231,9 +210,6 @@ def create_invoice_header(invoice, customization: Optional[Dict[str, Any]], styl
     company_email = customization.get('company_email', '') if customization else ''
     company_website = customization.get('company_website', '') if customization else ''
     
-    logo_url = customization.get('company_logo_url') if customization else None
-    logo = load_company_logo(logo_url)
-    
     # Create header table
     header_data = []
     
@@ -555,225 +531,215 @@ def create_footer(customization: Optional[Dict[str, Any]], styles: Dict[str, Par
     
     return elements
 
+def render_invoice_pdf(invoice, context) -> bytes:
+    """Lays out ``invoice`` with a RenderContext from services.invoice_rendering."""
+    customization = context.customization
+    colors = context.colors
+    styles = context.styles
+    currency = context.currency
+
+    buffer = io.BytesIO()
+
+    def on_page(canvas, doc):
+        draw_footer(canvas, doc, customization)
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=0.5*inch,
+        leftMargin=0.5*inch,
+        topMargin=0.5*inch,
+        bottomMargin=2.5*inch
+    )
+
+    story = []
+
+    story.extend(create_invoice_header(invoice, customization, styles, colors, logo_image(context.logo)))
+
+    story.extend(create_customer_section(invoice, styles))
+
+    if context.plan_type == 'healthcare':
+        story.extend([])
+    else:
+        story.extend(create_vehicle_section(invoice, customization, styles))
+
+    story.extend(create_items_table(invoice, styles, colors, currency))
+
+    story.extend(create_workshop_sections(invoice, customization, styles))
+
+    story.extend(create_notes_section(invoice, customization, styles))
+
+    story.extend(create_totals_section(invoice, styles, colors, currency))
+
+    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+
+    return pdf_bytes
+
+def render_invoice_document(data: Dict[str, Any]) -> bytes:
+    """Renders an invoice_document() from services.invoice_rendering; runs in the PDF pool."""
+    from types import SimpleNamespace
+    from ...services.invoice_rendering import document_context
+
+    return render_invoice_pdf(SimpleNamespace(**data["invoice"]), document_context(data))
+
 def generate_modern_invoice_pdf(invoice, db: Session) -> bytes:
     try:
-        from ...config.invoice_customization_models import InvoiceCustomization
-        from ...config.database import get_subscription_by_tenant, get_plan_by_id
-        
-        customization_obj = db.query(InvoiceCustomization).filter(
-            InvoiceCustomization.tenant_id == invoice.tenant_id,
-            InvoiceCustomization.is_active == True
-        ).first()
-        
-        subscription = get_subscription_by_tenant(str(invoice.tenant_id), db)
-        plan_type = None
-        if subscription:
-            plan = get_plan_by_id(str(subscription.planId), db)
-            if plan:
-                plan_type = plan.planType
-        
-        customization = None
-        if customization_obj:
-            customization = {
-                'company_name': customization_obj.company_name,
-                'company_logo_url': customization_obj.company_logo_url,
-                'company_address': customization_obj.company_address,
-                'company_phone': customization_obj.company_phone,
-                'company_email': customization_obj.company_email,
-                'company_website': customization_obj.company_website,
-                'bank_sort_code': customization_obj.bank_sort_code,
-                'bank_account_number': customization_obj.bank_account_number,
-                'payment_instructions': customization_obj.payment_instructions,
-                'primary_color': customization_obj.primary_color,
-                'secondary_color': customization_obj.secondary_color,
-                'accent_color': customization_obj.accent_color,
-                'show_vehicle_info': customization_obj.show_vehicle_info,
-                'show_parts_section': customization_obj.show_parts_section,
-                'show_labour_section': customization_obj.show_labour_section,
-                'show_comments_section': customization_obj.show_comments_section,
-                'footer_text': customization_obj.footer_text,
-                'show_contact_info_in_footer': customization_obj.show_contact_info_in_footer,
-                'footer_background_color': customization_obj.footer_background_color,
-                'grid_color': customization_obj.grid_color,
-                'default_currency': getattr(customization_obj, 'default_currency', 'USD'),
-                'thank_you_message': customization_obj.thank_you_message,
-                'enquiry_message': customization_obj.enquiry_message,
-                'contact_message': customization_obj.contact_message,
-                'default_payment_instructions': customization_obj.default_payment_instructions,
-            }
-        
-        
-        colors = get_customization_colors(customization)
-        
-        styles = create_styles(colors)
-        
-        # Get currency from customization or default to USD
-        currency = customization.get('default_currency', 'USD') if customization else 'USD'
-        
-        buffer = io.BytesIO()
-        
-        def on_page(canvas, doc):
-            draw_footer(canvas, doc, customization)
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=0.5*inch,
-            leftMargin=0.5*inch,
-            topMargin=0.5*inch,
-            bottomMargin=2.5*inch
+        from ...services.invoice_rendering import cached_invoice_pdf, get_render_context, invoice_document
+        from ...services.pdf_rendering import INVOICE, render_pdf
+
+        context = get_render_context(db, invoice.tenant_id)
+        return cached_invoice_pdf(
+            invoice, context, lambda invoice, context: render_pdf(INVOICE, invoice_document(invoice, context))
         )
-        
-        story = []
-        
-        story.extend(create_invoice_header(invoice, customization, styles, colors))
-        
-        story.extend(create_customer_section(invoice, styles))
-        
-        if plan_type == 'healthcare':
-            story.extend([])
-        else:
-            story.extend(create_vehicle_section(invoice, customization, styles))
-        
-        story.extend(create_items_table(invoice, styles, colors, currency))
-        
-        story.extend(create_workshop_sections(invoice, customization, styles))
-        
-        story.extend(create_notes_section(invoice, customization, styles))
-        
-        story.extend(create_totals_section(invoice, styles, colors, currency))
-        
-        doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
-        
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_bytes
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise ValueError(f"Failed to generate invoice PDF: {str(e)}")
 
 
-def generate_delivery_note_pdf(delivery_note, invoice, db: Session) -> bytes:
+def delivery_note_document(delivery_note, invoice, db: Session) -> Dict[str, Any]:
+    """Everything render_delivery_note_pdf() draws, read from the database as plain data."""
+    from ...config.invoice_customization_models import InvoiceCustomization
+    customization_obj = db.query(InvoiceCustomization).filter(
+        InvoiceCustomization.tenant_id == invoice.tenant_id,
+        InvoiceCustomization.is_active == True
+    ).first()
+    customer_type = 'cash'
     try:
-        from ...config.invoice_customization_models import InvoiceCustomization
-        customization_obj = db.query(InvoiceCustomization).filter(
-            InvoiceCustomization.tenant_id == invoice.tenant_id,
-            InvoiceCustomization.is_active == True
-        ).first()
-        customization = None
-        if customization_obj:
-            customization = {
-                'company_name': customization_obj.company_name,
-                'company_address': customization_obj.company_address,
-                'company_phone': customization_obj.company_phone,
-                'company_email': customization_obj.company_email,
-            }
-        company_name = (customization or {}).get('company_name', 'Company')
-        company_address = (customization or {}).get('company_address', '')
-        company_phone = (customization or {}).get('company_phone', '')
-        company_email = (customization or {}).get('company_email', '')
-        customer_type = 'cash'
+        from ...api.v1.crm.customers.logic import get_customer_by_id
+        if invoice.customerId:
+            customer = get_customer_by_id(db, invoice.customerId, str(invoice.tenant_id))
+            if customer and getattr(customer, 'paymentTerms', None):
+                customer_type = (customer.paymentTerms or 'cash').lower()
+            elif customer and getattr(customer, 'customerType', None):
+                customer_type = (customer.customerType or 'individual').lower()
+    except Exception:
+        pass
+    delivery_date = delivery_note.created_at if hasattr(delivery_note, 'created_at') and delivery_note.created_at else datetime.now()
+    items = getattr(invoice, 'items', None) or []
+    if isinstance(items, str):
+        import json
         try:
-            from ...api.v1.crm.customers.logic import get_customer_by_id
-            if invoice.customerId:
-                customer = get_customer_by_id(db, invoice.customerId, str(invoice.tenant_id))
-                if customer and getattr(customer, 'paymentTerms', None):
-                    customer_type = (customer.paymentTerms or 'cash').lower()
-                elif customer and getattr(customer, 'customerType', None):
-                    customer_type = (customer.customerType or 'individual').lower()
+            items = json.loads(items)
         except Exception:
-            pass
-        delivery_date = delivery_note.created_at if hasattr(delivery_note, 'created_at') and delivery_note.created_at else datetime.now()
-        if hasattr(delivery_date, 'strftime'):
-            delivery_date_str = delivery_date.strftime('%d/%m/%Y')
-        else:
-            delivery_date_str = str(delivery_date)[:10]
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=0.5*inch,
-            leftMargin=0.5*inch,
-            topMargin=0.5*inch,
-            bottomMargin=0.75*inch
-        )
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'DeliveryTitle', parent=styles['Heading1'], fontSize=14, textColor=hex_to_color(FRONTEND_COLORS['primary']), alignment=TA_LEFT, fontName='Helvetica-Bold'
-        )
-        body_style = ParagraphStyle(
-            'DeliveryBody', parent=styles['Normal'], fontSize=9, textColor=hex_to_color(FRONTEND_COLORS['text_primary']), fontName='Helvetica'
-        )
-        small_style = ParagraphStyle(
-            'DeliverySmall', parent=styles['Normal'], fontSize=8, textColor=hex_to_color(FRONTEND_COLORS['text_secondary']), fontName='Helvetica'
-        )
-        story = []
-        story.append(Paragraph(company_name, title_style))
-        if company_address:
-            story.append(Paragraph(company_address.replace('\n', '<br/>'), small_style))
-        contact_parts = []
-        if company_phone:
-            contact_parts.append(f"T: {company_phone}")
-        if company_email:
-            contact_parts.append(f"E: {company_email}")
-        if contact_parts:
-            story.append(Paragraph(' | '.join(contact_parts), small_style))
-        story.append(Spacer(1, 10))
-        story.append(Paragraph("Customer :", body_style))
-        customer_lines = [invoice.customerName or '']
-        if getattr(invoice, 'billingAddress', None) and invoice.billingAddress:
-            customer_lines.append(invoice.billingAddress)
-        if getattr(invoice, 'customerCity', None) and invoice.customerCity:
-            customer_lines.append(invoice.customerCity)
-        story.append(Paragraph('<br/>'.join(customer_lines), body_style))
-        story.append(Spacer(1, 8))
-        story.append(Paragraph("DELIVERY NOTE", title_style))
-        story.append(Spacer(1, 6))
-        meta_data = [
-            f"Date: {delivery_date_str}",
-            f"Invoice No: {invoice.invoiceNumber}",
-            f"Customer type: {customer_type}",
-        ]
-        story.append(Paragraph('<br/>'.join(meta_data), small_style))
-        story.append(Spacer(1, 8))
-        items = getattr(invoice, 'items', None) or []
-        if isinstance(items, str):
-            import json
-            try:
-                items = json.loads(items)
-            except Exception:
-                items = []
-        table_data = [['Qty', 'Product']]
-        total_qty = 0
-        for item in items:
-            if isinstance(item, dict):
-                qty = float(item.get('quantity', 0))
-                desc = item.get('description', '')
-            else:
-                qty = float(getattr(item, 'quantity', 0))
-                desc = getattr(item, 'description', '')
-            total_qty += qty
-            table_data.append([str(int(qty) if qty == int(qty) else qty), desc])
-        if table_data:
-            items_table = Table(table_data, colWidths=[0.8*inch, 4.5*inch])
-            items_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, hex_to_color(FRONTEND_COLORS['border'])),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ]))
-            story.append(items_table)
-        story.append(Spacer(1, 6))
-        num_items = len(table_data) - 1
-        story.append(Paragraph(f"{int(total_qty)} &nbsp;&nbsp;&nbsp; {num_items} Items", body_style))
-        story.append(Spacer(1, 12))
-        story.append(Paragraph("Powered by www.Biztrack.uk", small_style))
-        doc.build(story)
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-        return pdf_bytes
+            items = []
+    return {
+        'company_name': customization_obj.company_name if customization_obj else 'Company',
+        'company_address': customization_obj.company_address if customization_obj else '',
+        'company_phone': customization_obj.company_phone if customization_obj else '',
+        'company_email': customization_obj.company_email if customization_obj else '',
+        'customer_type': customer_type,
+        'delivery_date': delivery_date,
+        'invoice_number': invoice.invoiceNumber,
+        'customer_name': invoice.customerName,
+        'billing_address': getattr(invoice, 'billingAddress', None),
+        'customer_city': getattr(invoice, 'customerCity', None),
+        'items': [
+            item if isinstance(item, dict)
+            else {'quantity': getattr(item, 'quantity', 0), 'description': getattr(item, 'description', '')}
+            for item in items
+        ],
+    }
+
+
+def render_delivery_note_pdf(data: Dict[str, Any]) -> bytes:
+    """Lays out a delivery_note_document(); runs in the PDF pool."""
+    company_name = data['company_name'] or 'Company'
+    company_address = data['company_address'] or ''
+    company_phone = data['company_phone'] or ''
+    company_email = data['company_email'] or ''
+    delivery_date = data['delivery_date']
+    if hasattr(delivery_date, 'strftime'):
+        delivery_date_str = delivery_date.strftime('%d/%m/%Y')
+    else:
+        delivery_date_str = str(delivery_date)[:10]
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=0.5*inch,
+        leftMargin=0.5*inch,
+        topMargin=0.5*inch,
+        bottomMargin=0.75*inch
+    )
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'DeliveryTitle', parent=styles['Heading1'], fontSize=14, textColor=hex_to_color(FRONTEND_COLORS['primary']), alignment=TA_LEFT, fontName='Helvetica-Bold'
+    )
+    body_style = ParagraphStyle(
+        'DeliveryBody', parent=styles['Normal'], fontSize=9, textColor=hex_to_color(FRONTEND_COLORS['text_primary']), fontName='Helvetica'
+    )
+    small_style = ParagraphStyle(
+        'DeliverySmall', parent=styles['Normal'], fontSize=8, textColor=hex_to_color(FRONTEND_COLORS['text_secondary']), fontName='Helvetica'
+    )
+    story = []
+    story.append(Paragraph(company_name, title_style))
+    if company_address:
+        story.append(Paragraph(company_address.replace('\n', '<br/>'), small_style))
+    contact_parts = []
+    if company_phone:
+        contact_parts.append(f"T: {company_phone}")
+    if company_email:
+        contact_parts.append(f"E: {company_email}")
+    if contact_parts:
+        story.append(Paragraph(' | '.join(contact_parts), small_style))
+    story.append(Spacer(1, 10))
+    story.append(Paragraph("Customer :", body_style))
+    customer_lines = [data['customer_name'] or '']
+    if data['billing_address']:
+        customer_lines.append(data['billing_address'])
+    if data['customer_city']:
+        customer_lines.append(data['customer_city'])
+    story.append(Paragraph('<br/>'.join(customer_lines), body_style))
+    story.append(Spacer(1, 8))
+    story.append(Paragraph("DELIVERY NOTE", title_style))
+    story.append(Spacer(1, 6))
+    meta_data = [
+        f"Date: {delivery_date_str}",
+        f"Invoice No: {data['invoice_number']}",
+        f"Customer type: {data['customer_type']}",
+    ]
+    story.append(Paragraph('<br/>'.join(meta_data), small_style))
+    story.append(Spacer(1, 8))
+    table_data = [['Qty', 'Product']]
+    total_qty = 0
+    for item in data['items']:
+        qty = float(item.get('quantity', 0))
+        desc = item.get('description', '')
+        total_qty += qty
+        table_data.append([str(int(qty) if qty == int(qty) else qty), desc])
+    if table_data:
+        items_table = Table(table_data, colWidths=[0.8*inch, 4.5*inch])
+        items_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, hex_to_color(FRONTEND_COLORS['border'])),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ]))
+        story.append(items_table)
+    story.append(Spacer(1, 6))
+    num_items = len(table_data) - 1
+    story.append(Paragraph(f"{int(total_qty)} &nbsp;&nbsp;&nbsp; {num_items} Items", body_style))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("Powered by www.Biztrack.uk", small_style))
+    doc.build(story)
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    return pdf_bytes
+
+
+def generate_delivery_note_pdf(delivery_note, invoice, db: Session) -> bytes:
+    try:
+        from ...services.pdf_rendering import DELIVERY_NOTE, render_pdf
+
+        return render_pdf(DELIVERY_NOTE, delivery_note_document(delivery_note, invoice, db))
+    except HTTPException:
+        raise
     except Exception as e:
         raise ValueError(f"Failed to generate delivery note PDF: {str(e)}")
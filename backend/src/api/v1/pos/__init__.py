@@ -6,6 +6,8 @@ from .shifts.api import router as shifts_router
 from .transactions.api import router as transactions_router
 from .reports.api import router as reports_router
 from .dashboard.api import router as dashboard_router
+from .pricing.api import router as pricing_router
+from .receipts.api import router as receipts_router
 
 router = APIRouter(prefix="/pos", tags=["pos"])
 router.include_router(products_router)
@@ -14,3 +16,5 @@ router.include_router(shifts_router)
 router.include_router(transactions_router)
 router.include_router(reports_router)
 router.include_router(dashboard_router)
+router.include_router(pricing_router)
+router.include_router(receipts_router)
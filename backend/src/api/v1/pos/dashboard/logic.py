@@ -2,28 +2,20 @@ from datetime import datetime
 from typing import Any, Dict
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from .....models.pos import POSShift as POSShiftORM, POSTransaction as POSTransactionORM
+from .....models.pos import POSShift as POSShiftORM
+from ..sales_rollups import sales_totals
 
 
 def get_pos_dashboard_data(db: Session, tenant_id: str) -> Dict[str, Any]:
+    # Open-ended ranges read the day rollups only; they are current to the last sale.
     today = datetime.utcnow().date()
     start_of_day = datetime.combine(today, datetime.min.time())
-    end_of_day = datetime.combine(today, datetime.max.time())
-
-    today_transactions = (
-        db.query(POSTransactionORM)
-        .filter(
-            POSTransactionORM.tenant_id == tenant_id,
-            POSTransactionORM.createdAt >= start_of_day,
-            POSTransactionORM.createdAt <= end_of_day,
-        )
-        .all()
-    )
+    start_of_month = datetime(today.year, today.month, 1)
 
-    today_sales = sum(txn.total for txn in today_transactions)
-    today_count = len(today_transactions)
+    today_totals = sales_totals(db, tenant_id, start=start_of_day)[0]
+    month_totals = sales_totals(db, tenant_id, start=start_of_month)[0]
+    payment_methods = sales_totals(db, tenant_id, start=start_of_day, group_by=("paymentMethod",))
 
     open_shifts = (
         db.query(POSShiftORM)
@@ -31,42 +23,15 @@ def get_pos_dashboard_data(db: Session, tenant_id: str) -> Dict[str, Any]:
         .count()
     )
 
-    start_of_month = datetime(today.year, today.month, 1)
-    month_transactions = (
-        db.query(POSTransactionORM)
-        .filter(
-            POSTransactionORM.tenant_id == tenant_id,
-            POSTransactionORM.createdAt >= start_of_month,
-        )
-        .all()
-    )
-
-    month_sales = sum(txn.total for txn in month_transactions)
-    month_count = len(month_transactions)
-
-    payment_methods = (
-        db.query(
-            POSTransactionORM.paymentMethod,
-            func.count(POSTransactionORM.id),
-            func.sum(POSTransactionORM.total),
-        )
-        .filter(
-            POSTransactionORM.tenant_id == tenant_id,
-            POSTransactionORM.createdAt >= start_of_day,
-            POSTransactionORM.createdAt <= end_of_day,
-        )
-        .group_by(POSTransactionORM.paymentMethod)
-        .all()
-    )
-
     payment_breakdown = {
-        method: {"count": count, "total": float(total or 0)}
-        for method, count, total in payment_methods
+        row["paymentMethod"]: {"count": row["transactionCount"], "total": row["salesTotal"]}
+        for row in payment_methods
+        if row["transactionCount"]
     }
 
     return {
-        "today": {"sales": round(today_sales, 2), "transactions": today_count},
-        "month": {"sales": round(month_sales, 2), "transactions": month_count},
+        "today": {"sales": today_totals["salesTotal"], "transactions": today_totals["transactionCount"]},
+        "month": {"sales": month_totals["salesTotal"], "transactions": month_totals["transactionCount"]},
         "open_shifts": open_shifts,
         "payment_methods": payment_breakdown,
     }
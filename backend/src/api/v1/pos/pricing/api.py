@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .....config.database import get_db
+from .....api.dependencies import get_current_user, get_tenant_context, require_permission
+from .schemas import (
+    POSPriceListCreate,
+    POSPriceListResponse,
+    POSPriceListsResponse,
+    POSPriceListUpdate,
+    POSPriceQuoteRequest,
+    POSPriceQuoteResponse,
+    POSPromotionCreate,
+    POSPromotionResponse,
+    POSPromotionsResponse,
+    POSPromotionUpdate,
+)
+from . import logic
+
+router = APIRouter()
+
+
+@router.get("/pricing/price-lists", response_model=POSPriceListsResponse)
+async def list_price_lists(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:view")),
+):
+    return logic.list_price_lists_endpoint(db, tenant_context)
+
+
+@router.get("/pricing/price-lists/{price_list_id}", response_model=POSPriceListResponse)
+async def get_price_list(
+    price_list_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:view")),
+):
+    return logic.get_price_list_endpoint(db, tenant_context, price_list_id)
+
+
+@router.post("/pricing/price-lists", response_model=POSPriceListResponse)
+async def create_price_list(
+    price_list_data: POSPriceListCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.create_price_list_endpoint(db, tenant_context, price_list_data)
+
+
+@router.put("/pricing/price-lists/{price_list_id}", response_model=POSPriceListResponse)
+async def update_price_list(
+    price_list_id: str,
+    price_list_data: POSPriceListUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.update_price_list_endpoint(db, tenant_context, price_list_id, price_list_data)
+
+
+@router.delete("/pricing/price-lists/{price_list_id}")
+async def delete_price_list(
+    price_list_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.delete_price_list_endpoint(db, tenant_context, price_list_id)
+
+
+@router.get("/pricing/promotions", response_model=POSPromotionsResponse)
+async def list_promotions(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:view")),
+):
+    return logic.list_promotions_endpoint(db, tenant_context)
+
+
+@router.post("/pricing/promotions", response_model=POSPromotionResponse)
+async def create_promotion(
+    promotion_data: POSPromotionCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.create_promotion_endpoint(db, tenant_context, promotion_data)
+
+
+@router.put("/pricing/promotions/{promotion_id}", response_model=POSPromotionResponse)
+async def update_promotion(
+    promotion_id: str,
+    promotion_data: POSPromotionUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.update_promotion_endpoint(db, tenant_context, promotion_id, promotion_data)
+
+
+@router.delete("/pricing/promotions/{promotion_id}")
+async def delete_promotion(
+    promotion_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.delete_promotion_endpoint(db, tenant_context, promotion_id)
+
+
+@router.post("/pricing/quote", response_model=POSPriceQuoteResponse)
+async def quote_basket(
+    quote_data: POSPriceQuoteRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:create")),
+):
+    return logic.quote_basket_endpoint(db, tenant_context, quote_data)
@@ -0,0 +1,369 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from sqlalchemy.orm import Session, selectinload
+
+from .....config.inventory_models import Product, Warehouse
+from .....models.pos import POSPriceList as POSPriceListORM, POSPriceListItem, POSPromotion as POSPromotionORM
+from .....services.pos_pricing import get_pricing_index, invalidate_pricing
+
+
+def _parse_id(value: str, label: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError as e:
+        raise ValueError(f"Invalid {label}: {value}") from e
+
+
+def _check_warehouse(db: Session, tenant_id: Any, warehouse_id: Optional[str]) -> None:
+    if warehouse_id is None:
+        return
+    found = (
+        db.query(Warehouse.id)
+        .filter(Warehouse.tenant_id == tenant_id, Warehouse.id == _parse_id(warehouse_id, "warehouseId"))
+        .first()
+    )
+    if not found:
+        raise ValueError(f"Warehouse {warehouse_id} not found")
+
+
+def _check_products(db: Session, tenant_id: Any, product_ids) -> None:
+    ids = {_parse_id(pid, "productId") for pid in product_ids}
+    if not ids:
+        return
+    found = {row.id for row in db.query(Product.id).filter(Product.tenant_id == tenant_id, Product.id.in_(ids))}
+    missing = sorted(str(pid) for pid in ids - found)
+    if missing:
+        raise ValueError(f"Products not found: {', '.join(missing)}")
+
+
+def get_price_lists(db: Session, tenant_id: Any) -> List[POSPriceListORM]:
+    return (
+        db.query(POSPriceListORM)
+        .options(selectinload(POSPriceListORM.items))
+        .filter(POSPriceListORM.tenant_id == tenant_id)
+        .order_by(POSPriceListORM.priority.desc(), POSPriceListORM.name)
+        .all()
+    )
+
+
+def get_price_list_by_id(db: Session, tenant_id: Any, price_list_id: str) -> Optional[POSPriceListORM]:
+    return (
+        db.query(POSPriceListORM)
+        .options(selectinload(POSPriceListORM.items))
+        .filter(POSPriceListORM.tenant_id == tenant_id, POSPriceListORM.id == _parse_id(price_list_id, "price list id"))
+        .first()
+    )
+
+
+def _replace_items(db: Session, tenant_id: Any, price_list: POSPriceListORM, items) -> None:
+    entries = {(item.productId, item.minQuantity): item for item in items}
+    _check_products(db, tenant_id, {product_id for product_id, _ in entries})
+    db.query(POSPriceListItem).filter(POSPriceListItem.priceListId == price_list.id).delete(synchronize_session=False)
+    db.add_all([
+        POSPriceListItem(
+            tenant_id=tenant_id,
+            priceListId=price_list.id,
+            productId=_parse_id(item.productId, "productId"),
+            price=item.price,
+            minQuantity=item.minQuantity,
+        )
+        for item in entries.values()
+    ])
+
+
+def create_price_list(db: Session, tenant_id: Any, data) -> POSPriceListORM:
+    """Raises ValueError for an unknown warehouse or product."""
+    _check_warehouse(db, tenant_id, data.warehouseId)
+    now = datetime.utcnow()
+    price_list = POSPriceListORM(
+        tenant_id=tenant_id,
+        name=data.name,
+        warehouseId=data.warehouseId,
+        customerGroup=data.customerGroup,
+        priority=data.priority,
+        startsAt=data.startsAt,
+        endsAt=data.endsAt,
+        isActive=data.isActive,
+        createdAt=now,
+        updatedAt=now,
+    )
+    db.add(price_list)
+    db.flush()
+    _replace_items(db, tenant_id, price_list, data.items)
+    db.commit()
+    invalidate_pricing(tenant_id)
+    return get_price_list_by_id(db, tenant_id, str(price_list.id))
+
+
+def update_price_list(db: Session, tenant_id: Any, price_list_id: str, data) -> Optional[POSPriceListORM]:
+    price_list = get_price_list_by_id(db, tenant_id, price_list_id)
+    if not price_list:
+        return None
+    changes = data.dict(exclude_unset=True)
+    items = changes.pop("items", None)
+    if "warehouseId" in changes:
+        _check_warehouse(db, tenant_id, changes["warehouseId"])
+    for key, value in changes.items():
+        if value is None and key in ("name", "priority", "isActive"):
+            continue
+        setattr(price_list, key, value)
+    if items is not None:
+        _replace_items(db, tenant_id, price_list, data.items)
+    price_list.updatedAt = datetime.utcnow()
+    db.commit()
+    invalidate_pricing(tenant_id)
+    return get_price_list_by_id(db, tenant_id, price_list_id)
+
+
+def delete_price_list(db: Session, tenant_id: Any, price_list_id: str) -> bool:
+    price_list = get_price_list_by_id(db, tenant_id, price_list_id)
+    if not price_list:
+        return False
+    db.delete(price_list)
+    db.commit()
+    invalidate_pricing(tenant_id)
+    return True
+
+
+def get_promotions(db: Session, tenant_id: Any) -> List[POSPromotionORM]:
+    return (
+        db.query(POSPromotionORM)
+        .filter(POSPromotionORM.tenant_id == tenant_id)
+        .order_by(POSPromotionORM.priority.desc(), POSPromotionORM.name)
+        .all()
+    )
+
+
+def get_promotion_by_id(db: Session, tenant_id: Any, promotion_id: str) -> Optional[POSPromotionORM]:
+    return (
+        db.query(POSPromotionORM)
+        .filter(POSPromotionORM.tenant_id == tenant_id, POSPromotionORM.id == _parse_id(promotion_id, "promotion id"))
+        .first()
+    )
+
+
+def create_promotion(db: Session, tenant_id: Any, data) -> POSPromotionORM:
+    """Raises ValueError for an unknown warehouse or product."""
+    _check_warehouse(db, tenant_id, data.warehouseId)
+    _check_products(db, tenant_id, data.productIds)
+    now = datetime.utcnow()
+    promotion = POSPromotionORM(tenant_id=tenant_id, **data.dict(), createdAt=now, updatedAt=now)
+    db.add(promotion)
+    db.commit()
+    db.refresh(promotion)
+    invalidate_pricing(tenant_id)
+    return promotion
+
+
+def update_promotion(db: Session, tenant_id: Any, promotion_id: str, data) -> Optional[POSPromotionORM]:
+    """Raises ValueError when the result is not a valid promotion."""
+    from .schemas import POSPromotionCreate
+
+    promotion = get_promotion_by_id(db, tenant_id, promotion_id)
+    if not promotion:
+        return None
+    changes = data.dict(exclude_unset=True)
+    current = {key: getattr(promotion, key) for key in POSPromotionCreate.model_fields}
+    current["productIds"] = [str(pid) for pid in current["productIds"] or []]
+    current["warehouseId"] = str(current["warehouseId"]) if current["warehouseId"] else None
+    merged = POSPromotionCreate(**{**current, **changes})
+    if "warehouseId" in changes:
+        _check_warehouse(db, tenant_id, merged.warehouseId)
+    if "productIds" in changes:
+        _check_products(db, tenant_id, merged.productIds)
+    for key in changes:
+        setattr(promotion, key, getattr(merged, key))
+    promotion.updatedAt = datetime.utcnow()
+    db.commit()
+    db.refresh(promotion)
+    invalidate_pricing(tenant_id)
+    return promotion
+
+
+def delete_promotion(db: Session, tenant_id: Any, promotion_id: str) -> bool:
+    promotion = get_promotion_by_id(db, tenant_id, promotion_id)
+    if not promotion:
+        return False
+    db.delete(promotion)
+    db.commit()
+    invalidate_pricing(tenant_id)
+    return True
+
+
+def list_price_lists_endpoint(db: Session, tenant_context: dict):
+    from fastapi import HTTPException
+    from ..shared import convert_db_price_list_to_pydantic
+    from .schemas import POSPriceListsResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        price_lists = get_price_lists(db, tenant_context["tenant_id"])
+        return POSPriceListsResponse(priceLists=[convert_db_price_list_to_pydantic(p) for p in price_lists])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching price lists: {str(e)}")
+
+
+def get_price_list_endpoint(db: Session, tenant_context: dict, price_list_id: str):
+    from fastapi import HTTPException
+    from ..shared import convert_db_price_list_to_pydantic
+    from .schemas import POSPriceListResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        price_list = get_price_list_by_id(db, tenant_context["tenant_id"], price_list_id)
+        if not price_list:
+            raise HTTPException(status_code=404, detail="Price list not found")
+        return POSPriceListResponse(priceList=convert_db_price_list_to_pydantic(price_list))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching price list: {str(e)}")
+
+
+def create_price_list_endpoint(db: Session, tenant_context: dict, price_list_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_price_list_to_pydantic
+    from .schemas import POSPriceListResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        price_list = create_price_list(db, tenant_context["tenant_id"], price_list_data)
+        return POSPriceListResponse(priceList=convert_db_price_list_to_pydantic(price_list))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating price list: {str(e)}")
+
+
+def update_price_list_endpoint(db: Session, tenant_context: dict, price_list_id: str, price_list_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_price_list_to_pydantic
+    from .schemas import POSPriceListResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        price_list = update_price_list(db, tenant_context["tenant_id"], price_list_id, price_list_data)
+        if not price_list:
+            raise HTTPException(status_code=404, detail="Price list not found")
+        return POSPriceListResponse(priceList=convert_db_price_list_to_pydantic(price_list))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating price list: {str(e)}")
+
+
+def delete_price_list_endpoint(db: Session, tenant_context: dict, price_list_id: str):
+    from fastapi import HTTPException
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        if not delete_price_list(db, tenant_context["tenant_id"], price_list_id):
+            raise HTTPException(status_code=404, detail="Price list not found")
+        return {"message": "Price list deleted successfully"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting price list: {str(e)}")
+
+
+def list_promotions_endpoint(db: Session, tenant_context: dict):
+    from fastapi import HTTPException
+    from ..shared import convert_db_promotion_to_pydantic
+    from .schemas import POSPromotionsResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        promotions = get_promotions(db, tenant_context["tenant_id"])
+        return POSPromotionsResponse(promotions=[convert_db_promotion_to_pydantic(p) for p in promotions])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching promotions: {str(e)}")
+
+
+def create_promotion_endpoint(db: Session, tenant_context: dict, promotion_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_promotion_to_pydantic
+    from .schemas import POSPromotionResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        promotion = create_promotion(db, tenant_context["tenant_id"], promotion_data)
+        return POSPromotionResponse(promotion=convert_db_promotion_to_pydantic(promotion))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating promotion: {str(e)}")
+
+
+def update_promotion_endpoint(db: Session, tenant_context: dict, promotion_id: str, promotion_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_promotion_to_pydantic
+    from .schemas import POSPromotionResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        promotion = update_promotion(db, tenant_context["tenant_id"], promotion_id, promotion_data)
+        if not promotion:
+            raise HTTPException(status_code=404, detail="Promotion not found")
+        return POSPromotionResponse(promotion=convert_db_promotion_to_pydantic(promotion))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating promotion: {str(e)}")
+
+
+def delete_promotion_endpoint(db: Session, tenant_context: dict, promotion_id: str):
+    from fastapi import HTTPException
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        if not delete_promotion(db, tenant_context["tenant_id"], promotion_id):
+            raise HTTPException(status_code=404, detail="Promotion not found")
+        return {"message": "Promotion deleted successfully"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting promotion: {str(e)}")
+
+
+def quote_basket_endpoint(db: Session, tenant_context: dict, quote_data):
+    from fastapi import HTTPException
+    from ..shared import calculate_transaction_totals
+    from .schemas import POSPriceQuoteResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        at = quote_data.at
+        if at is not None and at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        pricing = get_pricing_index(db, tenant_context["tenant_id"], quote_data.warehouseId)
+        basket = pricing.price_basket(quote_data.items, quote_data.customerGroup, at)
+        totals = calculate_transaction_totals(basket.items, quote_data.discount, 0.0)
+        return POSPriceQuoteResponse(items=basket.items, appliedPromotions=basket.applied, **totals)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error pricing basket: {str(e)}")
@@ -0,0 +1,132 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+from .....services.pos_pricing import BUY_X_GET_Y, PERCENT_OFF, PROMOTION_KINDS
+from ..transactions.schemas import POSTransactionItem
+
+
+class POSPriceListItemIn(BaseModel):
+    productId: str
+    price: float = Field(..., ge=0)
+    minQuantity: int = Field(1, ge=1)
+
+
+class POSPriceListCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    warehouseId: Optional[str] = None
+    customerGroup: Optional[str] = Field(None, max_length=64)
+    priority: int = 0
+    startsAt: Optional[datetime] = None
+    endsAt: Optional[datetime] = None
+    isActive: bool = True
+    items: List[POSPriceListItemIn] = []
+
+
+class POSPriceListUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1)
+    warehouseId: Optional[str] = None
+    customerGroup: Optional[str] = Field(None, max_length=64)
+    priority: Optional[int] = None
+    startsAt: Optional[datetime] = None
+    endsAt: Optional[datetime] = None
+    isActive: Optional[bool] = None
+    items: Optional[List[POSPriceListItemIn]] = Field(None, description="Replaces every item of the list")
+
+
+class POSPriceList(BaseModel):
+    id: str
+    name: str
+    warehouseId: Optional[str] = None
+    customerGroup: Optional[str] = None
+    priority: int = 0
+    startsAt: Optional[datetime] = None
+    endsAt: Optional[datetime] = None
+    isActive: bool = True
+    items: List[POSPriceListItemIn] = []
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+
+
+class POSPriceListResponse(BaseModel):
+    priceList: POSPriceList
+
+
+class POSPriceListsResponse(BaseModel):
+    priceLists: List[POSPriceList]
+
+
+class POSPromotionCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    kind: str = Field(..., description="percent_off | amount_off | fixed_price | buy_x_get_y")
+    value: float = Field(0.0, ge=0)
+    buyQuantity: Optional[int] = Field(None, ge=1)
+    getQuantity: Optional[int] = Field(None, ge=1)
+    minQuantity: int = Field(1, ge=1)
+    productIds: List[str] = []
+    categories: List[str] = []
+    warehouseId: Optional[str] = None
+    customerGroup: Optional[str] = Field(None, max_length=64)
+    priority: int = 0
+    stackable: bool = False
+    startsAt: Optional[datetime] = None
+    endsAt: Optional[datetime] = None
+    isActive: bool = True
+
+    @model_validator(mode="after")
+    def check_kind(self):
+        if self.kind not in PROMOTION_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(PROMOTION_KINDS)}")
+        if self.kind == BUY_X_GET_Y and not (self.buyQuantity and self.getQuantity):
+            raise ValueError("buy_x_get_y needs buyQuantity and getQuantity")
+        if self.kind in (PERCENT_OFF, BUY_X_GET_Y) and self.value > 100:
+            raise ValueError("value is a percentage and cannot exceed 100")
+        return self
+
+
+class POSPromotionUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1)
+    value: Optional[float] = Field(None, ge=0)
+    buyQuantity: Optional[int] = Field(None, ge=1)
+    getQuantity: Optional[int] = Field(None, ge=1)
+    minQuantity: Optional[int] = Field(None, ge=1)
+    productIds: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    warehouseId: Optional[str] = None
+    customerGroup: Optional[str] = Field(None, max_length=64)
+    priority: Optional[int] = None
+    stackable: Optional[bool] = None
+    startsAt: Optional[datetime] = None
+    endsAt: Optional[datetime] = None
+    isActive: Optional[bool] = None
+
+
+class POSPromotion(POSPromotionCreate):
+    id: str
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+
+
+class POSPromotionResponse(BaseModel):
+    promotion: POSPromotion
+
+
+class POSPromotionsResponse(BaseModel):
+    promotions: List[POSPromotion]
+
+
+class POSPriceQuoteRequest(BaseModel):
+    items: List[POSTransactionItem]
+    warehouseId: Optional[str] = None
+    customerGroup: Optional[str] = Field(None, max_length=64)
+    discount: float = 0.0
+    at: Optional[datetime] = Field(None, description="Price as of this time (UTC); now when omitted")
+
+
+class POSPriceQuoteResponse(BaseModel):
+    items: List[Dict[str, Any]]
+    appliedPromotions: List[Dict[str, Any]]
+    subtotal: float
+    discount: float
+    taxAmount: float
+    total: float
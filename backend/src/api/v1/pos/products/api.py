@@ -6,7 +6,7 @@ from .....config.database import get_db
 from .....api.dependencies import get_current_user, get_tenant_context, require_permission
 from .....models.inventory_models import ProductCreate, ProductUpdate, ProductsResponse, ProductResponse
 from . import logic
-from .schemas import ProductCodeLookupResponse
+from .schemas import ProductCodeCreate, ProductCodeLookupResponse, ProductCodesResponse
 
 router = APIRouter()
 
@@ -32,12 +32,13 @@ async def list_pos_products(
 @router.get("/products/search")
 async def search_products(
     q: str = Query(..., description="Search query for product name, SKU, or barcode"),
+    limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
     tenant_context: Optional[dict] = Depends(get_tenant_context),
     _: dict = Depends(require_permission("pos:products:view")),
 ):
-    return logic.search_pos_products(db, tenant_context, q)
+    return logic.search_pos_products(db, tenant_context, q, limit)
 
 
 @router.get("/products/lookup", response_model=ProductCodeLookupResponse)
@@ -94,3 +95,38 @@ async def delete_pos_product(
     _: dict = Depends(require_permission("pos:products:delete")),
 ):
     return logic.delete_pos_product(db, tenant_context, product_id)
+
+
+@router.get("/products/{product_id}/codes", response_model=ProductCodesResponse)
+async def get_pos_product_codes(
+    product_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:view")),
+):
+    return logic.get_pos_product_codes(db, tenant_context, product_id)
+
+
+@router.post("/products/{product_id}/codes", response_model=ProductCodesResponse)
+async def add_pos_product_code(
+    product_id: str,
+    code_data: ProductCodeCreate,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.add_pos_product_code(db, tenant_context, product_id, code_data)
+
+
+@router.delete("/products/{product_id}/codes/{code}", response_model=ProductCodesResponse)
+async def remove_pos_product_code(
+    product_id: str,
+    code: str,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:products:update")),
+):
+    return logic.remove_pos_product_code(db, tenant_context, product_id, code)
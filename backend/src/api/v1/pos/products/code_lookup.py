@@ -1,12 +1,54 @@
+"""
+POS product code lookup
+
+A scan resolves locally: the tenant's catalogue by barcode, SKU or an
+alternate code (product_codes), through a per-worker LRU of recent codes
+that holds the product's lookup details, so a hot code answers without a
+query. POS product writes drop the product's codes from this worker's LRU;
+changes made elsewhere (other workers, stock movements, inventory edits)
+show within CATALOG_TTL.
+Unknown barcodes are never looked up on the request: they are queued as
+pending product_codes rows and a background job asks Open Food Facts, so a
+later scan of the same code answers from the stored result. Misses are
+cached too, briefly in memory and for days in product_codes, so a till
+rescanning an unknown code does no repeated work.
+"""
+
+import itertools
 import json
+import logging
 import re
-from typing import Any, Dict, Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 from urllib.parse import parse_qs, urlparse
 
 import requests
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from .....config.database import get_product_by_barcode
+from .....config.inventory_models import Product, ProductCode
+from .....core.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CODE_ALTERNATE = "alternate"
+CODE_PENDING = "pending"
+CODE_FOUND = "found"
+CODE_NOT_FOUND = "not_found"
+
+CATALOG_TTL = 300  # seconds a code -> product details resolution is reused
+MISS_TTL = 30  # seconds a code outside the catalogue answers from memory
+NOT_FOUND_RETRY = timedelta(days=7)
+LOOKUP_ERROR_RETRY = timedelta(hours=1)
+ENRICH_BATCH_SIZE = 20
+
+# Per worker, keyed by (tenant id, code): the id and suggested fields of the
+# product a code resolved to, and the lookup response of codes the catalogue
+# does not know
+_catalog_hits = LRUCache(maxsize=4096, default_ttl=CATALOG_TTL)
+_unresolved = LRUCache(maxsize=4096, default_ttl=MISS_TTL)
 
 
 FOOD_CATEGORY_KEYWORDS = {
@@ -168,39 +210,147 @@ def db_product_to_suggested(db_product) -> Dict[str, Any]:
 
 
 def lookup_open_food_facts(barcode: str) -> Optional[Dict[str, Any]]:
-    try:
-        response = requests.get(
-            f"https://world.openfoodfacts.org/api/v2/product/{barcode}.json",
-            timeout=5,
-            headers={"User-Agent": "BizTrack/1.0"},
-        )
-        if response.status_code != 200:
-            return None
-        payload = response.json()
-        if payload.get("status") != 1:
-            return None
-        product = payload.get("product") or {}
-        name = (
-            _clean_str(product.get("product_name"))
-            or _clean_str(product.get("product_name_en"))
-            or _clean_str(product.get("generic_name"))
-        )
-        if not name:
-            return None
-        return normalize_suggested_fields(
-            {
-                "name": name,
-                "sku": barcode,
-                "description": product.get("generic_name") or product.get("ingredients_text"),
-                "brand": (product.get("brands") or "").split(",")[0].strip() if product.get("brands") else None,
-                "category": map_external_category(product.get("categories_tags") or product.get("categories")),
-                "barcode": barcode,
-                "salePrice": product.get("price"),
-            },
-            barcode,
+    """
+    Product fields for ``barcode`` from Open Food Facts, or None when it does
+    not know the code. Raises requests.RequestException (and ValueError for a
+    malformed reply) when the lookup itself failed.
+    """
+    response = requests.get(
+        f"https://world.openfoodfacts.org/api/v2/product/{barcode}.json",
+        timeout=5,
+        headers={"User-Agent": "BizTrack/1.0"},
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("status") != 1:
+        return None
+    product = payload.get("product") or {}
+    name = (
+        _clean_str(product.get("product_name"))
+        or _clean_str(product.get("product_name_en"))
+        or _clean_str(product.get("generic_name"))
+    )
+    if not name:
+        return None
+    return normalize_suggested_fields(
+        {
+            "name": name,
+            "sku": barcode,
+            "description": product.get("generic_name") or product.get("ingredients_text"),
+            "brand": (product.get("brands") or "").split(",")[0].strip() if product.get("brands") else None,
+            "category": map_external_category(product.get("categories_tags") or product.get("categories")),
+            "barcode": barcode,
+            "salePrice": product.get("price"),
+        },
+        barcode,
+    )
+
+
+# ------------------------------------------------------------------ #
+# Local resolution
+# ------------------------------------------------------------------ #
+def _catalog_product(db: Session, tenant_id: str, code: str) -> Optional[Product]:
+    alternate = select(ProductCode.productId).where(
+        ProductCode.tenant_id == tenant_id,
+        ProductCode.code == code,
+        ProductCode.productId.isnot(None),
+    )
+    return (
+        db.query(Product)
+        .filter(
+            Product.tenant_id == tenant_id,
+            or_(Product.barcode == code, Product.sku == code, Product.id.in_(alternate)),
         )
-    except requests.RequestException:
+        .order_by((Product.barcode == code).desc(), (Product.sku == code).desc())
+        .first()
+    )
+
+
+def _catalog_response(entry: Dict[str, Any], code_type: str) -> Dict[str, Any]:
+    return {
+        "source": "catalog",
+        "codeType": code_type,
+        "existsInCatalog": True,
+        "existingProductId": entry["productId"],
+        "suggested": dict(entry["suggested"]),
+        "message": f"A product with this {code_type if code_type == 'barcode' else 'code'} already exists in your catalog.",
+    }
+
+
+def _queue_enrichment(db: Session, tenant_id: str, barcode: str) -> bool:
+    """Ask for an external lookup of ``barcode`` unless one is pending or recent. True when queued."""
+    now = datetime.utcnow()
+    stmt = pg_insert(ProductCode).values(
+        tenant_id=tenant_id, code=barcode, status=CODE_PENDING, attempts=0, createdAt=now, updatedAt=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "code"],
+        set_={"status": CODE_PENDING, "updatedAt": now},
+        where=(ProductCode.status == CODE_NOT_FOUND) & (ProductCode.retryAfter <= now),
+    ).returning(ProductCode.id)
+    queued = db.execute(stmt).first() is not None
+    db.commit()
+    return queued
+
+
+def _barcode_response(db: Session, tenant_id: str, barcode: str) -> Dict[str, Any]:
+    entry = (
+        db.query(ProductCode.status, ProductCode.source, ProductCode.suggested)
+        .filter(ProductCode.tenant_id == tenant_id, ProductCode.code == barcode)
+        .first()
+    )
+    if entry and entry.status == CODE_FOUND and entry.suggested:
+        return {
+            "source": entry.source or "external",
+            "codeType": "barcode",
+            "existsInCatalog": False,
+            "existingProductId": None,
+            "suggested": entry.suggested,
+            "message": "Product details loaded from barcode database.",
+        }
+    queued = entry is not None and entry.status == CODE_PENDING
+    if entry is None or entry.status == CODE_NOT_FOUND:
+        queued = _queue_enrichment(db, tenant_id, barcode)
+    if queued:
+        schedule_code_enrichment(tenant_id)
+    return {
+        "source": "barcode",
+        "codeType": "barcode",
+        "existsInCatalog": False,
+        "existingProductId": None,
+        "suggested": normalize_suggested_fields({"barcode": barcode, "sku": barcode}, barcode),
+        "message": "Barcode captured. Fill in remaining product details.",
+    }
+
+
+def forget_product_code(tenant_id: Any, code: Optional[str]) -> None:
+    """Drop this worker's cached resolution of ``code`` after the catalogue changed."""
+    if code:
+        key = (str(tenant_id), code.strip())
+        _catalog_hits.delete(key)
+        _unresolved.delete(key)
+
+
+def forget_product_codes(db: Session, tenant_id: Any, product_id: Any, *codes: Optional[str]) -> None:
+    """Drop the cached resolution of ``codes`` and of the product's alternate codes."""
+    for code in itertools.chain(codes, list_alternate_codes(db, tenant_id, product_id)):
+        forget_product_code(tenant_id, code)
+
+
+def _resolve_catalog(db: Session, tenant_id: str, code: str) -> Optional[Dict[str, Any]]:
+    """The cached ``{productId, suggested}`` of the product ``code`` resolves to; None outside the catalogue."""
+    key = (str(tenant_id), code)
+    entry = _catalog_hits.get(key)
+    if entry is not None:
+        return entry
+    product = _catalog_product(db, tenant_id, code)
+    if product is None:
         return None
+    entry = {"productId": str(product.id), "suggested": db_product_to_suggested(product)}
+    _catalog_hits.set(key, entry)
+    return entry
 
 
 def lookup_product_code(db: Session, tenant_id: str, raw_code: str) -> Dict[str, Any]:
@@ -222,19 +372,10 @@ def lookup_product_code(db: Session, tenant_id: str, raw_code: str) -> Dict[str,
     elif is_barcode_like(code):
         lookup_barcode = re.sub(r"\s+", "", code)
 
-    if lookup_barcode:
-        existing = get_product_by_barcode(db, lookup_barcode, tenant_id)
-        if existing:
-            return {
-                "source": "catalog",
-                "codeType": "barcode",
-                "existsInCatalog": True,
-                "existingProductId": str(existing.id),
-                "suggested": db_product_to_suggested(existing),
-                "message": "A product with this barcode already exists in your catalog.",
-            }
-
     if structured:
+        entry = _resolve_catalog(db, tenant_id, lookup_barcode) if lookup_barcode else None
+        if entry:
+            return _catalog_response(entry, "barcode")
         return {
             "source": "qr_json",
             "codeType": "qr",
@@ -244,31 +385,149 @@ def lookup_product_code(db: Session, tenant_id: str, raw_code: str) -> Dict[str,
             "message": "Product details loaded from QR code.",
         }
 
+    lookup_code = lookup_barcode or code
+    key = (str(tenant_id), lookup_code)
+    cached = _unresolved.get(key)
+    if cached is not None:
+        return cached
+
+    entry = _resolve_catalog(db, tenant_id, lookup_code)
+    if entry:
+        return _catalog_response(entry, "barcode" if lookup_barcode else "qr")
+
     if lookup_barcode:
-        external = lookup_open_food_facts(lookup_barcode)
-        if external:
-            return {
-                "source": "openfoodfacts",
-                "codeType": "barcode",
-                "existsInCatalog": False,
-                "existingProductId": None,
-                "suggested": external,
-                "message": "Product details loaded from barcode database.",
-            }
-        return {
-            "source": "barcode",
-            "codeType": "barcode",
+        response = _barcode_response(db, tenant_id, lookup_barcode)
+    else:
+        response = {
+            "source": "raw_code",
+            "codeType": "qr",
             "existsInCatalog": False,
             "existingProductId": None,
-            "suggested": normalize_suggested_fields({"barcode": lookup_barcode, "sku": lookup_barcode}, lookup_barcode),
-            "message": "Barcode captured. Fill in remaining product details.",
+            "suggested": normalize_suggested_fields({"sku": code, "name": code}, code),
+            "message": "Code captured. Fill in remaining product details.",
         }
+    _unresolved.set(key, response)
+    return response
+
+
+# ------------------------------------------------------------------ #
+# External enrichment (background)
+# ------------------------------------------------------------------ #
+def enrich_product_codes(db: Session, tenant_id: str, batch_size: int = ENRICH_BATCH_SIZE) -> int:
+    """
+    Look up the tenant's pending codes externally and store the outcome,
+    committing per batch. Rows are claimed with SKIP LOCKED, so concurrent
+    runs share the work. Returns the codes processed.
+    """
+    processed = 0
+    while True:
+        rows = (
+            db.query(ProductCode)
+            .filter(ProductCode.tenant_id == tenant_id, ProductCode.status == CODE_PENDING)
+            .order_by(ProductCode.createdAt)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            return processed
+        for row in rows:
+            row.attempts = (row.attempts or 0) + 1
+            try:
+                suggested = lookup_open_food_facts(row.code)
+            except (requests.RequestException, ValueError) as e:
+                logger.warning("Barcode lookup failed for %s: %s", row.code, e)
+                row.status = CODE_NOT_FOUND
+                row.retryAfter = datetime.utcnow() + LOOKUP_ERROR_RETRY
+                continue
+            if suggested:
+                row.status = CODE_FOUND
+                row.source = "openfoodfacts"
+                row.suggested = suggested
+                row.retryAfter = None
+            else:
+                row.status = CODE_NOT_FOUND
+                row.retryAfter = datetime.utcnow() + NOT_FOUND_RETRY
+        db.commit()
+        for row in rows:
+            forget_product_code(tenant_id, row.code)
+        processed += len(rows)
+
+
+_scheduled: set = set()
+_scheduled_lock = threading.Lock()
+
+
+def schedule_code_enrichment(tenant_id: Any) -> None:
+    """Run ``enrich_product_codes`` for the tenant on a background thread, once at a time per tenant."""
+    key = str(tenant_id)
+    with _scheduled_lock:
+        if key in _scheduled:
+            return
+        _scheduled.add(key)
+
+    def _run() -> None:
+        from .....config.database_config import SessionLocal
+
+        db = SessionLocal()
+        try:
+            enrich_product_codes(db, key)
+        except Exception as e:
+            db.rollback()
+            logger.error("Failed to enrich product codes for tenant %s: %s", key, e, exc_info=True)
+        finally:
+            db.close()
+            with _scheduled_lock:
+                _scheduled.discard(key)
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
+# ------------------------------------------------------------------ #
+# Alternate codes
+# ------------------------------------------------------------------ #
+def list_alternate_codes(db: Session, tenant_id: str, product_id: str) -> List[str]:
+    rows = (
+        db.query(ProductCode.code)
+        .filter(ProductCode.tenant_id == tenant_id, ProductCode.productId == product_id)
+        .order_by(ProductCode.code)
+        .all()
+    )
+    return [row.code for row in rows]
 
-    return {
-        "source": "raw_code",
-        "codeType": "qr",
-        "existsInCatalog": False,
-        "existingProductId": None,
-        "suggested": normalize_suggested_fields({"sku": code, "name": code}, code),
-        "message": "Code captured. Fill in remaining product details.",
-    }
+
+def add_alternate_code(db: Session, tenant_id: str, product_id: str, raw_code: str) -> List[str]:
+    """
+    Make ``raw_code`` resolve to the product and commit. Replaces a stored
+    external lookup of the code. Raises ValueError when another product
+    already answers to it.
+    """
+    code = raw_code.strip()
+    if not code:
+        raise ValueError("Code is empty")
+    owner = _catalog_product(db, tenant_id, code)
+    if owner and str(owner.id) != str(product_id):
+        raise ValueError(f"Code {code} already belongs to {owner.name}")
+    now = datetime.utcnow()
+    stmt = pg_insert(ProductCode).values(
+        tenant_id=tenant_id, code=code, productId=product_id, status=CODE_ALTERNATE,
+        attempts=0, createdAt=now, updatedAt=now,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "code"],
+        set_={"productId": product_id, "status": CODE_ALTERNATE, "suggested": None, "retryAfter": None, "updatedAt": now},
+    ))
+    db.commit()
+    forget_product_code(tenant_id, code)
+    return list_alternate_codes(db, tenant_id, product_id)
+
+
+def remove_alternate_code(db: Session, tenant_id: str, product_id: str, code: str) -> List[str]:
+    db.query(ProductCode).filter(
+        ProductCode.tenant_id == tenant_id,
+        ProductCode.productId == product_id,
+        ProductCode.code == code,
+    ).delete(synchronize_session=False)
+    db.commit()
+    forget_product_code(tenant_id, code)
+    return list_alternate_codes(db, tenant_id, product_id)
@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from .....models.inventory_models import (
@@ -15,15 +16,24 @@ from .....models.inventory_models import (
     WORKSHOP_CATEGORIES,
 )
 from .....config.database import (
-    get_products,
     get_product_by_id,
     create_product,
     update_product,
     delete_product,
 )
+from .....config.inventory_models import Product
+from .....services.pos_pricing import invalidate_pricing
+from .....services.product_search import product_search_clause, search_products
 from ..categories.logic import get_pos_categories
-from .schemas import default_category_values
-from .code_lookup import lookup_product_code as resolve_product_code
+from .schemas import ProductCodesResponse, default_category_values
+from .code_lookup import (
+    add_alternate_code,
+    forget_product_code,
+    forget_product_codes,
+    list_alternate_codes,
+    lookup_product_code as resolve_product_code,
+    remove_alternate_code,
+)
 
 
 def convert_db_product_to_pydantic(db_product, supplier_name: Optional[str] = None):
@@ -143,38 +153,42 @@ def list_pos_products(
     if not tenant_context:
         raise HTTPException(status_code=400, detail="Tenant context required")
     try:
+        filters = [Product.tenant_id == tenant_context["tenant_id"]]
+        if category:
+            filters.append(Product.category == category)
+        search_clause = product_search_clause(search)
+        if search_clause is not None:
+            filters.append(search_clause)
+        if low_stock is not None:
+            is_low = Product.stockQuantity <= Product.minStockLevel
+            filters.append(is_low if low_stock else ~is_low)
+        if is_active is not None:
+            filters.append(Product.isActive == is_active)
+
         skip = (page - 1) * limit
-        products = get_products(db, tenant_context["tenant_id"], skip, limit)
-
-        if category or search or low_stock is not None or is_active is not None:
-            filtered_products = []
-            for product in products:
-                if category and product.category != category:
-                    continue
-                if search:
-                    search_lower = search.lower()
-                    if not any([
-                        search_lower in (product.name or "").lower(),
-                        search_lower in (product.sku or "").lower(),
-                        search_lower in (product.description or "").lower(),
-                    ]):
-                        continue
-                if low_stock is not None:
-                    if low_stock and product.stockQuantity > product.lowStockThreshold:
-                        continue
-                    if not low_stock and product.stockQuantity <= product.lowStockThreshold:
-                        continue
-                if is_active is not None and product.isActive != is_active:
-                    continue
-                filtered_products.append(product)
-            products = filtered_products
+        rows = (
+            db.query(Product, func.count().over().label("total"))
+            .filter(*filters)
+            .order_by(Product.createdAt.desc(), Product.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        products = [product for product, _ in rows]
+        # Window count: the total rides along with the page. Only a page past
+        # the end needs its own count.
+        if rows:
+            total = rows[0].total
+        elif skip:
+            total = db.query(func.count(Product.id)).filter(*filters).scalar() or 0
+        else:
+            total = 0
 
         pydantic_products = convert_products_to_pydantic(
             db,
             tenant_context["tenant_id"],
             products,
         )
-        total = len(pydantic_products)
 
         return ProductsResponse(
             products=pydantic_products,
@@ -191,32 +205,17 @@ def list_pos_products(
         raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
 
 
-def search_pos_products(db: Session, tenant_context: dict, q: str):
+def search_pos_products(db: Session, tenant_context: dict, q: str, limit: int = 10):
     if not tenant_context:
         raise HTTPException(status_code=400, detail="Tenant context required")
     try:
-        products = get_products(db, tenant_context["tenant_id"], 0, 100)
+        products, total = search_products(db, tenant_context["tenant_id"], q, limit=limit)
         pydantic_products = convert_products_to_pydantic(
             db,
             tenant_context["tenant_id"],
             products,
         )
-
-        search_lower = q.lower()
-        matching_products = []
-        for product in pydantic_products:
-            if (
-                search_lower in product.name.lower()
-                or search_lower in product.sku.lower()
-                or (product.barcode and search_lower in product.barcode.lower())
-                or (product.productType and search_lower in product.productType.lower())
-                or (product.brand and search_lower in product.brand.lower())
-                or (product.supplierName and search_lower in product.supplierName.lower())
-                or (product.category and search_lower in product.category.lower())
-            ):
-                matching_products.append(product)
-
-        return {"products": matching_products[:10], "total": len(matching_products)}
+        return {"products": pydantic_products, "total": total}
     except HTTPException:
         raise
     except Exception as e:
@@ -317,6 +316,10 @@ def create_pos_product(
         }
 
         db_product = create_product(payload, db)
+        forget_product_code(tenant_context["tenant_id"], db_product.barcode)
+        forget_product_code(tenant_context["tenant_id"], db_product.sku)
+        if "category" in mapped_data:
+            invalidate_pricing(tenant_context["tenant_id"])
         pydantic_product = convert_single_product_to_pydantic(
             db,
             tenant_context["tenant_id"],
@@ -381,6 +384,8 @@ def update_pos_product(
                 mapped_data[date_field] = None if v is None or v == "" else v
 
         mapped_data["updatedAt"] = datetime.now()
+        previous = get_product_by_id(product_id, db, tenant_context["tenant_id"])
+        previous_codes = (previous.barcode, previous.sku) if previous else ()
         db_product = update_product(
             product_id,
             mapped_data,
@@ -389,6 +394,16 @@ def update_pos_product(
         )
         if not db_product:
             raise HTTPException(status_code=404, detail="Product not found")
+        forget_product_codes(
+            db,
+            tenant_context["tenant_id"],
+            product_id,
+            *previous_codes,
+            db_product.barcode,
+            db_product.sku,
+        )
+        if "category" in mapped_data:
+            invalidate_pricing(tenant_context["tenant_id"])
         pydantic_product = convert_single_product_to_pydantic(
             db,
             tenant_context["tenant_id"],
@@ -405,11 +420,60 @@ def delete_pos_product(db: Session, tenant_context: dict, product_id: str):
     if not tenant_context:
         raise HTTPException(status_code=400, detail="Tenant context required")
     try:
+        db_product = get_product_by_id(product_id, db, tenant_context["tenant_id"])
+        if not db_product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        # Collected first: the alternate codes go with the product
+        codes = [db_product.barcode, db_product.sku, *list_alternate_codes(db, tenant_context["tenant_id"], product_id)]
         success = delete_product(product_id, db, tenant_context["tenant_id"])
         if not success:
             raise HTTPException(status_code=404, detail="Product not found")
+        for code in codes:
+            forget_product_code(tenant_context["tenant_id"], code)
         return {"message": "Product deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting product: {str(e)}")
+
+
+def get_pos_product_codes(db: Session, tenant_context: dict, product_id: str):
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        if not get_product_by_id(product_id, db, tenant_context["tenant_id"]):
+            raise HTTPException(status_code=404, detail="Product not found")
+        codes = list_alternate_codes(db, tenant_context["tenant_id"], product_id)
+        return ProductCodesResponse(productId=product_id, codes=codes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching product codes: {str(e)}")
+
+
+def add_pos_product_code(db: Session, tenant_context: dict, product_id: str, code_data):
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        if not get_product_by_id(product_id, db, tenant_context["tenant_id"]):
+            raise HTTPException(status_code=404, detail="Product not found")
+        codes = add_alternate_code(db, tenant_context["tenant_id"], product_id, code_data.code)
+        return ProductCodesResponse(productId=product_id, codes=codes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error adding product code: {str(e)}")
+
+
+def remove_pos_product_code(db: Session, tenant_context: dict, product_id: str, code: str):
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        codes = remove_alternate_code(db, tenant_context["tenant_id"], product_id, code)
+        return ProductCodesResponse(productId=product_id, codes=codes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error removing product code: {str(e)}")
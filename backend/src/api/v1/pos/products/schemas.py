@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 
 from .....models.inventory_models import ProductCategory
 
@@ -24,5 +24,14 @@ class ProductCodeLookupResponse(BaseModel):
     message: str
 
 
+class ProductCodeCreate(BaseModel):
+    code: str = Field(..., min_length=1, max_length=128)
+
+
+class ProductCodesResponse(BaseModel):
+    productId: str
+    codes: List[str]
+
+
 def default_category_values():
     return [e.value for e in ProductCategory]
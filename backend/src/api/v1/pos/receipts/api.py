@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .....config.database import get_db
+from .....api.dependencies import get_current_user, get_tenant_context, require_permission
+from .schemas import (
+    POSReceiptTemplateCreate,
+    POSReceiptTemplateResponse,
+    POSReceiptTemplatesResponse,
+    POSReceiptTemplateUpdate,
+)
+from . import logic
+
+router = APIRouter()
+
+
+@router.get("/receipt-templates", response_model=POSReceiptTemplatesResponse)
+def list_receipt_templates(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:view")),
+):
+    return logic.list_receipt_templates_endpoint(db, tenant_context)
+
+
+@router.post("/receipt-templates", response_model=POSReceiptTemplateResponse)
+def create_receipt_template(
+    template_data: POSReceiptTemplateCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:update")),
+):
+    return logic.create_receipt_template_endpoint(db, tenant_context, template_data)
+
+
+@router.put("/receipt-templates/{template_id}", response_model=POSReceiptTemplateResponse)
+def update_receipt_template(
+    template_id: str,
+    template_data: POSReceiptTemplateUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:update")),
+):
+    return logic.update_receipt_template_endpoint(db, tenant_context, template_id, template_data)
+
+
+@router.delete("/receipt-templates/{template_id}")
+def delete_receipt_template(
+    template_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:update")),
+):
+    return logic.delete_receipt_template_endpoint(db, tenant_context, template_id)
+
+
+@router.get("/transactions/{transaction_id}/receipt")
+def get_transaction_receipt(
+    transaction_id: str,
+    format: str = Query("text", description="text, escpos or pdf"),
+    template_id: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:view")),
+):
+    return logic.get_transaction_receipt_endpoint(db, tenant_context, transaction_id, format, template_id)
+
+
+@router.get("/shifts/{shift_id}/receipts")
+def get_shift_receipts(
+    shift_id: str,
+    format: str = Query("text", description="text, escpos or pdf"),
+    template_id: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:shifts:view")),
+):
+    return logic.get_shift_receipts_endpoint(db, tenant_context, shift_id, format, template_id)
@@ -0,0 +1,275 @@
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .....models.platform.user import User
+from .....models.pos import POSReceiptTemplate as POSReceiptTemplateORM, POSShift as POSShiftORM
+from .....models.pos import POSTransaction as POSTransactionORM
+from .....services.receipts import (
+    RECEIPT_FORMATS,
+    RECEIPT_MEDIA_TYPES,
+    get_compiled_receipt,
+    receipt_data,
+    validate_receipt_template,
+)
+
+REPRINT_BATCH_SIZE = 500
+
+
+def get_receipt_templates(db: Session, tenant_id: Any) -> List[POSReceiptTemplateORM]:
+    return (
+        db.query(POSReceiptTemplateORM)
+        .filter(POSReceiptTemplateORM.tenant_id == tenant_id)
+        .order_by(POSReceiptTemplateORM.isDefault.desc(), POSReceiptTemplateORM.name)
+        .all()
+    )
+
+
+def get_receipt_template_by_id(db: Session, tenant_id: Any, template_id: str) -> Optional[POSReceiptTemplateORM]:
+    """Raises ValueError when ``template_id`` is not a UUID."""
+    try:
+        template_uuid = uuid.UUID(str(template_id))
+    except ValueError as e:
+        raise ValueError(f"Invalid template id: {template_id}") from e
+    return (
+        db.query(POSReceiptTemplateORM)
+        .filter(POSReceiptTemplateORM.tenant_id == tenant_id, POSReceiptTemplateORM.id == template_uuid)
+        .first()
+    )
+
+
+def _clear_default(db: Session, tenant_id: Any, keep_id=None) -> None:
+    query = db.query(POSReceiptTemplateORM).filter(
+        POSReceiptTemplateORM.tenant_id == tenant_id, POSReceiptTemplateORM.isDefault.is_(True)
+    )
+    if keep_id is not None:
+        query = query.filter(POSReceiptTemplateORM.id != keep_id)
+    query.update({"isDefault": False}, synchronize_session=False)
+
+
+def create_receipt_template(db: Session, tenant_id: Any, data) -> POSReceiptTemplateORM:
+    """Raises ValueError when the template does not compile."""
+    validate_receipt_template(data)
+    if data.isDefault:
+        _clear_default(db, tenant_id)
+    now = datetime.utcnow()
+    template = POSReceiptTemplateORM(tenant_id=tenant_id, **data.dict(), version=1, createdAt=now, updatedAt=now)
+    db.add(template)
+    db.commit()
+    db.refresh(template)
+    return template
+
+
+def update_receipt_template(db: Session, tenant_id: Any, template_id: str, data) -> Optional[POSReceiptTemplateORM]:
+    """Raises ValueError when the changed template does not compile."""
+    from .schemas import POSReceiptTemplateCreate
+
+    template = get_receipt_template_by_id(db, tenant_id, template_id)
+    if not template:
+        return None
+    changes = {
+        key: value
+        for key, value in data.dict(exclude_unset=True).items()
+        if value is not None or key in ("header", "footer", "currency")
+    }
+    current = {key: getattr(template, key) for key in POSReceiptTemplateCreate.model_fields}
+    merged = POSReceiptTemplateCreate(**{**current, **changes})
+    validate_receipt_template(merged)
+    if merged.isDefault and not template.isDefault:
+        _clear_default(db, tenant_id, keep_id=template.id)
+    for key in changes:
+        setattr(template, key, getattr(merged, key))
+    # Compiled templates are cached by version
+    template.version = (template.version or 1) + 1
+    template.updatedAt = datetime.utcnow()
+    db.commit()
+    db.refresh(template)
+    return template
+
+
+def delete_receipt_template(db: Session, tenant_id: Any, template_id: str) -> bool:
+    template = get_receipt_template_by_id(db, tenant_id, template_id)
+    if not template:
+        return False
+    db.delete(template)
+    db.commit()
+    return True
+
+
+def _cashier_name(db: Session, employee_id) -> str:
+    user = db.query(User.firstName, User.lastName, User.userName).filter(User.id == employee_id).first()
+    if not user:
+        return ""
+    full_name = " ".join(part for part in (user.firstName, user.lastName) if part)
+    return full_name or user.userName or ""
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in RECEIPT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(RECEIPT_FORMATS)}")
+
+
+def _receipt_response(content: bytes, fmt: str, filename: str):
+    from fastapi import Response
+
+    headers = {"Content-Disposition": f'inline; filename="{filename}"'} if fmt == "pdf" else None
+    return Response(content=content, media_type=RECEIPT_MEDIA_TYPES[fmt], headers=headers)
+
+
+def list_receipt_templates_endpoint(db: Session, tenant_context: dict):
+    from fastapi import HTTPException
+    from ..shared import convert_db_receipt_template_to_pydantic
+    from .schemas import POSReceiptTemplatesResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        templates = get_receipt_templates(db, tenant_context["tenant_id"])
+        return POSReceiptTemplatesResponse(templates=[convert_db_receipt_template_to_pydantic(t) for t in templates])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching receipt templates: {str(e)}")
+
+
+def create_receipt_template_endpoint(db: Session, tenant_context: dict, template_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_receipt_template_to_pydantic
+    from .schemas import POSReceiptTemplateResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        template = create_receipt_template(db, tenant_context["tenant_id"], template_data)
+        return POSReceiptTemplateResponse(template=convert_db_receipt_template_to_pydantic(template))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        # A concurrent save made another template the default first
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Another receipt template was made the default at the same time")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating receipt template: {str(e)}")
+
+
+def update_receipt_template_endpoint(db: Session, tenant_context: dict, template_id: str, template_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_receipt_template_to_pydantic
+    from .schemas import POSReceiptTemplateResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        template = update_receipt_template(db, tenant_context["tenant_id"], template_id, template_data)
+        if not template:
+            raise HTTPException(status_code=404, detail="Receipt template not found")
+        return POSReceiptTemplateResponse(template=convert_db_receipt_template_to_pydantic(template))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except IntegrityError:
+        # A concurrent save made another template the default first
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Another receipt template was made the default at the same time")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating receipt template: {str(e)}")
+
+
+def delete_receipt_template_endpoint(db: Session, tenant_context: dict, template_id: str):
+    from fastapi import HTTPException
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        if not delete_receipt_template(db, tenant_context["tenant_id"], template_id):
+            raise HTTPException(status_code=404, detail="Receipt template not found")
+        return {"message": "Receipt template deleted successfully"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting receipt template: {str(e)}")
+
+
+def get_transaction_receipt_endpoint(
+    db: Session,
+    tenant_context: dict,
+    transaction_id: str,
+    fmt: str,
+    template_id: Optional[str] = None,
+):
+    from fastapi import HTTPException
+    from ..transactions.logic import get_pos_transaction_by_id
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        _check_format(fmt)
+        tenant_id = tenant_context["tenant_id"]
+        transaction = get_pos_transaction_by_id(db, transaction_id, tenant_id)
+        if not transaction:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        compiled = get_compiled_receipt(db, tenant_id, template_id)
+        if compiled is None:
+            raise HTTPException(status_code=404, detail="Receipt template not found")
+        shift = db.query(POSShiftORM.employeeId, POSShiftORM.shiftNumber).filter(
+            POSShiftORM.id == transaction.shiftId
+        ).first()
+        receipt = receipt_data(
+            transaction,
+            _cashier_name(db, shift.employeeId) if shift else "",
+            shift.shiftNumber if shift else "",
+        )
+        content = compiled.render([receipt], fmt)
+        return _receipt_response(content, fmt, f"receipt-{transaction.transactionNumber}.pdf")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering receipt: {str(e)}")
+
+
+def get_shift_receipts_endpoint(
+    db: Session,
+    tenant_context: dict,
+    shift_id: str,
+    fmt: str,
+    template_id: Optional[str] = None,
+):
+    from fastapi import HTTPException
+    from ..shifts.logic import get_pos_shift_by_id
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        _check_format(fmt)
+        tenant_id = tenant_context["tenant_id"]
+        shift = get_pos_shift_by_id(db, shift_id, tenant_id)
+        if not shift:
+            raise HTTPException(status_code=404, detail="Shift not found")
+        compiled = get_compiled_receipt(db, tenant_id, template_id)
+        if compiled is None:
+            raise HTTPException(status_code=404, detail="Receipt template not found")
+        cashier = _cashier_name(db, shift.employeeId)
+        transactions = (
+            db.query(POSTransactionORM)
+            .filter(POSTransactionORM.tenant_id == tenant_id, POSTransactionORM.shiftId == shift.id)
+            .order_by(POSTransactionORM.createdAt, POSTransactionORM.id)
+            .yield_per(REPRINT_BATCH_SIZE)
+        )
+        content = compiled.render(
+            (receipt_data(transaction, cashier, shift.shiftNumber) for transaction in transactions), fmt
+        )
+        return _receipt_response(content, fmt, f"receipts-{shift.shiftNumber}.pdf")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering shift receipts: {str(e)}")
@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+class POSReceiptTemplateCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    paperWidth: int = Field(80, description="Paper width in mm: 58 or 80")
+    header: Optional[str] = Field(
+        None, description="Lines of text; {company_name}, {transaction_number}, {cashier} and the like are filled in"
+    )
+    footer: Optional[str] = None
+    currency: Optional[str] = Field(None, max_length=8)
+    showSku: bool = False
+    showSavings: bool = True
+    isDefault: bool = False
+
+
+class POSReceiptTemplateUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1)
+    paperWidth: Optional[int] = None
+    header: Optional[str] = None
+    footer: Optional[str] = None
+    currency: Optional[str] = Field(None, max_length=8)
+    showSku: Optional[bool] = None
+    showSavings: Optional[bool] = None
+    isDefault: Optional[bool] = None
+
+
+class POSReceiptTemplate(POSReceiptTemplateCreate):
+    id: str
+    version: int
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+
+
+class POSReceiptTemplateResponse(BaseModel):
+    template: POSReceiptTemplate
+
+
+class POSReceiptTemplatesResponse(BaseModel):
+    templates: List[POSReceiptTemplate]
@@ -25,6 +25,33 @@ async def get_pos_sales_report(
     )
 
 
+@router.get("/reports/products")
+async def get_pos_product_sales_report(
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    sort_by: str = Query("quantity", description="quantity, revenue or margin"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:reports:view")),
+):
+    return logic.get_pos_product_sales_report_endpoint(db, tenant_context, date_from, date_to, sort_by, limit)
+
+
+@router.get("/reports/products/{product_id}")
+async def get_pos_product_sales_detail(
+    product_id: str,
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:reports:view")),
+):
+    return logic.get_pos_product_sales_detail_endpoint(db, tenant_context, product_id, date_from, date_to)
+
+
 @router.get("/reports/inventory")
 async def get_pos_inventory_report(
     low_stock_only: bool = Query(False, description="Show only low stock items"),
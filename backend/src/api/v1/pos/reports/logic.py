@@ -1,14 +1,19 @@
-from datetime import datetime
+import uuid
 from typing import Optional
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from fastapi import HTTPException
 
 from .....config.database import get_products
-from ..shared import convert_db_shift_to_pydantic, convert_db_transaction_to_pydantic
-from ..transactions.logic import get_pos_transactions
-from ..shifts.logic import get_pos_shifts
+from .....models.platform.user import User
+from .....models.pos import POSShift as POSShiftORM
+from .....services.stock_valuation import get_product_stock_values
+from ..sales_rollups import METRICS as SALES_METRICS, sales_totals
+from ..transaction_lines import product_sales, product_sales_series
+from ..shared import convert_db_shift_to_pydantic, convert_db_transaction_to_pydantic, parse_pos_date_range
+from ..transactions.logic import query_pos_transactions
 
 
 def get_pos_sales_report_endpoint(
@@ -22,86 +27,111 @@ def get_pos_sales_report_endpoint(
     if not tenant_context:
         raise HTTPException(status_code=400, detail="Tenant context required")
     try:
-        db_transactions = get_pos_transactions(db, tenant_context["tenant_id"], 0, 1000)
-        transactions = [convert_db_transaction_to_pydantic(t) for t in db_transactions]
+        tenant_id = tenant_context["tenant_id"]
+        start, end = parse_pos_date_range(date_from, date_to)
+        rows = sales_totals(
+            db,
+            tenant_id,
+            start,
+            end,
+            payment_method=payment_method,
+            cashier_id=cashier_id,
+            group_by=("day", "paymentMethod"),
+        )
 
-        if not transactions:
-            return {
-                "summary": {
-                    "totalSales": 0.0,
-                    "totalTransactions": 0,
-                    "averageTransaction": 0.0,
-                    "dateRange": {"from": date_from, "to": date_to},
-                },
-                "paymentMethods": {},
-                "dailySales": {},
-                "transactions": [],
-            }
-
-        if date_from or date_to:
-            filtered_transactions = []
-            for transaction in transactions:
-                try:
-                    transaction_date = datetime.fromisoformat(transaction.createdAt.replace("Z", "+00:00"))
-                    if date_from:
-                        from_date = datetime.fromisoformat(date_from.replace("Z", "+00:00"))
-                        if transaction_date < from_date:
-                            continue
-                    if date_to:
-                        to_date = datetime.fromisoformat(date_to.replace("Z", "+00:00"))
-                        if transaction_date > to_date:
-                            continue
-                    filtered_transactions.append(transaction)
-                except (ValueError, AttributeError):
-                    continue
-            transactions = filtered_transactions
-
-        if payment_method:
-            transactions = [t for t in transactions if t.paymentMethod.value == payment_method]
-
-        if cashier_id:
-            transactions = [t for t in transactions if t.cashierId == cashier_id]
+        summary = {metric: 0 for metric in SALES_METRICS}
+        payment_methods = {}
+        daily_sales = {}
+        for row in rows:
+            for metric in SALES_METRICS:
+                summary[metric] += row[metric]
+            if row["transactionCount"]:
+                method = payment_methods.setdefault(row["paymentMethod"], {"count": 0, "total": 0.0})
+                method["count"] += row["transactionCount"]
+                method["total"] = round(method["total"] + row["salesTotal"], 2)
+                day = daily_sales.setdefault(row["day"], {"sales": 0.0, "transactions": 0})
+                day["sales"] = round(day["sales"] + row["salesTotal"], 2)
+                day["transactions"] += row["transactionCount"]
 
-        total_sales = sum(t.total for t in transactions)
-        total_transactions = len(transactions)
+        total_sales = round(summary["salesTotal"], 2)
+        total_transactions = summary["transactionCount"]
         avg_transaction = total_sales / total_transactions if total_transactions > 0 else 0
 
-        payment_methods = {}
-        for transaction in transactions:
-            method = transaction.paymentMethod.value
-            if method not in payment_methods:
-                payment_methods[method] = {"count": 0, "total": 0}
-            payment_methods[method]["count"] += 1
-            payment_methods[method]["total"] += transaction.total
-
-        daily_sales = {}
-        for transaction in transactions:
-            try:
-                date = transaction.createdAt.isoformat()[:10] if hasattr(transaction.createdAt, "isoformat") else str(transaction.createdAt)[:10]
-                if date not in daily_sales:
-                    daily_sales[date] = {"sales": 0, "transactions": 0}
-                daily_sales[date]["sales"] += transaction.total
-                daily_sales[date]["transactions"] += 1
-            except (AttributeError, TypeError):
-                continue
+        db_transactions, _, _ = query_pos_transactions(
+            db,
+            tenant_id,
+            payment_method=payment_method,
+            cashier_id=cashier_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=100,
+        )
 
         return {
             "summary": {
-                "totalSales": round(total_sales, 2),
+                "totalSales": total_sales,
                 "totalTransactions": total_transactions,
                 "averageTransaction": round(avg_transaction, 2),
+                "totalDiscounts": round(summary["discountTotal"], 2),
+                "totalTax": round(summary["taxTotal"], 2),
+                "refunds": {"count": summary["refundCount"], "total": round(summary["refundTotal"], 2)},
+                "voids": {"count": summary["voidCount"], "total": round(summary["voidTotal"], 2)},
                 "dateRange": {"from": date_from, "to": date_to},
             },
             "paymentMethods": payment_methods,
-            "dailySales": daily_sales,
-            "transactions": transactions[:100],
+            "dailySales": dict(sorted(daily_sales.items())),
+            "transactions": [convert_db_transaction_to_pydantic(t) for t in db_transactions],
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating sales report: {str(e)}")
 
 
+def get_pos_product_sales_report_endpoint(
+    db: Session,
+    tenant_context: dict,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    sort_by: str,
+    limit: int,
+):
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        start, end = parse_pos_date_range(date_from, date_to)
+        return {
+            "products": product_sales(db, tenant_context["tenant_id"], start, end, sort_by=sort_by, limit=limit),
+            "dateRange": {"from": date_from, "to": date_to},
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating product sales report: {str(e)}")
+
+
+def get_pos_product_sales_detail_endpoint(
+    db: Session,
+    tenant_context: dict,
+    product_id: str,
+    date_from: Optional[str],
+    date_to: Optional[str],
+):
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        start, end = parse_pos_date_range(date_from, date_to)
+        report = product_sales_series(db, tenant_context["tenant_id"], product_id, start, end)
+        report["dateRange"] = {"from": date_from, "to": date_to}
+        return report
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating product sales report: {str(e)}")
+
+
 def get_pos_inventory_report_endpoint(
     db: Session,
     tenant_context: dict,
@@ -113,8 +143,14 @@ def get_pos_inventory_report_endpoint(
     try:
         products = get_products(db, tenant_context["tenant_id"], 0, 1000)
 
-        def get_price(product):
-            return float(getattr(product, "salePrice", getattr(product, "unitPrice", getattr(product, "price", 0.0))) or 0.0)
+        # Stock is valued at cost (FIFO); products not yet valued use their cost price
+        stock_values = get_product_stock_values(db, tenant_context["tenant_id"])
+
+        def get_stock_value(product):
+            value = stock_values.get(str(product.id))
+            if value is None:
+                value = float(product.costPerUnitPrice or 0.0) * product.stockQuantity
+            return value
 
         def get_low_stock_threshold(product):
             return int(getattr(product, "minStockLevel", getattr(product, "lowStockThreshold", 0)) or 0)
@@ -139,7 +175,7 @@ def get_pos_inventory_report_endpoint(
             products = [p for p in products if p.category == category]
 
         total_products = len(products)
-        total_value = sum(get_price(p) * p.stockQuantity for p in products)
+        total_value = sum(get_stock_value(p) for p in products)
         low_stock_count = len([p for p in products if p.stockQuantity <= get_low_stock_threshold(p)])
         out_of_stock_count = len([p for p in products if p.stockQuantity == 0])
 
@@ -149,7 +185,7 @@ def get_pos_inventory_report_endpoint(
             if cat not in category_summary:
                 category_summary[cat] = {"count": 0, "totalValue": 0, "lowStock": 0}
             category_summary[cat]["count"] += 1
-            category_summary[cat]["totalValue"] += get_price(product) * product.stockQuantity
+            category_summary[cat]["totalValue"] += get_stock_value(product)
             if product.stockQuantity <= get_low_stock_threshold(product):
                 category_summary[cat]["lowStock"] += 1
 
@@ -180,71 +216,79 @@ def get_pos_shifts_report_endpoint(
     if not tenant_context:
         raise HTTPException(status_code=400, detail="Tenant context required")
     try:
-        db_shifts = get_pos_shifts(db, tenant_context["tenant_id"], 0, 1000)
-        shifts = [convert_db_shift_to_pydantic(s) for s in db_shifts]
-
-        if not shifts:
-            return {
-                "summary": {
-                    "totalShifts": 0,
-                    "openShifts": 0,
-                    "closedShifts": 0,
-                    "totalSales": 0.0,
-                    "totalTransactions": 0,
-                    "dateRange": {"from": date_from, "to": date_to},
-                },
-                "cashierSummary": {},
-                "shifts": [],
-            }
-
-        if date_from or date_to:
-            filtered_shifts = []
-            for shift in shifts:
-                try:
-                    shift_date = datetime.fromisoformat(shift.openedAt.replace("Z", "+00:00"))
-                    if date_from:
-                        from_date = datetime.fromisoformat(date_from.replace("Z", "+00:00"))
-                        if shift_date < from_date:
-                            continue
-                    if date_to:
-                        to_date = datetime.fromisoformat(date_to.replace("Z", "+00:00"))
-                        if shift_date > to_date:
-                            continue
-                    filtered_shifts.append(shift)
-                except (ValueError, AttributeError):
-                    continue
-            shifts = filtered_shifts
-
+        tenant_id = tenant_context["tenant_id"]
+        start, end = parse_pos_date_range(date_from, date_to)
+        filters = [POSShiftORM.tenant_id == tenant_id]
+        if start is not None:
+            filters.append(POSShiftORM.startTime >= start)
+        if end is not None:
+            filters.append(POSShiftORM.startTime < end)
         if cashier_id:
-            shifts = [s for s in shifts if s.cashierId == cashier_id]
+            filters.append(POSShiftORM.employeeId == uuid.UUID(cashier_id))
+
+        total_shifts, open_shifts, closed_shifts = (
+            db.query(
+                func.count(POSShiftORM.id),
+                func.count(POSShiftORM.id).filter(POSShiftORM.status == "open"),
+                func.count(POSShiftORM.id).filter(POSShiftORM.status == "closed"),
+            )
+            .filter(*filters)
+            .one()
+        )
 
-        total_shifts = len(shifts)
-        open_shifts = len([s for s in shifts if s.status == "open"])
-        closed_shifts = len([s for s in shifts if s.status == "closed"])
-        total_sales = sum(s.totalSales for s in shifts)
-        total_transactions = sum(s.totalTransactions for s in shifts)
+        # Every sale of the selected shifts, whenever it was rung up.
+        shift_ids = select(POSShiftORM.id).where(*filters)
+        sales_by_cashier = {
+            row["cashierId"]: row
+            for row in sales_totals(db, tenant_id, shift_ids=shift_ids, group_by=("cashierId",))
+        }
 
         cashier_summary = {}
-        for shift in shifts:
-            cashier = shift.cashierName
-            if cashier not in cashier_summary:
-                cashier_summary[cashier] = {"shifts": 0, "totalSales": 0, "totalTransactions": 0}
-            cashier_summary[cashier]["shifts"] += 1
-            cashier_summary[cashier]["totalSales"] += shift.totalSales
-            cashier_summary[cashier]["totalTransactions"] += shift.totalTransactions
+        cashiers = (
+            db.query(
+                POSShiftORM.employeeId,
+                func.count(POSShiftORM.id),
+                User.firstName,
+                User.lastName,
+                User.userName,
+            )
+            .outerjoin(User, User.id == POSShiftORM.employeeId)
+            .filter(*filters)
+            .group_by(POSShiftORM.employeeId, User.firstName, User.lastName, User.userName)
+            .all()
+        )
+        for employee_id, shift_count, first_name, last_name, user_name in cashiers:
+            name = " ".join(part for part in (first_name, last_name) if part) or user_name or str(employee_id)
+            sales = sales_by_cashier.get(str(employee_id), {})
+            cashier_summary[name] = {
+                "cashierId": str(employee_id),
+                "shifts": shift_count,
+                "totalSales": sales.get("salesTotal", 0.0),
+                "totalTransactions": sales.get("transactionCount", 0),
+            }
+
+        db_shifts = (
+            db.query(POSShiftORM)
+            .filter(*filters)
+            .order_by(POSShiftORM.startTime.desc())
+            .limit(100)
+            .all()
+        )
 
         return {
             "summary": {
                 "totalShifts": total_shifts,
                 "openShifts": open_shifts,
                 "closedShifts": closed_shifts,
-                "totalSales": round(total_sales, 2),
-                "totalTransactions": total_transactions,
+                "totalSales": round(sum(row["salesTotal"] for row in sales_by_cashier.values()), 2),
+                "totalTransactions": sum(row["transactionCount"] for row in sales_by_cashier.values()),
                 "dateRange": {"from": date_from, "to": date_to},
             },
             "cashierSummary": cashier_summary,
-            "shifts": shifts[:100],
+            "shifts": [convert_db_shift_to_pydantic(s) for s in db_shifts],
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,400 @@
+"""
+POS sales rollups
+
+One POSSalesRollup row per (hour | day, shift, cashier, payment method)
+holds the counts and money totals of the sales, refunds and voids made in
+it. Writers call ``record_sales`` / ``record_status_change`` /
+``remove_sale`` in the same database transaction as the change, so every
+bucket, the current one included, is exact.
+
+Reads split a date range into whole days, whole hours at the day edges and
+raw transactions for the sub-hour edges (at most two partial hours), so a
+report costs the same for a quiet week as for a busy year.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Numeric, case, cast, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ....models.pos import POSSalesRollup, POSShift as POSShiftORM, POSTransaction as POSTransactionORM
+
+GRAIN_HOUR = "hour"
+GRAIN_DAY = "day"
+SOURCE_RAW = "raw"
+
+VOID_STATUSES = ("void", "cancelled")
+REFUND_STATUSES = ("refunded",)
+NON_SALE_STATUSES = VOID_STATUSES + REFUND_STATUSES
+
+COUNT_METRICS = ("transactionCount", "refundCount", "voidCount")
+MONEY_METRICS = ("salesTotal", "discountTotal", "taxTotal", "refundTotal", "voidTotal")
+METRICS = COUNT_METRICS + MONEY_METRICS
+
+GROUP_KEYS = ("paymentMethod", "cashierId", "shiftId", "day")
+
+_BUCKET_KEY = ["tenant_id", "grain", "bucketStart", "shiftId", "cashierId", "paymentMethod"]
+_STEP = {GRAIN_HOUR: timedelta(hours=1), GRAIN_DAY: timedelta(days=1)}
+
+
+def is_sale_status(status: Optional[str]) -> bool:
+    return status not in NON_SALE_STATUSES
+
+
+def _uuid(value: Any) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(round(float(value or 0.0), 2)))
+
+
+def bucket_start(moment: datetime, grain: str) -> datetime:
+    if grain == GRAIN_DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _bucket_ceil(moment: datetime, grain: str) -> datetime:
+    floor = bucket_start(moment, grain)
+    return floor if floor == moment else floor + _STEP[grain]
+
+
+# ------------------------------------------------------------------ #
+# Writes
+# ------------------------------------------------------------------ #
+def _contribution(status: Optional[str], transaction: POSTransactionORM) -> Dict[str, Any]:
+    """What one transaction in ``status`` adds to its buckets."""
+    if status in VOID_STATUSES:
+        return {"voidCount": 1, "voidTotal": _money(transaction.total)}
+    if status in REFUND_STATUSES:
+        return {"refundCount": 1, "refundTotal": _money(transaction.total)}
+    return {
+        "transactionCount": 1,
+        "salesTotal": _money(transaction.total),
+        "discountTotal": _money(transaction.discount),
+        "taxTotal": _money(transaction.taxAmount),
+    }
+
+
+def _cashier(db: Session, transaction: POSTransactionORM, cashier_id: Any) -> Any:
+    if cashier_id is not None:
+        return cashier_id
+    return db.query(POSShiftORM.employeeId).filter(POSShiftORM.id == transaction.shiftId).scalar()
+
+
+def _add_to_buckets(
+    buckets: Dict[Tuple, Dict[str, Any]], transaction: POSTransactionORM, cashier_id: Any, deltas: Dict[str, Any],
+) -> None:
+    deltas = {metric: value for metric, value in deltas.items() if value}
+    if not deltas:
+        return
+    created = transaction.createdAt or datetime.utcnow()
+    for grain in (GRAIN_HOUR, GRAIN_DAY):
+        key = (
+            grain,
+            _uuid(transaction.tenant_id),
+            bucket_start(created, grain),
+            _uuid(transaction.shiftId),
+            _uuid(cashier_id),
+            transaction.paymentMethod,
+        )
+        entry = buckets.setdefault(key, {metric: 0 for metric in METRICS})
+        for metric, value in deltas.items():
+            entry[metric] += value
+
+
+def _upsert_buckets(db: Session, buckets: Dict[Tuple, Dict[str, Any]]) -> None:
+    """One multi-row upsert. Rows go hour before day and sorted, so concurrent writers lock in the same order."""
+    if not buckets:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "grain": key[0],
+            "tenant_id": key[1],
+            "bucketStart": key[2],
+            "shiftId": key[3],
+            "cashierId": key[4],
+            "paymentMethod": key[5],
+            "updatedAt": now,
+            **entry,
+        }
+        for key, entry in sorted(buckets.items(), key=lambda item: (item[0][0] != GRAIN_HOUR, str(item[0])))
+    ]
+    stmt = pg_insert(POSSalesRollup).values(rows)
+    set_ = {metric: getattr(POSSalesRollup, metric) + stmt.excluded[metric] for metric in METRICS}
+    set_["updatedAt"] = now
+    db.execute(stmt.on_conflict_do_update(index_elements=_BUCKET_KEY, set_=set_))
+
+
+def record_sales(db: Session, transactions: Sequence[POSTransactionORM], cashier_id: Any = None) -> None:
+    """Add new transactions to their buckets. ``cashier_id`` defaults to each shift's employee."""
+    buckets: Dict[Tuple, Dict[str, Any]] = {}
+    for transaction in transactions:
+        _add_to_buckets(
+            buckets,
+            transaction,
+            _cashier(db, transaction, cashier_id),
+            _contribution(transaction.paymentStatus, transaction),
+        )
+    _upsert_buckets(db, buckets)
+
+
+def record_sale(db: Session, transaction: POSTransactionORM, cashier_id: Any = None) -> None:
+    record_sales(db, [transaction], cashier_id)
+
+
+def record_status_change(
+    db: Session, transaction: POSTransactionORM, previous_status: Optional[str], cashier_id: Any = None,
+) -> None:
+    """Move a transaction between sale, refund and void totals after its status changed."""
+    deltas = _contribution(transaction.paymentStatus, transaction)
+    for metric, value in _contribution(previous_status, transaction).items():
+        deltas[metric] = deltas.get(metric, 0) - value
+    buckets: Dict[Tuple, Dict[str, Any]] = {}
+    _add_to_buckets(buckets, transaction, _cashier(db, transaction, cashier_id), deltas)
+    _upsert_buckets(db, buckets)
+
+
+def remove_sale(db: Session, transaction: POSTransactionORM, cashier_id: Any = None) -> None:
+    """Take a deleted transaction out of its buckets."""
+    deltas = {metric: -value for metric, value in _contribution(transaction.paymentStatus, transaction).items()}
+    buckets: Dict[Tuple, Dict[str, Any]] = {}
+    _add_to_buckets(buckets, transaction, _cashier(db, transaction, cashier_id), deltas)
+    _upsert_buckets(db, buckets)
+
+
+_REBUILD_SQL = """
+    INSERT INTO pos_sales_rollups (
+        id, tenant_id, grain, "bucketStart", "shiftId", "cashierId", "paymentMethod",
+        "transactionCount", "salesTotal", "discountTotal", "taxTotal",
+        "refundCount", "refundTotal", "voidCount", "voidTotal", "updatedAt"
+    )
+    SELECT gen_random_uuid(), tx.tenant_id, g.grain, date_trunc(g.grain, tx."createdAt"),
+           tx."shiftId", tx.cashier, tx."paymentMethod",
+           count(*) FILTER (WHERE tx.kind = 'sale'),
+           coalesce(sum(tx.total) FILTER (WHERE tx.kind = 'sale'), 0),
+           coalesce(sum(tx.discount) FILTER (WHERE tx.kind = 'sale'), 0),
+           coalesce(sum(tx.tax) FILTER (WHERE tx.kind = 'sale'), 0),
+           count(*) FILTER (WHERE tx.kind = 'refund'),
+           coalesce(sum(tx.total) FILTER (WHERE tx.kind = 'refund'), 0),
+           count(*) FILTER (WHERE tx.kind = 'void'),
+           coalesce(sum(tx.total) FILTER (WHERE tx.kind = 'void'), 0),
+           now() AT TIME ZONE 'utc'
+    FROM (
+        SELECT t.tenant_id, t."createdAt", t."shiftId", s."employeeId" AS cashier, t."paymentMethod",
+               CASE
+                   WHEN t."paymentStatus" IN ('void', 'cancelled') THEN 'void'
+                   WHEN t."paymentStatus" = 'refunded' THEN 'refund'
+                   ELSE 'sale'
+               END AS kind,
+               CAST(t.total AS numeric(14, 2)) AS total,
+               CAST(coalesce(t.discount, 0) AS numeric(14, 2)) AS discount,
+               CAST(coalesce(t."taxAmount", 0) AS numeric(14, 2)) AS tax
+        FROM pos_transactions t
+        JOIN pos_shifts s ON s.id = t."shiftId"
+        WHERE t.tenant_id = CAST(:tenant_id AS uuid) AND t."createdAt" IS NOT NULL
+    ) tx
+    CROSS JOIN (VALUES ('hour'), ('day')) AS g(grain)
+    GROUP BY tx.tenant_id, g.grain, date_trunc(g.grain, tx."createdAt"), tx."shiftId", tx.cashier, tx."paymentMethod"
+"""
+
+
+def rebuild_sales_rollups(db: Session, tenant_id: Any) -> int:
+    """Recompute the tenant's rollups from pos_transactions and commit. Returns the rows written."""
+    db.query(POSSalesRollup).filter(POSSalesRollup.tenant_id == tenant_id).delete(synchronize_session=False)
+    result = db.execute(text(_REBUILD_SQL), {"tenant_id": str(tenant_id)})
+    db.commit()
+    return int(result.rowcount or 0)
+
+
+# ------------------------------------------------------------------ #
+# Reads
+# ------------------------------------------------------------------ #
+def range_segments(
+    start: Optional[datetime], end: Optional[datetime],
+) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """
+    Cover [start, end) with (source, lo, hi) pieces: day rollups for whole
+    days, hour rollups for whole hours at the day edges, raw transactions
+    for what is left of the edge hours. None is an open bound.
+    """
+    first_hour = _bucket_ceil(start, GRAIN_HOUR) if start else None
+    last_hour = bucket_start(end, GRAIN_HOUR) if end else None
+    if first_hour and last_hour and first_hour >= last_hour:
+        return [(SOURCE_RAW, start, end)]
+
+    segments = []
+    if start and start < first_hour:
+        segments.append((SOURCE_RAW, start, first_hour))
+    first_day = _bucket_ceil(first_hour, GRAIN_DAY) if first_hour else None
+    last_day = bucket_start(last_hour, GRAIN_DAY) if last_hour else None
+    if first_day and last_day and first_day >= last_day:
+        segments.append((GRAIN_HOUR, first_hour, last_hour))
+    else:
+        if first_hour and first_hour < first_day:
+            segments.append((GRAIN_HOUR, first_hour, first_day))
+        segments.append((GRAIN_DAY, first_day, last_day))
+        if last_hour and last_day < last_hour:
+            segments.append((GRAIN_HOUR, last_day, last_hour))
+    if end and last_hour < end:
+        segments.append((SOURCE_RAW, last_hour, end))
+    return segments
+
+
+def _scope_filter(column, value):
+    if isinstance(value, (str, uuid.UUID)):
+        return column == value
+    return column.in_(value)
+
+
+def _rollup_query(db: Session, tenant_id: Any, grain: str, lo, hi, scope: Dict[str, Any], group_by: Sequence[str]):
+    keys = {
+        "paymentMethod": POSSalesRollup.paymentMethod,
+        "cashierId": POSSalesRollup.cashierId,
+        "shiftId": POSSalesRollup.shiftId,
+        "day": func.date(POSSalesRollup.bucketStart),
+    }
+    columns = [keys[key].label(key) for key in group_by]
+    columns += [func.sum(getattr(POSSalesRollup, metric)).label(metric) for metric in METRICS]
+    query = db.query(*columns).filter(POSSalesRollup.tenant_id == tenant_id, POSSalesRollup.grain == grain)
+    if lo is not None:
+        query = query.filter(POSSalesRollup.bucketStart >= lo)
+    if hi is not None:
+        query = query.filter(POSSalesRollup.bucketStart < hi)
+    for key, value in scope.items():
+        query = query.filter(_scope_filter(keys[key], value))
+    if group_by:
+        query = query.group_by(*[keys[key] for key in group_by])
+    return query
+
+
+def _raw_query(db: Session, tenant_id: Any, lo, hi, scope: Dict[str, Any], group_by: Sequence[str]):
+    status = POSTransactionORM.paymentStatus
+    is_void = status.in_(VOID_STATUSES)
+    is_refund = status.in_(REFUND_STATUSES)
+
+    def money(column):
+        return cast(func.coalesce(column, 0), Numeric(14, 2))
+
+    def sale(value):
+        return func.coalesce(func.sum(case((is_void, 0), (is_refund, 0), else_=value)), 0)
+
+    def only(condition, value):
+        return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+    keys = {
+        "paymentMethod": POSTransactionORM.paymentMethod,
+        "cashierId": POSShiftORM.employeeId,
+        "shiftId": POSTransactionORM.shiftId,
+        "day": func.date(POSTransactionORM.createdAt),
+    }
+    metrics = {
+        "transactionCount": sale(1),
+        "salesTotal": sale(money(POSTransactionORM.total)),
+        "discountTotal": sale(money(POSTransactionORM.discount)),
+        "taxTotal": sale(money(POSTransactionORM.taxAmount)),
+        "refundCount": only(is_refund, 1),
+        "refundTotal": only(is_refund, money(POSTransactionORM.total)),
+        "voidCount": only(is_void, 1),
+        "voidTotal": only(is_void, money(POSTransactionORM.total)),
+    }
+    columns = [keys[key].label(key) for key in group_by]
+    columns += [metrics[metric].label(metric) for metric in METRICS]
+    query = (
+        db.query(*columns)
+        .join(POSShiftORM, POSShiftORM.id == POSTransactionORM.shiftId)
+        .filter(POSTransactionORM.tenant_id == tenant_id)
+    )
+    if lo is not None:
+        query = query.filter(POSTransactionORM.createdAt >= lo)
+    if hi is not None:
+        query = query.filter(POSTransactionORM.createdAt < hi)
+    for key, value in scope.items():
+        query = query.filter(_scope_filter(keys[key], value))
+    if group_by:
+        query = query.group_by(*[keys[key] for key in group_by])
+    return query
+
+
+def _key_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def sales_totals(
+    db: Session,
+    tenant_id: Any,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    payment_method: Optional[str] = None,
+    cashier_id: Optional[str] = None,
+    shift_id: Optional[str] = None,
+    shift_ids: Any = None,
+    group_by: Sequence[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Sales, refund and void totals of [start, end), one dict per combination
+    of the ``group_by`` keys (any of GROUP_KEYS; ids and days as strings).
+    With no grouping the result is a single dict. ``shift_ids`` limits the
+    totals to a list or SELECT of shift ids. Raises ValueError for a
+    malformed cashier or shift id.
+    """
+    unknown = set(group_by) - set(GROUP_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot group POS sales by {', '.join(sorted(unknown))}")
+    scope: Dict[str, Any] = {}
+    if payment_method:
+        scope["paymentMethod"] = payment_method
+    if cashier_id:
+        scope["cashierId"] = _uuid(cashier_id)
+    if shift_id:
+        scope["shiftId"] = _uuid(shift_id)
+    elif shift_ids is not None:
+        scope["shiftId"] = shift_ids
+
+    totals: Dict[Tuple, Dict[str, Any]] = {}
+    for source, lo, hi in range_segments(start, end):
+        if source == SOURCE_RAW:
+            query = _raw_query(db, tenant_id, lo, hi, scope, group_by)
+        else:
+            query = _rollup_query(db, tenant_id, source, lo, hi, scope, group_by)
+        for row in query.all():
+            key = tuple(_key_value(getattr(row, name)) for name in group_by)
+            entry = totals.setdefault(key, {metric: 0 for metric in METRICS})
+            for metric in METRICS:
+                entry[metric] += getattr(row, metric) or 0
+
+    if not totals and not group_by:
+        totals[()] = {metric: 0 for metric in METRICS}
+    results = []
+    for key, entry in totals.items():
+        item = dict(zip(group_by, key))
+        item.update({metric: int(entry[metric]) for metric in COUNT_METRICS})
+        item.update({metric: round(float(entry[metric]), 2) for metric in MONEY_METRICS})
+        results.append(item)
+    return results
+
+
+def shift_transaction_totals(db: Session, tenant_id: Any, shift_id: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    One shift's totals per payment method straight from pos_transactions,
+    in one grouped query; closing a shift records these, not the rollups.
+    """
+    query = _raw_query(db, tenant_id, None, None, {"shiftId": _uuid(shift_id)}, ("paymentMethod",))
+    return {
+        row.paymentMethod: {
+            **{metric: int(getattr(row, metric) or 0) for metric in COUNT_METRICS},
+            **{metric: round(float(getattr(row, metric) or 0), 2) for metric in MONEY_METRICS},
+        }
+        for row in query.all()
+    }
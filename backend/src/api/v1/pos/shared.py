@@ -1,19 +1,46 @@
-import uuid
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
 from ....models.pos.enums import POSPaymentMethod, POSTransactionStatus
-from ....models.pos import POSTransaction as POSTransactionORM, POSShift as POSShiftORM
+from ....models.pos import POSTransaction as POSTransactionORM, POSShift as POSShiftORM, POSShiftReport as POSShiftReportORM
+from ....models.pos import POSPriceList as POSPriceListORM, POSPromotion as POSPromotionORM
+from ....models.pos import POSReceiptTemplate as POSReceiptTemplateORM
+from ....services.document_sequences import next_document_number, pos_number_blocks, POS_SHIFT, POS_TRANSACTION
 
 
-def generate_transaction_number() -> str:
-    return f"TXN-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
+def generate_transaction_number(tenant_id: str) -> str:
+    # Drawn from a per-worker block so busy tills never queue on the counter row.
+    return pos_number_blocks.next_number(tenant_id, POS_TRANSACTION)
 
 
-def generate_shift_number() -> str:
-    return f"SHIFT-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
+def generate_shift_number(db: Session, tenant_id: str) -> str:
+    return next_document_number(db, tenant_id, POS_SHIFT)
+
+
+def _parse_pos_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_pos_date_range(
+    date_from: Optional[str],
+    date_to: Optional[str],
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Half-open [start, end) bounds of the ISO ``date_from``/``date_to`` filters.
+    A plain date as ``date_to`` covers that whole day; a datetime is
+    inclusive. Raises ValueError for malformed input.
+    """
+    start = _parse_pos_datetime(date_from) if date_from else None
+    end = None
+    if date_to:
+        end = _parse_pos_datetime(date_to)
+        end += timedelta(days=1) if len(date_to) == 10 else timedelta(microseconds=1)
+    return start, end
 
 
 def convert_db_shift_to_pydantic(db_shift: POSShiftORM):
@@ -38,6 +65,100 @@ def convert_db_shift_to_pydantic(db_shift: POSShiftORM):
     )
 
 
+def convert_db_shift_report_to_pydantic(db_report: POSShiftReportORM):
+    from .shifts.schemas import POSShiftReport
+
+    def money(value):
+        return float(value) if value is not None else None
+
+    return POSShiftReport(
+        id=str(db_report.id),
+        shiftId=str(db_report.shiftId),
+        shiftNumber=db_report.shiftNumber,
+        cashierId=str(db_report.cashierId),
+        openedAt=db_report.openedAt,
+        closedAt=db_report.closedAt,
+        transactionCount=db_report.transactionCount,
+        salesTotal=money(db_report.salesTotal),
+        discountTotal=money(db_report.discountTotal),
+        taxTotal=money(db_report.taxTotal),
+        refundCount=db_report.refundCount,
+        refundTotal=money(db_report.refundTotal),
+        voidCount=db_report.voidCount,
+        voidTotal=money(db_report.voidTotal),
+        openingCash=money(db_report.openingCash),
+        expectedCash=money(db_report.expectedCash),
+        countedCash=money(db_report.countedCash),
+        cashDifference=money(db_report.cashDifference),
+        paymentMethods=db_report.paymentMethods or {},
+        createdAt=db_report.createdAt,
+    )
+
+def convert_db_price_list_to_pydantic(db_list: POSPriceListORM):
+    from .pricing.schemas import POSPriceList, POSPriceListItemIn
+
+    return POSPriceList(
+        id=str(db_list.id),
+        name=db_list.name,
+        warehouseId=str(db_list.warehouseId) if db_list.warehouseId else None,
+        customerGroup=db_list.customerGroup,
+        priority=db_list.priority or 0,
+        startsAt=db_list.startsAt,
+        endsAt=db_list.endsAt,
+        isActive=bool(db_list.isActive),
+        items=[
+            POSPriceListItemIn(productId=str(item.productId), price=item.price, minQuantity=item.minQuantity or 1)
+            for item in sorted(db_list.items, key=lambda item: (str(item.productId), item.minQuantity or 1))
+        ],
+        createdAt=db_list.createdAt,
+        updatedAt=db_list.updatedAt,
+    )
+
+
+def convert_db_promotion_to_pydantic(db_promotion: POSPromotionORM):
+    from .pricing.schemas import POSPromotion
+
+    return POSPromotion(
+        id=str(db_promotion.id),
+        name=db_promotion.name,
+        kind=db_promotion.kind,
+        value=db_promotion.value or 0.0,
+        buyQuantity=db_promotion.buyQuantity,
+        getQuantity=db_promotion.getQuantity,
+        minQuantity=db_promotion.minQuantity or 1,
+        productIds=[str(pid) for pid in db_promotion.productIds or []],
+        categories=list(db_promotion.categories or []),
+        warehouseId=str(db_promotion.warehouseId) if db_promotion.warehouseId else None,
+        customerGroup=db_promotion.customerGroup,
+        priority=db_promotion.priority or 0,
+        stackable=bool(db_promotion.stackable),
+        startsAt=db_promotion.startsAt,
+        endsAt=db_promotion.endsAt,
+        isActive=bool(db_promotion.isActive),
+        createdAt=db_promotion.createdAt,
+        updatedAt=db_promotion.updatedAt,
+    )
+
+
+def convert_db_receipt_template_to_pydantic(db_template: POSReceiptTemplateORM):
+    from .receipts.schemas import POSReceiptTemplate
+
+    return POSReceiptTemplate(
+        id=str(db_template.id),
+        name=db_template.name,
+        paperWidth=db_template.paperWidth,
+        header=db_template.header,
+        footer=db_template.footer,
+        currency=db_template.currency,
+        showSku=bool(db_template.showSku),
+        showSavings=bool(db_template.showSavings),
+        isDefault=bool(db_template.isDefault),
+        version=db_template.version or 1,
+        createdAt=db_template.createdAt,
+        updatedAt=db_template.updatedAt,
+    )
+
+
 def convert_db_transaction_to_pydantic(db_txn: POSTransactionORM):
     from .transactions.schemas import POSTransaction
 
@@ -70,6 +191,7 @@ def convert_db_transaction_to_pydantic(db_txn: POSTransactionORM):
         changeAmount=getattr(db_txn, "changeAmount", 0.0),
         notes=db_txn.notes,
         status=status,
+        appliedPromotions=db_txn.appliedPromotions or [],
         createdAt=db_txn.createdAt,
         updatedAt=db_txn.updatedAt,
     )
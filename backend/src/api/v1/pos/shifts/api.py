@@ -4,7 +4,14 @@ from typing import Optional
 
 from .....config.database import get_db
 from .....api.dependencies import get_current_user, get_tenant_context, require_permission
-from .schemas import POSShiftCreate, POSShiftUpdate, POSShiftsResponse, POSShiftResponse
+from .schemas import (
+    POSShiftClose,
+    POSShiftCreate,
+    POSShiftReportResponse,
+    POSShiftResponse,
+    POSShiftsResponse,
+    POSShiftUpdate,
+)
 from . import logic
 
 router = APIRouter()
@@ -70,3 +77,26 @@ async def update_pos_shift(
     _: dict = Depends(require_permission("pos:shifts:update")),
 ):
     return logic.update_pos_shift_endpoint(db, tenant_context, shift_id, shift_data)
+
+
+@router.post("/shifts/{shift_id}/close", response_model=POSShiftReportResponse)
+async def close_pos_shift(
+    shift_id: str,
+    close_data: POSShiftClose,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:shifts:update")),
+):
+    return logic.close_pos_shift_endpoint(db, tenant_context, shift_id, close_data)
+
+
+@router.get("/shifts/{shift_id}/report", response_model=POSShiftReportResponse)
+async def get_pos_shift_report(
+    shift_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:shifts:view")),
+):
+    return logic.get_pos_shift_report_endpoint(db, tenant_context, shift_id)
@@ -1,9 +1,11 @@
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from .....models.pos import POSShift as POSShiftORM
+from .....models.pos import POSPaymentMethod, POSShift as POSShiftORM, POSShiftReport
+from ..sales_rollups import COUNT_METRICS, MONEY_METRICS, shift_transaction_totals
 
 
 def get_pos_shift_by_id(
@@ -60,6 +62,97 @@ def create_pos_shift(db: Session, shift_data: dict) -> POSShiftORM:
     return db_shift
 
 
+def add_to_shift_totals(db: Session, shift_id, sales: float, transactions: int) -> None:
+    """
+    Add sales to a shift's running totals in one UPDATE, without reading them
+    first. Raises ValueError when the shift was closed meanwhile: closing
+    locks the same row, so a sale is either in its Z-report or refused.
+    """
+    updated = db.query(POSShiftORM).filter(POSShiftORM.id == shift_id, POSShiftORM.status == "open").update(
+        {
+            POSShiftORM.totalSales: func.coalesce(POSShiftORM.totalSales, 0.0) + sales,
+            POSShiftORM.totalTransactions: func.coalesce(POSShiftORM.totalTransactions, 0) + transactions,
+            POSShiftORM.updatedAt: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        raise ValueError("Shift is closed")
+
+
+def get_pos_shift_report(db: Session, shift_id: str, tenant_id: str = None) -> Optional[POSShiftReport]:
+    query = db.query(POSShiftReport).filter(POSShiftReport.shiftId == shift_id)
+    if tenant_id:
+        query = query.filter(POSShiftReport.tenant_id == tenant_id)
+    return query.first()
+
+
+def close_pos_shift(
+    db: Session,
+    shift_id: str,
+    tenant_id: str,
+    counted_cash: Optional[float] = None,
+    notes: Optional[str] = None,
+) -> Optional[POSShiftReport]:
+    """
+    Close an open shift and write its Z-report. The shift row is locked, its
+    totals come from one grouped query over its transactions and replace the
+    running counters. Raises ValueError when the shift is not open.
+    """
+    shift = (
+        db.query(POSShiftORM)
+        .filter(POSShiftORM.id == shift_id, POSShiftORM.tenant_id == tenant_id)
+        .with_for_update()
+        .first()
+    )
+    if not shift:
+        return None
+    if shift.status != "open":
+        raise ValueError("Shift is already closed")
+
+    by_method = shift_transaction_totals(db, tenant_id, shift.id)
+    totals = {metric: 0 for metric in COUNT_METRICS}
+    totals.update({metric: 0.0 for metric in MONEY_METRICS})
+    for figures in by_method.values():
+        for metric, value in figures.items():
+            totals[metric] += value
+    totals.update({metric: round(totals[metric], 2) for metric in MONEY_METRICS})
+
+    opening_cash = round(float(shift.openingAmount or 0.0), 2)
+    # Refunded and voided sales are out of salesTotal: their cash went back out
+    cash_sales = by_method.get(POSPaymentMethod.CASH.value, {}).get("salesTotal", 0.0)
+    expected_cash = round(opening_cash + cash_sales, 2)
+    now = datetime.now()
+
+    shift.status = "closed"
+    shift.endTime = now
+    shift.closingAmount = counted_cash
+    shift.totalSales = totals["salesTotal"]
+    shift.totalTransactions = totals["transactionCount"]
+    if notes is not None:
+        shift.notes = notes
+    shift.updatedAt = datetime.utcnow()
+
+    report = POSShiftReport(
+        tenant_id=shift.tenant_id,
+        shiftId=shift.id,
+        shiftNumber=shift.shiftNumber,
+        cashierId=shift.employeeId,
+        openedAt=shift.startTime,
+        closedAt=now,
+        openingCash=opening_cash,
+        expectedCash=expected_cash,
+        countedCash=counted_cash,
+        cashDifference=round(counted_cash - expected_cash, 2) if counted_cash is not None else None,
+        paymentMethods=by_method,
+        **totals,
+    )
+    db.add(report)
+    db.commit()
+    db.refresh(report)
+    return report
+
+
 def update_pos_shift(
     db: Session,
     shift_id: str,
@@ -175,7 +268,7 @@ def open_pos_shift_endpoint(db: Session, tenant_context: dict, current_user, shi
             raise HTTPException(status_code=400, detail="User already has an open shift")
         db_shift_data = {
             "id": str(uuid_lib.uuid4()),
-            "shiftNumber": generate_shift_number(),
+            "shiftNumber": generate_shift_number(db, tenant_context["tenant_id"]),
             "tenant_id": tenant_context["tenant_id"],
             "employeeId": str(current_user.id),
             "startTime": datetime.now(),
@@ -212,16 +305,64 @@ def update_pos_shift_endpoint(db: Session, tenant_context: dict, shift_id: str,
                 if hasattr(update_dict["status"], "value")
                 else update_dict["status"]
             )
+        if update_dict.get("status") == "closed":
+            # Closing through an update still writes the Z-report
+            existing = get_pos_shift_by_id(db, shift_id, tenant_context["tenant_id"])
+            if existing and existing.status == "open":
+                close_pos_shift(
+                    db, shift_id, tenant_context["tenant_id"],
+                    update_dict.pop("closingAmount", None), update_dict.pop("notes", None),
+                )
+                update_dict.pop("status")
         db_shift = update_pos_shift(db, shift_id, update_dict, tenant_context["tenant_id"])
         if not db_shift:
             raise HTTPException(status_code=404, detail="Shift not found")
         return POSShiftResponse(shift=convert_db_shift_to_pydantic(db_shift))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating shift: {str(e)}")
 
 
+def close_pos_shift_endpoint(db: Session, tenant_context: dict, shift_id: str, close_data):
+    from fastapi import HTTPException
+    from ..shared import convert_db_shift_report_to_pydantic
+    from .schemas import POSShiftReportResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        report = close_pos_shift(db, shift_id, tenant_context["tenant_id"], close_data.countedCash, close_data.notes)
+        if not report:
+            raise HTTPException(status_code=404, detail="Shift not found")
+        return POSShiftReportResponse(report=convert_db_shift_report_to_pydantic(report))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error closing shift: {str(e)}")
+
+
+def get_pos_shift_report_endpoint(db: Session, tenant_context: dict, shift_id: str):
+    from fastapi import HTTPException
+    from ..shared import convert_db_shift_report_to_pydantic
+    from .schemas import POSShiftReportResponse
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        report = get_pos_shift_report(db, shift_id, tenant_context["tenant_id"])
+        if not report:
+            raise HTTPException(status_code=404, detail="Shift report not found; the shift is not closed")
+        return POSShiftReportResponse(report=convert_db_shift_report_to_pydantic(report))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching shift report: {str(e)}")
+
 def get_current_open_shift_endpoint(db: Session, tenant_context: dict, current_user):
     from fastapi import HTTPException
     from ..shared import convert_db_shift_to_pydantic
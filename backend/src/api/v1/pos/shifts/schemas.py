@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 from .....models.common import Pagination
@@ -27,6 +27,11 @@ class POSShiftUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class POSShiftClose(BaseModel):
+    countedCash: Optional[float] = None
+    notes: Optional[str] = None
+
+
 class POSShift(POSShiftBase):
     id: str
     tenant_id: str
@@ -55,3 +60,30 @@ class POSShiftFilters(BaseModel):
     cashierId: Optional[str] = None
     dateFrom: Optional[str] = None
     dateTo: Optional[str] = None
+
+
+class POSShiftReport(BaseModel):
+    id: str
+    shiftId: str
+    shiftNumber: Optional[str] = None
+    cashierId: str
+    openedAt: datetime
+    closedAt: datetime
+    transactionCount: int = 0
+    salesTotal: float = 0.0
+    discountTotal: float = 0.0
+    taxTotal: float = 0.0
+    refundCount: int = 0
+    refundTotal: float = 0.0
+    voidCount: int = 0
+    voidTotal: float = 0.0
+    openingCash: float = 0.0
+    expectedCash: float = 0.0
+    countedCash: Optional[float] = None
+    cashDifference: Optional[float] = None
+    paymentMethods: Dict[str, Dict[str, Any]] = {}
+    createdAt: Optional[datetime] = None
+
+
+class POSShiftReportResponse(BaseModel):
+    report: POSShiftReport
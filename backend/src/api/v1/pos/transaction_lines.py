@@ -0,0 +1,294 @@
+"""
+POS transaction lines
+
+A sale's items are written as pos_transaction_lines rows in the same commit
+as the transaction, after its stock was deducted, each with the cost per
+unit the sale consumed. Per-product sales, best sellers and margins are
+then indexed queries on (tenant_id, productId, createdAt) instead of a
+parse of every transaction's ``items`` JSON, which stays on the header as
+the receipt snapshot.
+
+``backfill_transaction_lines`` derives lines for older transactions from
+that JSON, in batches; their cost is the product's current cost price.
+"""
+
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import distinct, func, insert, or_, text
+from sqlalchemy.orm import Session
+
+from ....models.pos import POSTransaction as POSTransactionORM, POSTransactionLine
+from .sales_rollups import NON_SALE_STATUSES
+
+BACKFILL_BATCH_SIZE = 1000
+SORT_KEYS = ("quantity", "revenue", "margin")
+
+
+def _product_uuid(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _line_rows(transaction: POSTransactionORM, unit_costs: Dict[str, float]) -> List[Dict[str, Any]]:
+    rows = []
+    for number, item in enumerate(transaction.items or [], start=1):
+        product_id = _product_uuid(item.get("productId"))
+        unit_cost = unit_costs.get(str(product_id)) if product_id else None
+        rows.append({
+            "id": uuid.uuid4(),
+            "tenant_id": transaction.tenant_id,
+            "transactionId": transaction.id,
+            "lineNumber": number,
+            "productId": product_id,
+            "productName": item.get("productName"),
+            "sku": item.get("sku"),
+            "quantity": int(item.get("quantity") or 0),
+            "unitPrice": round(float(item.get("unitPrice") or 0.0), 2),
+            "discount": round(float(item.get("discount") or 0.0), 2),
+            "taxRate": float(item.get("taxRate") or 0.0),
+            "lineTotal": round(float(item.get("total") or 0.0), 2),
+            "unitCost": round(unit_cost, 4) if unit_cost is not None else None,
+            "createdAt": transaction.createdAt,
+        })
+    return rows
+
+
+def _deduct_stock(db: Session, transactions: Sequence[POSTransactionORM], user_id: Any) -> Dict[str, Dict[str, float]]:
+    from ....services.inventory_sync_service import InventorySyncService
+
+    outcome = InventorySyncService(db).deduct_pos_sales_stock(
+        str(transactions[0].tenant_id),
+        str(user_id),
+        [
+            {"transaction_id": str(t.id), "label": t.transactionNumber, "items": t.items or []}
+            for t in transactions
+        ],
+    )
+    if not outcome["success"]:
+        raise ValueError("; ".join(outcome["errors"]))
+    return outcome["unit_costs"]
+
+
+def record_sales_lines(db: Session, transactions: Sequence[POSTransactionORM], user_id: Any) -> None:
+    """
+    Deduct the stock of one tenant's sales and write their lines, one
+    statement each, inside the caller's transaction. Raises ValueError
+    (naming the products) when a product is unknown or short of stock; the
+    caller rolls back.
+    """
+    if not transactions:
+        return
+    unit_costs = _deduct_stock(db, transactions, user_id)
+    rows = [
+        row
+        for transaction in transactions
+        for row in _line_rows(transaction, unit_costs.get(str(transaction.id), {}))
+    ]
+    if rows:
+        db.execute(insert(POSTransactionLine), rows)
+
+
+def record_sale_lines(db: Session, transaction: POSTransactionORM, user_id: Any) -> None:
+    record_sales_lines(db, [transaction], user_id)
+
+
+def rededuct_sale_stock(db: Session, transaction: POSTransactionORM, user_id: Any) -> None:
+    """Deduct stock again for a voided sale that is reinstated. Raises ValueError on a shortfall."""
+    _deduct_stock(db, [transaction], user_id)
+
+
+def restore_sale_stock(db: Session, transaction: POSTransactionORM) -> None:
+    """Return a voided or deleted sale's stock. Its lines stay; reports skip non-sales."""
+    from ....services.inventory_sync_service import InventorySyncService
+
+    InventorySyncService(db).restore_pos_sale_stock(str(transaction.id), str(transaction.tenant_id))
+
+
+# ------------------------------------------------------------------ #
+# Backfill
+# ------------------------------------------------------------------ #
+_NUMERIC = "CASE WHEN item.value->>'{0}' ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN CAST(item.value->>'{0}' AS numeric) ELSE 0 END"
+_PRODUCT = (
+    "CASE WHEN item.value->>'productId' ~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$' "
+    "THEN CAST(item.value->>'productId' AS uuid) END"
+)
+
+_BACKFILL_SQL = """
+    WITH batch AS (
+        SELECT t.id, t.tenant_id, t.items, COALESCE(t."createdAt", t."updatedAt", now() AT TIME ZONE 'utc') AS created
+        FROM pos_transactions t
+        WHERE t.id > CAST(:after AS uuid)
+          {tenant_filter}
+          AND NOT EXISTS (SELECT 1 FROM pos_transaction_lines l WHERE l."transactionId" = t.id)
+        ORDER BY t.id
+        LIMIT :batch_size
+    ),
+    inserted AS (
+        INSERT INTO pos_transaction_lines (
+            id, tenant_id, "transactionId", "lineNumber", "productId", "productName", sku,
+            quantity, "unitPrice", discount, "taxRate", "lineTotal", "unitCost", "createdAt"
+        )
+        SELECT gen_random_uuid(), b.tenant_id, b.id, item.ordinality, p.id,
+               item.value->>'productName', item.value->>'sku',
+               CAST(round({quantity}) AS integer),
+               round({unit_price}, 2), round({discount}, 2), {tax_rate}, round({total}, 2),
+               p."costPerUnitPrice", b.created
+        FROM batch b
+        CROSS JOIN LATERAL json_array_elements(
+            CASE WHEN json_typeof(b.items) = 'array' THEN b.items ELSE '[]'::json END
+        ) WITH ORDINALITY AS item(value, ordinality)
+        LEFT JOIN products p ON p.tenant_id = b.tenant_id AND p.id = {product}
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM batch) AS transactions,
+           (SELECT CAST(max(id::text) AS uuid) FROM batch) AS last_id,
+           (SELECT count(*) FROM inserted) AS lines
+"""
+
+
+def _backfill_statement(tenant_id: Optional[str]):
+    return text(_BACKFILL_SQL.format(
+        tenant_filter="AND t.tenant_id = CAST(:tenant_id AS uuid)" if tenant_id else "",
+        quantity=_NUMERIC.format("quantity"),
+        unit_price=_NUMERIC.format("unitPrice"),
+        discount=_NUMERIC.format("discount"),
+        tax_rate=_NUMERIC.format("taxRate"),
+        total=_NUMERIC.format("total"),
+        product=_PRODUCT,
+    ))
+
+
+def backfill_transaction_lines(
+    db: Session,
+    tenant_id: Optional[str] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> Iterator[Dict[str, int]]:
+    """
+    Write lines for transactions that have none, ``batch_size`` transactions
+    per statement and commit. Yields ``{"transactions", "lines"}`` per batch.
+    Restartable: finished transactions are skipped on the next run.
+    """
+    statement = _backfill_statement(tenant_id)
+    after = uuid.UUID(int=0)
+    while True:
+        params = {"after": str(after), "batch_size": batch_size}
+        if tenant_id:
+            params["tenant_id"] = str(tenant_id)
+        row = db.execute(statement, params).one()
+        db.commit()
+        if not row.transactions:
+            return
+        after = row.last_id
+        yield {"transactions": int(row.transactions), "lines": int(row.lines)}
+
+
+# ------------------------------------------------------------------ #
+# Reads
+# ------------------------------------------------------------------ #
+def _sale_lines(db: Session, tenant_id: Any, start, end, *columns):
+    query = (
+        db.query(*columns)
+        .join(POSTransactionORM, POSTransactionORM.id == POSTransactionLine.transactionId)
+        .filter(
+            POSTransactionLine.tenant_id == tenant_id,
+            or_(
+                POSTransactionORM.paymentStatus.is_(None),
+                POSTransactionORM.paymentStatus.notin_(NON_SALE_STATUSES),
+            ),
+        )
+    )
+    if start is not None:
+        query = query.filter(POSTransactionLine.createdAt >= start)
+    if end is not None:
+        query = query.filter(POSTransactionLine.createdAt < end)
+    return query
+
+
+def _sales_columns():
+    revenue = func.coalesce(func.sum(POSTransactionLine.lineTotal), 0)
+    cost = func.coalesce(func.sum(POSTransactionLine.unitCost * POSTransactionLine.quantity), 0)
+    return [
+        func.coalesce(func.sum(POSTransactionLine.quantity), 0).label("quantity"),
+        revenue.label("revenue"),
+        cost.label("cost"),
+        (revenue - cost).label("margin"),
+        func.count(distinct(POSTransactionLine.transactionId)).label("transactions"),
+    ]
+
+
+def _sales_figures(row) -> Dict[str, Any]:
+    revenue = float(row.revenue or 0)
+    margin = float(row.margin or 0)
+    return {
+        "quantity": int(row.quantity or 0),
+        "revenue": round(revenue, 2),
+        "cost": round(float(row.cost or 0), 2),
+        "margin": round(margin, 2),
+        "marginPercent": round(margin / revenue * 100, 2) if revenue else None,
+        "transactions": int(row.transactions or 0),
+    }
+
+
+def product_sales(
+    db: Session,
+    tenant_id: Any,
+    start=None,
+    end=None,
+    sort_by: str = "quantity",
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """Best sellers of [start, end) by quantity, revenue or margin; voids and refunds excluded."""
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}")
+    columns = _sales_columns()
+    order = {column.name: column for column in columns}[sort_by]
+    rows = (
+        _sale_lines(
+            db, tenant_id, start, end,
+            POSTransactionLine.productId,
+            func.max(POSTransactionLine.productName).label("productName"),
+            func.max(POSTransactionLine.sku).label("sku"),
+            *columns,
+        )
+        .filter(POSTransactionLine.productId.isnot(None))
+        .group_by(POSTransactionLine.productId)
+        .order_by(order.desc(), POSTransactionLine.productId)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {"productId": str(row.productId), "productName": row.productName, "sku": row.sku, **_sales_figures(row)}
+        for row in rows
+    ]
+
+
+def product_sales_series(
+    db: Session,
+    tenant_id: Any,
+    product_id: str,
+    start=None,
+    end=None,
+) -> Dict[str, Any]:
+    """One product's totals over [start, end) and its sales per day. Raises ValueError for a malformed id."""
+    product_uuid = uuid.UUID(str(product_id))
+    day = func.date(POSTransactionLine.createdAt)
+    rows = (
+        _sale_lines(db, tenant_id, start, end, day.label("day"), *_sales_columns())
+        .filter(POSTransactionLine.productId == product_uuid)
+        .group_by(day)
+        .order_by(day)
+        .all()
+    )
+    totals = (
+        _sale_lines(db, tenant_id, start, end, *_sales_columns())
+        .filter(POSTransactionLine.productId == product_uuid)
+        .one()
+    )
+    return {
+        "productId": str(product_uuid),
+        "summary": _sales_figures(totals),
+        "daily": [{"date": row.day.isoformat(), **_sales_figures(row)} for row in rows],
+    }
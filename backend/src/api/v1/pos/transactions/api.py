@@ -4,7 +4,14 @@ from typing import Optional
 
 from .....config.database import get_db
 from .....api.dependencies import get_current_user, get_tenant_context, require_permission
-from .schemas import POSTransactionCreate, POSTransactionUpdate, POSTransactionsResponse, POSTransactionResponse
+from .schemas import (
+    POSSyncRequest,
+    POSSyncResponse,
+    POSTransactionCreate,
+    POSTransactionResponse,
+    POSTransactionsResponse,
+    POSTransactionUpdate,
+)
 from . import logic
 
 router = APIRouter()
@@ -19,6 +26,9 @@ async def list_pos_transactions(
     amount_from: Optional[float] = Query(None),
     amount_to: Optional[float] = Query(None),
     search: Optional[str] = Query(None),
+    shift_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    include_total: bool = Query(False, alias="includeTotal", description="Count all matches on cursor pages too"),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -38,6 +48,9 @@ async def list_pos_transactions(
         search,
         page,
         limit,
+        shift_id=shift_id,
+        cursor=cursor,
+        include_total=include_total,
     )
 
 
@@ -63,6 +76,18 @@ async def create_pos_transaction(
     return logic.create_pos_transaction_endpoint(db, tenant_context, current_user, transaction_data)
 
 
+
+@router.post("/transactions/sync", response_model=POSSyncResponse)
+async def sync_pos_transactions(
+    sync_data: POSSyncRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+    tenant_context: Optional[dict] = Depends(get_tenant_context),
+    _: dict = Depends(require_permission("pos:transactions:create")),
+):
+    return logic.sync_pos_transactions_endpoint(db, tenant_context, current_user, sync_data)
+
+
 @router.put("/transactions/{transaction_id}", response_model=POSTransactionResponse)
 async def update_pos_transaction(
     transaction_id: str,
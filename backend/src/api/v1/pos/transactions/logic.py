@@ -1,9 +1,18 @@
+import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from .....models.pos import POSTransaction as POSTransactionORM
+from .....core.pagination import encode_keyset_cursor, keyset_before
+from .....models.pos import POSShift as POSShiftORM, POSTransaction as POSTransactionORM
+from .....services.pos_pricing import PricedBasket, get_pricing_index
+from ..sales_rollups import VOID_STATUSES, is_sale_status, record_sale, record_status_change, remove_sale
+from ..transaction_lines import rededuct_sale_stock, record_sale_lines, restore_sale_stock
+from ..shared import parse_pos_date_range
+from ..shifts.logic import add_to_shift_totals
 
 
 def get_pos_transaction_by_id(
@@ -68,26 +77,116 @@ def get_pos_transactions_by_date_range(
     return query.order_by(POSTransactionORM.createdAt.desc()).offset(skip).limit(limit).all()
 
 
-def create_pos_transaction(db: Session, transaction_data: dict) -> POSTransactionORM:
+def get_pos_transaction_by_client_reference(
+    db: Session,
+    tenant_id: str,
+    client_reference: str,
+) -> Optional[POSTransactionORM]:
+    return (
+        db.query(POSTransactionORM)
+        .filter(POSTransactionORM.tenant_id == tenant_id, POSTransactionORM.clientReference == client_reference)
+        .first()
+    )
+
+
+def price_sale(db: Session, tenant_id, transaction_data, at: datetime) -> PricedBasket:
+    """The sale's lines repriced by the price lists and promotions of its store at ``at`` (UTC)."""
+    pricing = get_pricing_index(db, tenant_id, transaction_data.warehouseId)
+    return pricing.price_basket(transaction_data.items, transaction_data.customerGroup, at)
+
+
+def pos_transaction_row(
+    tenant_id,
+    shift: POSShiftORM,
+    transaction_data,
+    created_at: datetime,
+    basket: Optional[PricedBasket] = None,
+) -> dict:
+    """Column values of a new sale in ``shift`` from a POSTransactionCreate, with its lines as priced in ``basket``."""
+    from ..shared import calculate_transaction_totals, generate_transaction_number
+
+    items = basket.items if basket is not None else [item.dict() for item in transaction_data.items]
+    totals = calculate_transaction_totals(items, transaction_data.discount, 0.0)
+    return {
+        "id": str(uuid.uuid4()),
+        "transactionNumber": generate_transaction_number(tenant_id),
+        "clientReference": transaction_data.clientReference,
+        "tenant_id": tenant_id,
+        "shiftId": str(shift.id),
+        "customerId": transaction_data.customerId,
+        "customerName": transaction_data.customerName,
+        "items": items,
+        "appliedPromotions": (basket.applied or None) if basket is not None else None,
+        "subtotal": totals["subtotal"],
+        "discount": totals["discount"],
+        "taxAmount": totals["taxAmount"],
+        "total": totals["total"],
+        "paymentMethod": transaction_data.paymentMethod.value,
+        "paymentStatus": "completed",
+        "notes": transaction_data.notes,
+        "createdAt": created_at,
+        "updatedAt": created_at,
+    }
+
+
+def create_pos_transaction(db: Session, transaction_data: dict, cashier_id=None) -> POSTransactionORM:
+    """
+    Ring up a sale: header, lines, stock deduction, rollups and the shift's
+    running totals (an atomic increment) in one commit.
+    Raises ValueError, with nothing written, when a product is unknown or
+    short of stock.
+    """
     db_transaction = POSTransactionORM(**transaction_data)
     db.add(db_transaction)
+    try:
+        db.flush()
+        if cashier_id is None:
+            cashier_id = _shift_employee_id(db, db_transaction)
+        record_sale_lines(db, db_transaction, cashier_id)
+        record_sale(db, db_transaction, cashier_id)
+        if is_sale_status(db_transaction.paymentStatus):
+            add_to_shift_totals(db, db_transaction.shiftId, float(db_transaction.total or 0.0), 1)
+    except ValueError:
+        db.rollback()
+        raise
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
 
+def _shift_employee_id(db: Session, transaction: POSTransactionORM):
+    return db.query(POSShiftORM.employeeId).filter(POSShiftORM.id == transaction.shiftId).scalar()
+
+
 def update_pos_transaction(
     db: Session,
     transaction_id: str,
     update_data: dict,
     tenant_id: str = None,
 ) -> Optional[POSTransactionORM]:
+    """
+    Update a transaction. Voiding or cancelling a sale returns its stock and
+    reinstating it deducts again (ValueError, nothing written, on a
+    shortfall); refunds leave stock alone.
+    """
     transaction = get_pos_transaction_by_id(db, transaction_id, tenant_id)
     if transaction:
+        previous_status = transaction.paymentStatus
         for key, value in update_data.items():
             if hasattr(transaction, key) and value is not None:
                 setattr(transaction, key, value)
         transaction.updatedAt = datetime.utcnow()
+        if transaction.paymentStatus != previous_status:
+            cashier_id = _shift_employee_id(db, transaction)
+            try:
+                if transaction.paymentStatus in VOID_STATUSES and previous_status not in VOID_STATUSES:
+                    restore_sale_stock(db, transaction)
+                elif previous_status in VOID_STATUSES and transaction.paymentStatus not in VOID_STATUSES:
+                    rededuct_sale_stock(db, transaction, cashier_id)
+                record_status_change(db, transaction, previous_status, cashier_id)
+            except ValueError:
+                db.rollback()
+                raise
         db.commit()
         db.refresh(transaction)
     return transaction
@@ -100,12 +199,100 @@ def delete_pos_transaction(
 ) -> bool:
     transaction = get_pos_transaction_by_id(db, transaction_id, tenant_id)
     if transaction:
+        if transaction.paymentStatus not in VOID_STATUSES:
+            restore_sale_stock(db, transaction)
+        remove_sale(db, transaction)
         db.delete(transaction)
         db.commit()
         return True
     return False
 
 
+def query_pos_transactions(
+    db: Session,
+    tenant_id: str,
+    status: Optional[str] = None,
+    payment_method: Optional[str] = None,
+    shift_id: Optional[str] = None,
+    cashier_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    amount_from: Optional[float] = None,
+    amount_to: Optional[float] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 10,
+    include_total: bool = False,
+) -> Tuple[List[POSTransactionORM], Optional[int], Optional[str]]:
+    """
+    A filtered page of transactions, newest first, and the total number of
+    matches. Pass ``cursor`` (from the previous page) for keyset paging on
+    (createdAt, id); ``skip`` is only honoured without one. After a cursor
+    the total is None unless ``include_total`` asks for a separate count,
+    so deep pages stay proportional to the page size. Raises ValueError for
+    a malformed date or cursor.
+    """
+    filters = [POSTransactionORM.tenant_id == tenant_id]
+    if status:
+        filters.append(POSTransactionORM.paymentStatus == status)
+    if payment_method:
+        filters.append(POSTransactionORM.paymentMethod == payment_method)
+    if shift_id:
+        filters.append(POSTransactionORM.shiftId == shift_id)
+    if cashier_id:
+        filters.append(POSTransactionORM.shiftId.in_(
+            select(POSShiftORM.id).where(
+                POSShiftORM.tenant_id == tenant_id, POSShiftORM.employeeId == cashier_id
+            )
+        ))
+    start, end = parse_pos_date_range(date_from, date_to)
+    if start is not None:
+        filters.append(POSTransactionORM.createdAt >= start)
+    if end is not None:
+        filters.append(POSTransactionORM.createdAt < end)
+    if amount_from is not None:
+        filters.append(POSTransactionORM.total >= amount_from)
+    if amount_to is not None:
+        filters.append(POSTransactionORM.total <= amount_to)
+    if search:
+        pattern = "%" + search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        filters.append(or_(
+            POSTransactionORM.transactionNumber.ilike(pattern, escape="\\"),
+            POSTransactionORM.customerName.ilike(pattern, escape="\\"),
+        ))
+
+    query = db.query(POSTransactionORM, func.count().over().label("total")).filter(*filters)
+    after = keyset_before(POSTransactionORM.createdAt, POSTransactionORM.id, cursor)
+    if after is not None:
+        query = query.filter(after)
+    query = query.order_by(POSTransactionORM.createdAt.desc(), POSTransactionORM.id.desc())
+    if after is None and skip:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+
+    # The window count covers every match on an offset page; after a cursor
+    # it only sees the rows still ahead, so the total is counted separately
+    # and only on request.
+    if after is not None:
+        total = None
+        if include_total:
+            total = db.query(func.count(POSTransactionORM.id)).filter(*filters).scalar() or 0
+    elif rows:
+        total = rows[0].total
+    elif skip:
+        total = db.query(func.count(POSTransactionORM.id)).filter(*filters).scalar() or 0
+    else:
+        total = 0
+
+    transactions = [transaction for transaction, _ in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = transactions[-1]
+        next_cursor = encode_keyset_cursor(last.createdAt, last.id)
+    return transactions, total, next_cursor
+
+
 def list_pos_transactions_endpoint(
     db: Session,
     tenant_context: dict,
@@ -118,6 +305,9 @@ def list_pos_transactions_endpoint(
     search: Optional[str],
     page: int,
     limit: int,
+    shift_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
 ):
     from fastapi import HTTPException
     from ..shared import convert_db_transaction_to_pydantic
@@ -126,44 +316,23 @@ def list_pos_transactions_endpoint(
     if not tenant_context:
         raise HTTPException(status_code=400, detail="Tenant context required")
     try:
-        skip = (page - 1) * limit
-        transactions = get_pos_transactions(db, tenant_context["tenant_id"], skip, limit)
-
-        if status or payment_method or date_from or date_to or amount_from or amount_to or search:
-            filtered_transactions = []
-            for transaction in transactions:
-                pydantic_txn = convert_db_transaction_to_pydantic(transaction)
-                if status and pydantic_txn.status.value != status:
-                    continue
-                if payment_method and pydantic_txn.paymentMethod.value != payment_method:
-                    continue
-                if date_from:
-                    transaction_date = datetime.fromisoformat(pydantic_txn.createdAt.replace("Z", "+00:00"))
-                    from_date = datetime.fromisoformat(date_from.replace("Z", "+00:00"))
-                    if transaction_date < from_date:
-                        continue
-                if date_to:
-                    transaction_date = datetime.fromisoformat(pydantic_txn.createdAt.replace("Z", "+00:00"))
-                    to_date = datetime.fromisoformat(date_to.replace("Z", "+00:00"))
-                    if transaction_date > to_date:
-                        continue
-                if amount_from and pydantic_txn.total < amount_from:
-                    continue
-                if amount_to and pydantic_txn.total > amount_to:
-                    continue
-                if search:
-                    search_lower = search.lower()
-                    if not any([
-                        search_lower in pydantic_txn.transactionNumber.lower(),
-                        search_lower in (pydantic_txn.customerName or "").lower(),
-                        search_lower in pydantic_txn.cashierName.lower(),
-                    ]):
-                        continue
-                filtered_transactions.append(transaction)
-            transactions = filtered_transactions
-
+        transactions, total, next_cursor = query_pos_transactions(
+            db,
+            tenant_context["tenant_id"],
+            status=status,
+            payment_method=payment_method,
+            shift_id=shift_id,
+            date_from=date_from,
+            date_to=date_to,
+            amount_from=amount_from,
+            amount_to=amount_to,
+            search=search,
+            cursor=cursor,
+            skip=(page - 1) * limit,
+            limit=limit,
+            include_total=include_total,
+        )
         pydantic_transactions = [convert_db_transaction_to_pydantic(t) for t in transactions]
-        total = len(pydantic_transactions)
 
         return POSTransactionsResponse(
             transactions=pydantic_transactions,
@@ -171,9 +340,12 @@ def list_pos_transactions_endpoint(
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": (total + limit - 1) // limit,
+                "pages": (total + limit - 1) // limit if total is not None else None,
             },
+            nextCursor=next_cursor,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -204,13 +376,8 @@ def create_pos_transaction_endpoint(
     current_user,
     transaction_data,
 ):
-    import uuid as uuid_lib
     from fastapi import HTTPException
-    from ..shared import (
-        calculate_transaction_totals,
-        convert_db_transaction_to_pydantic,
-        generate_transaction_number,
-    )
+    from ..shared import convert_db_transaction_to_pydantic
     from ..shifts.logic import get_open_pos_shift
     from .schemas import POSTransactionResponse
 
@@ -221,41 +388,74 @@ def create_pos_transaction_endpoint(
         if not open_shift:
             raise HTTPException(status_code=400, detail="No open shift found. Please open a shift first.")
 
-        totals = calculate_transaction_totals(transaction_data.items, transaction_data.discount, 0.0)
-
-        db_txn_data = {
-            "id": str(uuid_lib.uuid4()),
-            "transactionNumber": generate_transaction_number(),
-            "tenant_id": tenant_context["tenant_id"],
-            "shiftId": str(open_shift.id),
-            "customerId": transaction_data.customerId,
-            "customerName": transaction_data.customerName,
-            "items": [item.dict() for item in transaction_data.items],
-            "subtotal": totals["subtotal"],
-            "discount": totals["discount"],
-            "taxAmount": totals["taxAmount"],
-            "total": totals["total"],
-            "paymentMethod": transaction_data.paymentMethod.value,
-            "paymentStatus": "completed",
-            "notes": transaction_data.notes,
-            "createdAt": datetime.now(),
-            "updatedAt": datetime.now(),
-        }
-
-        db_transaction = create_pos_transaction(db, db_txn_data)
-
-        open_shift.totalSales += totals["total"]
-        open_shift.totalTransactions += 1
-        db.commit()
-        db.refresh(open_shift)
+        if transaction_data.clientReference:
+            existing = get_pos_transaction_by_client_reference(
+                db, tenant_context["tenant_id"], transaction_data.clientReference
+            )
+            if existing:
+                return POSTransactionResponse(transaction=convert_db_transaction_to_pydantic(existing))
+
+        basket = price_sale(db, tenant_context["tenant_id"], transaction_data, datetime.utcnow())
+        db_txn_data = pos_transaction_row(
+            tenant_context["tenant_id"], open_shift, transaction_data, datetime.now(), basket
+        )
+        # One commit: the sale, its rollup buckets and the shift totals.
+        try:
+            db_transaction = create_pos_transaction(db, db_txn_data, cashier_id=open_shift.employeeId)
+        except IntegrityError:
+            # A retry of the same sale committed first
+            db.rollback()
+            if not transaction_data.clientReference:
+                raise
+            existing = get_pos_transaction_by_client_reference(
+                db, tenant_context["tenant_id"], transaction_data.clientReference
+            )
+            if not existing:
+                raise
+            db_transaction = existing
 
         return POSTransactionResponse(transaction=convert_db_transaction_to_pydantic(db_transaction))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating transaction: {str(e)}")
 
 
+
+def sync_pos_transactions_endpoint(
+    db: Session,
+    tenant_context: dict,
+    current_user,
+    sync_data,
+):
+    from fastapi import HTTPException
+    from ..shifts.logic import get_open_pos_shift
+    from .schemas import POSSyncResponse
+    from .sync import CREATED, DUPLICATE, REJECTED, sync_pos_sales
+
+    if not tenant_context:
+        raise HTTPException(status_code=400, detail="Tenant context required")
+    try:
+        open_shift = get_open_pos_shift(db, tenant_context["tenant_id"], str(current_user.id))
+        if not open_shift:
+            raise HTTPException(status_code=400, detail="No open shift found. Please open a shift first.")
+
+        results = sync_pos_sales(db, tenant_context["tenant_id"], current_user.id, open_shift, sync_data.sales)
+        return POSSyncResponse(
+            results=results,
+            created=sum(1 for r in results if r["status"] == CREATED),
+            duplicates=sum(1 for r in results if r["status"] == DUPLICATE),
+            rejected=sum(1 for r in results if r["status"] == REJECTED),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing transactions: {str(e)}")
+
 def update_pos_transaction_endpoint(
     db: Session,
     tenant_context: dict,
@@ -282,6 +482,8 @@ def update_pos_transaction_endpoint(
         if not db_transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
         return POSTransactionResponse(transaction=convert_db_transaction_to_pydantic(db_transaction))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
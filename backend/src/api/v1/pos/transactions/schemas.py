@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -33,9 +33,17 @@ class POSTransactionBase(BaseModel):
     status: POSTransactionStatus = POSTransactionStatus.PENDING
 
 
+POS_SYNC_MAX_BATCH = 200
+
+
 class POSTransactionCreate(BaseModel):
+    clientReference: Optional[str] = Field(
+        None, min_length=1, max_length=64, description="Idempotency key; a retry with the same key returns the first sale"
+    )
     customerId: Optional[str] = None
     customerName: Optional[str] = None
+    customerGroup: Optional[str] = Field(None, max_length=64, description="Selects customer-group price lists and promotions")
+    warehouseId: Optional[str] = Field(None, description="Store the sale is rung up in; selects its price lists and promotions")
     items: List[POSTransactionItem]
     discount: float = 0.0
     taxRate: float = 0.0
@@ -55,6 +63,7 @@ class POSTransaction(POSTransactionBase):
     shiftId: str
     cashierId: str
     cashierName: str
+    appliedPromotions: List[Dict[str, Any]] = []
     createdAt: datetime
     updatedAt: datetime
 
@@ -62,9 +71,16 @@ class POSTransaction(POSTransactionBase):
         from_attributes = True
 
 
+class POSTransactionsPagination(Pagination):
+    # None on cursor pages unless includeTotal is set
+    total: Optional[int] = None
+    pages: Optional[int] = None
+
+
 class POSTransactionsResponse(BaseModel):
     transactions: List[POSTransaction]
-    pagination: Pagination
+    pagination: POSTransactionsPagination
+    nextCursor: Optional[str] = None
 
 
 class POSTransactionResponse(BaseModel):
@@ -78,3 +94,27 @@ class POSTransactionFilters(BaseModel):
     dateFrom: Optional[str] = None
     dateTo: Optional[str] = None
     search: Optional[str] = None
+
+
+class POSSyncSale(POSTransactionCreate):
+    clientReference: str = Field(..., min_length=1, max_length=64)
+    soldAt: Optional[datetime] = Field(None, description="When the till rang the sale up")
+
+
+class POSSyncRequest(BaseModel):
+    sales: List[POSSyncSale] = Field(..., min_length=1, max_length=POS_SYNC_MAX_BATCH)
+
+
+class POSSyncResult(BaseModel):
+    clientReference: str
+    status: str  # created | duplicate | rejected
+    transactionId: Optional[str] = None
+    transactionNumber: Optional[str] = None
+    errors: List[str] = []
+
+
+class POSSyncResponse(BaseModel):
+    results: List[POSSyncResult]
+    created: int
+    duplicates: int
+    rejected: int
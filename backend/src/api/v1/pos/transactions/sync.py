@@ -0,0 +1,200 @@
+"""
+POS batch sync
+
+A till that was offline queues its sales and replays them here in batches,
+each sale carrying a ``clientReference`` chosen by the till. A batch costs
+a fixed number of statements however many sales it holds:
+
+* one lookup of the references already stored (retries come back as
+  ``duplicate`` with the first sale's number);
+* one ``SELECT ... FOR UPDATE`` of the products involved, after which sales
+  are admitted in the order they were rung up while their stock lasts; a
+  sale that would oversell, or names an unknown product, is ``rejected``
+  on its own and the rest of the batch goes ahead;
+* one multi-row insert of the headers, ``ON CONFLICT DO NOTHING`` on
+  (tenant_id, clientReference), so a concurrent replay of the same batch
+  cannot create a second copy;
+* one guarded stock update, one insert of the lines, one rollup upsert and
+  one update of the shift totals, then a single commit.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .....config.inventory_models import Product
+from .....models.pos import POSShift as POSShiftORM, POSTransaction as POSTransactionORM
+from .....services.stock_mutations import aggregate_deltas
+from ..sales_rollups import record_sales
+from ..shifts.logic import add_to_shift_totals
+from ..transaction_lines import record_sales_lines
+from .logic import pos_transaction_row, price_sale
+
+CREATED = "created"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+
+def _sold_at(sale) -> datetime:
+    """The sale's time as naive UTC, like every other createdAt."""
+    if sale.soldAt is None:
+        return datetime.utcnow()
+    if sale.soldAt.tzinfo is None:
+        return sale.soldAt
+    return sale.soldAt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _requested(sale) -> Dict[str, int]:
+    return aggregate_deltas(
+        (item.productId, item.quantity) for item in sale.items if item.productId and item.quantity > 0
+    )
+
+
+def _valid_uuid(value: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _lock_stock(db: Session, tenant_id: Any, product_ids) -> Dict[str, int]:
+    ids = sorted({pid for pid in (_valid_uuid(p) for p in product_ids) if pid is not None})
+    if not ids:
+        return {}
+    rows = (
+        db.query(Product.id, Product.stockQuantity)
+        .filter(Product.tenant_id == tenant_id, Product.id.in_(ids))
+        .order_by(Product.id)
+        .with_for_update()
+        .all()
+    )
+    return {str(row.id): int(row.stockQuantity or 0) for row in rows}
+
+
+def _result(reference: str, status: str, transaction=None, errors: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        "clientReference": reference,
+        "status": status,
+        "transactionId": str(transaction.id) if transaction is not None else None,
+        "transactionNumber": transaction.transactionNumber if transaction is not None else None,
+        "errors": errors or [],
+    }
+
+
+def _existing(db: Session, tenant_id: Any, references) -> Dict[str, Any]:
+    if not references:
+        return {}
+    rows = (
+        db.query(POSTransactionORM.id, POSTransactionORM.transactionNumber, POSTransactionORM.clientReference)
+        .filter(POSTransactionORM.tenant_id == tenant_id, POSTransactionORM.clientReference.in_(list(references)))
+        .all()
+    )
+    return {row.clientReference: row for row in rows}
+
+
+def sync_pos_sales(
+    db: Session,
+    tenant_id: Any,
+    user_id: Any,
+    shift: POSShiftORM,
+    sales: Sequence,
+) -> List[Dict[str, Any]]:
+    """
+    Write a batch of offline sales into ``shift`` and commit. Returns one
+    result per sale, in request order, with status created, duplicate or
+    rejected.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(sales)
+
+    seen = set()
+    candidates = []
+    for index, sale in enumerate(sales):
+        if sale.clientReference in seen:
+            results[index] = _result(sale.clientReference, REJECTED, errors=["clientReference repeated in batch"])
+            continue
+        seen.add(sale.clientReference)
+        candidates.append(index)
+
+    existing = _existing(db, tenant_id, [sales[i].clientReference for i in candidates])
+    pending = []
+    for index in candidates:
+        found = existing.get(sales[index].clientReference)
+        if found is not None:
+            results[index] = _result(sales[index].clientReference, DUPLICATE, found)
+        else:
+            pending.append(index)
+
+    requested = {index: _requested(sales[index]) for index in pending}
+    stock = _lock_stock(db, tenant_id, {pid for quantities in requested.values() for pid in quantities})
+    admitted = []
+    for index in sorted(pending, key=lambda i: _sold_at(sales[i])):
+        errors = []
+        for product_id, quantity in requested[index].items():
+            available = stock.get(product_id)
+            if available is None:
+                errors.append(f"Product {product_id} not found")
+            elif available < quantity:
+                errors.append(f"Insufficient stock for product {product_id}: {available} available, {quantity} requested")
+        if errors:
+            results[index] = _result(sales[index].clientReference, REJECTED, errors=errors)
+            continue
+        for product_id, quantity in requested[index].items():
+            stock[product_id] -= quantity
+        admitted.append(index)
+
+    created = []
+    if admitted:
+        rows = {
+            index: pos_transaction_row(
+                tenant_id,
+                shift,
+                sales[index],
+                _sold_at(sales[index]),
+                price_sale(db, tenant_id, sales[index], _sold_at(sales[index])),
+            )
+            for index in admitted
+        }
+        inserted = {
+            row.id
+            for row in db.execute(
+                pg_insert(POSTransactionORM)
+                .values(list(rows.values()))
+                .on_conflict_do_nothing(
+                    index_elements=["tenant_id", "clientReference"],
+                    index_where=POSTransactionORM.clientReference.isnot(None),
+                )
+                .returning(POSTransactionORM.id)
+            )
+        }
+        transactions = {
+            str(txn.id): txn
+            for txn in db.query(POSTransactionORM).filter(POSTransactionORM.id.in_(inserted)).all()
+        } if inserted else {}
+
+        # Rows another request inserted first since the lookup above.
+        raced = _existing(
+            db, tenant_id, [sales[i].clientReference for i in admitted if str(rows[i]["id"]) not in transactions]
+        )
+        for index in admitted:
+            transaction = transactions.get(str(rows[index]["id"]))
+            if transaction is None:
+                results[index] = _result(
+                    sales[index].clientReference, DUPLICATE, raced.get(sales[index].clientReference)
+                )
+            else:
+                created.append(transaction)
+                results[index] = _result(sales[index].clientReference, CREATED, transaction)
+
+    if created:
+        try:
+            record_sales_lines(db, created, user_id)
+            record_sales(db, created, cashier_id=shift.employeeId)
+            add_to_shift_totals(db, shift.id, sum(float(t.total or 0.0) for t in created), len(created))
+        except ValueError:
+            db.rollback()
+            raise
+    db.commit()
+    return results
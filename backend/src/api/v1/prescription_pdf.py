@@ -1,6 +1,7 @@
 import io
 from datetime import datetime
-from typing import Any, List
+from types import SimpleNamespace
+from typing import Any, Dict, List
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
@@ -14,6 +15,8 @@ PRIMARY_HEX = "#1e40af"
 TEXT_HEX = "#111827"
 BORDER_HEX = "#e5e7eb"
 
+PRESCRIPTION_FIELDS = ("patient_name", "patient_phone", "prescription_date", "items", "notes")
+
 
 def _item_display(item: dict) -> str:
     t = item.get("type") or "medicine"
@@ -39,7 +42,27 @@ def _item_display(item: dict) -> str:
     return " – ".join(p for p in parts if p)
 
 
+def prescription_document(prescription, doctor=None) -> Dict[str, Any]:
+    """What render_prescription_pdf() draws, as plain data."""
+    return {
+        "prescription": {name: getattr(prescription, name, None) for name in PRESCRIPTION_FIELDS},
+        "doctor": {
+            "first_name": getattr(doctor, "first_name", ""),
+            "last_name": getattr(doctor, "last_name", ""),
+        } if doctor else None,
+    }
+
+
 def generate_prescription_pdf(prescription, doctor=None, appointment=None) -> bytes:
+    from ...services.pdf_rendering import PRESCRIPTION, render_pdf
+
+    return render_pdf(PRESCRIPTION, prescription_document(prescription, doctor))
+
+
+def render_prescription_pdf(data: Dict[str, Any]) -> bytes:
+    """Lays out a prescription_document(); runs in the PDF pool."""
+    prescription = SimpleNamespace(**data["prescription"])
+    doctor = SimpleNamespace(**data["doctor"]) if data["doctor"] else None
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Index, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+from .database_config import Base
+
+
+class ChangeFeedTombstone(Base):
+    """
+    A deleted row of an exported table (pos_transactions, invoices,
+    payments), written by the change_feed_tombstone trigger so change-feed
+    consumers learn about deletes made by any code path.
+    """
+    __tablename__ = "change_feed_tombstones"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), nullable=False)  # no FK: outlives tenant clean-up order
+    entity = Column(String(32), nullable=False)  # source table name
+    recordId = Column(UUID(as_uuid=True), nullable=False)
+    deletedAt = Column(DateTime, nullable=False, default=datetime.utcnow)
+    changeTxid = Column(BigInteger, nullable=False)  # id of the deleting transaction
+
+    __table_args__ = (
+        Index("idx_change_feed_tombstones_feed", "tenant_id", "entity", "changeTxid", "recordId"),
+    )
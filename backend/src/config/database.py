@@ -33,7 +33,9 @@ from .notification_models import (
 
 from .inventory_models import (
     Product, Warehouse, PurchaseOrder, Receiving,
-    StorageLocation, StockMovement
+    StorageLocation, StockMovement, StockBalance,
+    StockCostLayer, StockCostConsumption, StockValuation, StockValuationSnapshot,
+    StockReorderAlert, ProductImportJob, StockTake, StockTakeLine, ProductCode
 )
 
 from .job_card_models import JobCard
@@ -65,7 +67,8 @@ from .investment_models import (
 )
 
 from ..models.pos import (
-    POSShift, POSTransaction, PosProductCategory
+    POSShift, POSShiftReport, POSTransaction, POSTransactionLine, PosProductCategory, POSSalesRollup,
+    POSPriceList, POSPriceListItem, POSPromotion, POSReceiptTemplate,
 )
 
 from .custom_options_models import (
@@ -265,6 +268,7 @@ from .inventory_crud import (
     
     # Stock Movement functions
     get_stock_movements, get_stock_movement_by_id, create_stock_movement, update_stock_movement, delete_stock_movement,
+    list_stock_movements, list_stock_movements_with_product, resolve_movement_product_uuid,
     
     # PurchaseOrder functions
     get_purchase_order_by_id, get_purchase_order_by_number, get_all_purchase_orders, get_purchase_orders,
@@ -382,9 +386,12 @@ __all__ = [
     'Employee', 'JobPosting', 'PerformanceReview', 'TimeEntry', 'LeaveRequest', 'Payroll', 'Benefits',
     'Training', 'TrainingEnrollment', 'Application',
     'Product', 'Warehouse', 'Supplier', 'PurchaseOrder', 'Receiving',
-    'StorageLocation', 'StockMovement',
+    'StorageLocation', 'StockMovement', 'StockBalance',
+    'StockCostLayer', 'StockCostConsumption', 'StockValuation', 'StockValuationSnapshot', 'StockReorderAlert', 'ProductImportJob',
+    'StockTake', 'StockTakeLine', 'ProductCode',
     'Invoice', 'Payment',
-    'POSShift', 'POSTransaction', 'PosProductCategory',
+    'POSShift', 'POSShiftReport', 'POSTransaction', 'POSTransactionLine', 'PosProductCategory', 'POSSalesRollup',
+    'POSPriceList', 'POSPriceListItem', 'POSPromotion', 'POSReceiptTemplate',
     'Vehicle',
     'CustomEventType', 'CustomDepartment', 'CustomLeaveType', 'CustomLeadSource',
     'CustomContactSource', 'CustomCompanyIndustry', 'CustomContactType', 'CustomIndustry',
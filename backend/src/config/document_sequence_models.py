@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+from .database_config import Base
+
+
+class DocumentSequence(Base):
+    """
+    Last issued number per (tenant, document type, period).
+
+    Document types whose numbers are unique across tenants (purchase orders,
+    POS transactions and shifts) use the all-zero UUID as a shared scope, so
+    tenant_id carries no foreign key.
+    """
+    __tablename__ = "document_sequences"
+
+    tenant_id = Column(UUID(as_uuid=True), primary_key=True)
+    document_type = Column(String(32), primary_key=True)
+    period_key = Column(String(16), primary_key=True, default="")
+    last_value = Column(BigInteger, nullable=False, default=0)
+    template = Column(String(64), nullable=True)  # overrides the code default, e.g. "PO/{period}/{number:05d}"
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,10 +1,14 @@
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import uuid
+from datetime import datetime, time, timedelta
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from .inventory_models import Product, Warehouse, PurchaseOrder, Receiving, StorageLocation, StockMovement
 from .hrm_models import Supplier
+from ..services.stock_balances import apply_movement_balances, movement_snapshot
+from ..services.inventory_dashboard import get_inventory_dashboard, invalidate_inventory_dashboard
+from ..core.pagination import encode_keyset_cursor, keyset_before
 
 # Product functions
 def get_product_by_id(product_id: str, db: Session, tenant_id: str = None) -> Optional[Product]:
@@ -56,6 +60,7 @@ def create_product(product_data: dict, db: Session) -> Product:
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    invalidate_inventory_dashboard(db_product.tenant_id)
     return db_product
 
 def update_product(product_id: str, update_data: dict, db: Session, tenant_id: str = None) -> Optional[Product]:
@@ -69,13 +74,16 @@ def update_product(product_id: str, update_data: dict, db: Session, tenant_id: s
         product.updatedAt = datetime.utcnow()
         db.commit()
         db.refresh(product)
+        invalidate_inventory_dashboard(product.tenant_id)
     return product
 
 def delete_product(product_id: str, db: Session, tenant_id: str = None) -> bool:
     product = get_product_by_id(product_id, db, tenant_id)
     if product:
+        product_tenant_id = product.tenant_id
         db.delete(product)
         db.commit()
+        invalidate_inventory_dashboard(product_tenant_id)
         return True
     return False
 
@@ -114,6 +122,7 @@ def create_warehouse(warehouse_data: dict, db: Session) -> Warehouse:
     db.add(db_warehouse)
     db.commit()
     db.refresh(db_warehouse)
+    invalidate_inventory_dashboard(db_warehouse.tenant_id)
     return db_warehouse
 
 def update_warehouse(warehouse_id: str, update_data: dict, db: Session, tenant_id: str = None) -> Optional[Warehouse]:
@@ -125,6 +134,7 @@ def update_warehouse(warehouse_id: str, update_data: dict, db: Session, tenant_i
         warehouse.updatedAt = datetime.utcnow()
         db.commit()
         db.refresh(warehouse)
+        invalidate_inventory_dashboard(warehouse.tenant_id)
     return warehouse
 
 def delete_warehouse(warehouse_id: str, db: Session, tenant_id: str = None) -> bool:
@@ -167,8 +177,10 @@ def delete_warehouse(warehouse_id: str, db: Session, tenant_id: str = None) -> b
             db.delete(receiving)
         
         # Finally delete the warehouse
+        warehouse_tenant_id = warehouse.tenant_id
         db.delete(warehouse)
         db.commit()
+        invalidate_inventory_dashboard(warehouse_tenant_id)
         return True
         
     except Exception as e:
@@ -217,6 +229,7 @@ def create_purchase_order(po_data: dict, db: Session) -> PurchaseOrder:
     db.add(db_po)
     db.commit()
     db.refresh(db_po)
+    invalidate_inventory_dashboard(db_po.tenant_id)
     return db_po
 
 def update_purchase_order(po_id: str, update_data: dict, db: Session, tenant_id: str = None) -> Optional[PurchaseOrder]:
@@ -232,6 +245,7 @@ def update_purchase_order(po_id: str, update_data: dict, db: Session, tenant_id:
         po.updatedAt = datetime.utcnow()
         db.commit()
         db.refresh(po)
+        invalidate_inventory_dashboard(po.tenant_id)
     return po
 
 def delete_purchase_order(po_id: str, db: Session, tenant_id: str = None) -> bool:
@@ -247,8 +261,10 @@ def delete_purchase_order(po_id: str, db: Session, tenant_id: str = None) -> boo
         raise ValueError("Cannot delete purchase order with linked receivings")
 
     try:
+        po_tenant_id = po.tenant_id
         db.delete(po)
         db.commit()
+        invalidate_inventory_dashboard(po_tenant_id)
         return True
     except IntegrityError:
         db.rollback()
@@ -292,6 +308,7 @@ def create_receiving(receiving_data: dict, db: Session) -> Receiving:
     db.add(db_receiving)
     db.commit()
     db.refresh(db_receiving)
+    invalidate_inventory_dashboard(db_receiving.tenant_id)
     return db_receiving
 
 def update_receiving(receiving_id: str, update_data: dict, db: Session, tenant_id: str = None) -> Optional[Receiving]:
@@ -303,13 +320,16 @@ def update_receiving(receiving_id: str, update_data: dict, db: Session, tenant_i
         receiving.updatedAt = datetime.utcnow()
         db.commit()
         db.refresh(receiving)
+        invalidate_inventory_dashboard(receiving.tenant_id)
     return receiving
 
 def delete_receiving(receiving_id: str, db: Session, tenant_id: str = None) -> bool:
     receiving = get_receiving_by_id(receiving_id, db, tenant_id)
     if receiving:
+        receiving_tenant_id = receiving.tenant_id
         db.delete(receiving)
         db.commit()
+        invalidate_inventory_dashboard(receiving_tenant_id)
         return True
     return False
 
@@ -391,6 +411,127 @@ def get_stock_movement_by_id(movement_id: str, db: Session, tenant_id: str = Non
         query = query.filter(StockMovement.tenant_id == tenant_id)
     return query.first()
 
+def resolve_movement_product_uuid(product_ref: Any, db: Session, tenant_id: Any) -> Optional[uuid.UUID]:
+    """Resolve a movement's productId (UUID or SKU) to the tenant's product id"""
+    if not product_ref:
+        return None
+    try:
+        candidate = uuid.UUID(str(product_ref))
+    except (TypeError, ValueError):
+        candidate = None
+    if candidate is not None:
+        found = db.query(Product.id).filter(Product.id == candidate, Product.tenant_id == tenant_id).first()
+        if found:
+            return found[0]
+    found = db.query(Product.id).filter(Product.sku == str(product_ref), Product.tenant_id == tenant_id).first()
+    return found[0] if found else None
+
+def _stock_movement_filters(
+    db: Session,
+    tenant_id: str,
+    product_id: str = None,
+    warehouse_id: str = None,
+    movement_type: str = None,
+    reference_type: str = None,
+    date_from: Any = None,
+    date_to: Any = None,
+) -> List[Any]:
+    """
+    Tenant-leading filters matching the idx_stock_movements_tenant_* indexes.
+    ``product_id`` may be a product UUID or SKU; ``date_to`` is inclusive
+    (a date covers the whole day).
+    """
+    filters = [StockMovement.tenant_id == tenant_id]
+    if product_id:
+        product_uuid = resolve_movement_product_uuid(product_id, db, tenant_id)
+        if product_uuid is not None:
+            filters.append(StockMovement.product_uuid == product_uuid)
+        else:
+            filters.append(StockMovement.productId == str(product_id))
+    if warehouse_id:
+        filters.append(StockMovement.warehouseId == warehouse_id)
+    if movement_type:
+        filters.append(StockMovement.movementType == movement_type)
+    if reference_type:
+        filters.append(StockMovement.referenceType == reference_type)
+    if date_from:
+        if not isinstance(date_from, datetime):
+            date_from = datetime.combine(date_from, time.min)
+        filters.append(StockMovement.createdAt >= date_from)
+    if date_to:
+        if not isinstance(date_to, datetime):
+            date_to = datetime.combine(date_to + timedelta(days=1), time.min)
+            filters.append(StockMovement.createdAt < date_to)
+        else:
+            filters.append(StockMovement.createdAt <= date_to)
+    return filters
+
+def _stock_movement_page(query, cursor: Optional[str], skip: int, limit: int, entity=None):
+    """Newest-first page of ``query`` plus the cursor of the next one (None on the last page)."""
+    after = keyset_before(StockMovement.createdAt, StockMovement.id, cursor)
+    if after is not None:
+        query = query.filter(after)
+    query = query.order_by(StockMovement.createdAt.desc(), StockMovement.id.desc())
+    if after is None and skip:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1] if entity is None else rows[-1][entity]
+        next_cursor = encode_keyset_cursor(last.createdAt, last.id)
+    return rows, next_cursor
+
+def list_stock_movements(
+    db: Session,
+    tenant_id: str,
+    cursor: str = None,
+    skip: int = 0,
+    limit: int = 100,
+    include_total: bool = False,
+    **filters,
+) -> Tuple[List[StockMovement], Optional[int], Optional[str]]:
+    """
+    A page of movements, newest first, filtered by product, warehouse,
+    movement/reference type and date range. Pass ``cursor`` (from the
+    previous page) for keyset paging; ``skip`` is only honoured without one.
+    The total is counted only with ``include_total``, as it costs a scan of
+    every matching row. Returns (movements, total, next_cursor).
+    """
+    conditions = _stock_movement_filters(db, tenant_id, **filters)
+    total = None
+    if include_total:
+        total = db.query(func.count(StockMovement.id)).filter(*conditions).scalar() or 0
+    rows, next_cursor = _stock_movement_page(db.query(StockMovement).filter(*conditions), cursor, skip, limit)
+    return rows, total, next_cursor
+
+def list_stock_movements_with_product(
+    db: Session,
+    tenant_id: str,
+    cursor: str = None,
+    skip: int = 0,
+    limit: int = 100,
+    include_total: bool = True,
+    **filters,
+) -> Tuple[List[Tuple[StockMovement, Optional[Product]]], Optional[int], Optional[str]]:
+    """
+    One joined query for a page of movements with their product, newest first.
+    Takes the filters and paging arguments of ``list_stock_movements``.
+    Returns (rows, total, next_cursor).
+    """
+    conditions = _stock_movement_filters(db, tenant_id, **filters)
+    total = None
+    if include_total:
+        total = db.query(func.count(StockMovement.id)).filter(*conditions).scalar() or 0
+    query = (
+        db.query(StockMovement, Product)
+        .outerjoin(Product, Product.id == StockMovement.product_uuid)
+        .filter(*conditions)
+    )
+    rows, next_cursor = _stock_movement_page(query, cursor, skip, limit, entity=0)
+    return rows, total, next_cursor
+
 def get_stock_movements(db: Session, tenant_id: str = None, product_id: str = None, warehouse_id: str = None, skip: int = 0, limit: int = 100) -> List[StockMovement]:
     """Get stock movements with optional filters"""
     query = db.query(StockMovement)
@@ -405,9 +546,18 @@ def get_stock_movements(db: Session, tenant_id: str = None, product_id: str = No
     return query.order_by(StockMovement.createdAt.desc()).offset(skip).limit(limit).all()
 
 def create_stock_movement(movement_data: dict, db: Session) -> StockMovement:
-    """Create a new stock movement"""
+    """Create a new stock movement and book it into stock balances and product stock"""
     db_movement = StockMovement(**movement_data)
+    if db_movement.product_uuid is None:
+        db_movement.product_uuid = resolve_movement_product_uuid(
+            db_movement.productId, db, db_movement.tenant_id
+        )
     db.add(db_movement)
+    try:
+        apply_movement_balances(db, [(db_movement, 1)], update_products=True)
+    except ValueError:
+        db.rollback()
+        raise
     db.commit()
     db.refresh(db_movement)
     return db_movement
@@ -422,10 +572,20 @@ def update_stock_movement(movement_id: str, update_data: dict, db: Session, tena
     if not db_movement:
         return None
     
+    before = movement_snapshot(db_movement)
     for key, value in update_data.items():
         if hasattr(db_movement, key):
             setattr(db_movement, key, value)
+    if "productId" in update_data:
+        db_movement.product_uuid = resolve_movement_product_uuid(
+            db_movement.productId, db, db_movement.tenant_id
+        )
     
+    try:
+        apply_movement_balances(db, [(before, -1), (db_movement, 1)], update_products=True)
+    except ValueError:
+        db.rollback()
+        raise
     db.commit()
     db.refresh(db_movement)
     return db_movement
@@ -434,6 +594,11 @@ def delete_stock_movement(movement_id: str, db: Session, tenant_id: str = None)
     """Delete a stock movement"""
     movement = get_stock_movement_by_id(movement_id, db, tenant_id)
     if movement:
+        try:
+            apply_movement_balances(db, [(movement, -1)], update_products=True)
+        except ValueError:
+            db.rollback()
+            raise
         db.delete(movement)
         db.commit()
         return True
@@ -441,67 +606,4 @@ def delete_stock_movement(movement_id: str, db: Session, tenant_id: str = None)
 
 # Inventory dashboard functions
 def get_inventory_dashboard_stats(db: Session, tenant_id: str) -> Dict[str, Any]:
-    # Get basic counts
-    total_products = db.query(Product).filter(Product.tenant_id == tenant_id, Product.isActive == True).count()
-    low_stock_products = db.query(Product).filter(
-        Product.tenant_id == tenant_id,
-        Product.isActive == True,
-        Product.stockQuantity <= Product.minStockLevel
-    ).count()
-    out_of_stock_products = db.query(Product).filter(
-        Product.tenant_id == tenant_id,
-        Product.isActive == True,
-        Product.stockQuantity == 0
-    ).count()
-    total_warehouses = db.query(Warehouse).filter(Warehouse.tenant_id == tenant_id, Warehouse.isActive == True).count()
-    total_suppliers = db.query(Supplier).filter(Supplier.tenant_id == tenant_id, Supplier.isActive == True).count()
-    pending_purchase_orders = db.query(PurchaseOrder).filter(
-        PurchaseOrder.tenant_id == tenant_id,
-        PurchaseOrder.status.in_(["draft", "submitted", "approved", "ordered"])
-    ).count()
-    pending_receivings = db.query(Receiving).filter(
-        Receiving.tenant_id == tenant_id,
-        Receiving.status.in_(["pending", "in_progress"])
-    ).count()
-    
-    # Calculate total stock value
-    total_stock_value = db.query(
-        func.sum(Product.stockQuantity * Product.costPerUnitPrice)
-    ).filter(
-        Product.tenant_id == tenant_id,
-        Product.isActive == True
-    ).scalar() or 0.0
-    
-    # Get low stock alerts
-    low_stock_alerts = []
-    low_stock_products_list = db.query(Product).filter(
-        Product.tenant_id == tenant_id,
-        Product.isActive == True,
-        Product.stockQuantity <= Product.minStockLevel
-    ).limit(10).all()
-    
-    for product in low_stock_products_list:
-        alert_type = "out_of_stock" if product.stockQuantity == 0 else "low_stock"
-        message = f"Product {product.name} (SKU: {product.sku}) is running low on stock. Current: {product.stockQuantity}, Minimum: {product.minStockLevel}"
-        
-        low_stock_alerts.append({
-            "productId": str(product.id),
-            "productName": product.name,
-            "sku": product.sku,
-            "currentStock": product.stockQuantity,
-            "minStockLevel": product.minStockLevel,
-            "alertType": alert_type,
-            "message": message
-        })
-    
-    return {
-        "totalProducts": total_products,
-        "lowStockProducts": low_stock_products,
-        "outOfStockProducts": out_of_stock_products,
-        "totalWarehouses": total_warehouses,
-        "totalSuppliers": total_suppliers,
-        "pendingPurchaseOrders": pending_purchase_orders,
-        "pendingReceivings": pending_receivings,
-        "totalStockValue": total_stock_value,
-        "lowStockAlerts": low_stock_alerts
-    }
+    return get_inventory_dashboard(db, tenant_id)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, Text, JSON, ForeignKey, Date, Index
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, Text, JSON, ForeignKey, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from .database_config import Base
@@ -34,12 +34,22 @@ class Product(Base):
     dateOfPurchase = Column(Date)
     modelNo = Column(String)
     isActive = Column(Boolean, default=True)
+    searchDocument = Column(Text, nullable=True)  # set by the products_search_document trigger
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     tenant = relationship("Tenant", back_populates="products")
 
+    __table_args__ = (
+        Index("idx_products_tenant_barcode", "tenant_id", "barcode"),
+        Index(
+            "idx_products_tenant_low_stock",
+            "tenant_id", "stockQuantity",
+            postgresql_where=text('"isActive" AND "stockQuantity" <= "minStockLevel"'),
+        ),
+    )
+
 class Warehouse(Base):
     __tablename__ = "warehouses"
     
@@ -159,6 +169,8 @@ class StockMovement(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     productId = Column(String, nullable=False)
+    # productId as written (UUID or SKU), resolved to the product row
+    product_uuid = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
     warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id"), nullable=False)
     locationId = Column(String, nullable=True)
     movementType = Column(String, nullable=False)  # inbound, outbound, transfer, adjustment, return, damage, expiry, cycle_count, instock
@@ -171,6 +183,10 @@ class StockMovement(Base):
     serialNumber = Column(String, nullable=True)
     expiryDate = Column(DateTime, nullable=True)
     status = Column(String, default="pending")  # pending, in_progress, completed, cancelled, failed
+    # Signed change of stock value booked by this movement under FIFO and
+    # moving-average costing; for an outbound movement -value is its COGS
+    fifoValue = Column(Float, nullable=True)
+    averageValue = Column(Float, nullable=True)
     createdBy = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -179,3 +195,253 @@ class StockMovement(Base):
     tenant = relationship("Tenant", back_populates="stock_movements")
     warehouse = relationship("Warehouse", back_populates="stock_movements")
     creator = relationship("User", back_populates="created_stock_movements")
+    product = relationship("Product")
+
+    __table_args__ = (
+        Index("idx_stock_movements_tenant_product_created", "tenant_id", "product_uuid", "createdAt", "id"),
+        Index("idx_stock_movements_tenant_warehouse_created", "tenant_id", "warehouseId", "createdAt", "id"),
+        Index("idx_stock_movements_tenant_type_created", "tenant_id", "movementType", "createdAt", "id"),
+        Index("idx_stock_movements_tenant_reftype_created", "tenant_id", "referenceType", "createdAt", "id"),
+        Index("idx_stock_movements_tenant_created", "tenant_id", "createdAt", "id"),
+    )
+
+class StockBalance(Base):
+    """On-hand quantity per (product, warehouse, location, batch), maintained with every StockMovement."""
+    __tablename__ = "stock_balances"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False)
+    # Empty string rather than NULL so the natural key stays unique
+    locationId = Column(String, nullable=False, default="")
+    batchNumber = Column(String, nullable=False, default="")
+    expiryDate = Column(DateTime, nullable=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "uq_stock_balances_key",
+            "tenant_id", "productId", "warehouseId", "locationId", "batchNumber",
+            unique=True,
+        ),
+        Index("idx_stock_balances_tenant_warehouse", "tenant_id", "warehouseId"),
+        Index("idx_stock_balances_tenant_expiry", "tenant_id", "expiryDate"),
+    )
+
+class StockCostLayer(Base):
+    """FIFO cost layer: quantity received by one movement at one unit cost, consumed oldest first."""
+    __tablename__ = "stock_cost_layers"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False)
+    movementId = Column(UUID(as_uuid=True), nullable=False)  # receiving movement; no FK, layers outlive edits
+    receivedAt = Column(DateTime, nullable=False)
+    originalQuantity = Column(Integer, nullable=False)
+    remainingQuantity = Column(Integer, nullable=False)
+    unitCost = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "idx_stock_cost_layers_open",
+            "tenant_id", "productId", "warehouseId", "receivedAt", "id",
+            postgresql_where=text('"remainingQuantity" > 0'),
+        ),
+        Index("idx_stock_cost_layers_movement", "movementId"),
+    )
+
+class StockCostConsumption(Base):
+    """Quantity an outbound movement took from a cost layer, kept so the movement can be reversed."""
+    __tablename__ = "stock_cost_consumptions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    movementId = Column(UUID(as_uuid=True), nullable=False)
+    # NULL when stock went negative and the shortfall was costed at the average
+    layerId = Column(UUID(as_uuid=True), ForeignKey("stock_cost_layers.id", ondelete="SET NULL"), nullable=True)
+    quantity = Column(Integer, nullable=False)
+    unitCost = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("idx_stock_cost_consumptions_movement", "movementId"),
+    )
+
+class StockValuation(Base):
+    """Current quantity and value per (product, warehouse) under FIFO and moving-average costing."""
+    __tablename__ = "stock_valuations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+    averageCost = Column(Float, nullable=False, default=0.0)
+    averageValue = Column(Float, nullable=False, default=0.0)
+    fifoValue = Column(Float, nullable=False, default=0.0)
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_stock_valuations_key", "tenant_id", "productId", "warehouseId", unique=True),
+    )
+
+class StockValuationSnapshot(Base):
+    """Closing quantity and value per (product, warehouse) at the end of a day; anchors as-of reports."""
+    __tablename__ = "stock_valuation_snapshots"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False)
+    snapshotDate = Column(Date, nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+    fifoValue = Column(Float, nullable=False, default=0.0)
+    averageValue = Column(Float, nullable=False, default=0.0)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "uq_stock_valuation_snapshots_key",
+            "tenant_id", "snapshotDate", "productId", "warehouseId",
+            unique=True,
+        ),
+    )
+
+class StockReorderAlert(Base):
+    """
+    Low-stock state of one product: opened when a stock change crosses its
+    minimum level, resolved when stock recovers. One row per product, so a
+    product that stays low is alerted once.
+    """
+    __tablename__ = "stock_reorder_alerts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    alertType = Column(String(16), nullable=False, default="low_stock")  # low_stock, out_of_stock
+    status = Column(String(16), nullable=False, default="pending")  # pending, notified, resolved
+    stockQuantity = Column(Integer, nullable=False, default=0)  # stock when the threshold was crossed
+    minStockLevel = Column(Integer, nullable=False, default=0)
+    suggestedQuantity = Column(Integer, nullable=True)
+    purchaseOrderId = Column(UUID(as_uuid=True), ForeignKey("purchase_orders.id", ondelete="SET NULL"), nullable=True)
+    triggeredAt = Column(DateTime, default=datetime.utcnow)
+    notifiedAt = Column(DateTime, nullable=True)
+    resolvedAt = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("uq_stock_reorder_alerts_product", "tenant_id", "productId", unique=True),
+        Index(
+            "idx_stock_reorder_alerts_pending",
+            "tenant_id", "triggeredAt",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+class ProductImportJob(Base):
+    """
+    Bulk catalogue import of one CSV/XLSX file. ``processedRows`` is the
+    checkpoint: it is committed together with each chunk, so a failed or
+    interrupted import resumes exactly where it stopped.
+    """
+    __tablename__ = "product_import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    createdBy = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="SET NULL"), nullable=True)
+    fileName = Column(String, nullable=False)
+    filePath = Column(String, nullable=False)
+    fileFormat = Column(String(8), nullable=False)  # csv, xlsx
+    status = Column(String(16), nullable=False, default="pending")  # pending, running, completed, failed
+    totalRows = Column(Integer, nullable=True)
+    processedRows = Column(Integer, nullable=False, default=0)
+    createdCount = Column(Integer, nullable=False, default=0)
+    updatedCount = Column(Integer, nullable=False, default=0)
+    failedCount = Column(Integer, nullable=False, default=0)
+    movementCount = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, default=list)  # [{"row", "sku", "error"}], capped
+    message = Column(Text, nullable=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finishedAt = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_product_import_jobs_tenant_created", "tenant_id", "createdAt"),
+    )
+
+class StockTake(Base):
+    """
+    Physical count (stock take / cycle count) of one warehouse. Opening it
+    snapshots the expected quantity of every product into its lines; posting
+    books ``counted - expected`` per line as cycle_count movements, so sales
+    and receipts made while counting stay on the books.
+    """
+    __tablename__ = "stock_takes"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id"), nullable=False)
+    reference = Column(String, nullable=False)
+    status = Column(String(16), nullable=False, default="open")  # open, posted, cancelled
+    notes = Column(Text, nullable=True)
+    lineCount = Column(Integer, nullable=False, default=0)
+    countedCount = Column(Integer, nullable=False, default=0)
+    varianceCount = Column(Integer, nullable=False, default=0)
+    varianceValue = Column(Float, nullable=False, default=0.0)
+    uploadBatches = Column(JSON, default=list)  # ids of count uploads already applied
+    createdBy = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    postedBy = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    postedAt = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_stock_takes_tenant_created", "tenant_id", "createdAt"),
+    )
+
+class StockTakeLine(Base):
+    __tablename__ = "stock_take_lines"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    stockTakeId = Column(UUID(as_uuid=True), ForeignKey("stock_takes.id", ondelete="CASCADE"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    expectedQuantity = Column(Integer, nullable=False, default=0)
+    countedQuantity = Column(Integer, nullable=True)  # NULL until counted
+    unitCost = Column(Float, nullable=False, default=0.0)
+    countedBy = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    countedAt = Column(DateTime, nullable=True)
+    movementId = Column(UUID(as_uuid=True), nullable=True)  # variance movement once posted
+
+    __table_args__ = (
+        Index("uq_stock_take_lines_product", "stockTakeId", "productId", unique=True),
+    )
+
+class ProductCode(Base):
+    """
+    Scan code resolution for one tenant: an alternate code of a catalogue
+    product (``productId`` set), or the outcome of an external lookup of an
+    unknown barcode. ``status`` pending rows wait for the enrichment job;
+    not_found rows are retried after ``retryAfter``.
+    """
+    __tablename__ = "product_codes"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    code = Column(String(128), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=True)
+    status = Column(String(16), nullable=False, default="alternate")  # alternate, pending, found, not_found
+    source = Column(String(32), nullable=True)  # external database that answered
+    suggested = Column(JSON, nullable=True)  # product fields from the external lookup
+    attempts = Column(Integer, nullable=False, default=0)
+    retryAfter = Column(DateTime, nullable=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_product_codes_tenant_code", "tenant_id", "code", unique=True),
+        Index("idx_product_codes_product", "productId", postgresql_where=text('"productId" IS NOT NULL')),
+        Index("idx_product_codes_pending", "tenant_id", "createdAt", postgresql_where=text("status = 'pending'")),
+    )
@@ -3,6 +3,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from .job_card_models import JobCard
+from ..services.document_sequences import next_document_number, JOB_CARD
 
 
 def get_job_card_by_id(job_card_id: str, db: Session, tenant_id: str = None) -> Optional[JobCard]:
@@ -29,27 +30,12 @@ def get_all_job_cards(
 
 
 def get_next_job_card_number(db: Session, tenant_id: str) -> str:
-    """Generate the next job card number.
+    """Allocate the next job card number.
 
-    Format: JC-YYYYMMDD-{sequence} where {sequence} continues globally across
-    all job cards (not reset per day), so existing cards keep their numbers.
+    Format: JC-YYYYMMDD-{sequence} where {sequence} continues across all job
+    cards of the tenant (not reset per day), so existing cards keep their numbers.
     """
-    numbers = (
-        db.query(JobCard.job_card_number)
-        .filter(JobCard.tenant_id == tenant_id, JobCard.is_active == True)
-        .all()
-    )
-    max_number = 0
-    for (card_number,) in numbers:
-        try:
-            parsed = int(str(card_number).split("-")[-1])
-            if parsed > max_number:
-                max_number = parsed
-        except (ValueError, IndexError):
-            continue
-    next_number = max_number + 1
-    date_part = datetime.utcnow().strftime("%Y%m%d")
-    return f"JC-{date_part}-{next_number:03d}"
+    return next_document_number(db, tenant_id, JOB_CARD)
 
 
 def create_job_card(job_card_data: dict, db: Session, tenant_id: str = None) -> JobCard:
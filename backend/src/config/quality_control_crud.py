@@ -10,14 +10,15 @@ from .quality_control_models import (
     QualityStatus, QualityPriority, InspectionType, DefectSeverity, QualityStandard
 )
 
+from ..services.document_sequences import next_document_number, QUALITY_CHECK
+
 logger = logging.getLogger(__name__)
 
 # Quality Check CRUD operations
 def create_quality_check(db: Session, check_data: Dict[str, Any], tenant_id: str, created_by_id: str) -> QualityCheck:
     """Create a new quality check"""
     try:
-        # Generate check number
-        check_number = f"QC-{datetime.utcnow().strftime('%Y%m')}-{uuid.uuid4().hex[:8].upper()}"
+        check_number = get_next_quality_check_number(db, tenant_id)
         
         check = QualityCheck(
             tenant_id=tenant_id,
@@ -155,31 +156,8 @@ def delete_quality_check(db: Session, check_id: str, tenant_id: str) -> bool:
         return False
 
 def get_next_quality_check_number(db: Session, tenant_id: str) -> str:
-    """Get next quality check number"""
-    try:
-        current_month = datetime.utcnow().strftime('%Y%m')
-        prefix = f"QC-{current_month}-"
-        
-        # Get the highest number for current month
-        last_check = db.query(QualityCheck).filter(
-            and_(
-                QualityCheck.tenant_id == tenant_id,
-                QualityCheck.check_number.like(f"{prefix}%")
-            )
-        ).order_by(desc(QualityCheck.check_number)).first()
-        
-        if last_check:
-            # Extract the numeric part and increment
-            last_number = int(last_check.check_number.split('-')[-1], 16)
-            next_number = f"{prefix}{format(last_number + 1, '08x').upper()}"
-        else:
-            next_number = f"{prefix}{format(1, '08x').upper()}"
-            
-        return next_number
-        
-    except Exception as e:
-        logger.error(f"Error generating quality check number: {str(e)}")
-        return f"QC-{datetime.utcnow().strftime('%Y%m')}-{uuid.uuid4().hex[:8].upper()}"
+    """Allocate the next quality check number in the caller's transaction"""
+    return next_document_number(db, tenant_id, QUALITY_CHECK)
 
 # Quality Inspection CRUD operations
 def create_quality_inspection(db: Session, inspection_data: Dict[str, Any], tenant_id: str) -> QualityInspection:
@@ -1,5 +1,7 @@
 import time
 import json
+import threading
+from collections import OrderedDict
 from typing import Any, Optional, Dict
 from functools import wraps
 import logging
@@ -42,6 +44,45 @@ class SimpleCache:
             'keys': list(self.cache.keys())
         }
 
+class LRUCache:
+    """Bounded, thread-safe TTL cache that drops the least recently used entry when full."""
+
+    def __init__(self, maxsize: int = 1024, default_ttl: int = 300):
+        self.cache: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() > entry['expires_at']:
+                del self.cache[key]
+                return None
+            self.cache.move_to_end(key)
+            return entry['value']
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl or self.default_ttl
+        with self._lock:
+            self.cache[key] = {'value': value, 'expires_at': time.monotonic() + ttl}
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self.cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'size': len(self.cache), 'maxsize': self.maxsize}
+
 cache = SimpleCache(default_ttl=300)
 
 def cached(ttl: int = 300, key_prefix: str = ""):
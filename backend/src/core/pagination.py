@@ -0,0 +1,45 @@
+"""
+Keyset (seek) pagination helpers
+
+A cursor encodes the sort key of the last row of a page, ``(created_at, id)``,
+so the next page is read with ``WHERE (created_at, id) < (:ts, :id)`` from an
+index instead of skipping ``offset`` rows. The row-value comparison matters:
+Postgres turns it into an index range bound, while the equivalent
+``a < x OR (a = x AND b < y)`` is only applied as a filter while walking the
+index from the top, so deep pages would still slow down linearly.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import literal, tuple_
+
+
+def encode_keyset_cursor(created_at: datetime, row_id: Any) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raise ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_before(created_col, id_col, cursor: Optional[str]):
+    """Filter for rows after ``cursor`` in ``ORDER BY created DESC, id DESC``; None for the first page."""
+    if not cursor:
+        return None
+    created_at, row_id = decode_keyset_cursor(cursor)
+    if getattr(id_col.type, "as_uuid", False):
+        try:
+            row_id = uuid.UUID(row_id)
+        except ValueError as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+    return tuple_(created_col, id_col) < tuple_(literal(created_at, created_col.type), literal(row_id, id_col.type))
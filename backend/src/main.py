@@ -11,7 +11,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from .config.database import create_tables, get_plans, get_db
-from .api.v1 import auth, users, tenants, plans, sales, crm, hrm, healthcare, ngo, custom_options, invoices, invoice_customization, installments, delivery_notes, pos, inventory, subscriptions, job_cards, vehicles, quality_control, ledger, admin, file_upload, deduct_stock, customer_import, dashboard, investments, reports, notifications, events, profile, workshop, mot, agent_portal
+from .api.v1 import auth, users, tenants, plans, sales, crm, hrm, healthcare, ngo, custom_options, invoices, invoice_customization, installments, delivery_notes, pos, inventory, subscriptions, job_cards, vehicles, quality_control, ledger, admin, file_upload, deduct_stock, customer_import, dashboard, investments, reports, notifications, events, profile, workshop, mot, agent_portal, exports
 from .api.v1.rbac.router import router as rbac_router
 from .api.v1.projects.router import router as projects_router
 from .api.v1.tasks.router import router as tasks_router
@@ -37,6 +37,16 @@ async def on_startup():
     logging.info("📊 Monitoring system enabled")
     logging.info("📝 Audit logging enabled")
 
+    from .services import pdf_rendering
+
+    pdf_rendering.warm_up()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    from .services import pdf_rendering
+
+    pdf_rendering.shutdown()
+
 # Tenant middleware
 @app.middleware("http")
 async def tenant_middleware_func(request: Request, call_next):
@@ -203,6 +213,7 @@ app.include_router(ledger.router)
 app.include_router(banking_router)
 app.include_router(investments.router)
 app.include_router(reports.router)
+app.include_router(exports.router)
 app.include_router(admin.router)
 app.include_router(file_upload.router)
 app.include_router(notifications.router)
@@ -260,7 +271,11 @@ async def simple_health_check():
 @app.get("/metrics")
 async def get_metrics():
     """Get system metrics and performance data"""
-    return await system_monitor.get_performance_summary()
+    from .services import pdf_rendering
+
+    summary = await system_monitor.get_performance_summary()
+    summary["pdf_rendering"] = pdf_rendering.stats()
+    return summary
 
 @app.get("/metrics/history")
 async def get_metrics_history(hours: int = 24):
@@ -307,7 +322,7 @@ async def get_public_plans():
 
 
 @app.get("/public/i/{code}")
-async def public_invoice_pdf_short(
+def public_invoice_pdf_short(
     code: str,
     db: Session = Depends(get_db),
 ):
@@ -321,7 +336,7 @@ async def public_invoice_pdf_short(
 
 
 @app.get("/public/invoices/{invoice_id}/pdf")
-async def public_invoice_pdf(
+def public_invoice_pdf(
     invoice_id: str,
     token: str,
     db: Session = Depends(get_db),
@@ -16,6 +16,8 @@ from .transaction import BankTransaction
 from .cash_position import CashPosition
 from .till import Till
 from .till_transaction import TillTransaction
+from .statement import BankStatementImport, BankStatementLine
+from .daily_cash_balance import DailyCashBalance, CashRollupState
 
 __all__ = [
     "BankAccount",
@@ -23,6 +25,10 @@ __all__ = [
     "CashPosition",
     "Till",
     "TillTransaction",
+    "BankStatementImport",
+    "BankStatementLine",
+    "DailyCashBalance",
+    "CashRollupState",
     "TransactionType",
     "TransactionStatus",
     "PaymentMethod",
@@ -23,6 +23,7 @@ class BankAccount(Base):
     account_type = Column(String(32), nullable=False, default=BankAccountType.CHECKING.value)
     currency = Column(String, default="USD")
 
+    opening_balance = Column(Float, default=0.0)
     current_balance = Column(Float, default=0.0)
     available_balance = Column(Float, default=0.0)
     pending_balance = Column(Float, default=0.0)
@@ -0,0 +1,50 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Float, Date, DateTime, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class DailyCashBalance(Base):
+    """Per-day cash rollup of one bank account or till, derived from its transactions."""
+
+    __tablename__ = "daily_cash_balances"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    source_type = Column(String(16), nullable=False)  # bank | till
+    source_id = Column(UUID(as_uuid=True), nullable=False)
+    position_date = Column(Date, nullable=False)
+
+    opening_balance = Column(Float, nullable=False, default=0.0)
+    inflow = Column(Float, nullable=False, default=0.0)
+    outflow = Column(Float, nullable=False, default=0.0)
+    closing_balance = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "uq_daily_cash_balances_source_date",
+            "tenant_id", "source_type", "source_id", "position_date",
+            unique=True,
+        ),
+        Index("idx_daily_cash_balances_tenant_date", "tenant_id", "position_date"),
+    )
+
+
+class CashRollupState(Base):
+    """High-water mark and pending re-flow point of the daily cash rollup per source."""
+
+    __tablename__ = "cash_rollup_state"
+
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    source_type = Column(String(16), primary_key=True)
+    source_id = Column(UUID(as_uuid=True), primary_key=True)
+
+    high_water_mark = Column(DateTime, nullable=True)
+    dirty_from = Column(Date, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
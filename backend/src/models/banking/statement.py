@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Float, DateTime, Integer, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class BankStatementImport(Base):
+    __tablename__ = "bank_statement_imports"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    bank_account_id = Column(UUID(as_uuid=True), ForeignKey("bank_accounts.id"), nullable=False)
+
+    file_name = Column(String, nullable=True)
+    file_format = Column(String(16), nullable=False)
+    period_start = Column(DateTime, nullable=True)
+    period_end = Column(DateTime, nullable=True)
+
+    total_lines = Column(Integer, default=0)
+    matched_count = Column(Integer, default=0)
+    review_count = Column(Integer, default=0)
+    unmatched_count = Column(Integer, default=0)
+
+    imported_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    lines = relationship("BankStatementLine", back_populates="statement_import", cascade="all, delete-orphan")
+    bank_account = relationship("BankAccount")
+
+    __table_args__ = (
+        Index("idx_bank_statement_imports_tenant_account", "tenant_id", "bank_account_id"),
+    )
+
+
+class BankStatementLine(Base):
+    __tablename__ = "bank_statement_lines"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    import_id = Column(UUID(as_uuid=True), ForeignKey("bank_statement_imports.id", ondelete="CASCADE"), nullable=False)
+    bank_account_id = Column(UUID(as_uuid=True), ForeignKey("bank_accounts.id"), nullable=False)
+
+    line_number = Column(Integer, nullable=False)
+    transaction_date = Column(DateTime, nullable=False)
+    amount = Column(Float, nullable=False)
+    reference = Column(String, nullable=True)
+    payee = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    external_id = Column(String, nullable=True)
+
+    # matched (auto or confirmed), review (suggestion pending), unmatched, ignored
+    status = Column(String(16), nullable=False, default="unmatched")
+    match_score = Column(Float, nullable=True)
+    matched_transaction_id = Column(UUID(as_uuid=True), ForeignKey("bank_transactions.id", ondelete="SET NULL"), nullable=True)
+    resolved_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    resolved_at = Column(DateTime, nullable=True)
+
+    statement_import = relationship("BankStatementImport", back_populates="lines")
+    matched_transaction = relationship("BankTransaction")
+
+    __table_args__ = (
+        Index("idx_bank_statement_lines_import_status", "import_id", "status"),
+        Index("idx_bank_statement_lines_tenant_account_status", "tenant_id", "bank_account_id", "status"),
+    )
@@ -45,6 +45,8 @@ class TillTransaction(Base):
     __table_args__ = (
         Index("idx_till_transactions_tenant", "tenant_id"),
         Index("idx_till_transactions_till", "till_id"),
+        Index("idx_till_transactions_till_order", "till_id", "transaction_date", "created_at"),
+        Index("idx_till_transactions_tenant_updated", "tenant_id", "updated_at"),
         Index("idx_till_transactions_date", "transaction_date"),
         Index("idx_till_transactions_type", "transaction_type"),
     )
@@ -71,6 +71,8 @@ class BankTransaction(Base):
     __table_args__ = (
         Index("idx_bank_transactions_tenant", "tenant_id"),
         Index("idx_bank_transactions_account", "bank_account_id"),
+        Index("idx_bank_transactions_account_order", "bank_account_id", "transaction_date", "created_at"),
+        Index("idx_bank_transactions_tenant_updated", "tenant_id", "updated_at"),
         Index("idx_bank_transactions_date", "transaction_date"),
         Index("idx_bank_transactions_type", "transaction_type"),
         Index("idx_bank_transactions_status", "status"),
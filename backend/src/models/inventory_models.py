@@ -1,6 +1,6 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from .common import Pagination
 
@@ -314,6 +314,8 @@ class StockMovement(StockMovementBase):
     status: StockMovementStatus
     createdAt: datetime
     updatedAt: datetime
+    fifoValue: Optional[float] = None  # signed stock value change; -fifoValue is the COGS of an issue
+    averageValue: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -325,6 +327,8 @@ class StockMovementWithProduct(StockMovementBase):
     status: StockMovementStatus
     createdAt: datetime
     updatedAt: datetime
+    fifoValue: Optional[float] = None
+    averageValue: Optional[float] = None
     productName: Optional[str] = None
     productSku: Optional[str] = None
     productCategory: Optional[str] = None
@@ -332,6 +336,19 @@ class StockMovementWithProduct(StockMovementBase):
     class Config:
         from_attributes = True
 
+class StockBalance(BaseModel):
+    id: str
+    productId: str
+    productName: Optional[str] = None
+    productSku: Optional[str] = None
+    warehouseId: str
+    warehouseName: Optional[str] = None
+    locationId: Optional[str] = None
+    batchNumber: Optional[str] = None
+    expiryDate: Optional[datetime] = None
+    quantity: int
+    updatedAt: Optional[datetime] = None
+
 class PurchaseOrderBase(BaseModel):
     orderNumber: str
     batchNumber: Optional[str] = None
@@ -506,10 +523,152 @@ class StockMovementResponse(BaseModel):
 class StockMovementsResponse(BaseModel):
     stockMovements: List[StockMovement]
     total: int
+    nextCursor: Optional[str] = None
 
 class StockMovementsWithProductResponse(BaseModel):
     stockMovements: List[StockMovementWithProduct]
     total: int
+    nextCursor: Optional[str] = None
+
+class StockValuationLine(BaseModel):
+    productId: str
+    productName: Optional[str] = None
+    productSku: Optional[str] = None
+    warehouseId: str
+    warehouseName: Optional[str] = None
+    quantity: int
+    averageCost: Optional[float] = None
+    averageValue: float
+    fifoValue: float
+    updatedAt: Optional[datetime] = None
+
+class StockBalancesResponse(BaseModel):
+    stockBalances: List[StockBalance]
+    total: int
+
+class StockBalanceDriftResponse(BaseModel):
+    balanceDrift: List[Dict[str, Any]]
+    productDrift: List[Dict[str, Any]]
+
+class StockValuationResponse(BaseModel):
+    items: List[StockValuationLine]
+    total: int
+    totalFifoValue: float
+    totalAverageValue: float
+
+class StockValuationAsOfResponse(BaseModel):
+    asOf: date
+    items: List[StockValuationLine]
+    totalFifoValue: float
+    totalAverageValue: float
+
+class ReorderAlert(BaseModel):
+    id: str
+    productId: str
+    productName: str
+    sku: Optional[str] = None
+    supplierId: Optional[str] = None
+    alertType: str
+    status: str
+    currentStock: Optional[int] = None
+    minStockLevel: Optional[int] = None
+    maxStockLevel: Optional[int] = None
+    suggestedQuantity: Optional[int] = None
+    purchaseOrderId: Optional[str] = None
+    triggeredAt: Optional[datetime] = None
+    notifiedAt: Optional[datetime] = None
+    resolvedAt: Optional[datetime] = None
+
+class ReorderAlertsResponse(BaseModel):
+    alerts: List[ReorderAlert]
+    total: int
+
+class ProductImportRowError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportJobResponse(BaseModel):
+    id: str
+    fileName: str
+    status: str
+    totalRows: Optional[int] = None
+    processedRows: int
+    progress: float
+    createdCount: int
+    updatedCount: int
+    failedCount: int
+    movementCount: int
+    warehouseId: Optional[str] = None
+    message: Optional[str] = None
+    errors: Optional[List[ProductImportRowError]] = None
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+
+class ProductImportJobsResponse(BaseModel):
+    jobs: List[ProductImportJobResponse]
+    total: int
+
+class StockTakeCreate(BaseModel):
+    warehouseId: str
+    notes: Optional[str] = None
+    category: Optional[str] = None
+    productIds: Optional[List[str]] = None
+
+class StockTakeCount(BaseModel):
+    productId: Optional[str] = None
+    sku: Optional[str] = None
+    barcode: Optional[str] = None
+    quantity: int = Field(..., ge=0)
+    countedAt: Optional[datetime] = None
+
+class StockTakeCountsUpload(BaseModel):
+    counts: List[StockTakeCount]
+    mode: str = "set"  # set, add
+    batchId: Optional[str] = None
+
+class StockTakeCountResult(BaseModel):
+    applied: int
+    unknown: List[str]
+    duplicateBatch: bool
+
+class StockTakeResponse(BaseModel):
+    id: str
+    reference: str
+    warehouseId: str
+    status: str
+    notes: Optional[str] = None
+    lineCount: int
+    countedCount: int
+    varianceCount: int
+    varianceValue: float
+    createdBy: str
+    postedBy: Optional[str] = None
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    postedAt: Optional[datetime] = None
+
+class StockTakesResponse(BaseModel):
+    stockTakes: List[StockTakeResponse]
+    total: int
+
+class StockTakeLineResponse(BaseModel):
+    id: str
+    productId: str
+    productName: str
+    sku: Optional[str] = None
+    barcode: Optional[str] = None
+    expectedQuantity: int
+    countedQuantity: Optional[int] = None
+    variance: Optional[int] = None
+    varianceValue: Optional[float] = None
+    countedAt: Optional[datetime] = None
+    movementId: Optional[str] = None
+
+class StockTakeLinesResponse(BaseModel):
+    lines: List[StockTakeLineResponse]
+    total: int
 
 class PurchaseOrderResponse(BaseModel):
     purchaseOrder: PurchaseOrder
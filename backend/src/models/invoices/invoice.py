@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Float, Text, ForeignKey, JSON, Index
+from sqlalchemy import Column, String, DateTime, Float, Text, ForeignKey, JSON, Index, BigInteger, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from ...config.database_config import Base
@@ -41,6 +41,7 @@ class Invoice(Base):
     status = Column(String, default="draft")
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow)
+    changeTxid = Column(BigInteger, nullable=False, server_default=text("0"))  # set by the change_feed_touch trigger
     paidAt = Column(DateTime, nullable=True)
     sentAt = Column(DateTime, nullable=True)
     totalPaid = Column(Float, default=0.0)
@@ -60,4 +61,5 @@ class Invoice(Base):
         Index("idx_invoices_customer_id", "customerId"),
         Index("idx_invoices_tenant_status", "tenant_id", "status"),
         Index("idx_invoices_tenant_due_date", "tenant_id", "dueDate"),
+        Index("idx_invoices_change_feed", "tenant_id", "changeTxid", "id"),
     )
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Float, Text, ForeignKey, Index, BigInteger, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from ...config.database_config import Base
@@ -20,5 +20,10 @@ class Payment(Base):
     status = Column(String, default="pending")
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow)
+    changeTxid = Column(BigInteger, nullable=False, server_default=text("0"))  # set by the change_feed_touch trigger
     invoice = relationship("Invoice", back_populates="payments")
     tenant = relationship("Tenant", back_populates="payments")
+
+    __table_args__ = (
+        Index("idx_payments_change_feed", "tenant_id", "changeTxid", "id"),
+    )
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 from .shift import POSShift
+from .shift_report import POSShiftReport
 from .transaction import POSTransaction
+from .transaction_line import POSTransactionLine
 from .category import PosProductCategory
+from .sales_rollup import POSSalesRollup
+from .pricing import POSPriceList, POSPriceListItem, POSPromotion
+from .receipt_template import POSReceiptTemplate
 from .enums import POSPaymentMethod, POSTransactionStatus, POSShiftStatus
 
 __all__ = [
     "POSShift",
+    "POSShiftReport",
     "POSTransaction",
+    "POSTransactionLine",
     "PosProductCategory",
+    "POSSalesRollup",
+    "POSPriceList",
+    "POSPriceListItem",
+    "POSPromotion",
+    "POSReceiptTemplate",
     "POSPaymentMethod",
     "POSTransactionStatus",
     "POSShiftStatus",
@@ -0,0 +1,95 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Float, Integer, Boolean, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class POSPriceList(Base):
+    """
+    Prices that replace ``Product.salePrice`` at the till, optionally only
+    in one store (warehouse), for one customer group or within a date range.
+    When several lists price a product the highest priority wins.
+    """
+
+    __tablename__ = "pos_price_lists"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    name = Column(String, nullable=False)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=True)
+    customerGroup = Column(String(64), nullable=True)
+    priority = Column(Integer, nullable=False, default=0)
+    startsAt = Column(DateTime, nullable=True)
+    endsAt = Column(DateTime, nullable=True)
+    isActive = Column(Boolean, nullable=False, default=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    # Also bumped when the list's items change, so pricing caches notice
+    updatedAt = Column(DateTime, default=datetime.utcnow)
+
+    items = relationship("POSPriceListItem", back_populates="priceList", passive_deletes=True)
+
+    __table_args__ = (
+        Index("idx_pos_price_lists_tenant_active", "tenant_id", "isActive"),
+    )
+
+
+class POSPriceListItem(Base):
+    __tablename__ = "pos_price_list_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    priceListId = Column(UUID(as_uuid=True), ForeignKey("pos_price_lists.id", ondelete="CASCADE"), nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    price = Column(Float, nullable=False)
+    # Tiered pricing: the entry applies from this quantity on the line
+    minQuantity = Column(Integer, nullable=False, default=1)
+
+    priceList = relationship("POSPriceList", back_populates="items")
+
+    __table_args__ = (
+        Index("uq_pos_price_list_items_entry", "priceListId", "productId", "minQuantity", unique=True),
+        Index("idx_pos_price_list_items_product", "productId"),
+    )
+
+
+class POSPromotion(Base):
+    """
+    A discount applied to matching basket lines.
+
+    kind is percent_off (value %), amount_off (value per unit), fixed_price
+    (unit price becomes value) or buy_x_get_y (of every buyQuantity +
+    getQuantity units, getQuantity are value % off, 100 when value is 0).
+    A promotion targets productIds and/or categories, or every product when
+    both are empty. Per line the best non-stackable promotion applies,
+    plus every stackable one.
+    """
+
+    __tablename__ = "pos_promotions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    name = Column(String, nullable=False)
+    kind = Column(String(16), nullable=False)
+    value = Column(Float, nullable=False, default=0.0)
+    buyQuantity = Column(Integer, nullable=True)
+    getQuantity = Column(Integer, nullable=True)
+    minQuantity = Column(Integer, nullable=False, default=1)
+    productIds = Column(JSON, nullable=False, default=list)
+    categories = Column(JSON, nullable=False, default=list)
+    warehouseId = Column(UUID(as_uuid=True), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=True)
+    customerGroup = Column(String(64), nullable=True)
+    priority = Column(Integer, nullable=False, default=0)
+    stackable = Column(Boolean, nullable=False, default=False)
+    startsAt = Column(DateTime, nullable=True)
+    endsAt = Column(DateTime, nullable=True)
+    isActive = Column(Boolean, nullable=False, default=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    updatedAt = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_pos_promotions_tenant_active", "tenant_id", "isActive"),
+    )
@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, Text, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class POSReceiptTemplate(Base):
+    """
+    Layout of a tenant's till receipts. One template renders as plain text,
+    ESC/POS or PDF on 58 or 80 mm paper; header and footer are lines of
+    text with {placeholders}. version is bumped on every change, which is
+    what compiled templates are cached by.
+    """
+
+    __tablename__ = "pos_receipt_templates"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    name = Column(String, nullable=False)
+    paperWidth = Column(Integer, nullable=False, default=80)  # mm: 58 or 80
+    header = Column(Text, nullable=True)
+    footer = Column(Text, nullable=True)
+    currency = Column(String(8), nullable=True)  # tenant's invoice currency when empty
+    showSku = Column(Boolean, nullable=False, default=False)
+    showSavings = Column(Boolean, nullable=False, default=True)
+    isDefault = Column(Boolean, nullable=False, default=False)
+    version = Column(Integer, nullable=False, default=1)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    updatedAt = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_pos_receipt_templates_tenant", "tenant_id"),
+        Index(
+            "uq_pos_receipt_templates_default",
+            "tenant_id",
+            unique=True,
+            postgresql_where=text('"isDefault"'),
+        ),
+    )
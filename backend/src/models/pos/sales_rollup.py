@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class POSSalesRollup(Base):
+    """
+    POS sales per hour or day and (shift, cashier, payment method), kept in
+    step with pos_transactions in the same database transaction as the sale,
+    void or refund. Money columns are exact decimals so increments and
+    reversals never drift.
+    """
+
+    __tablename__ = "pos_sales_rollups"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    grain = Column(String(8), nullable=False)  # hour | day
+    bucketStart = Column(DateTime, nullable=False)
+    shiftId = Column(UUID(as_uuid=True), ForeignKey("pos_shifts.id", ondelete="CASCADE"), nullable=False)
+    cashierId = Column(UUID(as_uuid=True), nullable=False)
+    paymentMethod = Column(String, nullable=False)
+
+    transactionCount = Column(Integer, nullable=False, default=0)
+    salesTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    discountTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    taxTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    refundCount = Column(Integer, nullable=False, default=0)
+    refundTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    voidCount = Column(Integer, nullable=False, default=0)
+    voidTotal = Column(Numeric(14, 2), nullable=False, default=0)
+
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "uq_pos_sales_rollups_bucket",
+            "tenant_id", "grain", "bucketStart", "shiftId", "cashierId", "paymentMethod",
+            unique=True,
+        ),
+        Index("idx_pos_sales_rollups_tenant_shift", "tenant_id", "shiftId"),
+    )
@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class POSShiftReport(Base):
+    """
+    Z-report of a closed shift, computed from its transactions when it was
+    closed and never changed afterwards. Later voids or refunds show up in
+    the sales reports, not here.
+    """
+
+    __tablename__ = "pos_shift_reports"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    shiftId = Column(UUID(as_uuid=True), ForeignKey("pos_shifts.id", ondelete="CASCADE"), nullable=False)
+    shiftNumber = Column(String, nullable=True)
+    cashierId = Column(UUID(as_uuid=True), nullable=False)
+    openedAt = Column(DateTime, nullable=False)
+    closedAt = Column(DateTime, nullable=False)
+
+    transactionCount = Column(Integer, nullable=False, default=0)
+    salesTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    discountTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    taxTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    refundCount = Column(Integer, nullable=False, default=0)
+    refundTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    voidCount = Column(Integer, nullable=False, default=0)
+    voidTotal = Column(Numeric(14, 2), nullable=False, default=0)
+
+    openingCash = Column(Numeric(14, 2), nullable=False, default=0)
+    expectedCash = Column(Numeric(14, 2), nullable=False, default=0)
+    countedCash = Column(Numeric(14, 2), nullable=True)
+    cashDifference = Column(Numeric(14, 2), nullable=True)  # counted - expected
+    # {payment method: {transactionCount, salesTotal, ...}}
+    paymentMethods = Column(JSON, nullable=False, default=dict)
+
+    createdAt = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_pos_shift_reports_shift", "shiftId", unique=True),
+        Index("idx_pos_shift_reports_tenant_closed", "tenant_id", "closedAt"),
+    )
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, DateTime, Float, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Float, Text, ForeignKey, JSON, Index, BigInteger, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -10,6 +10,18 @@ from ...config.database_config import Base
 
 class POSTransaction(Base):
     __tablename__ = "pos_transactions"
+    __table_args__ = (
+        Index("idx_pos_transactions_tenant_created", "tenant_id", "createdAt", "id"),
+        Index("idx_pos_transactions_tenant_shift", "tenant_id", "shiftId"),
+        Index("idx_pos_transactions_tenant_payment_created", "tenant_id", "paymentMethod", "createdAt"),
+        Index("idx_pos_transactions_change_feed", "tenant_id", "changeTxid", "id"),
+        Index(
+            "uq_pos_transactions_client_reference",
+            "tenant_id", "clientReference",
+            unique=True,
+            postgresql_where=text('"clientReference" IS NOT NULL'),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     transactionNumber = Column(String, unique=True, index=True)
@@ -25,8 +37,19 @@ class POSTransaction(Base):
     paymentMethod = Column(String, nullable=False)
     paymentStatus = Column(String, default="completed")
     notes = Column(Text, nullable=True)
+    # Price lists and promotions the pricing engine applied, one entry per line and rule
+    appliedPromotions = Column(JSON, nullable=True)
+    # Idempotency key chosen by the till, so a replayed or retried sale is not booked twice
+    clientReference = Column(String(64), nullable=True)
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow)
+    changeTxid = Column(BigInteger, nullable=False, server_default=text("0"))  # set by the change_feed_touch trigger
 
     shift = relationship("POSShift", back_populates="transactions")
+    lines = relationship(
+        "POSTransactionLine",
+        back_populates="transaction",
+        order_by="POSTransactionLine.lineNumber",
+        passive_deletes=True,
+    )
     tenant = relationship("Tenant", back_populates="pos_transactions")
@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Float, Integer, Numeric, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID
+
+from ...config.database_config import Base
+
+
+class POSTransactionLine(Base):
+    """
+    One item of a POS sale. ``items`` on the transaction stays the receipt
+    snapshot; these rows carry the same lines for per-product queries, with
+    the cost per unit the sale consumed.
+    """
+
+    __tablename__ = "pos_transaction_lines"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    transactionId = Column(
+        UUID(as_uuid=True), ForeignKey("pos_transactions.id", ondelete="CASCADE"), nullable=False
+    )
+    lineNumber = Column(Integer, nullable=False)
+    productId = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
+    productName = Column(String, nullable=True)
+    sku = Column(String, nullable=True)
+    quantity = Column(Integer, nullable=False)
+    unitPrice = Column(Numeric(14, 2), nullable=False, default=0)
+    discount = Column(Numeric(14, 2), nullable=False, default=0)
+    taxRate = Column(Float, nullable=False, default=0.0)
+    lineTotal = Column(Numeric(14, 2), nullable=False, default=0)
+    unitCost = Column(Numeric(14, 4), nullable=True)
+    # Copy of the transaction's createdAt, so date ranges need no join
+    createdAt = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    transaction = relationship("POSTransaction", back_populates="lines")
+
+    __table_args__ = (
+        Index("uq_pos_transaction_lines_line", "transactionId", "lineNumber", unique=True),
+        Index("idx_pos_transaction_lines_tenant_product_created", "tenant_id", "productId", "createdAt"),
+        Index("idx_pos_transaction_lines_tenant_created", "tenant_id", "createdAt"),
+    )
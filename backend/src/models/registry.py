@@ -50,6 +50,16 @@ def register_all_models():
         Receiving,
         StorageLocation,
         StockMovement,
+        StockBalance,
+        StockCostLayer,
+        StockCostConsumption,
+        StockValuation,
+        StockValuationSnapshot,
+        StockReorderAlert,
+        ProductImportJob,
+        StockTake,
+        StockTakeLine,
+        ProductCode,
     )
     from ..config.job_card_models import JobCard
     from ..config.vehicle_models import Vehicle
@@ -65,9 +75,20 @@ def register_all_models():
         BudgetItem,
         AccountReceivable,
     )
-    from ..models.banking import BankAccount, BankTransaction, CashPosition, Till, TillTransaction
+    from ..models.banking import (
+        BankAccount,
+        BankTransaction,
+        CashPosition,
+        Till,
+        TillTransaction,
+        BankStatementImport,
+        BankStatementLine,
+        DailyCashBalance,
+        CashRollupState,
+    )
     from ..config.investment_models import Investment, EquipmentInvestment, InvestmentTransaction
-    from ..models.pos import POSShift, POSTransaction, PosProductCategory
+    from ..models.pos import POSShift, POSShiftReport, POSTransaction, POSTransactionLine, PosProductCategory, POSSalesRollup
+    from ..models.pos import POSPriceList, POSPriceListItem, POSPromotion, POSReceiptTemplate
     from ..config.custom_options_models import (
         CustomEventType,
         CustomDepartment,
@@ -81,6 +102,8 @@ def register_all_models():
     from ..config.audit_models import AuditLog, Permission, CustomRole
     from ..config.event_models import Event
     from ..config.saved_reports_models import SavedReport
+    from ..config.document_sequence_models import DocumentSequence
+    from ..config.change_feed_models import ChangeFeedTombstone
     from ..config.quality_control_models import (
         QualityCheck,
         QualityInspection,
@@ -144,6 +167,16 @@ def register_all_models():
         Receiving,
         StorageLocation,
         StockMovement,
+        StockBalance,
+        StockCostLayer,
+        StockCostConsumption,
+        StockValuation,
+        StockValuationSnapshot,
+        StockReorderAlert,
+        ProductImportJob,
+        StockTake,
+        StockTakeLine,
+        ProductCode,
         JobCard,
         Vehicle,
         Invoice,
@@ -165,12 +198,23 @@ def register_all_models():
         CashPosition,
         Till,
         TillTransaction,
+        BankStatementImport,
+        BankStatementLine,
+        DailyCashBalance,
+        CashRollupState,
         Investment,
         EquipmentInvestment,
         InvestmentTransaction,
         POSShift,
+        POSShiftReport,
         POSTransaction,
+        POSTransactionLine,
         PosProductCategory,
+        POSSalesRollup,
+        POSPriceList,
+        POSPriceListItem,
+        POSPromotion,
+        POSReceiptTemplate,
         CustomEventType,
         CustomDepartment,
         CustomLeaveType,
@@ -184,6 +228,8 @@ def register_all_models():
         CustomRole,
         Event,
         SavedReport,
+        DocumentSequence,
+        ChangeFeedTombstone,
         QualityCheck,
         QualityInspection,
         QualityDefect,
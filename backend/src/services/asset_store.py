@@ -0,0 +1,155 @@
+"""
+Local store for images drawn into generated documents
+
+A company logo lives on S3 (or, for old tenants, under /static/). Instead of
+fetching and resizing it for every PDF, get_image() fetches a source once,
+shrinks it to the box it is drawn in and writes it as PNG under
+ASSET_CACHE_DIR, named by the SHA-256 of the resized bytes, so identical
+logos share one file. A small index file per (source, box) records which
+asset it resolved to, so a restarted worker reuses it without fetching.
+
+Sources that cannot be fetched are remembered for FAILURE_TTL_SECONDS so a
+broken logo URL does not cost a ten-second timeout per document. A source
+that may change under the same URL is resolved with a ``version`` (the
+invoice customization's id and updated_at for company logos), so a saved
+customization is fetched afresh by every worker, not only the one that
+saved it; forget() drops what was resolved for an old version.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+import requests
+from PIL import Image as PILImage
+
+from ..core.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "biztrack-assets")
+FETCH_TIMEOUT_SECONDS = 10
+RESOLVED_TTL_SECONDS = 3600
+FAILURE_TTL_SECONDS = 300
+
+LOGO_BOX = (200, 100)
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    path: str
+    width: int
+    height: int
+
+
+_resolved = LRUCache(maxsize=1024, default_ttl=RESOLVED_TTL_SECONDS)
+_failed = LRUCache(maxsize=1024, default_ttl=FAILURE_TTL_SECONDS)
+
+
+def _source_key(source: str, box: Tuple[int, int], version: Any = None) -> str:
+    raw = f"{box[0]}x{box[1]}:{source}"
+    if version is not None:
+        raw = f"{raw}@{version}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _index_path(key: str) -> str:
+    return os.path.join(ASSET_CACHE_DIR, "sources", key)
+
+
+def _asset_path(digest: str) -> str:
+    return os.path.join(ASSET_CACHE_DIR, digest[:2], f"{digest}.png")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _read_index(key: str) -> Optional[StoredImage]:
+    try:
+        with open(_index_path(key)) as f:
+            digest, width, height = f.read().split()
+    except (OSError, ValueError):
+        return None
+    path = _asset_path(digest)
+    if not os.path.exists(path):
+        return None
+    return StoredImage(path, int(width), int(height))
+
+
+def _fetch(source: str) -> bytes:
+    if source.startswith("/static/"):
+        # Local static files (backward compatibility), relative to the working directory
+        with open(source.replace("/static/", "", 1), "rb") as f:
+            return f.read()
+    response = requests.get(source, timeout=FETCH_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return response.content
+
+
+def _store(data: bytes, box: Tuple[int, int]) -> Tuple[str, int, int]:
+    image = PILImage.open(io.BytesIO(data))
+    image.thumbnail(box, PILImage.Resampling.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    png = out.getvalue()
+    digest = hashlib.sha256(png).hexdigest()
+    path = _asset_path(digest)
+    if not os.path.exists(path):
+        _write_atomic(path, png)
+    return digest, image.width, image.height
+
+
+def get_image(source: Optional[str], box: Tuple[int, int] = LOGO_BOX, version: Any = None) -> Optional[StoredImage]:
+    """
+    ``source`` resized to fit ``box``, as a local PNG; None when there is no
+    source or it could not be fetched or decoded. A new ``version`` fetches
+    the source again.
+    """
+    if not source:
+        return None
+    key = _source_key(source, box, version)
+    stored = _resolved.get(key)
+    if stored is not None:
+        return stored
+    if _failed.get(key) is not None:
+        return None
+
+    stored = _read_index(key)
+    if stored is None:
+        try:
+            digest, width, height = _store(_fetch(source), box)
+            _write_atomic(_index_path(key), f"{digest} {width} {height}".encode())
+        except Exception as e:
+            logger.warning(f"Error loading image from {source}: {str(e)}")
+            _failed.set(key, True)
+            return None
+        stored = StoredImage(_asset_path(digest), width, height)
+    _resolved.set(key, stored)
+    return stored
+
+
+def forget(source: Optional[str], box: Tuple[int, int] = LOGO_BOX, version: Any = None) -> None:
+    """Fetch ``source`` at ``version`` again next time it is asked for. Stored assets are left for other sources."""
+    if not source:
+        return
+    key = _source_key(source, box, version)
+    _resolved.delete(key)
+    _failed.delete(key)
+    try:
+        os.unlink(_index_path(key))
+    except OSError:
+        pass
@@ -0,0 +1,223 @@
+"""
+Change feed export
+
+POS transactions, invoices and payments are exported as a stream of
+changes ordered by ``(changeTxid, id)``. Database triggers stamp
+``changeTxid`` with the id of the writing transaction on every insert and
+update and record deletes in change_feed_tombstones, so a consumer that
+keeps the ``cursor`` of the last line it processed sees every later change.
+
+Transaction ids are handed out when a transaction first writes, not when it
+commits, so a pull only reads changes below the xmin of its snapshot: every
+transaction older than that has committed or rolled back, and any write not
+yet visible will get a larger id than the cursor. A long-running write
+transaction holds later changes back until it ends.
+
+Rows are read with server-side cursors (``yield_per``) and written as NDJSON
+one line at a time, so memory stays flat however many rows a pull covers.
+
+Each line is one of::
+
+    {"op": "upsert", "id", "updatedAt", "cursor", "data": {...}}
+    {"op": "delete", "id", "updatedAt", "cursor", "reason": "deleted" | <status>}
+
+A voided or cancelled record is a delete whose reason is its status.
+"""
+
+import base64
+import heapq
+import itertools
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, literal, text, tuple_
+from sqlalchemy.orm import Session
+
+from ..config.change_feed_models import ChangeFeedTombstone
+from ..models.invoices import Invoice, Payment
+from ..models.pos import POSTransaction
+
+STREAM_BATCH_SIZE = 1000
+DEFAULT_LIMIT = 50000
+MAX_LIMIT = 1000000
+
+
+@dataclass(frozen=True)
+class Feed:
+    model: Any
+    status_field: str
+    void_statuses: Tuple[str, ...]
+
+    @property
+    def entity(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def fields(self) -> List[str]:
+        return [column.key for column in self.model.__table__.columns]
+
+
+FEEDS: Dict[str, Feed] = {
+    "pos_transactions": Feed(POSTransaction, "paymentStatus", ("void", "cancelled")),
+    "invoices": Feed(Invoice, "status", ("void", "cancelled")),
+    "payments": Feed(Payment, "status", ("cancelled", "failed")),
+}
+
+# Same objects as the add_change_feed migration, for databases built with
+# create_all.
+CHANGE_FEED_FUNCTIONS_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION change_feed_touch() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW."updatedAt" := clock_timestamp() AT TIME ZONE 'utc';
+        NEW."changeTxid" := txid_current();
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION change_feed_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO change_feed_tombstones (id, tenant_id, entity, "recordId", "deletedAt", "changeTxid")
+        VALUES (gen_random_uuid(), OLD.tenant_id, TG_TABLE_NAME, OLD.id,
+                clock_timestamp() AT TIME ZONE 'utc', txid_current());
+        RETURN OLD;
+    END
+    $$
+    """,
+)
+
+
+def change_feed_trigger_ddl(table: str) -> Tuple[str, ...]:
+    return (
+        f"DROP TRIGGER IF EXISTS {table}_change_feed_touch ON {table}",
+        f"""
+        CREATE TRIGGER {table}_change_feed_touch
+        BEFORE INSERT OR UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION change_feed_touch()
+        """,
+        f"DROP TRIGGER IF EXISTS {table}_change_feed_tombstone ON {table}",
+        f"""
+        CREATE TRIGGER {table}_change_feed_tombstone
+        AFTER DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION change_feed_tombstone()
+        """,
+    )
+
+
+def _create_feed_triggers(target, connection, **kw):
+    for statement in CHANGE_FEED_FUNCTIONS_DDL + change_feed_trigger_ddl(target.name):
+        connection.execute(text(statement))
+
+
+for _feed in FEEDS.values():
+    event.listen(_feed.model.__table__, "after_create", _create_feed_triggers)
+
+
+def resolve_fields(feed: Feed, fields: Optional[str]) -> List[str]:
+    """The columns to export from a comma-separated ``fields``; all without one. Raises ValueError."""
+    available = feed.fields
+    if not fields:
+        return available
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields for {feed.entity}: {', '.join(unknown)}")
+    return list(dict.fromkeys(["id", "updatedAt", "changeTxid", feed.status_field] + requested))
+
+
+def encode_change_cursor(change_txid: int, record_id: Any) -> str:
+    raw = f"{change_txid}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> Tuple[int, uuid.UUID]:
+    """Raise ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        change_txid, record_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return int(change_txid), uuid.UUID(record_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _after(txid_col, id_col, cursor: Tuple[int, uuid.UUID]):
+    return tuple_(txid_col, id_col) > tuple_(literal(cursor[0], txid_col.type), literal(cursor[1], id_col.type))
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def iter_changes(
+    db: Session,
+    feed: Feed,
+    tenant_id: Any,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Changes after ``cursor``, oldest first, at most ``limit``: live rows and
+    tombstones merged on (changeTxid, id). Raises ValueError for a malformed
+    cursor before anything is read.
+    """
+    model = feed.model
+    fields = fields or feed.fields
+    after = decode_change_cursor(cursor) if cursor else None
+    # Every transaction below the snapshot's xmin has ended, so nothing can
+    # still commit below this watermark.
+    watermark = db.execute(text("SELECT txid_snapshot_xmin(txid_current_snapshot())")).scalar()
+
+    rows = db.query(*[getattr(model, name) for name in fields]).filter(
+        model.tenant_id == tenant_id, model.changeTxid < watermark
+    )
+    tombstones = db.query(
+        ChangeFeedTombstone.changeTxid, ChangeFeedTombstone.recordId, ChangeFeedTombstone.deletedAt
+    ).filter(
+        ChangeFeedTombstone.tenant_id == tenant_id,
+        ChangeFeedTombstone.entity == feed.entity,
+        ChangeFeedTombstone.changeTxid < watermark,
+    )
+    if after is not None:
+        rows = rows.filter(_after(model.changeTxid, model.id, after))
+        tombstones = tombstones.filter(_after(ChangeFeedTombstone.changeTxid, ChangeFeedTombstone.recordId, after))
+    rows = rows.order_by(model.changeTxid, model.id).limit(limit).yield_per(STREAM_BATCH_SIZE)
+    tombstones = (
+        tombstones.order_by(ChangeFeedTombstone.changeTxid, ChangeFeedTombstone.recordId)
+        .limit(limit)
+        .yield_per(STREAM_BATCH_SIZE)
+    )
+
+    live = ((row.changeTxid, row.id, row.updatedAt, row) for row in rows)
+    deleted = ((row.changeTxid, row.recordId, row.deletedAt, None) for row in tombstones)
+    merged = heapq.merge(live, deleted, key=lambda change: (change[0], change[1]))
+    for change_txid, record_id, changed_at, row in itertools.islice(merged, limit):
+        line: Dict[str, Any] = {
+            "op": "upsert",
+            "id": str(record_id),
+            "updatedAt": changed_at.isoformat() if changed_at else None,
+            "cursor": encode_change_cursor(change_txid, record_id),
+        }
+        if row is None:
+            line.update(op="delete", reason="deleted")
+        elif getattr(row, feed.status_field) in feed.void_statuses:
+            line.update(op="delete", reason=getattr(row, feed.status_field))
+        else:
+            line["data"] = {name: getattr(row, name) for name in fields}
+        yield line
+
+
+def ndjson_lines(changes: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for change in changes:
+        yield json.dumps(change, default=_json_default, separators=(",", ":")) + "\n"
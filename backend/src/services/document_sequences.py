@@ -0,0 +1,308 @@
+"""
+Document number sequences
+
+Every numbered document (invoice, purchase order, job card, ...) draws its
+number from a counter row in ``document_sequences`` keyed by
+(tenant, document type, period). ``next_document_number`` increments that row
+with ``UPDATE ... RETURNING`` inside the caller's transaction:
+
+- the row lock is held until the caller commits, so numbers are issued in
+  commit order without gaps and never twice;
+- a rolled-back document releases its number to the next caller;
+- no "guess the next number and retry on collision" loop is needed.
+
+The first allocation of a period creates the row, seeded from the highest
+number already present on the documents table so existing numbering carries
+on. Formats are ``str.format`` templates with ``{number}``, ``{period}`` and
+``{date}`` fields; a tenant can override one with ``set_document_template``.
+
+High-volume callers (POS) can use ``SequenceBlockAllocator``, which reserves
+blocks of numbers per worker in short transactions of their own. Numbers
+left in a block when a worker stops are skipped, so block-allocated
+sequences are unique but not gap-free.
+"""
+
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Scope for document types whose numbers are unique across all tenants.
+GLOBAL_SCOPE = uuid.UUID(int=0)
+
+PURCHASE_ORDER = "purchase_order"
+INVOICE = "invoice"
+ORDER = "order"
+CUSTOMER = "customer"
+JOB_CARD = "job_card"
+QUALITY_CHECK = "quality_check"
+DONOR = "donor"
+PARTNER = "partner"
+POS_TRANSACTION = "pos_transaction"
+POS_SHIFT = "pos_shift"
+STOCK_TAKE = "stock_take"
+
+
+@dataclass(frozen=True)
+class DocumentFormat:
+    template: str
+    period: Optional[str] = None  # strftime pattern of the reset period; None never resets
+    shared: bool = False  # one sequence for all tenants
+    seed: Optional[Callable[[Session, Any, str], int]] = None  # highest number already issued
+
+
+def highest_issued_number(
+    db: Session,
+    table: str,
+    column: str,
+    prefix: str,
+    tenant_id: Any = None,
+    tenant_column: str = "tenant_id",
+    hexadecimal: bool = False,
+) -> int:
+    """Largest trailing number among ``column`` values starting with ``prefix``."""
+    digits = "[0-9A-Fa-f]+" if hexadecimal else "[0-9]+"
+    suffix = f"substring({column} FROM '^' || :prefix_re || '({digits})$')"
+    if hexadecimal:
+        value = f"('x' || lpad({suffix}, 16, '0'))::bit(64)::bigint"
+    else:
+        value = f"CAST({suffix} AS bigint)"
+    where = f"{column} LIKE :prefix_like"
+    params: Dict[str, Any] = {
+        "prefix_re": _regex_escape(prefix),
+        "prefix_like": prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%",
+    }
+    if tenant_id is not None:
+        where += f" AND {tenant_column} = CAST(:tenant_id AS uuid)"
+        params["tenant_id"] = str(tenant_id)
+    # Suffixes longer than bigint can hold are legacy random ids, not sequence numbers.
+    result = db.execute(
+        text(f"SELECT max({value}) FROM {table} WHERE {where} AND length({suffix}) <= 15"),
+        params,
+    ).scalar()
+    return int(result or 0)
+
+
+def _regex_escape(value: str) -> str:
+    return "".join("\\" + ch if ch in r".^$*+?()[]{}|\\" else ch for ch in value)
+
+
+def _seed_purchase_order(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "purchase_orders", '"poNumber"', f"PO-{period}-")
+
+
+def _seed_invoice(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "invoices", '"invoiceNumber"', f"INV-{period}-", tenant_id)
+
+
+def _seed_order(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "invoices", '"orderNumber"', f"ORD-{period}-", tenant_id)
+
+
+def _seed_customer(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "customers", '"customerId"', "CUST", tenant_id)
+
+
+def _seed_job_card(db: Session, tenant_id: Any, period: str) -> int:
+    # Job card numbers continue across days: JC-<date>-<sequence>
+    return highest_issued_number(db, "job_cards", "regexp_replace(job_card_number, '^JC-[0-9]+-', 'JC-')", "JC-", tenant_id)
+
+
+def _seed_quality_check(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "quality_checks", "check_number", f"QC-{period}-", tenant_id, hexadecimal=True)
+
+
+def _seed_donor(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "ngo_donors", "donor_code", "DON", tenant_id)
+
+
+def _seed_partner(db: Session, tenant_id: Any, period: str) -> int:
+    return highest_issued_number(db, "ngo_partner_organizations", "partner_code", "PTR", tenant_id)
+
+
+DOCUMENT_FORMATS: Dict[str, DocumentFormat] = {
+    PURCHASE_ORDER: DocumentFormat("PO-{period}-{number:04d}", period="%Y%m", shared=True, seed=_seed_purchase_order),
+    INVOICE: DocumentFormat("INV-{period}-{number:04d}", period="%Y%m%d", seed=_seed_invoice),
+    ORDER: DocumentFormat("ORD-{period}-{number:04d}", period="%Y%m%d", seed=_seed_order),
+    CUSTOMER: DocumentFormat("CUST{number:03d}", seed=_seed_customer),
+    JOB_CARD: DocumentFormat("JC-{date}-{number:03d}", seed=_seed_job_card),
+    QUALITY_CHECK: DocumentFormat("QC-{period}-{number:08X}", period="%Y%m", seed=_seed_quality_check),
+    DONOR: DocumentFormat("DON{number:03d}", seed=_seed_donor),
+    PARTNER: DocumentFormat("PTR{number:03d}", seed=_seed_partner),
+    POS_TRANSACTION: DocumentFormat("TXN-{period}-{number:06d}", period="%Y%m%d", shared=True),
+    POS_SHIFT: DocumentFormat("SHIFT-{period}-{number:04d}", period="%Y%m%d", shared=True),
+    STOCK_TAKE: DocumentFormat("ST-{period}-{number:04d}", period="%Y%m"),
+}
+
+
+def _get_format(document_type: str) -> DocumentFormat:
+    try:
+        return DOCUMENT_FORMATS[document_type]
+    except KeyError:
+        raise ValueError(f"Unknown document type: {document_type}")
+
+
+def _scope(fmt: DocumentFormat, tenant_id: Any) -> str:
+    return str(GLOBAL_SCOPE if fmt.shared else tenant_id)
+
+
+def _period_key(fmt: DocumentFormat, now: datetime) -> str:
+    return now.strftime(fmt.period) if fmt.period else ""
+
+
+def format_document_number(template: str, number: int, period_key: str, now: datetime) -> str:
+    return template.format(number=number, period=period_key, date=now.strftime("%Y%m%d"))
+
+
+_INCREMENT_SQL = text("""
+    UPDATE document_sequences
+    SET last_value = last_value + :count, "updatedAt" = :now
+    WHERE tenant_id = CAST(:scope AS uuid) AND document_type = :document_type AND period_key = :period_key
+    RETURNING last_value, template
+""")
+
+# A new period inherits the template override of the latest period.
+_CREATE_SQL = text("""
+    INSERT INTO document_sequences (tenant_id, document_type, period_key, last_value, template, "updatedAt")
+    VALUES (
+        CAST(:scope AS uuid), :document_type, :period_key, :seed,
+        (
+            SELECT s.template FROM document_sequences s
+            WHERE s.tenant_id = CAST(:scope AS uuid) AND s.document_type = :document_type
+            ORDER BY s."updatedAt" DESC
+            LIMIT 1
+        ),
+        :now
+    )
+    ON CONFLICT (tenant_id, document_type, period_key) DO NOTHING
+""")
+
+
+def allocate_document_numbers(
+    db: Session,
+    tenant_id: Any,
+    document_type: str,
+    count: int = 1,
+    now: Optional[datetime] = None,
+) -> Tuple[int, int, str, Optional[str]]:
+    """
+    Reserve ``count`` consecutive numbers in the caller's transaction.
+
+    Returns ``(first, last, period_key, template_override)``. Nothing is
+    committed; the counter row stays locked until the caller commits.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    fmt = _get_format(document_type)
+    now = now or datetime.now()
+    params = {
+        "scope": _scope(fmt, tenant_id),
+        "document_type": document_type,
+        "period_key": _period_key(fmt, now),
+        "count": count,
+        "now": now,
+    }
+
+    row = db.execute(_INCREMENT_SQL, params).fetchone()
+    if row is None:
+        seed = fmt.seed(db, tenant_id, params["period_key"]) if fmt.seed else 0
+        # A concurrent first allocation makes this a no-op (after waiting for it to commit).
+        db.execute(_CREATE_SQL, {**params, "seed": seed})
+        row = db.execute(_INCREMENT_SQL, params).fetchone()
+
+    last = int(row[0])
+    return last - count + 1, last, params["period_key"], row[1]
+
+
+def next_document_number(db: Session, tenant_id: Any, document_type: str) -> str:
+    """Allocate and format the next number of ``document_type`` for the tenant."""
+    now = datetime.now()
+    number, _, period_key, template = allocate_document_numbers(db, tenant_id, document_type, 1, now)
+    return format_document_number(template or DOCUMENT_FORMATS[document_type].template, number, period_key, now)
+
+
+def set_document_template(db: Session, tenant_id: Any, document_type: str, template: Optional[str]) -> None:
+    """
+    Override (or with ``None`` reset) the number format of a document type for
+    a tenant, from the current period on. Commits.
+    """
+    fmt = _get_format(document_type)
+    if template is not None:
+        if "{number" not in template:
+            raise ValueError("Template must contain a {number} field")
+        try:
+            format_document_number(template, 1, "", datetime.now())
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid template: {e}")
+    now = datetime.now()
+    params = {
+        "scope": _scope(fmt, tenant_id),
+        "document_type": document_type,
+        "period_key": _period_key(fmt, now),
+        "now": now,
+        "template": template,
+    }
+    if db.execute(_INCREMENT_SQL, {**params, "count": 0}).fetchone() is None:
+        seed = fmt.seed(db, tenant_id, params["period_key"]) if fmt.seed else 0
+        db.execute(_CREATE_SQL, {**params, "seed": seed})
+    db.execute(text("""
+        UPDATE document_sequences SET template = :template
+        WHERE tenant_id = CAST(:scope AS uuid) AND document_type = :document_type AND period_key = :period_key
+    """), params)
+    db.commit()
+
+
+class SequenceBlockAllocator:
+    """
+    Per-process pool of pre-reserved number blocks.
+
+    Each block is reserved in its own short transaction, so request
+    transactions never wait on the counter row. Thread-safe.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None, block_size: int = 50):
+        self._session_factory = session_factory
+        self.block_size = block_size
+        self._blocks: Dict[Tuple[str, str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from ..config.database_config import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def next_number(self, tenant_id: Any, document_type: str) -> str:
+        fmt = _get_format(document_type)
+        now = datetime.now()
+        key = (_scope(fmt, tenant_id), document_type, _period_key(fmt, now))
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                db = self._new_session()
+                try:
+                    first, last, _, template = allocate_document_numbers(
+                        db, tenant_id, document_type, self.block_size, now
+                    )
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+                # Blocks of a finished period are never used again.
+                self._blocks = {k: v for k, v in self._blocks.items() if k[:2] != key[:2]}
+                block = [first, last, template]
+                self._blocks[key] = block
+            number = block[0]
+            block[0] += 1
+            template = block[2]
+        return format_document_number(template or fmt.template, number, key[2], now)
+
+
+pos_number_blocks = SequenceBlockAllocator()
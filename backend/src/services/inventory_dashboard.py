@@ -0,0 +1,134 @@
+"""
+Inventory dashboard aggregate
+
+The dashboard figures come from two statements regardless of catalogue size:
+
+- one conditional aggregation over the tenant's active products (counts,
+  stock value) that also returns the first low-stock rows as JSON;
+- one ``UNION ALL`` of counts over warehouses, suppliers, pending purchase
+  orders and pending receivings.
+
+Stock value is the FIFO value from stock_valuations; products without
+valuation rows (not yet rebuilt) fall back to quantity times cost price.
+
+The result is cached per tenant. Every path that changes product stock calls
+``invalidate_inventory_dashboard``; the short TTL bounds staleness for the
+other counts and for other worker processes.
+"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from ..core.cache import cache
+
+DASHBOARD_CACHE_TTL = 60
+LOW_STOCK_ALERT_LIMIT = 10
+
+# The low-stock predicate matches idx_products_tenant_low_stock exactly so the
+# planner can use the partial index.
+PRODUCT_AGGREGATE_SQL = text(f"""
+    SELECT
+        count(*) AS total_products,
+        count(*) FILTER (WHERE "stockQuantity" <= "minStockLevel") AS low_stock_products,
+        count(*) FILTER (WHERE "stockQuantity" = 0) AS out_of_stock_products,
+        COALESCE(sum(COALESCE(v.value, "stockQuantity" * "costPerUnitPrice")), 0) AS total_stock_value,
+        (
+            SELECT COALESCE(json_agg(low), '[]'::json)
+            FROM (
+                SELECT id, name, sku, "stockQuantity", "minStockLevel"
+                FROM products
+                WHERE tenant_id = CAST(:tenant_id AS uuid)
+                  AND "isActive" AND "stockQuantity" <= "minStockLevel"
+                ORDER BY "stockQuantity"
+                LIMIT {LOW_STOCK_ALERT_LIMIT}
+            ) low
+        ) AS low_stock_list
+    FROM products
+    LEFT JOIN (
+        SELECT "productId" AS product_id, sum("fifoValue") AS value
+        FROM stock_valuations
+        WHERE tenant_id = CAST(:tenant_id AS uuid)
+        GROUP BY "productId"
+    ) v ON v.product_id = products.id
+    WHERE products.tenant_id = CAST(:tenant_id AS uuid) AND "isActive"
+""")
+
+RELATED_COUNTS_SQL = text("""
+    SELECT 'totalWarehouses', count(*) FROM warehouses
+    WHERE tenant_id = CAST(:tenant_id AS uuid) AND "isActive"
+    UNION ALL
+    SELECT 'totalSuppliers', count(*) FROM suppliers
+    WHERE tenant_id = CAST(:tenant_id AS uuid) AND "isActive"
+    UNION ALL
+    SELECT 'pendingPurchaseOrders', count(*) FROM purchase_orders
+    WHERE tenant_id = CAST(:tenant_id AS uuid) AND status IN ('draft', 'submitted', 'approved', 'ordered')
+    UNION ALL
+    SELECT 'pendingReceivings', count(*) FROM receivings
+    WHERE tenant_id = CAST(:tenant_id AS uuid) AND status IN ('pending', 'in_progress')
+""")
+
+
+def _cache_key(tenant_id: Any) -> str:
+    return f"inventory_dashboard_{tenant_id}"
+
+
+def invalidate_inventory_dashboard(tenant_id: Any, db: Optional[Session] = None) -> None:
+    """
+    Drop the tenant's cached dashboard. Pass ``db`` when the change is not
+    committed yet: the entry is dropped again after commit, so a read racing
+    the open transaction cannot leave the old figures cached.
+    """
+    if tenant_id is None:
+        return
+    key = _cache_key(tenant_id)
+    cache.delete(key)
+    if db is not None:
+        event.listen(db, "after_commit", lambda session: cache.delete(key), once=True)
+
+
+def _low_stock_alert(row: Dict[str, Any]) -> Dict[str, Any]:
+    current = row["stockQuantity"]
+    minimum = row["minStockLevel"]
+    return {
+        "productId": str(row["id"]),
+        "productName": row["name"],
+        "sku": row["sku"],
+        "currentStock": current,
+        "minStockLevel": minimum,
+        "alertType": "out_of_stock" if current == 0 else "low_stock",
+        "message": (
+            f"Product {row['name']} (SKU: {row['sku']}) is running low on stock. "
+            f"Current: {current}, Minimum: {minimum}"
+        ),
+    }
+
+
+def compute_inventory_dashboard(db: Session, tenant_id: Any) -> Dict[str, Any]:
+    """Run the two dashboard statements without touching the cache."""
+    params = {"tenant_id": str(tenant_id)}
+    products = db.execute(PRODUCT_AGGREGATE_SQL, params).mappings().one()
+    counts = {name: int(value) for name, value in db.execute(RELATED_COUNTS_SQL, params).fetchall()}
+
+    return {
+        "totalProducts": int(products["total_products"]),
+        "lowStockProducts": int(products["low_stock_products"]),
+        "outOfStockProducts": int(products["out_of_stock_products"]),
+        "totalWarehouses": counts.get("totalWarehouses", 0),
+        "totalSuppliers": counts.get("totalSuppliers", 0),
+        "pendingPurchaseOrders": counts.get("pendingPurchaseOrders", 0),
+        "pendingReceivings": counts.get("pendingReceivings", 0),
+        "totalStockValue": float(products["total_stock_value"] or 0.0),
+        "lowStockAlerts": [_low_stock_alert(row) for row in products["low_stock_list"] or []],
+    }
+
+
+def get_inventory_dashboard(db: Session, tenant_id: Any) -> Dict[str, Any]:
+    """Cached per tenant for ``DASHBOARD_CACHE_TTL`` seconds."""
+    key = _cache_key(tenant_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_inventory_dashboard(db, tenant_id)
+        cache.set(key, stats, DASHBOARD_CACHE_TTL)
+    return stats
@@ -8,10 +8,13 @@ Rules:
   invoice creation time.
 - Creating a purchase order for a product increases Product.stockQuantity
   at purchase order creation time.
+- A POS sale deducts its items when it is rung up; voiding it restores them.
 - Every adjustment is recorded as a StockMovement row keyed by the source
   document id (referenceNumber) so it can be reversed / reconciled
   idempotently (restore on delete, reconcile on update, skip on payment
   for documents that were already deducted at creation).
+- All quantities of one document are applied atomically through
+  ``apply_stock_deltas``: either every line is applied or none is.
 """
 
 import logging
@@ -25,6 +28,8 @@ from sqlalchemy import and_
 from ..models.invoices import Invoice
 from ..config.inventory_models import Product, StockMovement, Warehouse, PurchaseOrder
 from ..config.inventory_crud import get_product_by_id
+from .stock_mutations import apply_stock_deltas, aggregate_deltas
+from .stock_balances import apply_movement_balances
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,6 +37,7 @@ logger = logging.getLogger(__name__)
 
 INVOICE_REFERENCE_TYPE = "Invoice"
 PURCHASE_ORDER_REFERENCE_TYPE = "PurchaseOrder"
+POS_TRANSACTION_REFERENCE_TYPE = "POSTransaction"
 
 
 class InventorySyncService:
@@ -82,6 +88,17 @@ class InventorySyncService:
             .all()
         )
 
+    def _pos_sale_movements(self, transaction_id: str, tenant_id: str) -> List[StockMovement]:
+        return (
+            self.db.query(StockMovement)
+            .filter(
+                StockMovement.tenant_id == tenant_id,
+                StockMovement.referenceNumber == transaction_id,
+                StockMovement.referenceType == POS_TRANSACTION_REFERENCE_TYPE,
+            )
+            .all()
+        )
+
     def _create_movement(
         self,
         *,
@@ -100,6 +117,7 @@ class InventorySyncService:
             id=str(uuid.uuid4()),
             tenant_id=tenant_id,
             productId=product_id,
+            product_uuid=product_id,
             warehouseId=warehouse_id,
             movementType=movement_type,
             quantity=quantity,
@@ -115,6 +133,23 @@ class InventorySyncService:
         self.db.add(movement)
         return movement
 
+    def _apply_existing(self, tenant_id: str, deltas: Dict[str, int], **kwargs) -> Dict[str, Any]:
+        """Apply reversal deltas to the products that still exist; apply_stock_deltas' outcome."""
+        if not deltas:
+            return {"success": True, "products": {}, "errors": []}
+        present = {
+            str(row[0])
+            for row in self.db.query(Product.id).filter(
+                Product.tenant_id == tenant_id, Product.id.in_(list(deltas))
+            )
+        }
+        return apply_stock_deltas(
+            self.db,
+            tenant_id,
+            {product_id: delta for product_id, delta in deltas.items() if product_id in present},
+            **kwargs,
+        )
+
     @staticmethod
     def _product_items(items: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
         return [item for item in (items or []) if item.get("productId") and item.get("quantity", 0) > 0]
@@ -162,65 +197,70 @@ class InventorySyncService:
             product_key = str(movement.productId)
             deducted_by_product[product_key] = deducted_by_product.get(product_key, 0) + movement.quantity
 
-        warehouse_id = self._resolve_warehouse_id(tenant_id)
-        results = []
-        errors = []
-        total_deducted = 0
-
-        for item in item_rows:
-            product_id = item.get("productId")
-            quantity = int(item.get("quantity", 0))
-
-            if skip_deducted and deducted_by_product.get(product_id, 0) >= quantity:
-                continue
+        requested = aggregate_deltas(
+            (item.get("productId"), int(item.get("quantity", 0))) for item in item_rows
+        )
+        if skip_deducted:
+            requested = {
+                product_id: quantity
+                for product_id, quantity in requested.items()
+                if deducted_by_product.get(product_id, 0) < quantity
+            }
 
-            product = get_product_by_id(product_id, self.db, tenant_id)
-            if not product:
-                errors.append(f"Product {product_id} not found")
-                continue
+        outcome = apply_stock_deltas(
+            self.db, tenant_id, {product_id: -quantity for product_id, quantity in requested.items()}
+        )
+        if not outcome["success"]:
+            return {
+                "success": False,
+                "invoice_id": invoice_id,
+                "total_items_deducted": 0,
+                "items_processed": len(item_rows),
+                "sync_results": [],
+                "errors": outcome["errors"],
+            }
 
-            if product.stockQuantity < quantity:
-                errors.append(
-                    f"Insufficient stock for product {product.name}. "
-                    f"Available: {product.stockQuantity}, Required: {quantity}"
-                )
-                continue
+        warehouse_id = self._resolve_warehouse_id(tenant_id) if requested else None
+        movements = []
+        results = []
+        total_deducted = 0
 
-            old_stock = product.stockQuantity
-            product.stockQuantity -= quantity
-            product.updatedAt = datetime.utcnow()
+        for product_id, quantity in requested.items():
+            product = outcome["products"][product_id]
 
             if warehouse_id:
-                self._create_movement(
+                movements.append(self._create_movement(
                     tenant_id=tenant_id,
                     product_id=product_id,
                     warehouse_id=warehouse_id,
                     movement_type="outbound",
                     quantity=quantity,
-                    unit_cost=product.costPerUnitPrice,
+                    unit_cost=product["unit_cost"],
                     reference_number=invoice_id,
                     reference_type=INVOICE_REFERENCE_TYPE,
                     notes=f"Stock deduction for invoice {invoice_id}",
                     user_id=user_id,
-                )
+                ))
 
             results.append({
                 "success": True,
                 "product_id": product_id,
-                "product_name": product.name,
+                "product_name": product["name"],
                 "quantity_deducted": quantity,
-                "old_stock": old_stock,
-                "new_stock": product.stockQuantity,
+                "old_stock": product["old_stock"],
+                "new_stock": product["new_stock"],
             })
             total_deducted += quantity
 
+        apply_movement_balances(self.db, [(movement, 1) for movement in movements])
+
         return {
-            "success": len(errors) == 0,
+            "success": True,
             "invoice_id": invoice_id,
             "total_items_deducted": total_deducted,
             "items_processed": len(item_rows),
             "sync_results": results,
-            "errors": errors,
+            "errors": [],
         }
 
     def restore_invoice_stock(self, invoice_id: str, tenant_id: str) -> Dict[str, Any]:
@@ -230,15 +270,13 @@ class InventorySyncService:
         movement) are restored.
         """
         movements = self._invoice_movements(invoice_id, tenant_id)
-        restored = 0
+        self._apply_existing(
+            tenant_id, aggregate_deltas((m.productId, m.quantity) for m in movements)
+        )
+        apply_movement_balances(self.db, [(movement, -1) for movement in movements])
         for movement in movements:
-            product = get_product_by_id(str(movement.productId), self.db, tenant_id)
-            if product:
-                product.stockQuantity += movement.quantity
-                product.updatedAt = datetime.utcnow()
             self.db.delete(movement)
-            restored += 1
-        return {"restored": restored}
+        return {"restored": len(movements)}
 
     def reconcile_invoice_stock(
         self,
@@ -292,75 +330,94 @@ class InventorySyncService:
         if not warehouse_id:
             warehouse_id = self._resolve_warehouse_id(tenant_id)
 
-        results = []
-        errors = []
-        total_added = 0
-
-        for item in item_rows:
-            product_id = item.get("productId")
-            quantity = int(item.get("quantity", 0))
+        requested = aggregate_deltas(
+            (item.get("productId"), int(item.get("quantity", 0))) for item in item_rows
+        )
+        if skip_existing:
+            requested = {
+                product_id: quantity
+                for product_id, quantity in requested.items()
+                if added_by_product.get(product_id, 0) < quantity
+            }
 
-            if skip_existing and added_by_product.get(product_id, 0) >= quantity:
-                continue
+        outcome = apply_stock_deltas(self.db, tenant_id, requested)
+        if not outcome["success"]:
+            return {
+                "success": False,
+                "po_id": po_id,
+                "total_items_added": 0,
+                "items_processed": len(item_rows),
+                "sync_results": [],
+                "errors": outcome["errors"],
+            }
 
-            product = get_product_by_id(product_id, self.db, tenant_id)
-            if not product:
-                errors.append(f"Product {product_id} not found")
-                continue
+        movements = []
+        results = []
+        total_added = 0
 
-            old_stock = product.stockQuantity
-            product.stockQuantity += quantity
-            product.updatedAt = datetime.utcnow()
+        for product_id, quantity in requested.items():
+            product = outcome["products"][product_id]
 
             if warehouse_id:
-                self._create_movement(
+                movements.append(self._create_movement(
                     tenant_id=tenant_id,
                     product_id=product_id,
                     warehouse_id=warehouse_id,
                     movement_type="inbound",
                     quantity=quantity,
-                    unit_cost=product.costPerUnitPrice,
+                    unit_cost=product["unit_cost"],
                     reference_number=po_id,
                     reference_type=PURCHASE_ORDER_REFERENCE_TYPE,
                     notes=f"Stock increase for purchase order {po_id}",
                     user_id=user_id,
-                )
+                ))
 
             results.append({
                 "success": True,
                 "product_id": product_id,
-                "product_name": product.name,
+                "product_name": product["name"],
                 "quantity_added": quantity,
-                "old_stock": old_stock,
-                "new_stock": product.stockQuantity,
+                "old_stock": product["old_stock"],
+                "new_stock": product["new_stock"],
             })
             total_added += quantity
 
+        apply_movement_balances(self.db, [(movement, 1) for movement in movements])
+
         return {
-            "success": len(errors) == 0,
+            "success": True,
             "po_id": po_id,
             "total_items_added": total_added,
             "items_processed": len(item_rows),
             "sync_results": results,
-            "errors": errors,
+            "errors": [],
         }
 
+    def _reverse_purchase_order_movements(self, tenant_id: str, movements: List[StockMovement]) -> None:
+        # Received goods that have since been sold cannot be taken back: the
+        # product total and stock_balances must move by the same amount, so a
+        # reversal that would take a product below zero is refused whole.
+        outcome = self._apply_existing(
+            tenant_id, aggregate_deltas((m.productId, -m.quantity) for m in movements)
+        )
+        if not outcome["success"]:
+            raise ValueError(
+                "Cannot reverse purchase order stock that is no longer on hand: " + "; ".join(outcome["errors"])
+            )
+        apply_movement_balances(self.db, [(movement, -1) for movement in movements])
+        for movement in movements:
+            self.db.delete(movement)
+
     def reverse_purchase_order_stock(self, po_id: str, tenant_id: str) -> Dict[str, Any]:
         """
-        Reverse stock increases for a purchase order that has been deleted
-        (or is being edited). Only quantities that were actually added (have a
-        stock movement) are reversed.
+        Reverse stock increases for a purchase order that has been deleted.
+        Only quantities that were actually added (have a stock movement) are
+        reversed. Raises ValueError, changing nothing, when part of what the
+        order added is no longer in stock.
         """
         movements = self._purchase_order_movements(po_id, tenant_id)
-        reversed_count = 0
-        for movement in movements:
-            product = get_product_by_id(str(movement.productId), self.db, tenant_id)
-            if product:
-                product.stockQuantity = max(0, product.stockQuantity - movement.quantity)
-                product.updatedAt = datetime.utcnow()
-            self.db.delete(movement)
-            reversed_count += 1
-        return {"reversed": reversed_count}
+        self._reverse_purchase_order_movements(tenant_id, movements)
+        return {"reversed": len(movements)}
 
     def reconcile_purchase_order_stock(
         self,
@@ -370,9 +427,13 @@ class InventorySyncService:
         new_items: List[Dict[str, Any]],
         warehouse_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Reverse previous increases, then apply increases for the new items."""
-        self.reverse_purchase_order_stock(po_id, tenant_id)
-        return self.increase_purchase_order_stock(
+        """
+        Apply increases for the new items, then reverse the previous ones, so
+        only the net change has to be in stock. Raises ValueError when a
+        product would go below zero (see reverse_purchase_order_stock).
+        """
+        previous = self._purchase_order_movements(po_id, tenant_id)
+        result = self.increase_purchase_order_stock(
             po_id,
             tenant_id,
             user_id,
@@ -380,6 +441,82 @@ class InventorySyncService:
             warehouse_id=warehouse_id,
             skip_existing=False,
         )
+        if result["success"]:
+            self._reverse_purchase_order_movements(tenant_id, previous)
+        return result
+
+    # ------------------------------------------------------------------ #
+    # POS sales: deduct / restore
+    # ------------------------------------------------------------------ #
+    def deduct_pos_sales_stock(
+        self,
+        tenant_id: str,
+        user_id: str,
+        sales: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Deduct stock for POS sales (``{"transaction_id", "label", "items"}``)
+        with one guarded UPDATE for all of them, all lines or none: an unknown
+        product or an oversold line refuses the lot.
+
+        ``unit_costs`` maps transaction id to ``{product id: cost per unit}``
+        as consumed (FIFO when the product has cost layers, its cost price
+        otherwise).
+        """
+        requested_by_sale = {
+            sale["transaction_id"]: aggregate_deltas(
+                (item.get("productId"), int(item.get("quantity", 0))) for item in self._product_items(sale["items"])
+            )
+            for sale in sales
+        }
+        totals = aggregate_deltas(
+            (product_id, -quantity)
+            for requested in requested_by_sale.values()
+            for product_id, quantity in requested.items()
+        )
+        outcome = apply_stock_deltas(self.db, tenant_id, totals)
+        if not outcome["success"]:
+            return {"success": False, "unit_costs": {}, "errors": outcome["errors"]}
+
+        warehouse_id = self._resolve_warehouse_id(tenant_id) if totals else None
+        unit_costs: Dict[str, Dict[str, float]] = {}
+        movements = []
+        for sale in sales:
+            costs = unit_costs.setdefault(sale["transaction_id"], {})
+            for product_id, quantity in requested_by_sale[sale["transaction_id"]].items():
+                product = outcome["products"][product_id]
+                costs[product_id] = float(product["unit_cost"] or 0.0)
+                if warehouse_id:
+                    movements.append((sale["transaction_id"], product_id, self._create_movement(
+                        tenant_id=tenant_id,
+                        product_id=product_id,
+                        warehouse_id=warehouse_id,
+                        movement_type="outbound",
+                        quantity=quantity,
+                        unit_cost=product["unit_cost"] or 0.0,
+                        reference_number=sale["transaction_id"],
+                        reference_type=POS_TRANSACTION_REFERENCE_TYPE,
+                        notes=f"POS sale {sale.get('label') or sale['transaction_id']}",
+                        user_id=user_id,
+                    )))
+
+        apply_movement_balances(self.db, [(movement, 1) for _, _, movement in movements])
+        for transaction_id, product_id, movement in movements:
+            if movement.fifoValue:
+                unit_costs[transaction_id][product_id] = -float(movement.fifoValue) / movement.quantity
+
+        return {"success": True, "unit_costs": unit_costs, "errors": []}
+
+    def restore_pos_sale_stock(self, transaction_id: str, tenant_id: str) -> Dict[str, Any]:
+        """Put back what a voided or deleted POS sale deducted (its stock movements)."""
+        movements = self._pos_sale_movements(transaction_id, tenant_id)
+        self._apply_existing(
+            tenant_id, aggregate_deltas((m.productId, m.quantity) for m in movements)
+        )
+        apply_movement_balances(self.db, [(movement, -1) for movement in movements])
+        for movement in movements:
+            self.db.delete(movement)
+        return {"restored": len(movements)}
 
     # ------------------------------------------------------------------ #
     # Legacy / backwards compatible entry points
@@ -0,0 +1,232 @@
+"""
+Invoice PDF rendering
+
+Everything an invoice PDF takes from its tenant (the active invoice
+customization, the colours and ParagraphStyles compiled from it, the
+currency and the plan type) is gathered once into a RenderContext and
+cached per process, instead of three queries and a style rebuild per PDF.
+The logo is resolved through the local asset store (services.asset_store),
+so it is downloaded and resized once rather than on every render, and is
+keyed by the customization signature, so a new logo saved under the same
+URL is fetched again by every worker.
+
+Saving the customization through this worker calls
+invalidate_render_context() and applies at once. At most every
+RECHECK_SECONDS a cached context is compared with the customization's
+updated_at (one small lookup), so a save through another worker applies
+within seconds; plan changes apply when the entry expires after
+MAX_AGE_SECONDS.
+
+Rendered PDFs are cached by (invoice id, invoice updatedAt, context
+version). The version is the customization's updated_at and the plan type,
+so an edited invoice or a restyled template is never served stale.
+
+A cache miss is laid out in the PDF rendering pool (services.pdf_rendering):
+invoice_document() turns the invoice and its context into plain data, and
+document_context() rebuilds, and caches, the context in the pool process.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config.invoice_customization_models import InvoiceCustomization
+from ..core.cache import LRUCache
+from . import asset_store
+
+RECHECK_SECONDS = 5
+MAX_AGE_SECONDS = 300
+PDF_CACHE_SIZE = 128
+PDF_TTL_SECONDS = 3600
+
+CUSTOMIZATION_FIELDS = (
+    "company_name",
+    "company_logo_url",
+    "company_address",
+    "company_phone",
+    "company_email",
+    "company_website",
+    "bank_sort_code",
+    "bank_account_number",
+    "payment_instructions",
+    "primary_color",
+    "secondary_color",
+    "accent_color",
+    "show_vehicle_info",
+    "show_parts_section",
+    "show_labour_section",
+    "show_comments_section",
+    "footer_text",
+    "show_contact_info_in_footer",
+    "footer_background_color",
+    "grid_color",
+    "thank_you_message",
+    "enquiry_message",
+    "contact_message",
+    "default_payment_instructions",
+)
+
+
+@dataclass
+class RenderContext:
+    signature: Tuple
+    checked_at: float
+    customization: Optional[Dict[str, Any]]
+    plan_type: Optional[str]
+    colors: Dict[str, Any]
+    styles: Dict[str, Any]
+    currency: str
+    logo: Optional[asset_store.StoredImage] = None
+
+    @property
+    def version(self) -> Tuple:
+        return self.signature + (self.plan_type,)
+
+
+_contexts = LRUCache(maxsize=1024, default_ttl=MAX_AGE_SECONDS)
+_pdfs = LRUCache(maxsize=PDF_CACHE_SIZE, default_ttl=PDF_TTL_SECONDS)
+_document_contexts = LRUCache(maxsize=256, default_ttl=MAX_AGE_SECONDS)
+
+INVOICE_FIELDS = (
+    "invoiceNumber",
+    "issueDate",
+    "dueDate",
+    "orderNumber",
+    "orderTime",
+    "customerName",
+    "customerEmail",
+    "customerPhone",
+    "billingAddress",
+    "customerCity",
+    "customerState",
+    "customerPostalCode",
+    "customerCountry",
+    "vehicleReg",
+    "items",
+    "notes",
+    "terms",
+    "subtotal",
+    "labourCost",
+    "vatRate",
+    "taxAmount",
+    "total",
+)
+
+
+def customization_dict(customization_obj: Optional[InvoiceCustomization]) -> Optional[Dict[str, Any]]:
+    if customization_obj is None:
+        return None
+    customization = {name: getattr(customization_obj, name) for name in CUSTOMIZATION_FIELDS}
+    customization["default_currency"] = getattr(customization_obj, "default_currency", "USD")
+    return customization
+
+
+def build_render_context(
+    customization: Optional[Dict[str, Any]],
+    plan_type: Optional[str] = None,
+    signature: Tuple = (None, None),
+    logo: Optional[asset_store.StoredImage] = None,
+) -> RenderContext:
+    """A context from an already loaded customization and logo."""
+    from ..api.v1.pdf_generator_modern import create_styles, get_customization_colors
+
+    colors = get_customization_colors(customization)
+    return RenderContext(
+        signature=signature,
+        checked_at=time.monotonic(),
+        customization=customization,
+        plan_type=plan_type,
+        colors=colors,
+        styles=create_styles(colors),
+        currency=customization.get("default_currency", "USD") if customization else "USD",
+        logo=logo,
+    )
+
+
+def customization_signature(db: Session, tenant_id: Any) -> Tuple:
+    """(id, updated_at) of the tenant's active customization; changes whenever it is saved."""
+    row = (
+        db.query(InvoiceCustomization.id, InvoiceCustomization.updated_at)
+        .filter(InvoiceCustomization.tenant_id == tenant_id, InvoiceCustomization.is_active == True)
+        .first()
+    )
+    return (str(row.id), row.updated_at) if row else (None, None)
+
+
+def _plan_type(db: Session, tenant_id: Any) -> Optional[str]:
+    from ..config.database import get_plan_by_id, get_subscription_by_tenant
+
+    subscription = get_subscription_by_tenant(str(tenant_id), db)
+    if not subscription:
+        return None
+    plan = get_plan_by_id(str(subscription.planId), db)
+    return plan.planType if plan else None
+
+
+def get_render_context(db: Session, tenant_id: Any) -> RenderContext:
+    """The tenant's render context, rebuilt when its customization changed."""
+    key = str(tenant_id)
+    context = _contexts.get(key)
+    if context is not None and time.monotonic() - context.checked_at < RECHECK_SECONDS:
+        return context
+
+    signature = customization_signature(db, tenant_id)
+    if context is None or context.signature != signature:
+        customization_obj = (
+            db.query(InvoiceCustomization)
+            .filter(InvoiceCustomization.tenant_id == tenant_id, InvoiceCustomization.is_active == True)
+            .first()
+        )
+        customization = customization_dict(customization_obj)
+        logo = asset_store.get_image(
+            customization.get("company_logo_url") if customization else None, version=signature
+        )
+        context = build_render_context(customization, _plan_type(db, tenant_id), signature, logo)
+        _contexts.set(key, context)
+    else:
+        context.checked_at = time.monotonic()
+    return context
+
+
+def invalidate_render_context(tenant_id: Any) -> None:
+    """Drop the tenant's cached context and the logo resolved for it."""
+    context = _contexts.get(str(tenant_id))
+    if context is not None and context.customization:
+        asset_store.forget(context.customization.get("company_logo_url"), version=context.signature)
+    _contexts.delete(str(tenant_id))
+
+
+def cached_invoice_pdf(invoice, context: RenderContext, render: Callable[[Any, RenderContext], bytes]) -> bytes:
+    """``render(invoice, context)``, reused while the invoice and the context are unchanged."""
+    key = (str(invoice.id), invoice.updatedAt, context.version)
+    pdf_bytes = _pdfs.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = render(invoice, context)
+        _pdfs.set(key, pdf_bytes)
+    return pdf_bytes
+
+
+def invoice_document(invoice, context: RenderContext) -> Dict[str, Any]:
+    """What the pool needs to lay out ``invoice``: plain values, no ORM objects."""
+    return {
+        "tenant_id": str(invoice.tenant_id),
+        "signature": context.signature,
+        "plan_type": context.plan_type,
+        "customization": context.customization,
+        "logo": vars(context.logo) if context.logo else None,
+        "invoice": {name: getattr(invoice, name) for name in INVOICE_FIELDS if hasattr(invoice, name)},
+    }
+
+
+def document_context(document: Dict[str, Any]) -> RenderContext:
+    """The RenderContext of an invoice_document(), built once per pool process and version."""
+    signature = tuple(document["signature"])
+    key = (document["tenant_id"], signature, document["plan_type"])
+    context = _document_contexts.get(key)
+    if context is None:
+        logo = asset_store.StoredImage(**document["logo"]) if document["logo"] else None
+        context = build_render_context(document["customization"], document["plan_type"], signature, logo)
+        _document_contexts.set(key, context)
+    return context
@@ -0,0 +1,224 @@
+"""
+PDF rendering pool
+
+ReportLab layout is CPU-bound and holds the GIL, so rendering in a request
+handler stalls every other request on the worker. PDFs are instead laid out
+in a bounded pool of PDF_WORKERS processes. Each generator is split in two:
+a document builder that reads the database in the request and returns plain
+data (dicts, lists, strings, numbers and datetimes, never ORM objects), and
+a renderer that lays that data out in a pool process.
+
+At most PDF_MAX_PENDING renders are queued or running per API worker; past
+that render_pdf() answers 503 with Retry-After instead of queueing more
+work. Each document type has its own timeout (TIMEOUTS, queue wait
+included), after which the caller gets 504. A render that has already
+started by then is not left running: its pool is retired and the pool's
+processes killed (renders running or queued in it fail with 503), so hung renders
+cannot pile up and hold every worker. Queue wait and render time of
+every render are recorded in system_monitor under "pdf_rendering".
+
+Pool processes are spawned, not forked, so they never inherit the API
+worker's threads or database connections, and are replaced after
+PDF_MAX_TASKS_PER_CHILD renders. warm_up() starts them and imports the
+renderers at application startup, so the first request does not pay for it.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+INVOICE = "invoice"
+DELIVERY_NOTE = "delivery_note"
+JOB_CARD = "job_card"
+PRESCRIPTION = "prescription"
+CUSTOMER_INFO = "customer_info"
+
+TIMEOUTS = {
+    INVOICE: 20.0,
+    DELIVERY_NOTE: 10.0,
+    JOB_CARD: 15.0,
+    PRESCRIPTION: 10.0,
+    CUSTOMER_INFO: 20.0,
+}
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_PENDING = int(os.getenv("PDF_MAX_PENDING", str(PDF_WORKERS * 4)))
+PDF_MAX_TASKS_PER_CHILD = 500
+RETRY_AFTER_SECONDS = 5
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_pending = 0
+
+
+def _renderer(doc_type: str) -> Callable[[Dict[str, Any]], bytes]:
+    if doc_type == INVOICE:
+        from ..api.v1.pdf_generator_modern import render_invoice_document
+        return render_invoice_document
+    if doc_type == DELIVERY_NOTE:
+        from ..api.v1.pdf_generator_modern import render_delivery_note_pdf
+        return render_delivery_note_pdf
+    if doc_type == JOB_CARD:
+        from ..api.v1.job_card_pdf import render_job_card_pdf
+        return render_job_card_pdf
+    if doc_type == PRESCRIPTION:
+        from ..api.v1.prescription_pdf import render_prescription_pdf
+        return render_prescription_pdf
+    if doc_type == CUSTOMER_INFO:
+        from ..api.v1.customer_info_pdf import render_customer_info_pdf
+        return render_customer_info_pdf
+    raise ValueError(f"Unknown document type: {doc_type}")
+
+
+def _render_in_worker(doc_type: str, data: Dict[str, Any]) -> Tuple[bytes, float, float]:
+    """Runs in a pool process. Wall-clock times, comparable with the API worker's."""
+    started_at = time.time()
+    pdf_bytes = _renderer(doc_type)(data)
+    return pdf_bytes, started_at, time.time()
+
+
+def _import_renderers() -> None:
+    for doc_type in TIMEOUTS:
+        _renderer(doc_type)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=PDF_MAX_TASKS_PER_CHILD,
+        )
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor, kill: bool = False) -> None:
+    """
+    Called with _lock held after a process of ``pool`` died (e.g. killed for
+    memory), or with ``kill`` after a render in it timed out. Its queued work
+    is cancelled and its processes are told to exit, or killed; a pool that
+    has already been replaced is left alone.
+    """
+    global _pool
+    if _pool is not pool:
+        return
+    if kill:
+        logger.error("PDF render timed out while running, replacing the rendering pool")
+    else:
+        logger.error("PDF rendering pool is broken, replacing it")
+    _pool = None
+    if kill:
+        # The executor notices its dead processes, fails their work with
+        # BrokenProcessPool and shuts itself down. Calling shutdown() here
+        # as well races its manager thread replacing retired processes.
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+    else:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _record(doc_type: str, outcome: str, queue_wait: Optional[float] = None, render_time: Optional[float] = None) -> None:
+    from ..core.monitoring import system_monitor
+
+    entry = {"timestamp": datetime.utcnow().isoformat(), "document": doc_type, "outcome": outcome}
+    if queue_wait is not None:
+        entry["queue_wait"] = round(queue_wait, 4)
+    if render_time is not None:
+        entry["render_time"] = round(render_time, 4)
+    system_monitor.metrics_history["pdf_rendering"].append(entry)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="PDF rendering is busy, please retry shortly",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def _submit(doc_type: str, data: Dict[str, Any]) -> Tuple[ProcessPoolExecutor, Future]:
+    global _pending
+    submitted_at = time.time()
+
+    def done(future: Future) -> None:
+        global _pending
+        with _lock:
+            _pending -= 1
+        if future.cancelled():
+            _record(doc_type, "cancelled")
+        elif future.exception() is not None:
+            _record(doc_type, "failed")
+        else:
+            _, started_at, finished_at = future.result()
+            _record(doc_type, "rendered", started_at - submitted_at, finished_at - started_at)
+
+    with _lock:
+        if _pending >= PDF_MAX_PENDING:
+            _record(doc_type, "rejected")
+            raise _busy()
+        pool = _get_pool()
+        try:
+            future = pool.submit(_render_in_worker, doc_type, data)
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise _busy()
+        _pending += 1
+    future.add_done_callback(done)
+    return pool, future
+
+
+def render_pdf(doc_type: str, data: Dict[str, Any]) -> bytes:
+    """
+    Lay out ``data`` in the pool and wait for the PDF, blocking the calling
+    thread; call it from sync (threadpool) handlers, never on the event loop.
+    Raises HTTPException 503 when the pool is saturated and 504 when the
+    document type's timeout passes; renderer errors propagate as raised.
+    """
+    pool, future = _submit(doc_type, data)
+    try:
+        pdf_bytes, _, _ = future.result(timeout=TIMEOUTS[doc_type])
+    except FutureTimeoutError:
+        if not future.cancel():
+            # Already handed to a process, which may be hung: only killing it frees the slot.
+            with _lock:
+                _discard_pool(pool, kill=True)
+        raise HTTPException(status_code=504, detail="PDF rendering timed out")
+    except BrokenProcessPool:
+        with _lock:
+            _discard_pool(pool)
+        raise _busy()
+    except CancelledError:
+        raise _busy()  # queued in a pool that was retired meanwhile
+    return pdf_bytes
+
+
+def warm_up() -> None:
+    """Start the pool processes without waiting for them."""
+    with _lock:
+        pool = _get_pool()
+        for _ in range(PDF_WORKERS):
+            pool.submit(_import_renderers)
+
+
+def stats() -> Dict[str, Any]:
+    return {"workers": PDF_WORKERS, "maxPending": PDF_MAX_PENDING, "pending": _pending}
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,392 @@
+"""
+POS pricing engine
+
+Price lists and promotions are loaded once per tenant and compiled, per
+store, into a PricingIndex: dicts from product id to the rules that can
+touch that product, already in the order they are tried. Pricing a basket
+is then a dict lookup and a scan of a handful of rules per line, with no
+database access, so even thousands of active rules cost microseconds per
+basket line.
+
+Compiled rules are cached per process. At most every RECHECK_SECONDS the
+cache is compared with the tenant's rule tables (max updatedAt and row
+count, two small aggregates), so a change made through another worker
+applies within seconds; changes made through this one call
+invalidate_pricing() and apply at once. Category promotions are expanded
+to product ids when compiled, which is why entries are also rebuilt after
+MAX_AGE_SECONDS.
+"""
+
+import itertools
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import Product
+from ..core.cache import LRUCache
+from ..models.pos import POSPriceList, POSPriceListItem, POSPromotion
+
+PERCENT_OFF = "percent_off"
+AMOUNT_OFF = "amount_off"
+FIXED_PRICE = "fixed_price"
+BUY_X_GET_Y = "buy_x_get_y"
+PROMOTION_KINDS = (PERCENT_OFF, AMOUNT_OFF, FIXED_PRICE, BUY_X_GET_Y)
+
+RECHECK_SECONDS = 5
+MAX_AGE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class PriceRule:
+    price_list_id: str
+    name: str
+    price: float
+    min_quantity: int
+    priority: int
+    store_specific: bool
+    customer_group: Optional[str]
+    starts_at: Optional[datetime]
+    ends_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class PromotionRule:
+    id: str
+    name: str
+    kind: str
+    value: float
+    buy_quantity: int
+    get_quantity: int
+    min_quantity: int
+    priority: int
+    stackable: bool
+    customer_group: Optional[str]
+    starts_at: Optional[datetime]
+    ends_at: Optional[datetime]
+
+    def discount(self, quantity: int, unit_price: float) -> float:
+        """Discount on a line of ``quantity`` units at ``unit_price``."""
+        if quantity < self.min_quantity:
+            return 0.0
+        if self.kind == PERCENT_OFF:
+            return quantity * unit_price * self.value / 100
+        if self.kind == AMOUNT_OFF:
+            return quantity * min(self.value, unit_price)
+        if self.kind == FIXED_PRICE:
+            return quantity * max(unit_price - self.value, 0.0)
+        if self.kind == BUY_X_GET_Y and self.buy_quantity > 0 and self.get_quantity > 0:
+            free = (quantity // (self.buy_quantity + self.get_quantity)) * self.get_quantity
+            return free * unit_price * (self.value or 100.0) / 100
+        return 0.0
+
+
+# (productId, warehouseId, rule) and (warehouseId, productIds, categories, rule)
+PriceRow = Tuple[str, Optional[str], PriceRule]
+PromotionRow = Tuple[Optional[str], FrozenSet[str], Tuple[str, ...], PromotionRule]
+
+
+_NO_PROMOTIONS: Tuple[Tuple, Tuple] = ((), ())
+
+
+def _applies(rule, customer_group: Optional[str], at: datetime) -> bool:
+    return (
+        (rule.customer_group is None or rule.customer_group == customer_group)
+        and (rule.starts_at is None or rule.starts_at <= at)
+        and (rule.ends_at is None or at < rule.ends_at)
+    )
+
+
+@dataclass
+class PricedBasket:
+    items: List[Dict[str, Any]]
+    applied: List[Dict[str, Any]]
+
+
+class PricingIndex:
+    """The rules of one tenant in one store, keyed by product id."""
+
+    def __init__(
+        self,
+        prices: Dict[str, Tuple[PriceRule, ...]],
+        promotions: Dict[str, Tuple[Tuple[PromotionRule, ...], Tuple[PromotionRule, ...]]],
+        catalog_promotions: Tuple[Tuple[PromotionRule, ...], Tuple[PromotionRule, ...]],
+    ):
+        # promotions map a product to (exclusive, stackable), each by descending priority
+        self.prices = prices
+        self.promotions = promotions
+        self.catalog_promotions = catalog_promotions
+
+    def _line_promotions(
+        self, product_id: str, quantity: int, unit_price: float, customer_group: Optional[str], at: datetime
+    ) -> List[Tuple[PromotionRule, float]]:
+        exclusive, stackable = self.promotions.get(product_id, _NO_PROMOTIONS)
+        best = None
+        for rules in (exclusive, self.catalog_promotions[0]):
+            for rule in rules:
+                if best is not None and rule.priority < best[0].priority:
+                    break  # sorted by priority, so nothing further can win
+                if not _applies(rule, customer_group, at):
+                    continue
+                amount = rule.discount(quantity, unit_price)
+                if amount >= 0.005 and (best is None or (rule.priority, amount) > (best[0].priority, best[1])):
+                    best = (rule, amount)
+        applied = [best] if best else []
+        for rule in itertools.chain(stackable, self.catalog_promotions[1]):
+            if _applies(rule, customer_group, at):
+                amount = rule.discount(quantity, unit_price)
+                if amount >= 0.005:
+                    applied.append((rule, amount))
+        return applied
+
+    def price_basket(
+        self, items: Sequence, customer_group: Optional[str] = None, at: Optional[datetime] = None
+    ) -> PricedBasket:
+        """
+        Reprice ``items`` (POSTransactionItem or dicts). A line no rule
+        touches is returned as sent; otherwise unitPrice, discount and total
+        are recomputed and every rule used is listed in ``applied``.
+        """
+        at = at or datetime.utcnow()
+        lines = []
+        applied = []
+        for number, item in enumerate(items, start=1):
+            line = item.dict() if hasattr(item, "dict") else item
+            lines.append(line)
+            product_id = str(line.get("productId") or "")
+            quantity = int(line.get("quantity") or 0)
+            if not product_id or quantity <= 0:
+                continue
+
+            unit_price = float(line.get("unitPrice") or 0.0)
+            price_rule = None
+            for rule in self.prices.get(product_id, ()):
+                if quantity >= rule.min_quantity and _applies(rule, customer_group, at):
+                    price_rule = rule
+                    unit_price = rule.price
+                    break
+            promotions = self._line_promotions(product_id, quantity, unit_price, customer_group, at)
+            if price_rule is None and not promotions:
+                continue
+
+            line = lines[-1] = dict(line)
+            manual_discount = float(line.get("discount") or 0.0)
+            if price_rule is not None:
+                gross = round(unit_price * quantity - manual_discount, 2)
+                line["unitPrice"] = unit_price
+                applied.append({
+                    "kind": "price_list",
+                    "priceListId": price_rule.price_list_id,
+                    "name": price_rule.name,
+                    "lineNumber": number,
+                    "productId": product_id,
+                    "unitPrice": unit_price,
+                })
+            else:
+                gross = float(line.get("total") or 0.0)
+
+            promotion_discount = 0.0
+            for rule, amount in promotions:
+                amount = min(round(amount, 2), round(gross - promotion_discount, 2))
+                if amount <= 0:
+                    break
+                promotion_discount += amount
+                applied.append({
+                    "kind": rule.kind,
+                    "promotionId": rule.id,
+                    "name": rule.name,
+                    "lineNumber": number,
+                    "productId": product_id,
+                    "discount": amount,
+                })
+            line["discount"] = round(manual_discount + promotion_discount, 2)
+            line["total"] = round(gross - promotion_discount, 2)
+        return PricedBasket(items=lines, applied=applied)
+
+
+def compile_index(
+    price_rows: Iterable[PriceRow],
+    promotion_rows: Iterable[PromotionRow],
+    category_products: Dict[str, Sequence[str]],
+    store_id: Optional[str] = None,
+) -> PricingIndex:
+    """Index the rules that apply in ``store_id`` (chain-wide rules only when None)."""
+    prices: Dict[str, List[PriceRule]] = {}
+    for product_id, warehouse_id, rule in price_rows:
+        if warehouse_id is None or warehouse_id == store_id:
+            prices.setdefault(product_id, []).append(rule)
+
+    promotions: Dict[str, List[PromotionRule]] = {}
+    catalog = []
+    for warehouse_id, product_ids, categories, rule in promotion_rows:
+        if warehouse_id is not None and warehouse_id != store_id:
+            continue
+        if not product_ids and not categories:
+            catalog.append(rule)
+            continue
+        targets = set(product_ids)
+        for category in categories:
+            targets.update(category_products.get(category, ()))
+        for product_id in targets:
+            promotions.setdefault(product_id, []).append(rule)
+
+    # First match wins: priority, then store-specific over chain-wide, then the highest tier.
+    def price_order(rule):
+        return (-rule.priority, not rule.store_specific, -rule.min_quantity, rule.price)
+
+    def split(rules):
+        rules = sorted(rules, key=lambda rule: -rule.priority)
+        return (
+            tuple(rule for rule in rules if not rule.stackable),
+            tuple(rule for rule in rules if rule.stackable),
+        )
+
+    return PricingIndex(
+        {pid: tuple(sorted(rules, key=price_order)) for pid, rules in prices.items()},
+        {pid: split(rules) for pid, rules in promotions.items()},
+        split(catalog),
+    )
+
+
+@dataclass
+class _TenantRules:
+    signature: Tuple
+    checked_at: float
+    price_rows: List[PriceRow]
+    promotion_rows: List[PromotionRow]
+    category_products: Dict[str, List[str]]
+    stores: Dict[Optional[str], PricingIndex] = field(default_factory=dict)
+    store_ids: FrozenSet[str] = field(init=False)
+
+    def __post_init__(self):
+        self.store_ids = frozenset(
+            itertools.chain(
+                (warehouse_id for _, warehouse_id, _ in self.price_rows if warehouse_id is not None),
+                (warehouse_id for warehouse_id, _, _, _ in self.promotion_rows if warehouse_id is not None),
+            )
+        )
+
+    def for_store(self, store_id: Optional[str]) -> PricingIndex:
+        # A store no rule names gets the chain-wide rules, so unknown or bogus
+        # warehouse ids share one index and ``stores`` stays bounded by the
+        # warehouses the tenant's rules mention.
+        if store_id not in self.store_ids:
+            store_id = None
+        index = self.stores.get(store_id)
+        if index is None:
+            index = compile_index(self.price_rows, self.promotion_rows, self.category_products, store_id)
+            self.stores[store_id] = index
+        return index
+
+
+_tenants = LRUCache(maxsize=256, default_ttl=MAX_AGE_SECONDS)
+
+
+def _signature(db: Session, tenant_id: Any) -> Tuple:
+    lists = (
+        db.query(func.max(POSPriceList.updatedAt), func.count(POSPriceList.id))
+        .filter(POSPriceList.tenant_id == tenant_id)
+        .one()
+    )
+    promotions = (
+        db.query(func.max(POSPromotion.updatedAt), func.count(POSPromotion.id))
+        .filter(POSPromotion.tenant_id == tenant_id)
+        .one()
+    )
+    return tuple(lists) + tuple(promotions)
+
+
+def _optional_str(value) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def _load(db: Session, tenant_id: Any, signature: Tuple) -> _TenantRules:
+    price_rows = [
+        (
+            str(row.productId),
+            _optional_str(row.warehouseId),
+            PriceRule(
+                price_list_id=str(row.id),
+                name=row.name,
+                price=float(row.price),
+                min_quantity=int(row.minQuantity or 1),
+                priority=int(row.priority or 0),
+                store_specific=row.warehouseId is not None,
+                customer_group=row.customerGroup,
+                starts_at=row.startsAt,
+                ends_at=row.endsAt,
+            ),
+        )
+        for row in db.query(
+            POSPriceListItem.productId,
+            POSPriceListItem.price,
+            POSPriceListItem.minQuantity,
+            POSPriceList.id,
+            POSPriceList.name,
+            POSPriceList.warehouseId,
+            POSPriceList.customerGroup,
+            POSPriceList.priority,
+            POSPriceList.startsAt,
+            POSPriceList.endsAt,
+        )
+        .join(POSPriceList, POSPriceList.id == POSPriceListItem.priceListId)
+        .filter(POSPriceList.tenant_id == tenant_id, POSPriceList.isActive.is_(True))
+    ]
+
+    promotion_rows = []
+    for promotion in db.query(POSPromotion).filter(
+        POSPromotion.tenant_id == tenant_id, POSPromotion.isActive.is_(True)
+    ):
+        rule = PromotionRule(
+            id=str(promotion.id),
+            name=promotion.name,
+            kind=promotion.kind,
+            value=float(promotion.value or 0.0),
+            buy_quantity=int(promotion.buyQuantity or 0),
+            get_quantity=int(promotion.getQuantity or 0),
+            min_quantity=int(promotion.minQuantity or 1),
+            priority=int(promotion.priority or 0),
+            stackable=bool(promotion.stackable),
+            customer_group=promotion.customerGroup,
+            starts_at=promotion.startsAt,
+            ends_at=promotion.endsAt,
+        )
+        promotion_rows.append((
+            _optional_str(promotion.warehouseId),
+            frozenset(str(pid) for pid in promotion.productIds or ()),
+            tuple(promotion.categories or ()),
+            rule,
+        ))
+
+    category_products: Dict[str, List[str]] = {}
+    categories = {category for _, _, row_categories, _ in promotion_rows for category in row_categories}
+    if categories:
+        for product_id, category in db.query(Product.id, Product.category).filter(
+            Product.tenant_id == tenant_id, Product.category.in_(categories)
+        ):
+            category_products.setdefault(category, []).append(str(product_id))
+
+    return _TenantRules(signature, time.monotonic(), price_rows, promotion_rows, category_products)
+
+
+def get_pricing_index(db: Session, tenant_id: Any, store_id: Optional[str] = None) -> PricingIndex:
+    """The compiled rules of ``tenant_id`` in ``store_id``, rebuilt when the rule tables changed."""
+    key = str(tenant_id)
+    rules = _tenants.get(key)
+    if rules is not None and time.monotonic() - rules.checked_at < RECHECK_SECONDS:
+        return rules.for_store(store_id)
+
+    signature = _signature(db, tenant_id)
+    if rules is None or rules.signature != signature:
+        rules = _load(db, tenant_id, signature)
+        _tenants.set(key, rules)
+    else:
+        rules.checked_at = time.monotonic()
+    return rules.for_store(store_id)
+
+
+def invalidate_pricing(tenant_id: Any) -> None:
+    _tenants.delete(str(tenant_id))
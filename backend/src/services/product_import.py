@@ -0,0 +1,593 @@
+"""
+Bulk product catalogue import
+
+A CSV or XLSX file is stored with a ``product_import_jobs`` row and processed
+in chunks of ``IMPORT_CHUNK_SIZE`` rows. Each chunk:
+
+- validates its rows against in-memory maps of the tenant's suppliers and
+  categories (loaded once per run; unknown categories are created);
+- locks the products whose SKUs already exist, updates them with one
+  ``UPDATE ... FROM (VALUES ...)`` and inserts the rest with one
+  ``INSERT ... ON CONFLICT (sku) DO UPDATE``;
+- books opening stock as ``adjustment`` movements through
+  ``apply_movement_balances`` (balances, product stock, valuation and
+  reorder alerts in bulk) and inserts the movements in one statement;
+- commits together with the job's counters and its row checkpoint.
+
+The file is streamed, never loaded whole. A run that dies is resumed from
+the last committed chunk; re-running a finished file changes nothing, as
+opening stock is booked as the difference to the product's current stock.
+
+Columns are matched by header name (see ``FIELD_ALIASES``); only ``sku`` is
+required. New products also need a name, cost price and sale price;
+existing ones keep every value the file leaves empty, so a two-column file
+of SKU and price is a price update.
+"""
+
+import csv
+import logging
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import ProductImportJob, StockMovement, Warehouse
+from .inventory_dashboard import invalidate_inventory_dashboard
+from .stock_balances import apply_movement_balances
+
+logger = logging.getLogger(__name__)
+
+IMPORT_DIR = os.path.join("uploads", "product_imports")
+IMPORT_FORMATS = ("csv", "xlsx")
+IMPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 5000
+STALE_AFTER = timedelta(minutes=5)
+PRODUCT_IMPORT_REFERENCE = "ProductImport"
+
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "sku": ("sku", "product code", "item code", "code"),
+    "name": ("name", "product name", "item name", "title"),
+    "barcode": ("barcode", "ean", "upc"),
+    "description": ("description",),
+    "category": ("category",),
+    "brand": ("brand",),
+    "productType": ("product type", "producttype", "type"),
+    "unit": ("unit", "uom"),
+    "packSize": ("pack size", "packsize"),
+    "costPerUnitPrice": ("cost", "cost price", "costperunitprice", "unit cost", "purchase price"),
+    "salePrice": ("sale price", "saleprice", "price", "selling price", "retail price"),
+    "minStockLevel": ("min stock", "min stock level", "minstocklevel", "reorder level"),
+    "maxStockLevel": ("max stock", "max stock level", "maxstocklevel"),
+    "supplier": ("supplier", "supplier name", "supplier id", "supplierid", "supplier code"),
+    "openingStock": ("opening stock", "stock", "stock quantity", "stockquantity", "quantity", "qty", "on hand"),
+    "isActive": ("active", "is active", "isactive"),
+}
+_ALIAS_TO_FIELD = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+_TEXT_FIELDS = ("name", "barcode", "description", "category", "brand", "productType", "unit")
+_FLOAT_FIELDS = ("costPerUnitPrice", "salePrice")
+_INT_FIELDS = ("packSize", "minStockLevel", "maxStockLevel", "openingStock")
+
+# (column, SQL type) of the product values a row can carry
+_PRODUCT_COLUMNS = (
+    ("name", "varchar"), ("barcode", "varchar"), ("description", "text"), ("category", "varchar"),
+    ("brand", "varchar"), ("productType", "varchar"), ("unit", "varchar"), ("packSize", "integer"),
+    ("costPerUnitPrice", "double precision"), ("salePrice", "double precision"),
+    ("minStockLevel", "integer"), ("maxStockLevel", "integer"), ("supplierId", "uuid"), ("isActive", "boolean"),
+)
+
+
+class ProductImportError(ValueError):
+    pass
+
+
+# ------------------------------------------------------------------ #
+# Reading
+# ------------------------------------------------------------------ #
+def detect_import_format(file_name: Optional[str]) -> str:
+    extension = os.path.splitext(file_name or "")[1].lower().lstrip(".")
+    if extension not in IMPORT_FORMATS:
+        raise ProductImportError("File must be CSV or XLSX")
+    return extension
+
+
+def _header_fields(header: List[Any]) -> Dict[int, str]:
+    fields = {}
+    for index, cell in enumerate(header):
+        key = re.sub(r"[\s_\-]+", " ", str(cell or "")).strip().lower()
+        field = _ALIAS_TO_FIELD.get(key) or _ALIAS_TO_FIELD.get(key.replace(" ", ""))
+        if field and field not in fields.values():
+            fields[index] = field
+    if "sku" not in fields.values():
+        raise ProductImportError("The file needs a SKU column")
+    return fields
+
+
+def _csv_rows(path: str) -> Iterator[List[Any]]:
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        sample = handle.read(4096)
+        handle.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(handle, dialect)
+
+
+def _xlsx_rows(path: str) -> Iterator[List[Any]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(path: str, file_format: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(file row number, {field: raw value})`` for every non-empty data row."""
+    reader = _csv_rows(path) if file_format == "csv" else _xlsx_rows(path)
+    fields = None
+    for row_number, raw in enumerate(reader, start=1):
+        if not any(cell not in (None, "") and str(cell).strip() for cell in raw):
+            continue
+        if fields is None:
+            fields = _header_fields(raw)
+            continue
+        yield row_number, {field: raw[index] for index, field in fields.items() if index < len(raw)}
+    if fields is None:
+        raise ProductImportError("The file is empty")
+
+
+def import_file_fields(path: str, file_format: str) -> List[str]:
+    """Fields present in the file's header."""
+    reader = _csv_rows(path) if file_format == "csv" else _xlsx_rows(path)
+    for raw in reader:
+        if any(cell not in (None, "") and str(cell).strip() for cell in raw):
+            return list(_header_fields(raw).values())
+    raise ProductImportError("The file is empty")
+
+
+def count_import_rows(path: str, file_format: str) -> int:
+    return sum(1 for _ in iter_import_rows(path, file_format))
+
+
+# ------------------------------------------------------------------ #
+# Validation
+# ------------------------------------------------------------------ #
+def _clean(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # spreadsheet cells hold numeric SKUs and barcodes as floats
+    cleaned = " ".join(str(value).split())
+    return cleaned or None
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    cleaned = _clean(value)
+    if cleaned is None:
+        return None
+    cleaned = re.sub(r"[^\d.\-]", "", cleaned.replace(",", ""))
+    return float(cleaned)
+
+
+def _boolean(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    cleaned = (_clean(value) or "").lower()
+    if not cleaned:
+        return None
+    if cleaned in ("1", "true", "yes", "y", "active"):
+        return True
+    if cleaned in ("0", "false", "no", "n", "inactive"):
+        return False
+    raise ValueError(f"Invalid active flag: {value}")
+
+
+class _Lookups:
+    """Per-run maps of the tenant's suppliers and product categories."""
+
+    def __init__(self, db: Session, tenant_id: str):
+        from ..config.hrm_models import Supplier
+        from ..models.inventory_models import ProductCategory, WORKSHOP_CATEGORIES
+        from ..models.pos import PosProductCategory
+
+        self.tenant_id = tenant_id
+        self.suppliers: Dict[str, uuid.UUID] = {}
+        for supplier_id, name, code in db.query(Supplier.id, Supplier.name, Supplier.code).filter(
+            Supplier.tenant_id == tenant_id
+        ):
+            self.suppliers[str(supplier_id)] = supplier_id
+            if name:
+                self.suppliers.setdefault(name.strip().lower(), supplier_id)
+            if code:
+                self.suppliers.setdefault(code.strip().lower(), supplier_id)
+
+        names = [c.value for c in ProductCategory] + list(WORKSHOP_CATEGORIES)
+        names += [name for (name,) in db.query(PosProductCategory.name).filter(PosProductCategory.tenant_id == tenant_id)]
+        self.categories: Dict[str, str] = {}
+        for name in names:
+            self.categories.setdefault(name.strip().lower(), name)
+        self.new_categories: Dict[str, str] = {}
+
+    def supplier(self, value: Any) -> Optional[uuid.UUID]:
+        key = _clean(value)
+        if key is None:
+            return None
+        supplier_id = self.suppliers.get(key.lower())
+        if supplier_id is None:
+            raise ValueError(f"Unknown supplier: {key}")
+        return supplier_id
+
+    def category(self, value: Any) -> Optional[str]:
+        name = _clean(value)
+        if name is None:
+            return None
+        key = name.lower()
+        if key not in self.categories:
+            self.categories[key] = name
+            self.new_categories[key] = name
+        return self.categories[key]
+
+    def create_new_categories(self, db: Session) -> None:
+        if not self.new_categories:
+            return
+        db.execute(text("""
+            INSERT INTO pos_product_categories (id, tenant_id, name, "createdAt")
+            SELECT gen_random_uuid(), CAST(:tenant_id AS uuid), name, now()
+            FROM unnest(CAST(:names AS varchar[])) AS name
+            ON CONFLICT (tenant_id, name) DO NOTHING
+        """), {"tenant_id": str(self.tenant_id), "names": list(self.new_categories.values())})
+        self.new_categories = {}
+
+
+def validate_import_row(raw: Dict[str, Any], lookups: _Lookups) -> Dict[str, Any]:
+    """Parse one row into product values; raises ValueError with a readable message."""
+    sku = _clean(raw.get("sku"))
+    if not sku:
+        raise ValueError("SKU is required")
+    row: Dict[str, Any] = {"sku": sku}
+    for field in _TEXT_FIELDS:
+        row[field] = _clean(raw.get(field))
+    for field in _FLOAT_FIELDS + _INT_FIELDS:
+        try:
+            number = _number(raw.get(field))
+        except ValueError:
+            raise ValueError(f"{field} is not a number: {raw.get(field)}")
+        if number is not None and number < 0:
+            raise ValueError(f"{field} cannot be negative")
+        if number is not None and field in _INT_FIELDS:
+            if number != int(number):
+                raise ValueError(f"{field} must be a whole number")
+            number = int(number)
+        row[field] = number
+    row["category"] = lookups.category(raw.get("category"))
+    row["supplierId"] = lookups.supplier(raw.get("supplier"))
+    row["isActive"] = _boolean(raw.get("isActive"))
+    if row["minStockLevel"] is not None and row["maxStockLevel"] is not None and row["maxStockLevel"] < row["minStockLevel"]:
+        raise ValueError("maxStockLevel is below minStockLevel")
+    return row
+
+
+# ------------------------------------------------------------------ #
+# Writing
+# ------------------------------------------------------------------ #
+def _values_clause(rows: List[Dict[str, Any]], columns: List[Tuple[str, str]], prefix: str) -> Tuple[str, Dict[str, Any]]:
+    params: Dict[str, Any] = {}
+    tuples = []
+    for i, row in enumerate(rows):
+        cells = []
+        for j, (column, sql_type) in enumerate(columns):
+            name = f"{prefix}{i}_{j}"
+            value = row.get(column)
+            params[name] = str(value) if isinstance(value, uuid.UUID) else value
+            cells.append(f"CAST(:{name} AS {sql_type})")
+        tuples.append(f"({', '.join(cells)})")
+    return ", ".join(tuples), params
+
+
+def _column_list(columns) -> str:
+    return ", ".join(f'"{column}"' for column, _ in columns)
+
+
+def _update_existing(db: Session, rows: List[Dict[str, Any]]) -> None:
+    columns = [("id", "uuid")] + list(_PRODUCT_COLUMNS)
+    values_sql, params = _values_clause(rows, columns, "u")
+    assignments = ", ".join(f'"{column}" = COALESCE(v."{column}", p."{column}")' for column, _ in _PRODUCT_COLUMNS)
+    db.execute(text(f"""
+        UPDATE products p
+        SET {assignments}, "updatedAt" = now()
+        FROM (VALUES {values_sql}) AS v({_column_list(columns)})
+        WHERE p.id = v.id
+    """), params)
+
+
+def _insert_new(db: Session, tenant_id: str, rows: List[Dict[str, Any]]) -> List[Any]:
+    for row in rows:
+        row["id"] = uuid.uuid4()
+        row["tenant_id"] = tenant_id
+    columns = [("id", "uuid"), ("tenant_id", "uuid"), ("sku", "varchar")] + list(_PRODUCT_COLUMNS)
+    values_sql, params = _values_clause(rows, columns, "i")
+    updates = ", ".join(
+        f'"{column}" = COALESCE(EXCLUDED."{column}", products."{column}")' for column, _ in _PRODUCT_COLUMNS
+    )
+    # Defaults for what the file leaves empty; ON CONFLICT covers a SKU created
+    # by the same tenant since the chunk was read.
+    return db.execute(text(f"""
+        INSERT INTO products
+            (id, tenant_id, sku, {_column_list(_PRODUCT_COLUMNS)}, "stockQuantity", "createdAt", "updatedAt")
+        SELECT v.id, v.tenant_id, v.sku, v.name, v.barcode, v.description, COALESCE(v.category, 'other'),
+               v.brand, v."productType", COALESCE(v.unit, 'piece'), COALESCE(v."packSize", 1),
+               v."costPerUnitPrice", v."salePrice", COALESCE(v."minStockLevel", 0), v."maxStockLevel",
+               v."supplierId", COALESCE(v."isActive", true), 0, now(), now()
+        FROM (VALUES {values_sql}) AS v({_column_list(columns)})
+        ON CONFLICT (sku) DO UPDATE
+        SET {updates}, "updatedAt" = now()
+        WHERE products.tenant_id = EXCLUDED.tenant_id
+        RETURNING id, sku, (xmax = 0) AS inserted, "stockQuantity", "costPerUnitPrice"
+    """), params).fetchall()
+
+
+def _import_chunk(
+    db: Session,
+    job: ProductImportJob,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    lookups: _Lookups,
+) -> Dict[str, Any]:
+    tenant_id = str(job.tenant_id)
+    errors: List[Dict[str, Any]] = []
+    by_sku: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    for row_number, raw in chunk:
+        try:
+            row = validate_import_row(raw, lookups)
+        except ValueError as e:
+            errors.append({"row": row_number, "sku": _clean(raw.get("sku")), "error": str(e)})
+            continue
+        previous = by_sku.get(row["sku"])
+        if previous:
+            errors.append({"row": previous[0], "sku": row["sku"], "error": f"Duplicate SKU, row {row_number} used"})
+        by_sku[row["sku"]] = (row_number, row)
+    lookups.create_new_categories(db)
+
+    existing = {}
+    if by_sku:
+        existing = {
+            row.sku: row for row in db.execute(text("""
+                SELECT id, sku, tenant_id, "stockQuantity", "costPerUnitPrice"
+                FROM products
+                WHERE sku = ANY(CAST(:skus AS varchar[]))
+                ORDER BY id
+                FOR UPDATE
+            """), {"skus": list(by_sku)}).fetchall()
+        }
+
+    updates, inserts = [], []
+    stock_rows: List[Tuple[Any, int, int, float]] = []  # (product id, current stock, target, unit cost)
+    for sku, (row_number, row) in by_sku.items():
+        current = existing.get(sku)
+        if current is not None and str(current.tenant_id) != tenant_id:
+            errors.append({"row": row_number, "sku": sku, "error": "SKU is already used by another organisation"})
+        elif current is not None:
+            row["id"] = current.id
+            updates.append(row)
+            if row["openingStock"] is not None:
+                cost = row["costPerUnitPrice"] if row["costPerUnitPrice"] is not None else current.costPerUnitPrice
+                stock_rows.append((current.id, int(current.stockQuantity or 0), row["openingStock"], cost))
+        elif not row["name"] or row["costPerUnitPrice"] is None or row["salePrice"] is None:
+            errors.append({"row": row_number, "sku": sku, "error": "New products need a name, cost price and sale price"})
+        else:
+            inserts.append(row)
+
+    if updates:
+        _update_existing(db, updates)
+    created = updated_by_race = 0
+    if inserts:
+        returned = {row.sku: row for row in _insert_new(db, tenant_id, inserts)}
+        for row in inserts:
+            result = returned.get(row["sku"])
+            if result is None:
+                errors.append({"row": by_sku[row["sku"]][0], "sku": row["sku"], "error": "SKU is already used by another organisation"})
+                continue
+            if result.inserted:
+                created += 1
+            else:
+                updated_by_race += 1
+            if row["openingStock"] is not None:
+                stock_rows.append((result.id, int(result.stockQuantity or 0), row["openingStock"], result.costPerUnitPrice))
+
+    movements = _opening_movements(job, stock_rows)
+    if movements:
+        apply_movement_balances(db, [(movement, 1) for movement in movements], update_products=True)
+        db.execute(insert(StockMovement), movements)
+
+    return {
+        "created": created,
+        "updated": len(updates) + updated_by_race,
+        "failed": len({error["row"] for error in errors}),
+        "movements": len(movements),
+        "errors": sorted(errors, key=lambda error: error["row"]),
+    }
+
+
+def _opening_movements(job: ProductImportJob, stock_rows) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    movements = []
+    for product_id, current, target, unit_cost in stock_rows:
+        delta = target - current
+        if delta == 0:
+            continue
+        movements.append({
+            "id": uuid.uuid4(),
+            "tenant_id": job.tenant_id,
+            "productId": str(product_id),
+            "product_uuid": product_id,
+            "warehouseId": job.warehouseId,
+            "movementType": "adjustment",
+            "quantity": delta,
+            "unitCost": float(unit_cost or 0.0),
+            "referenceNumber": str(job.id),
+            "referenceType": PRODUCT_IMPORT_REFERENCE,
+            "notes": "Opening stock from product import",
+            "status": "completed",
+            "createdBy": job.createdBy,
+            "createdAt": now,
+            "updatedAt": now,
+        })
+    return movements
+
+
+# ------------------------------------------------------------------ #
+# Jobs
+# ------------------------------------------------------------------ #
+def default_warehouse_id(db: Session, tenant_id: str) -> Optional[uuid.UUID]:
+    row = (
+        db.query(Warehouse.id)
+        .filter(Warehouse.tenant_id == tenant_id)
+        .order_by(Warehouse.isActive.desc(), Warehouse.createdAt.asc())
+        .first()
+    )
+    return row[0] if row else None
+
+
+def create_import_job(
+    db: Session,
+    tenant_id: str,
+    user_id: str,
+    file_name: str,
+    stream,
+    warehouse_id: Optional[str] = None,
+) -> ProductImportJob:
+    """Store the uploaded file and register a pending job. Commits."""
+    file_format = detect_import_format(file_name)
+    job_id = uuid.uuid4()
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_DIR, f"{job_id}.{file_format}")
+    with open(path, "wb") as out:
+        while True:
+            block = stream.read(1024 * 1024)
+            if not block:
+                break
+            out.write(block)
+
+    try:
+        fields = import_file_fields(path, file_format)
+    except Exception as e:
+        os.remove(path)
+        raise ProductImportError(str(e) if isinstance(e, ProductImportError) else f"Could not read file: {e}")
+    if "openingStock" in fields and not warehouse_id:
+        warehouse_id = default_warehouse_id(db, tenant_id)
+        if warehouse_id is None:
+            os.remove(path)
+            raise ProductImportError("Opening stock needs a warehouse; create one first")
+
+    job = ProductImportJob(
+        id=job_id,
+        tenant_id=tenant_id,
+        createdBy=user_id,
+        warehouseId=warehouse_id,
+        fileName=file_name,
+        filePath=path,
+        fileFormat=file_format,
+        status="pending",
+        errors=[],
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _claim(db: Session, job_id: Any) -> bool:
+    now = datetime.utcnow()
+    claimed = db.execute(text("""
+        UPDATE product_import_jobs
+        SET status = 'running', message = NULL, "updatedAt" = :now
+        WHERE id = CAST(:job_id AS uuid)
+          AND (status IN ('pending', 'failed') OR (status = 'running' AND "updatedAt" < :stale_before))
+        RETURNING id
+    """), {"job_id": str(job_id), "now": now, "stale_before": now - STALE_AFTER}).fetchone()
+    db.commit()
+    return claimed is not None
+
+
+def run_import_job(job_id: Any, session_factory: Optional[Callable[[], Session]] = None) -> None:
+    """
+    Process (or resume) an import job in its own session. Returns quietly when
+    another worker is running it. Progress is committed after every chunk.
+    """
+    if session_factory is None:
+        from ..config.database_config import SessionLocal
+
+        session_factory = SessionLocal
+    db = session_factory()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.get(ProductImportJob, job_id if isinstance(job_id, uuid.UUID) else uuid.UUID(str(job_id)))
+        if job.totalRows is None:
+            job.totalRows = count_import_rows(job.filePath, job.fileFormat)
+            db.commit()
+
+        lookups = _Lookups(db, str(job.tenant_id))
+        rows = islice(iter_import_rows(job.filePath, job.fileFormat), job.processedRows, None)
+        while True:
+            chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            result = _import_chunk(db, job, chunk, lookups)
+            job.processedRows += len(chunk)
+            job.createdCount += result["created"]
+            job.updatedCount += result["updated"]
+            job.failedCount += result["failed"]
+            job.movementCount += result["movements"]
+            reported = job.errors or []
+            if result["errors"] and len(reported) < MAX_REPORTED_ERRORS:
+                job.errors = reported + result["errors"][:MAX_REPORTED_ERRORS - len(reported)]
+            job.updatedAt = datetime.utcnow()
+            db.commit()
+
+        job.status = "completed"
+        job.finishedAt = datetime.utcnow()
+        db.commit()
+        invalidate_inventory_dashboard(job.tenant_id)
+    except Exception as e:
+        db.rollback()
+        logger.error("Product import %s failed: %s", job_id, e, exc_info=True)
+        db.execute(text("""
+            UPDATE product_import_jobs SET status = 'failed', message = :message, "updatedAt" = now()
+            WHERE id = CAST(:job_id AS uuid)
+        """), {"job_id": str(job_id), "message": str(e)[:1000]})
+        db.commit()
+    finally:
+        db.close()
+
+
+def serialize_import_job(job: ProductImportJob, include_errors: bool = True) -> Dict[str, Any]:
+    total = job.totalRows
+    return {
+        "id": str(job.id),
+        "fileName": job.fileName,
+        "status": job.status,
+        "totalRows": total,
+        "processedRows": job.processedRows,
+        "progress": round(job.processedRows * 100.0 / total, 1) if total else (100.0 if job.status == "completed" else 0.0),
+        "createdCount": job.createdCount,
+        "updatedCount": job.updatedCount,
+        "failedCount": job.failedCount,
+        "movementCount": job.movementCount,
+        "warehouseId": str(job.warehouseId) if job.warehouseId else None,
+        "message": job.message,
+        "errors": (job.errors or []) if include_errors else None,
+        "createdAt": job.createdAt,
+        "updatedAt": job.updatedAt,
+        "finishedAt": job.finishedAt,
+    }
@@ -0,0 +1,211 @@
+"""
+Product search
+
+Every product carries ``searchDocument``: name, SKU, barcode, brand,
+category, type and supplier name, lower-cased with whitespace collapsed. A
+trigger keeps it current on product writes (whatever path they take: ORM,
+bulk import, raw SQL) and when a supplier is renamed. Two GIN indexes
+serve the search:
+
+- trigram (``pg_trgm``) for substring matches of three or more characters;
+- ``to_tsvector('simple', ...)`` for word-prefix matches, which also cover
+  one- and two-character input and multi-word queries in any order.
+
+Results are ranked exact barcode/SKU first, then name prefix, then word
+prefix, then other substring hits, by trigram similarity within a tier.
+The total is counted in the same statement.
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event, func, literal_column, or_, text
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import Product
+
+MIN_SUBSTRING_LENGTH = 3  # shortest term the trigram index can serve
+_SIMPLE = literal_column("'simple'")  # a literal, so expressions match idx_products_search_tsv
+
+# Same objects as the add_product_search migration, for databases built
+# with create_all.
+PRODUCT_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    r"""
+    CREATE OR REPLACE FUNCTION product_search_document(
+        p_name text, p_sku text, p_barcode text, p_brand text, p_category text, p_type text, p_supplier uuid
+    ) RETURNS text LANGUAGE sql STABLE AS $$
+        SELECT lower(btrim(regexp_replace(
+            concat_ws(' ', p_name, p_sku, p_barcode, p_brand, p_category, p_type,
+                      (SELECT s.name FROM suppliers s WHERE s.id = p_supplier)),
+            '\s+', ' ', 'g'
+        )))
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION products_search_document_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW."searchDocument" := product_search_document(
+            NEW.name, NEW.sku, NEW.barcode, NEW.brand, NEW.category, NEW."productType", NEW."supplierId"
+        );
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION suppliers_search_document_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.name IS DISTINCT FROM OLD.name THEN
+            UPDATE products
+            SET "searchDocument" = product_search_document(
+                name, sku, barcode, brand, category, "productType", "supplierId"
+            )
+            WHERE "supplierId" = NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS products_search_document ON products",
+    """
+    CREATE TRIGGER products_search_document
+    BEFORE INSERT OR UPDATE OF name, sku, barcode, brand, category, "productType", "supplierId" ON products
+    FOR EACH ROW EXECUTE FUNCTION products_search_document_trigger()
+    """,
+    "DROP TRIGGER IF EXISTS suppliers_search_document ON suppliers",
+    """
+    CREATE TRIGGER suppliers_search_document
+    AFTER UPDATE OF name ON suppliers
+    FOR EACH ROW EXECUTE FUNCTION suppliers_search_document_trigger()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_products_search_trgm
+    ON products USING gin ("searchDocument" gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_products_search_tsv
+    ON products USING gin (to_tsvector('simple', coalesce("searchDocument", '')))
+    """,
+)
+
+
+@event.listens_for(Product.__table__, "after_create")
+def _create_search_objects(target, connection, **kw):
+    for statement in PRODUCT_SEARCH_DDL:
+        connection.execute(text(statement))
+
+
+_SEARCH_SQL = """
+    WITH matches AS (
+        SELECT p.id, p.name,
+               CASE
+                   WHEN p.barcode = :raw OR p.sku = :raw THEN 0
+                   WHEN lower(p.barcode) = :term OR lower(p.sku) = :term THEN 1
+                   WHEN lower(p.name) LIKE :prefix ESCAPE '\\' THEN 2
+                   WHEN p."searchDocument" LIKE :word_prefix ESCAPE '\\' THEN 3
+                   ELSE 4
+               END AS tier,
+               similarity(p."searchDocument", :term) AS score
+        FROM products p
+        WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+          {active}
+          AND (p.sku = :raw OR p.barcode = :raw {contains} {words})
+    )
+    SELECT id, count(*) OVER () AS total
+    FROM matches
+    ORDER BY tier, score DESC, name, id
+    LIMIT :limit
+"""
+
+
+def normalize_search_term(value: str) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _prefix_tsquery(term: str) -> Optional[str]:
+    """``coca 330`` -> ``coca:* & 330:*``; None when nothing word-like is left."""
+    words = re.findall(r"\w+", term)
+    return " & ".join(f"{word}:*" for word in words) if words else None
+
+
+def search_product_ids(
+    db: Session,
+    tenant_id: Any,
+    query: str,
+    limit: int = 10,
+    active_only: bool = False,
+) -> Tuple[List[Any], int]:
+    """Ids of the best ``limit`` matches of ``query`` in ranking order, and the number of matches."""
+    raw = (query or "").strip()
+    term = normalize_search_term(raw)
+    if not term:
+        return [], 0
+
+    escaped = _like_escape(term)
+    params = {
+        "tenant_id": str(tenant_id),
+        "raw": raw,
+        "term": term,
+        "prefix": f"{escaped}%",
+        "word_prefix": f"% {escaped}%",
+        "limit": limit,
+    }
+    contains = ""
+    if len(term) >= MIN_SUBSTRING_LENGTH:
+        contains = "OR p.\"searchDocument\" LIKE :contains ESCAPE '\\'"
+        params["contains"] = f"%{escaped}%"
+    words = ""
+    tsquery = _prefix_tsquery(term)
+    if tsquery:
+        words = "OR to_tsvector('simple', coalesce(p.\"searchDocument\", '')) @@ to_tsquery('simple', :tsquery)"
+        params["tsquery"] = tsquery
+
+    statement = _SEARCH_SQL.format(
+        active='AND COALESCE(p."isActive", true)' if active_only else "",
+        contains=contains,
+        words=words,
+    )
+    rows = db.execute(text(statement), params).fetchall()
+    total = rows[0].total if rows else 0
+    return [row.id for row in rows], total
+
+
+def search_products(
+    db: Session,
+    tenant_id: Any,
+    query: str,
+    limit: int = 10,
+    active_only: bool = False,
+) -> Tuple[List[Product], int]:
+    """The ranked matching products themselves (one extra primary-key query)."""
+    ids, total = search_product_ids(db, tenant_id, query, limit=limit, active_only=active_only)
+    if not ids:
+        return [], total
+    by_id = {product.id: product for product in db.query(Product).filter(Product.id.in_(ids))}
+    return [by_id[product_id] for product_id in ids if product_id in by_id], total
+
+
+def product_search_clause(query: str):
+    """
+    WHERE clause matching ``query`` like ``search_product_ids`` does (same
+    indexes), for listings that filter rather than rank; None for a blank query.
+    """
+    raw = (query or "").strip()
+    term = normalize_search_term(raw)
+    if not term:
+        return None
+    conditions = [Product.sku == raw, Product.barcode == raw]
+    if len(term) >= MIN_SUBSTRING_LENGTH:
+        conditions.append(Product.searchDocument.like(f"%{_like_escape(term)}%", escape="\\"))
+    tsquery = _prefix_tsquery(term)
+    if tsquery:
+        conditions.append(
+            func.to_tsvector(_SIMPLE, func.coalesce(Product.searchDocument, "")).op("@@")(
+                func.to_tsquery(_SIMPLE, tsquery)
+            )
+        )
+    return or_(*conditions)
@@ -0,0 +1,355 @@
+"""
+POS receipt rendering
+
+A receipt template is compiled once into a CompiledReceipt: the tenant's
+details (company name, address, ...) are substituted, static header and
+footer lines are wrapped and centred, column layouts are fixed for the
+paper width, and the ESC/POS bytes of static lines and the PDF font metrics
+are worked out. Rendering a receipt is then a fill step that only formats
+one transaction's values into those slots, and a shift's receipts are
+reprinted in one pass over the same compiled template.
+
+Compiled templates are cached per worker by (template id, version) and the
+signature of the tenant's details (the invoice customization's id and
+updated_at, or the tenant name when there is none). Every edit of either
+changes the key, so neither a stale layout nor old company details or
+currency are used.
+"""
+
+import io
+import textwrap
+import uuid
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import mm
+from sqlalchemy.orm import Session
+
+from ..config.invoice_customization_models import InvoiceCustomization
+from ..core.cache import LRUCache
+from ..core.currency import format_currency
+from ..models.platform.tenant import Tenant
+from ..models.pos import POSReceiptTemplate
+from .invoice_rendering import customization_signature
+
+TEXT = "text"
+ESCPOS = "escpos"
+PDF = "pdf"
+RECEIPT_FORMATS = (TEXT, ESCPOS, PDF)
+RECEIPT_MEDIA_TYPES = {
+    TEXT: "text/plain; charset=utf-8",
+    ESCPOS: "application/octet-stream",
+    PDF: "application/pdf",
+}
+
+PAPER_COLUMNS = {58: 32, 80: 48}
+TEMPLATE_TTL_SECONDS = 600
+
+COMPANY_FIELDS = ("company_name", "company_address", "company_phone", "company_email", "company_website")
+SALE_FIELDS = ("transaction_number", "date", "time", "cashier", "customer", "payment_method", "shift_number")
+DEFAULT_HEADER = "{company_name}\n{company_address}\n{company_phone}"
+DEFAULT_FOOTER = "Thank you for shopping with us!"
+
+PLAIN = 0
+CENTER = 1
+BOLD = 2
+
+_ESC_INIT = b"\x1b@"
+_ESC_ALIGN = {False: b"\x1ba\x00", True: b"\x1ba\x01"}
+_ESC_BOLD = {False: b"\x1bE\x00", True: b"\x1bE\x01"}
+_ESC_FEED_CUT = b"\x1bd\x04\x1dV\x01"  # feed four lines, partial cut
+_ESC_ENCODING = "cp437"
+
+_PDF_MARGIN = 3 * mm
+_COURIER_ADVANCE = 0.6  # glyph width of Courier per point of font size
+
+
+class _Partial(dict):
+    """format_map mapping that leaves placeholders it does not know in place."""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def _placeholders(line: str) -> set:
+    """Raises ValueError for unbalanced braces."""
+    return {name for _, name, _, _ in Formatter().parse(line) if name}
+
+
+@dataclass(frozen=True)
+class _Line:
+    text: str
+    flags: int
+    dynamic: bool
+    escpos: bytes = b""
+
+
+class CompiledReceipt:
+    def __init__(
+        self,
+        paper_width: int,
+        header: Optional[str],
+        footer: Optional[str],
+        currency: str,
+        show_sku: bool,
+        show_savings: bool,
+        company: Dict[str, str],
+    ):
+        """Raises ValueError for an unsupported paper width or an unknown placeholder."""
+        if paper_width not in PAPER_COLUMNS:
+            raise ValueError(f"paperWidth must be one of {', '.join(str(w) for w in PAPER_COLUMNS)}")
+        self.columns = columns = PAPER_COLUMNS[paper_width]
+        self.currency = currency
+        self.show_sku = show_sku
+        self.show_savings = show_savings
+        self.header = self._compile_lines(header, company, CENTER | BOLD, first_only=True)
+        self.footer = self._compile_lines(footer, company, CENTER)
+
+        amount_width = 10 if columns >= 40 else 9
+        self.name_width = columns - amount_width - 1
+        self.item_format = f"{{:<{self.name_width}.{self.name_width}}} {{:>{amount_width}}}"
+        self.total_format = f"{{:<{columns - 16}}}{{:>16}}"
+        self.rule = "-" * columns
+        self.rule_escpos = self._escpos(self.rule, PLAIN)
+
+        self.page_width = paper_width * mm
+        self.font_size = (self.page_width - 2 * _PDF_MARGIN) / (columns * _COURIER_ADVANCE)
+        self.leading = self.font_size * 1.25
+
+    def _compile_lines(self, source: Optional[str], company: Dict[str, str], flags: int, first_only: bool = False):
+        # Lines with sale fields go through format_map again per receipt, so
+        # braces in the company details they carry must stay literal
+        escaped = {name: str(value).replace("{", "{{").replace("}", "}}") for name, value in company.items()}
+        lines = []
+        for number, raw in enumerate((source or "").splitlines()):
+            names = _placeholders(raw)
+            unknown = names.difference(COMPANY_FIELDS, SALE_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown receipt placeholder: {', '.join(sorted(unknown))}")
+            line_flags = flags if not first_only or number == 0 else flags & ~BOLD
+            text = raw.format_map(_Partial(company))
+            if names and not text.strip():
+                continue  # e.g. a phone line for a tenant without a phone
+            if names.intersection(SALE_FIELDS):
+                lines.append(_Line(raw.format_map(_Partial(escaped)), line_flags, True))
+                continue
+            for piece in textwrap.wrap(text, self.columns) or [""]:
+                lines.append(_Line(piece, line_flags, False, self._escpos(piece, line_flags)))
+        return tuple(lines)
+
+    def _escpos(self, text: str, flags: int) -> bytes:
+        return (
+            _ESC_ALIGN[bool(flags & CENTER)]
+            + _ESC_BOLD[bool(flags & BOLD)]
+            + text.encode(_ESC_ENCODING, errors="replace")
+            + b"\n"
+        )
+
+    def _fill(self, lines, fields: Dict[str, str], out: List[_Line]) -> None:
+        for line in lines:
+            if not line.dynamic:
+                out.append(line)
+                continue
+            text = line.text.format_map(fields)
+            for piece in textwrap.wrap(text, self.columns):
+                out.append(_Line(piece, line.flags, True))
+
+    def _money(self, value: float) -> str:
+        return f"{value:,.2f}"
+
+    def layout(self, receipt: Dict[str, Any]) -> List[_Line]:
+        """The receipt's lines, unpadded, with their alignment and weight."""
+        fields = receipt["fields"]
+        out: List[_Line] = []
+        self._fill(self.header, fields, out)
+        out.append(_Line(self.rule, PLAIN, False, self.rule_escpos))
+        out.append(_Line(f"Receipt {fields['transaction_number']}", PLAIN, True))
+        out.append(_Line(f"{fields['date']} {fields['time']}", PLAIN, True))
+        out.append(_Line(f"Cashier: {fields['cashier']}"[:self.columns], PLAIN, True))
+        if fields["customer"]:
+            out.append(_Line(f"Customer: {fields['customer']}"[:self.columns], PLAIN, True))
+        out.append(_Line(self.rule, PLAIN, False, self.rule_escpos))
+
+        for name, sku, quantity, unit_price, discount, total in receipt["items"]:
+            out.append(_Line(self.item_format.format(name, self._money(total)), PLAIN, True))
+            detail = f"  {quantity} x {self._money(unit_price)}"
+            if self.show_sku and sku:
+                detail += f"  {sku}"
+            out.append(_Line(detail[:self.columns], PLAIN, True))
+            if discount:
+                out.append(_Line(self.item_format.format("  Discount", "-" + self._money(discount)), PLAIN, True))
+
+        out.append(_Line(self.rule, PLAIN, False, self.rule_escpos))
+        out.append(_Line(self.total_format.format("Subtotal", self._money(receipt["subtotal"])), PLAIN, True))
+        if receipt["discount"]:
+            out.append(_Line(self.total_format.format("Discount", "-" + self._money(receipt["discount"])), PLAIN, True))
+        if receipt["tax"]:
+            out.append(_Line(self.total_format.format("Tax", self._money(receipt["tax"])), PLAIN, True))
+        out.append(_Line(
+            self.total_format.format("TOTAL", format_currency(receipt["total"], self.currency)), BOLD, True
+        ))
+        out.append(_Line(self.total_format.format("Paid by", fields["payment_method"]), PLAIN, True))
+        if self.show_savings and receipt["savings"] > 0:
+            out.append(_Line(
+                f"You saved {format_currency(receipt['savings'], self.currency)}", CENTER, True
+            ))
+        if self.footer:
+            out.append(_Line("", PLAIN, False, b"\n"))
+            self._fill(self.footer, fields, out)
+        return out
+
+    def _padded(self, line: _Line) -> str:
+        return line.text.center(self.columns).rstrip() if line.flags & CENTER else line.text
+
+    def text(self, receipts: Iterable[Dict[str, Any]]) -> bytes:
+        """Plain text, receipts separated by a blank line."""
+        return "\n\n".join(
+            "\n".join(self._padded(line) for line in self.layout(receipt)) for receipt in receipts
+        ).encode() + b"\n"
+
+    def escpos(self, receipts: Iterable[Dict[str, Any]]) -> bytes:
+        """ESC/POS for a thermal printer, each receipt fed and cut."""
+        out = [_ESC_INIT]
+        for receipt in receipts:
+            for line in self.layout(receipt):
+                out.append(line.escpos or self._escpos(line.text, line.flags))
+            out.append(_ESC_FEED_CUT)
+        return b"".join(out)
+
+    def pdf(self, receipts: Iterable[Dict[str, Any]]) -> bytes:
+        """One paper-width page per receipt, as long as the receipt."""
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=(self.page_width, self.page_width))
+        for receipt in receipts:
+            lines = self.layout(receipt)
+            height = 2 * _PDF_MARGIN + len(lines) * self.leading
+            pdf.setPageSize((self.page_width, height))
+            body = pdf.beginText(_PDF_MARGIN, height - _PDF_MARGIN - self.font_size)
+            bold = None
+            for line in lines:
+                if bool(line.flags & BOLD) != bold:
+                    bold = bool(line.flags & BOLD)
+                    body.setFont("Courier-Bold" if bold else "Courier", self.font_size, self.leading)
+                body.textLine(self._padded(line))
+            pdf.drawText(body)
+            pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+
+    def render(self, receipts: Iterable[Dict[str, Any]], fmt: str) -> bytes:
+        if fmt == TEXT:
+            return self.text(receipts)
+        if fmt == ESCPOS:
+            return self.escpos(receipts)
+        if fmt == PDF:
+            return self.pdf(receipts)
+        raise ValueError(f"format must be one of {', '.join(RECEIPT_FORMATS)}")
+
+
+def receipt_data(transaction, cashier: str = "", shift_number: str = "") -> Dict[str, Any]:
+    """The values a receipt shows for a POS transaction."""
+    created = transaction.createdAt
+    items = []
+    for item in transaction.items or []:
+        if not isinstance(item, dict):
+            continue
+        items.append((
+            str(item.get("productName") or ""),
+            str(item.get("sku") or ""),
+            int(item.get("quantity") or 0),
+            float(item.get("unitPrice") or 0.0),
+            float(item.get("discount") or 0.0),
+            float(item.get("total") or 0.0),
+        ))
+    savings = sum(float(entry.get("discount") or 0.0) for entry in transaction.appliedPromotions or [])
+    return {
+        "fields": {
+            "transaction_number": transaction.transactionNumber or "",
+            "date": created.strftime("%d/%m/%Y") if created else "",
+            "time": created.strftime("%H:%M") if created else "",
+            "cashier": cashier or "",
+            "customer": transaction.customerName or "",
+            "payment_method": (transaction.paymentMethod or "").replace("_", " ").title(),
+            "shift_number": shift_number or "",
+        },
+        "items": items,
+        "subtotal": float(transaction.subtotal or 0.0),
+        "discount": float(transaction.discount or 0.0),
+        "tax": float(transaction.taxAmount or 0.0),
+        "total": float(transaction.total or 0.0),
+        "savings": round(savings, 2),
+    }
+
+
+def validate_receipt_template(template_data) -> None:
+    """Compile with placeholder tenant details; raises ValueError when the template is unusable."""
+    CompiledReceipt(
+        template_data.paperWidth, template_data.header, template_data.footer, "USD",
+        template_data.showSku, template_data.showSavings, {name: name for name in COMPANY_FIELDS},
+    )
+
+
+_compiled = LRUCache(maxsize=512, default_ttl=TEMPLATE_TTL_SECONDS)
+
+
+def _company(db: Session, tenant_id: Any) -> Tuple[Dict[str, str], str]:
+    customization = (
+        db.query(InvoiceCustomization)
+        .filter(InvoiceCustomization.tenant_id == tenant_id, InvoiceCustomization.is_active == True)
+        .first()
+    )
+    if customization is None:
+        tenant_name = db.query(Tenant.name).filter(Tenant.id == tenant_id).scalar()
+        return {**{name: "" for name in COMPANY_FIELDS}, "company_name": tenant_name or ""}, "USD"
+    company = {
+        "company_name": customization.company_name or "",
+        "company_address": (customization.company_address or "").replace("\n", ", "),
+        "company_phone": customization.company_phone or "",
+        "company_email": customization.company_email or "",
+        "company_website": customization.company_website or "",
+    }
+    return company, getattr(customization, "default_currency", None) or "USD"
+
+
+def get_compiled_receipt(db: Session, tenant_id: Any, template_id: Optional[str] = None) -> Optional[CompiledReceipt]:
+    """
+    The tenant's compiled template: ``template_id`` or the default one, or
+    the built-in layout when the tenant has no default. None when
+    ``template_id`` is not one of the tenant's templates; ValueError when it
+    is not a UUID.
+    """
+    query = db.query(POSReceiptTemplate.id, POSReceiptTemplate.version).filter(
+        POSReceiptTemplate.tenant_id == tenant_id
+    )
+    if template_id:
+        try:
+            template_uuid = uuid.UUID(str(template_id))
+        except ValueError as e:
+            raise ValueError(f"Invalid template id: {template_id}") from e
+        row = query.filter(POSReceiptTemplate.id == template_uuid).first()
+        if row is None:
+            return None
+    else:
+        row = query.filter(POSReceiptTemplate.isDefault.is_(True)).first()
+
+    details = customization_signature(db, tenant_id)
+    if details[0] is None:
+        details = ("tenant", db.query(Tenant.name).filter(Tenant.id == tenant_id).scalar())
+    key = ((str(row.id), row.version) if row is not None else ("builtin", str(tenant_id))) + details
+    compiled = _compiled.get(key)
+    if compiled is not None:
+        return compiled
+
+    company, currency = _company(db, tenant_id)
+    if row is None:
+        compiled = CompiledReceipt(80, DEFAULT_HEADER, DEFAULT_FOOTER, currency, False, True, company)
+    else:
+        template = db.query(POSReceiptTemplate).filter(POSReceiptTemplate.id == row.id).one()
+        compiled = CompiledReceipt(
+            template.paperWidth, template.header, template.footer, template.currency or currency,
+            bool(template.showSku), bool(template.showSavings), company,
+        )
+    _compiled.set(key, compiled)
+    return compiled
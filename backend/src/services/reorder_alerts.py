@@ -0,0 +1,465 @@
+"""
+Low-stock and reorder-point alerts
+
+Thresholds are evaluated only for the products a stock change touches:
+``apply_stock_deltas`` hands its RETURNING rows (old and new quantity,
+minimum level) to ``record_threshold_crossings`` inside the same
+transaction, so a rolled-back sale never raises an alert and no query scans
+the catalogue.
+
+Each product has one ``stock_reorder_alerts`` row that moves through
+pending -> notified -> resolved. A crossing always re-opens a resolved
+alert, but within ``REORDER_ALERT_DEBOUNCE`` of the last notification it
+re-opens as notified, so stock hovering around its minimum does not flood
+users while the product still shows up in the alert list and the draft
+purchase orders. Dropping to zero always escalates a low-stock alert to
+out-of-stock and notifies again.
+
+Pending alerts are dispatched as one digest notification per tenant. After
+a commit that opened alerts, a short-lived thread waits
+``REORDER_DISPATCH_DELAY`` seconds to collect more and then dispatches;
+scripts/dispatch_reorder_alerts.py does the same from cron.
+
+Suggested quantities top stock up to ``maxStockLevel`` (or twice the
+minimum) and at least cover the recent outbound velocity over the lead
+time, rounded up to whole packs. ``draft_reorder_purchase_orders`` turns
+open alerts into draft purchase orders, one per supplier.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import Product, PurchaseOrder, StockReorderAlert, Warehouse
+from .inventory_dashboard import invalidate_inventory_dashboard
+
+logger = logging.getLogger(__name__)
+
+ALERT_LOW_STOCK = "low_stock"
+ALERT_OUT_OF_STOCK = "out_of_stock"
+
+STATUS_PENDING = "pending"
+STATUS_NOTIFIED = "notified"
+STATUS_RESOLVED = "resolved"
+OPEN_STATUSES = (STATUS_PENDING, STATUS_NOTIFIED)
+
+REORDER_ALERT_DEBOUNCE = timedelta(hours=24)
+REORDER_DISPATCH_DELAY = 5.0
+REORDER_DISPATCH_BATCH = 100
+REORDER_VELOCITY_DAYS = 30
+REORDER_LEAD_DAYS = 7
+AUTO_DISPATCH = os.getenv("REORDER_ALERTS_AUTO_DISPATCH", "1") != "0"
+
+_OPEN_ALERT_SQL = text("""
+    INSERT INTO stock_reorder_alerts
+        (id, tenant_id, "productId", "alertType", status, "stockQuantity", "minStockLevel", "triggeredAt")
+    VALUES
+        (:id, CAST(:tenant_id AS uuid), CAST(:product_id AS uuid), :alert_type, 'pending', :stock, :minimum, :now)
+    ON CONFLICT (tenant_id, "productId") DO UPDATE
+    SET "alertType" = EXCLUDED."alertType",
+        status = CASE
+            WHEN stock_reorder_alerts.status = 'resolved'
+             AND stock_reorder_alerts."notifiedAt" >= :debounce_before
+             AND NOT (EXCLUDED."alertType" = 'out_of_stock' AND stock_reorder_alerts."alertType" <> 'out_of_stock')
+            THEN 'notified'
+            ELSE 'pending'
+        END,
+        "stockQuantity" = EXCLUDED."stockQuantity",
+        "minStockLevel" = EXCLUDED."minStockLevel",
+        "triggeredAt" = EXCLUDED."triggeredAt",
+        "resolvedAt" = NULL,
+        "purchaseOrderId" = CASE
+            WHEN stock_reorder_alerts.status = 'resolved' THEN NULL
+            ELSE stock_reorder_alerts."purchaseOrderId"
+        END
+    WHERE stock_reorder_alerts.status = 'resolved' OR (
+        EXCLUDED."alertType" = 'out_of_stock' AND stock_reorder_alerts."alertType" <> 'out_of_stock'
+    )
+""")
+
+_RESOLVE_ALERTS_SQL = text("""
+    UPDATE stock_reorder_alerts
+    SET status = 'resolved', "resolvedAt" = :now
+    WHERE tenant_id = CAST(:tenant_id AS uuid)
+      AND "productId" = ANY(CAST(:product_ids AS uuid[]))
+      AND status <> 'resolved'
+""")
+
+
+def record_threshold_crossings(db: Session, tenant_id: Any, products: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Open or resolve alerts for products whose stock just crossed their
+    minimum level. ``products`` is the result map of ``apply_stock_deltas``.
+    Runs in the caller's transaction; returns the number of crossings.
+    """
+    now = datetime.utcnow()
+    crossed = []
+    recovered = []
+    for product_id, info in products.items():
+        if info.get("is_active") is False:
+            continue
+        minimum = int(info.get("min_stock") or 0)
+        old, new = int(info["old_stock"]), int(info["new_stock"])
+        if new <= minimum < old or (new <= 0 < old):
+            crossed.append((product_id, ALERT_OUT_OF_STOCK if new <= 0 else ALERT_LOW_STOCK, new, minimum))
+        elif old <= minimum < new:
+            recovered.append(product_id)
+
+    for product_id, alert_type, stock, minimum in crossed:
+        db.execute(_OPEN_ALERT_SQL, {
+            "id": uuid.uuid4(),
+            "tenant_id": str(tenant_id),
+            "product_id": product_id,
+            "alert_type": alert_type,
+            "stock": stock,
+            "minimum": minimum,
+            "now": now,
+            "debounce_before": now - REORDER_ALERT_DEBOUNCE,
+        })
+    if recovered:
+        db.execute(_RESOLVE_ALERTS_SQL, {"tenant_id": str(tenant_id), "product_ids": recovered, "now": now})
+
+    if crossed and AUTO_DISPATCH:
+        event.listen(db, "after_commit", lambda session: schedule_dispatch(tenant_id), once=True)
+    return len(crossed)
+
+
+def scan_reorder_alerts(db: Session, tenant_id: Any) -> int:
+    """
+    Open alerts for active products already at or below their minimum that
+    have no open alert (thresholds edited by hand, stock set outside
+    documents, first run). Uses the low-stock partial index. Commits.
+    """
+    result = db.execute(text("""
+        INSERT INTO stock_reorder_alerts
+            (id, tenant_id, "productId", "alertType", status, "stockQuantity", "minStockLevel", "triggeredAt")
+        SELECT gen_random_uuid(), p.tenant_id, p.id,
+               CASE WHEN p."stockQuantity" <= 0 THEN 'out_of_stock' ELSE 'low_stock' END,
+               'pending', p."stockQuantity", p."minStockLevel", :now
+        FROM products p
+        WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+          AND p."isActive" AND p."stockQuantity" <= p."minStockLevel"
+        ON CONFLICT (tenant_id, "productId") DO UPDATE
+        SET status = 'pending', "alertType" = EXCLUDED."alertType", "stockQuantity" = EXCLUDED."stockQuantity",
+            "minStockLevel" = EXCLUDED."minStockLevel", "triggeredAt" = EXCLUDED."triggeredAt",
+            "resolvedAt" = NULL, "purchaseOrderId" = NULL
+        WHERE stock_reorder_alerts.status = 'resolved'
+    """), {"tenant_id": str(tenant_id), "now": datetime.utcnow()})
+    db.execute(text("""
+        UPDATE stock_reorder_alerts a
+        SET status = 'resolved', "resolvedAt" = :now
+        FROM products p
+        WHERE a.tenant_id = CAST(:tenant_id AS uuid) AND a.status <> 'resolved'
+          AND p.id = a."productId" AND (NOT p."isActive" OR p."stockQuantity" > p."minStockLevel")
+    """), {"tenant_id": str(tenant_id), "now": datetime.utcnow()})
+    db.commit()
+    return result.rowcount or 0
+
+
+# ------------------------------------------------------------------ #
+# Suggestions
+# ------------------------------------------------------------------ #
+def outbound_velocity(db: Session, tenant_id: Any, product_ids: List[Any], days: int = REORDER_VELOCITY_DAYS) -> Dict[str, float]:
+    """Average outbound units per day over the last ``days`` days, per product."""
+    if not product_ids:
+        return {}
+    rows = db.execute(text("""
+        SELECT product_uuid, SUM(quantity)
+        FROM stock_movements
+        WHERE tenant_id = CAST(:tenant_id AS uuid)
+          AND product_uuid = ANY(CAST(:product_ids AS uuid[]))
+          AND lower("movementType") = 'outbound'
+          AND COALESCE(status, '') NOT IN ('cancelled', 'failed')
+          AND "createdAt" >= :since
+        GROUP BY product_uuid
+    """), {
+        "tenant_id": str(tenant_id),
+        "product_ids": [str(product_id) for product_id in product_ids],
+        "since": datetime.utcnow() - timedelta(days=days),
+    }).fetchall()
+    return {str(product_id): float(total or 0) / days for product_id, total in rows}
+
+
+def suggest_reorder_quantity(
+    stock: int, minimum: int, maximum: Optional[int], velocity: float, pack_size: Optional[int] = None,
+) -> int:
+    target = maximum if maximum and maximum > minimum else max(minimum * 2, 1)
+    cover = minimum + math.ceil(velocity * REORDER_LEAD_DAYS)
+    quantity = max(target, cover) - max(stock, 0)
+    if quantity <= 0:
+        return 0
+    pack = pack_size if pack_size and pack_size > 1 else 1
+    return int(math.ceil(quantity / pack) * pack)
+
+
+def _suggestions(db: Session, tenant_id: Any, products: List[Product]) -> Dict[str, int]:
+    velocity = outbound_velocity(db, tenant_id, [product.id for product in products])
+    return {
+        str(product.id): suggest_reorder_quantity(
+            int(product.stockQuantity or 0),
+            int(product.minStockLevel or 0),
+            product.maxStockLevel,
+            velocity.get(str(product.id), 0.0),
+            product.packSize,
+        )
+        for product in products
+    }
+
+
+# ------------------------------------------------------------------ #
+# Reads
+# ------------------------------------------------------------------ #
+def list_reorder_alerts(
+    db: Session,
+    tenant_id: Any,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Alerts with their product; open alerts carry a fresh suggested quantity."""
+    query = (
+        db.query(StockReorderAlert, Product)
+        .join(Product, Product.id == StockReorderAlert.productId)
+        .filter(StockReorderAlert.tenant_id == tenant_id)
+    )
+    if status:
+        query = query.filter(StockReorderAlert.status == status)
+    else:
+        query = query.filter(StockReorderAlert.status.in_(OPEN_STATUSES))
+    total = query.count()
+    rows = query.order_by(StockReorderAlert.triggeredAt.desc(), StockReorderAlert.id).offset(skip).limit(limit).all()
+
+    suggested = _suggestions(db, tenant_id, [product for alert, product in rows if alert.status in OPEN_STATUSES])
+    return {
+        "alerts": [
+            {
+                "id": str(alert.id),
+                "productId": str(product.id),
+                "productName": product.name,
+                "sku": product.sku,
+                "supplierId": str(product.supplierId) if product.supplierId else None,
+                "alertType": alert.alertType,
+                "status": alert.status,
+                "currentStock": product.stockQuantity,
+                "minStockLevel": product.minStockLevel,
+                "maxStockLevel": product.maxStockLevel,
+                "suggestedQuantity": suggested.get(str(product.id), alert.suggestedQuantity),
+                "purchaseOrderId": str(alert.purchaseOrderId) if alert.purchaseOrderId else None,
+                "triggeredAt": alert.triggeredAt,
+                "notifiedAt": alert.notifiedAt,
+                "resolvedAt": alert.resolvedAt,
+            }
+            for alert, product in rows
+        ],
+        "total": total,
+    }
+
+
+# ------------------------------------------------------------------ #
+# Dispatch
+# ------------------------------------------------------------------ #
+def dispatch_reorder_alerts(db: Session, tenant_id: Any) -> int:
+    """
+    Send the tenant's pending alerts as digest notifications of up to
+    ``REORDER_DISPATCH_BATCH`` products each and mark them notified. Commits.
+    """
+    from .notification_service import create_inventory_notification_for_all_tenant_users
+    from ..config.notification_models import NotificationType
+
+    dispatched = 0
+    while True:
+        rows = (
+            db.query(StockReorderAlert, Product)
+            .join(Product, Product.id == StockReorderAlert.productId)
+            .filter(StockReorderAlert.tenant_id == tenant_id, StockReorderAlert.status == STATUS_PENDING)
+            .order_by(StockReorderAlert.triggeredAt, StockReorderAlert.id)
+            .limit(REORDER_DISPATCH_BATCH)
+            .with_for_update(of=StockReorderAlert, skip_locked=True)
+            .all()
+        )
+        if not rows:
+            break
+
+        suggested = _suggestions(db, tenant_id, [product for _, product in rows])
+        now = datetime.utcnow()
+        lines = []
+        for alert, product in rows:
+            alert.status = STATUS_NOTIFIED
+            alert.notifiedAt = now
+            alert.suggestedQuantity = suggested.get(str(product.id))
+            lines.append({
+                "productId": str(product.id),
+                "productName": product.name,
+                "sku": product.sku,
+                "alertType": alert.alertType,
+                "currentStock": product.stockQuantity,
+                "minStockLevel": product.minStockLevel,
+                "suggestedQuantity": alert.suggestedQuantity,
+            })
+        db.flush()
+
+        out_of_stock = sum(1 for line in lines if line["alertType"] == ALERT_OUT_OF_STOCK)
+        if len(lines) == 1:
+            line = lines[0]
+            title = "Out of stock" if out_of_stock else "Low stock"
+            message = (
+                f"{line['productName']} (SKU: {line['sku']}) is at {line['currentStock']} "
+                f"(minimum {line['minStockLevel']}). Suggested reorder: {line['suggestedQuantity']}"
+            )
+        else:
+            title = f"{len(lines)} products need reordering"
+            names = ", ".join(line["productName"] for line in lines[:5])
+            more = f" and {len(lines) - 5} more" if len(lines) > 5 else ""
+            message = f"{out_of_stock} out of stock, {len(lines) - out_of_stock} low: {names}{more}"
+        create_inventory_notification_for_all_tenant_users(
+            db,
+            str(tenant_id),
+            title,
+            message,
+            type=NotificationType.ERROR if out_of_stock else NotificationType.WARNING,
+            action_url="/inventory",
+            notification_data={"reorderAlerts": lines},
+        )
+        db.commit()
+        dispatched += len(lines)
+    return dispatched
+
+
+_scheduled: set = set()
+_scheduled_lock = threading.Lock()
+
+
+def schedule_dispatch(tenant_id: Any, delay: float = REORDER_DISPATCH_DELAY) -> None:
+    """Dispatch the tenant's pending alerts from a background thread after ``delay`` seconds."""
+    key = str(tenant_id)
+    with _scheduled_lock:
+        if key in _scheduled:
+            return
+        _scheduled.add(key)
+
+    def _run() -> None:
+        time.sleep(delay)
+        with _scheduled_lock:
+            _scheduled.discard(key)
+        from ..config.database_config import SessionLocal
+
+        db = SessionLocal()
+        try:
+            dispatch_reorder_alerts(db, key)
+        except Exception as e:
+            db.rollback()
+            logger.error("Failed to dispatch reorder alerts for tenant %s: %s", key, e, exc_info=True)
+        finally:
+            db.close()
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
+# ------------------------------------------------------------------ #
+# Draft purchase orders
+# ------------------------------------------------------------------ #
+def _default_warehouse_id(db: Session, tenant_id: Any) -> Optional[str]:
+    warehouse = (
+        db.query(Warehouse.id)
+        .filter(Warehouse.tenant_id == tenant_id)
+        .order_by(Warehouse.isActive.desc(), Warehouse.createdAt.asc())
+        .first()
+    )
+    return str(warehouse[0]) if warehouse else None
+
+
+def draft_reorder_purchase_orders(
+    db: Session,
+    tenant_id: Any,
+    user_id: Any,
+    warehouse_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Create one draft purchase order per supplier for open alerts that have
+    none yet. Products without a supplier are left out. Drafts do not
+    change stock. Commits.
+    """
+    from .document_sequences import PURCHASE_ORDER, next_document_number
+
+    warehouse_id = warehouse_id or _default_warehouse_id(db, tenant_id)
+    if not warehouse_id:
+        raise ValueError("Tenant has no warehouse")
+
+    rows = (
+        db.query(StockReorderAlert, Product)
+        .join(Product, Product.id == StockReorderAlert.productId)
+        .filter(
+            StockReorderAlert.tenant_id == tenant_id,
+            StockReorderAlert.status.in_(OPEN_STATUSES),
+            StockReorderAlert.purchaseOrderId.is_(None),
+            Product.supplierId.isnot(None),
+            Product.isActive == True,
+        )
+        .order_by(Product.supplierId, Product.name)
+        .with_for_update(of=StockReorderAlert, skip_locked=True)
+        .all()
+    )
+    suggested = _suggestions(db, tenant_id, [product for _, product in rows])
+
+    by_supplier: Dict[str, List] = {}
+    for alert, product in rows:
+        quantity = suggested.get(str(product.id), 0)
+        if quantity > 0:
+            by_supplier.setdefault(str(product.supplierId), []).append((alert, product, quantity))
+
+    now = datetime.utcnow()
+    drafts = []
+    for supplier_id, lines in by_supplier.items():
+        items = [
+            {
+                "productId": str(product.id),
+                "productName": product.name,
+                "sku": product.sku,
+                "quantity": quantity,
+                "unitCost": float(product.costPerUnitPrice or 0.0),
+            }
+            for _, product, quantity in lines
+        ]
+        subtotal = round(sum(item["quantity"] * item["unitCost"] for item in items), 2)
+        order = PurchaseOrder(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            createdBy=str(user_id),
+            poNumber=next_document_number(db, tenant_id, PURCHASE_ORDER),
+            supplierId=supplier_id,
+            warehouseId=warehouse_id,
+            orderDate=now.date(),
+            status="draft",
+            subtotal=subtotal,
+            vatAmount=0.0,
+            totalAmount=subtotal,
+            notes="Drafted from reorder alerts",
+            items=items,
+            createdAt=now,
+            updatedAt=now,
+        )
+        db.add(order)
+        db.flush()
+        for alert, _, quantity in lines:
+            alert.purchaseOrderId = order.id
+            alert.suggestedQuantity = quantity
+        drafts.append({
+            "purchaseOrderId": str(order.id),
+            "poNumber": order.poNumber,
+            "supplierId": supplier_id,
+            "items": len(items),
+            "totalAmount": subtotal,
+        })
+
+    if drafts:
+        invalidate_inventory_dashboard(tenant_id, db)
+    db.commit()
+    return drafts
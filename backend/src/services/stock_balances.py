@@ -0,0 +1,417 @@
+"""
+Per-warehouse, per-lot stock balances
+
+``stock_balances`` holds the on-hand quantity for every
+(tenant, product, warehouse, location, batch) and is maintained in the same
+transaction as the StockMovement that changes it. ``Product.stockQuantity``
+stays the tenant-wide rollup of those rows.
+
+Sign convention of a movement (cancelled / failed movements count as zero):
+
+- inbound, instock, customer return: +quantity
+- outbound, damage, expiry, supplier return: -quantity
+- adjustment, cycle_count: quantity as recorded (may be negative)
+- transfer: 0 -- the row has no destination warehouse, so a transfer is
+  booked as an outbound/inbound pair instead
+
+``rebuild_stock_balances`` re-derives the table from the ledger and
+``check_stock_balance_drift`` reports where balances, ledger and product
+totals disagree.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import Product, StockBalance, StockMovement, Warehouse
+from .inventory_dashboard import invalidate_inventory_dashboard
+from .stock_mutations import apply_stock_deltas
+
+EXCLUDED_STATUSES = ("cancelled", "failed")
+INCREASING_TYPES = ("inbound", "instock")
+DECREASING_TYPES = ("outbound", "damage", "expiry")
+SIGNED_TYPES = ("adjustment", "cycle_count")
+SUPPLIER_RETURN_REFERENCE = "supplier_return"
+OPENING_BALANCE_REFERENCE = "OpeningBalance"
+
+SIGNED_QUANTITY_SQL = f"""
+    CASE
+        WHEN COALESCE(m.status, '') IN {EXCLUDED_STATUSES} THEN 0
+        WHEN lower(m."movementType") IN {INCREASING_TYPES} THEN m.quantity
+        WHEN lower(m."movementType") IN {DECREASING_TYPES} THEN -m.quantity
+        WHEN lower(m."movementType") = 'return' AND m."referenceType" = '{SUPPLIER_RETURN_REFERENCE}' THEN -m.quantity
+        WHEN lower(m."movementType") = 'return' THEN m.quantity
+        WHEN lower(m."movementType") IN {SIGNED_TYPES} THEN m.quantity
+        ELSE 0
+    END
+"""
+
+# Resolved product of a movement; falls back to a UUID-shaped productId for
+# rows written before product_uuid existed
+MOVEMENT_PRODUCT_SQL = """
+    COALESCE(
+        m.product_uuid,
+        CASE WHEN m."productId" ~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$'
+             THEN CAST(m."productId" AS uuid) END
+    )
+"""
+
+# Ledger aggregate per balance key, restricted to movements of existing products
+LEDGER_SQL = f"""
+    SELECT
+        m.tenant_id,
+        p.id AS product_id,
+        m."warehouseId" AS warehouse_id,
+        COALESCE(m."locationId", '') AS location_id,
+        COALESCE(m."batchNumber", '') AS batch_number,
+        MIN(m."expiryDate") FILTER (WHERE ({SIGNED_QUANTITY_SQL}) > 0) AS expiry_date,
+        SUM({SIGNED_QUANTITY_SQL})::integer AS quantity
+    FROM stock_movements m
+    JOIN products p ON p.tenant_id = m.tenant_id AND p.id = {MOVEMENT_PRODUCT_SQL}
+    WHERE m.tenant_id = CAST(:tenant_id AS uuid)
+    GROUP BY m.tenant_id, p.id, m."warehouseId", COALESCE(m."locationId", ''), COALESCE(m."batchNumber", '')
+"""
+
+
+def movement_signed_quantity(
+    movement_type: Any, reference_type: Optional[str], quantity: Any, status: Optional[str] = None
+) -> int:
+    """Python twin of SIGNED_QUANTITY_SQL."""
+    if (status or "") in EXCLUDED_STATUSES:
+        return 0
+    kind = str(getattr(movement_type, "value", movement_type) or "").lower()
+    quantity = int(quantity or 0)
+    if kind in INCREASING_TYPES:
+        return quantity
+    if kind in DECREASING_TYPES:
+        return -quantity
+    if kind == "return":
+        return -quantity if reference_type == SUPPLIER_RETURN_REFERENCE else quantity
+    if kind in SIGNED_TYPES:
+        return quantity
+    return 0
+
+
+def movement_snapshot(movement: Any) -> Dict[str, Any]:
+    """Capture the balance-relevant fields of a movement (before it is edited)."""
+    fields = (
+        "id", "tenant_id", "productId", "product_uuid", "warehouseId", "locationId", "batchNumber",
+        "expiryDate", "movementType", "referenceType", "quantity", "status",
+        "unitCost", "createdAt", "fifoValue", "averageValue",
+    )
+    if isinstance(movement, dict):
+        return {name: movement.get(name) for name in fields}
+    return {name: getattr(movement, name, None) for name in fields}
+
+
+def _uuid_or_none(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def apply_movement_balances(
+    db: Session,
+    changes: Iterable[Tuple[Any, int]],
+    update_products: bool = False,
+) -> None:
+    """
+    Book ``(movement, sign)`` pairs into stock_balances in one upsert.
+
+    ``sign`` is +1 to apply a movement and -1 to take it back (delete, or the
+    old side of an edit). With ``update_products`` the product rollup is
+    adjusted too, all-or-nothing; a ValueError is raised when that would
+    drive a product below zero. The same changes are booked into the FIFO
+    and average-cost valuation. Runs inside the caller's transaction.
+    """
+    changes = list(changes)
+    balances: Dict[Tuple, Dict[str, Any]] = {}
+    product_deltas: Dict[str, Dict[str, int]] = {}
+    for movement, sign in changes:
+        snap = movement_snapshot(movement)
+        delta = sign * movement_signed_quantity(
+            snap["movementType"], snap["referenceType"], snap["quantity"], snap["status"]
+        )
+        product_id = _uuid_or_none(snap["product_uuid"] or snap["productId"])
+        warehouse_id = _uuid_or_none(snap["warehouseId"])
+        if delta == 0 or product_id is None or warehouse_id is None:
+            continue
+        key = (
+            str(snap["tenant_id"]), str(product_id), str(warehouse_id),
+            snap["locationId"] or "", snap["batchNumber"] or "",
+        )
+        entry = balances.setdefault(key, {"quantity": 0, "expiryDate": None})
+        entry["quantity"] += delta
+        expiry = _as_datetime(snap["expiryDate"])
+        if delta > 0 and expiry is not None:
+            entry["expiryDate"] = expiry if entry["expiryDate"] is None else min(entry["expiryDate"], expiry)
+        tenant_deltas = product_deltas.setdefault(key[0], {})
+        tenant_deltas[key[1]] = tenant_deltas.get(key[1], 0) + delta
+
+    if update_products:
+        for tenant_id, deltas in product_deltas.items():
+            outcome = apply_stock_deltas(db, tenant_id, {k: v for k, v in deltas.items() if v})
+            if not outcome["success"]:
+                raise ValueError("; ".join(outcome["errors"]))
+
+    from .stock_valuation import apply_movement_valuation
+
+    apply_movement_valuation(db, changes)
+
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": uuid.UUID(key[0]),
+            "productId": uuid.UUID(key[1]),
+            "warehouseId": uuid.UUID(key[2]),
+            "locationId": key[3],
+            "batchNumber": key[4],
+            "expiryDate": entry["expiryDate"],
+            "quantity": entry["quantity"],
+            "updatedAt": datetime.utcnow(),
+        }
+        for key, entry in sorted(balances.items())
+        if entry["quantity"] != 0
+    ]
+    if not rows:
+        return
+
+    stmt = pg_insert(StockBalance).values(rows)
+    table = StockBalance.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.tenant_id, table.c.productId, table.c.warehouseId, table.c.locationId, table.c.batchNumber],
+        set_={
+            "quantity": table.c.quantity + stmt.excluded.quantity,
+            "expiryDate": func.least(table.c.expiryDate, stmt.excluded.expiryDate),
+            "updatedAt": stmt.excluded.updatedAt,
+        },
+    )
+    db.execute(stmt)
+
+
+# ------------------------------------------------------------------ #
+# Reads
+# ------------------------------------------------------------------ #
+def get_stock_balances(
+    db: Session,
+    tenant_id: str,
+    product_id: Optional[str] = None,
+    warehouse_id: Optional[str] = None,
+    expiring_before: Optional[datetime] = None,
+    include_zero: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+) -> Tuple[List[Dict[str, Any]], int]:
+    query = (
+        db.query(StockBalance, Product.name, Product.sku, Warehouse.name)
+        .join(Product, Product.id == StockBalance.productId)
+        .join(Warehouse, Warehouse.id == StockBalance.warehouseId)
+        .filter(StockBalance.tenant_id == tenant_id)
+    )
+    if product_id:
+        query = query.filter(StockBalance.productId == product_id)
+    if warehouse_id:
+        query = query.filter(StockBalance.warehouseId == warehouse_id)
+    if expiring_before:
+        query = query.filter(StockBalance.expiryDate.isnot(None), StockBalance.expiryDate < expiring_before)
+    if not include_zero:
+        query = query.filter(StockBalance.quantity != 0)
+
+    total = query.count()
+    if expiring_before:
+        query = query.order_by(StockBalance.expiryDate.asc(), StockBalance.id)
+    else:
+        query = query.order_by(Product.name.asc(), Warehouse.name.asc(), StockBalance.id)
+
+    balances = []
+    for balance, product_name, product_sku, warehouse_name in query.offset(skip).limit(limit).all():
+        balances.append({
+            "id": str(balance.id),
+            "productId": str(balance.productId),
+            "productName": product_name,
+            "productSku": product_sku,
+            "warehouseId": str(balance.warehouseId),
+            "warehouseName": warehouse_name,
+            "locationId": balance.locationId or None,
+            "batchNumber": balance.batchNumber or None,
+            "expiryDate": balance.expiryDate,
+            "quantity": balance.quantity,
+            "updatedAt": balance.updatedAt,
+        })
+    return balances, total
+
+
+# ------------------------------------------------------------------ #
+# Rebuild / drift
+# ------------------------------------------------------------------ #
+def rebuild_stock_balances(db: Session, tenant_id: str, sync_products: bool = False) -> Dict[str, int]:
+    """
+    Re-derive a tenant's stock_balances from the movement ledger and commit.
+    With ``sync_products`` Product.stockQuantity is reset to the ledger total
+    too -- only do that once opening stock is in the ledger
+    (see ``post_opening_balances``).
+    """
+    params = {"tenant_id": str(tenant_id), "now": datetime.utcnow()}
+    db.execute(text("DELETE FROM stock_balances WHERE tenant_id = CAST(:tenant_id AS uuid)"), params)
+    result = db.execute(text(f"""
+        INSERT INTO stock_balances
+            (id, tenant_id, "productId", "warehouseId", "locationId", "batchNumber", "expiryDate", quantity, "updatedAt")
+        SELECT gen_random_uuid(), l.tenant_id, l.product_id, l.warehouse_id, l.location_id, l.batch_number,
+               l.expiry_date, l.quantity, :now
+        FROM ({LEDGER_SQL}) l
+        WHERE l.quantity <> 0
+    """), params)
+    rebuilt = int(result.rowcount or 0)
+
+    synced = 0
+    if sync_products:
+        total = """
+            COALESCE((
+                SELECT SUM(b.quantity) FROM stock_balances b
+                WHERE b.tenant_id = p.tenant_id AND b."productId" = p.id
+            ), 0)
+        """
+        result = db.execute(text(f"""
+            UPDATE products p
+            SET "stockQuantity" = {total}, "updatedAt" = :now
+            WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+              AND COALESCE(p."stockQuantity", 0) <> {total}
+        """), params)
+        synced = int(result.rowcount or 0)
+
+    db.commit()
+    if synced:
+        invalidate_inventory_dashboard(tenant_id)
+    return {"balances": rebuilt, "products_synced": synced}
+
+
+def post_opening_balances(db: Session, tenant_id: str, user_id: str) -> Dict[str, Any]:
+    """
+    Adopt stock that predates the ledger: for every product whose
+    stockQuantity differs from its movement total, record an ``adjustment``
+    movement for the difference in the tenant's first warehouse. Afterwards
+    the ledger, the balances and the product rollup agree. Commits.
+    """
+    warehouse = (
+        db.query(Warehouse)
+        .filter(Warehouse.tenant_id == tenant_id)
+        .order_by(Warehouse.isActive.desc(), Warehouse.createdAt.asc())
+        .first()
+    )
+    if not warehouse:
+        return {"posted": 0, "skipped": "Tenant has no warehouse"}
+
+    rows = db.execute(text(f"""
+        SELECT p.id, COALESCE(p."stockQuantity", 0) - COALESCE(l.total, 0) AS gap, p."costPerUnitPrice"
+        FROM products p
+        LEFT JOIN (
+            SELECT product_id, SUM(quantity) AS total FROM ({LEDGER_SQL}) x GROUP BY product_id
+        ) l ON l.product_id = p.id
+        WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+          AND COALESCE(p."stockQuantity", 0) <> COALESCE(l.total, 0)
+    """), {"tenant_id": str(tenant_id)}).fetchall()
+
+    now = datetime.utcnow()
+    movements = []
+    for product_id, gap, unit_cost in rows:
+        movement = StockMovement(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            productId=str(product_id),
+            product_uuid=product_id,
+            warehouseId=warehouse.id,
+            movementType="adjustment",
+            quantity=int(gap),
+            unitCost=unit_cost or 0.0,
+            referenceType=OPENING_BALANCE_REFERENCE,
+            notes="Opening balance adopted from product stock",
+            status="completed",
+            createdBy=user_id,
+            createdAt=now,
+            updatedAt=now,
+        )
+        db.add(movement)
+        movements.append(movement)
+
+    apply_movement_balances(db, ((m, 1) for m in movements))
+    db.commit()
+    return {"posted": len(movements), "warehouseId": str(warehouse.id)}
+
+
+def check_stock_balance_drift(db: Session, tenant_id: str, limit: int = 500) -> Dict[str, Any]:
+    """
+    Compare stock_balances with the ledger (per key) and Product.stockQuantity
+    with the sum of its balances. Empty lists mean everything agrees.
+    """
+    params = {"tenant_id": str(tenant_id), "limit": limit}
+    balance_rows = db.execute(text(f"""
+        SELECT
+            COALESCE(l.product_id, b."productId") AS product_id,
+            COALESCE(l.warehouse_id, b."warehouseId") AS warehouse_id,
+            COALESCE(l.location_id, b."locationId") AS location_id,
+            COALESCE(l.batch_number, b."batchNumber") AS batch_number,
+            COALESCE(l.quantity, 0) AS ledger_quantity,
+            COALESCE(b.quantity, 0) AS balance_quantity
+        FROM ({LEDGER_SQL}) l
+        FULL OUTER JOIN (
+            SELECT * FROM stock_balances WHERE tenant_id = CAST(:tenant_id AS uuid)
+        ) b
+          ON b."productId" = l.product_id
+         AND b."warehouseId" = l.warehouse_id
+         AND b."locationId" = l.location_id
+         AND b."batchNumber" = l.batch_number
+        WHERE COALESCE(l.quantity, 0) <> COALESCE(b.quantity, 0)
+        LIMIT :limit
+    """), params).fetchall()
+
+    product_rows = db.execute(text("""
+        SELECT p.id, p.name, COALESCE(p."stockQuantity", 0), COALESCE(b.total, 0)
+        FROM products p
+        LEFT JOIN (
+            SELECT "productId", SUM(quantity) AS total
+            FROM stock_balances
+            WHERE tenant_id = CAST(:tenant_id AS uuid)
+            GROUP BY "productId"
+        ) b ON b."productId" = p.id
+        WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+          AND COALESCE(p."stockQuantity", 0) <> COALESCE(b.total, 0)
+        ORDER BY p.name
+        LIMIT :limit
+    """), params).fetchall()
+
+    return {
+        "balanceDrift": [
+            {
+                "productId": str(row[0]),
+                "warehouseId": str(row[1]),
+                "locationId": row[2] or None,
+                "batchNumber": row[3] or None,
+                "ledgerQuantity": int(row[4]),
+                "balanceQuantity": int(row[5]),
+            }
+            for row in balance_rows
+        ],
+        "productDrift": [
+            {
+                "productId": str(row[0]),
+                "productName": row[1],
+                "stockQuantity": int(row[2]),
+                "balanceQuantity": int(row[3]),
+            }
+            for row in product_rows
+        ],
+    }
@@ -0,0 +1,169 @@
+"""
+Atomic product stock mutations
+
+Every change to Product.stockQuantity made on behalf of a document (invoice,
+purchase order, ...) goes through ``apply_stock_deltas``. All line items are
+applied by a single statement:
+
+- the affected product rows are locked in ascending id order, so two
+  documents touching overlapping products can never deadlock;
+- the update only happens when every product exists and none would go below
+  zero, so a document is applied completely or not at all;
+- the new quantities come back via RETURNING, so callers never re-read;
+- products that crossed their minimum level are handed to the reorder
+  alerts from the same rows, without another query.
+
+Nothing is committed here; the caller owns the transaction.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import Product
+from .inventory_dashboard import invalidate_inventory_dashboard
+
+SHORTFALL_FAIL = "fail"
+SHORTFALL_CLAMP = "clamp"
+
+
+def aggregate_deltas(pairs: Iterable[Tuple[Any, int]]) -> Dict[str, int]:
+    """Sum (product_id, delta) pairs per product, dropping zero nets."""
+    totals: Dict[str, int] = {}
+    for product_id, delta in pairs:
+        try:
+            key = str(uuid.UUID(str(product_id)))
+        except (TypeError, ValueError):
+            key = str(product_id)
+        totals[key] = totals.get(key, 0) + int(delta)
+    return {key: value for key, value in totals.items() if value != 0}
+
+
+def _values_clause(deltas: Dict[str, int]) -> Tuple[str, Dict[str, Any]]:
+    rows = []
+    params: Dict[str, Any] = {}
+    for i, (product_id, delta) in enumerate(sorted(deltas.items())):
+        rows.append(f"(CAST(:p{i} AS uuid), CAST(:d{i} AS integer))")
+        params[f"p{i}"] = product_id
+        params[f"d{i}"] = delta
+    return ", ".join(rows), params
+
+
+def apply_stock_deltas(
+    db: Session,
+    tenant_id: Any,
+    deltas: Dict[str, int],
+    on_shortfall: str = SHORTFALL_FAIL,
+) -> Dict[str, Any]:
+    """
+    Apply signed quantity changes to a tenant's products in one statement.
+
+    ``deltas`` maps product id to the change (negative deducts). With
+    ``on_shortfall="fail"`` nothing is written unless every product exists
+    and has enough stock; with ``"clamp"`` quantities stop at zero instead.
+
+    Returns ``{"success", "products", "errors"}`` where ``products`` maps
+    product id to ``{name, old_stock, new_stock, unit_cost, min_stock, is_active}``.
+    """
+    errors: List[str] = []
+    valid: Dict[str, int] = {}
+    for product_id, delta in deltas.items():
+        try:
+            valid[str(uuid.UUID(str(product_id)))] = int(delta)
+        except (TypeError, ValueError):
+            errors.append(f"Product {product_id} not found")
+    if errors:
+        return {"success": False, "products": {}, "errors": errors}
+    if not valid:
+        return {"success": True, "products": {}, "errors": []}
+
+    values_sql, params = _values_clause(valid)
+    params.update({"tenant_id": str(tenant_id), "expected": len(valid), "now": datetime.utcnow()})
+
+    if on_shortfall == SHORTFALL_CLAMP:
+        new_quantity = 'GREATEST(0, l.old_qty + v.delta)'
+        guard = "(SELECT count(*) FROM locked) = :expected"
+    else:
+        new_quantity = "l.old_qty + v.delta"
+        guard = (
+            "(SELECT count(*) FROM locked) = :expected "
+            "AND NOT EXISTS (SELECT 1 FROM locked l2 JOIN v v2 ON v2.id = l2.id WHERE l2.old_qty + v2.delta < 0)"
+        )
+
+    statement = text(f"""
+        WITH v(id, delta) AS (VALUES {values_sql}),
+        locked AS MATERIALIZED (
+            SELECT p.id, COALESCE(p."stockQuantity", 0) AS old_qty
+            FROM products p
+            JOIN v ON v.id = p.id
+            WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+            ORDER BY p.id
+            FOR UPDATE OF p
+        )
+        UPDATE products p
+        SET "stockQuantity" = {new_quantity}, "updatedAt" = :now
+        FROM locked l
+        JOIN v ON v.id = l.id
+        WHERE p.id = l.id AND {guard}
+        RETURNING p.id, p.name, l.old_qty, p."stockQuantity", p."costPerUnitPrice", p."minStockLevel", p."isActive"
+    """)
+    rows = db.execute(statement, params).fetchall()
+
+    if len(rows) == len(valid):
+        products = {
+            str(row[0]): {
+                "name": row[1],
+                "old_stock": int(row[2]),
+                "new_stock": int(row[3]),
+                "unit_cost": row[4],
+                "min_stock": row[5],
+                "is_active": row[6],
+            }
+            for row in rows
+        }
+        _expire_loaded_products(db, products)
+        invalidate_inventory_dashboard(tenant_id, db)
+
+        from .reorder_alerts import record_threshold_crossings
+
+        record_threshold_crossings(db, tenant_id, products)
+        return {"success": True, "products": products, "errors": []}
+
+    return {"success": False, "products": {}, "errors": _describe_failure(db, tenant_id, valid)}
+
+
+def _expire_loaded_products(db: Session, product_ids) -> None:
+    # Products already in the session still hold the pre-update quantity.
+    for obj in list(db.identity_map.values()):
+        if isinstance(obj, Product) and str(obj.id) in product_ids:
+            db.expire(obj, ["stockQuantity", "updatedAt"])
+
+
+def _describe_failure(db: Session, tenant_id: Any, deltas: Dict[str, int]) -> List[str]:
+    # The rows are still locked by this transaction, so what we read here is
+    # exactly what made the guarded update refuse.
+    values_sql, params = _values_clause(deltas)
+    params["tenant_id"] = str(tenant_id)
+    found = db.execute(text(f"""
+        WITH v(id, delta) AS (VALUES {values_sql})
+        SELECT v.id, p.name, COALESCE(p."stockQuantity", 0)
+        FROM v
+        JOIN products p ON p.id = v.id AND p.tenant_id = CAST(:tenant_id AS uuid)
+    """), params).fetchall()
+    stock = {str(row[0]): (row[1], int(row[2])) for row in found}
+
+    errors = []
+    for product_id, delta in sorted(deltas.items()):
+        if product_id not in stock:
+            errors.append(f"Product {product_id} not found")
+            continue
+        name, available = stock[product_id]
+        if available + delta < 0:
+            errors.append(
+                f"Insufficient stock for product {name}. "
+                f"Available: {available}, Required: {-delta}"
+            )
+    return errors
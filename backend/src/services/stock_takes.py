@@ -0,0 +1,467 @@
+"""
+Stock takes (physical counts)
+
+A stock take freezes the expected quantity of every product in a warehouse
+into ``stock_take_lines`` when it is opened. Counts arrive in bulk, from the
+app or uploaded by offline handhelds, and are merged into the lines with one
+upsert per upload. Posting turns every line whose count differs from its
+snapshot into a ``cycle_count`` movement of ``counted - expected``, all in
+one transaction:
+
+- the variances are computed in SQL;
+- product rows are locked in id order by ``apply_stock_deltas`` (through
+  ``apply_movement_balances``), which also books balances and valuation;
+- the movements are written with one bulk insert.
+
+Posting the difference to the snapshot, rather than overwriting stock with
+the count, keeps sales and receipts made while counting on the books.
+"""
+
+import csv
+import io
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import StockMovement, StockTake, StockTakeLine, Warehouse
+from .document_sequences import STOCK_TAKE, next_document_number
+from .stock_balances import apply_movement_balances
+
+STOCK_TAKE_REFERENCE = "StockTake"
+COUNT_SET = "set"  # a count replaces the line's counted quantity
+COUNT_ADD = "add"  # a count is added to it (one scan per item)
+COUNT_MODES = (COUNT_SET, COUNT_ADD)
+
+_BALANCES_SQL = """
+    SELECT "productId", sum(quantity) AS quantity
+    FROM stock_balances
+    WHERE tenant_id = CAST(:tenant_id AS uuid) AND "warehouseId" = CAST(:warehouse_id AS uuid)
+    GROUP BY "productId"
+"""
+
+_SNAPSHOT_SQL = f"""
+    INSERT INTO stock_take_lines (id, tenant_id, "stockTakeId", "productId", "expectedQuantity", "unitCost")
+    SELECT gen_random_uuid(), p.tenant_id, CAST(:stock_take_id AS uuid), p.id,
+           COALESCE(b.quantity, 0), COALESCE(p."costPerUnitPrice", 0)
+    FROM products p
+    LEFT JOIN ({_BALANCES_SQL}) b ON b."productId" = p.id
+    WHERE p.tenant_id = CAST(:tenant_id AS uuid)
+      AND (COALESCE(p."isActive", true) OR COALESCE(b.quantity, 0) <> 0)
+      {{scope}}
+"""
+
+# Counts for products missing from the sheet add a line whose expected
+# quantity is the warehouse balance at count time.
+_COUNT_UPSERT_SQL = f"""
+    INSERT INTO stock_take_lines
+        (id, tenant_id, "stockTakeId", "productId", "expectedQuantity", "unitCost",
+         "countedQuantity", "countedBy", "countedAt")
+    SELECT gen_random_uuid(), p.tenant_id, CAST(:stock_take_id AS uuid), p.id,
+           COALESCE(b.quantity, 0), COALESCE(p."costPerUnitPrice", 0),
+           v.quantity, CAST(:user_id AS uuid), v.counted_at
+    FROM unnest(CAST(:product_ids AS uuid[]), CAST(:quantities AS integer[]), CAST(:counted_at AS timestamp[]))
+        AS v(product_id, quantity, counted_at)
+    JOIN products p ON p.id = v.product_id
+    LEFT JOIN ({_BALANCES_SQL}) b ON b."productId" = p.id
+    ON CONFLICT ("stockTakeId", "productId") DO UPDATE
+    SET "countedQuantity" = {{counted}},
+        "countedBy" = EXCLUDED."countedBy",
+        "countedAt" = GREATEST(stock_take_lines."countedAt", EXCLUDED."countedAt")
+    {{where}}
+"""
+
+_VARIANCES_SQL = """
+    SELECT l.id, l."productId", l."countedQuantity" - l."expectedQuantity" AS variance, l."unitCost"
+    FROM stock_take_lines l
+    WHERE l."stockTakeId" = CAST(:stock_take_id AS uuid)
+      AND l."countedQuantity" IS NOT NULL
+      AND l."countedQuantity" <> l."expectedQuantity"
+    ORDER BY l."productId"
+"""
+
+
+def get_stock_take(db: Session, tenant_id: str, stock_take_id: str, lock: bool = False) -> StockTake:
+    try:
+        take_uuid = uuid.UUID(str(stock_take_id))
+    except ValueError:
+        raise LookupError("Stock take not found")
+    query = db.query(StockTake).filter(StockTake.id == take_uuid, StockTake.tenant_id == tenant_id)
+    if lock:
+        query = query.with_for_update()
+    take = query.first()
+    if take is None:
+        raise LookupError("Stock take not found")
+    return take
+
+
+def _require_open(take: StockTake) -> None:
+    if take.status != "open":
+        raise ValueError(f"Stock take {take.reference} is {take.status}")
+
+
+def _refresh_counters(db: Session, take: StockTake) -> None:
+    lines, counted = (
+        db.query(func.count(StockTakeLine.id), func.count(StockTakeLine.countedQuantity))
+        .filter(StockTakeLine.stockTakeId == take.id)
+        .one()
+    )
+    take.lineCount = lines
+    take.countedCount = counted
+
+
+def open_stock_take(
+    db: Session,
+    tenant_id: str,
+    warehouse_id: str,
+    user_id: str,
+    notes: Optional[str] = None,
+    category: Optional[str] = None,
+    product_ids: Optional[List[str]] = None,
+) -> StockTake:
+    """
+    Open a count sheet for a warehouse, optionally limited to a category or a
+    list of products (cycle counts). Expected quantities come from
+    stock_balances in the same statement. Commits.
+    """
+    warehouse = db.query(Warehouse.id).filter(Warehouse.id == warehouse_id, Warehouse.tenant_id == tenant_id).first()
+    if warehouse is None:
+        raise LookupError("Warehouse not found")
+
+    take = StockTake(
+        tenant_id=tenant_id,
+        warehouseId=warehouse[0],
+        reference=next_document_number(db, tenant_id, STOCK_TAKE),
+        status="open",
+        notes=notes,
+        uploadBatches=[],
+        createdBy=user_id,
+    )
+    db.add(take)
+    db.flush()
+
+    scope = ""
+    params: Dict[str, Any] = {
+        "tenant_id": str(tenant_id), "warehouse_id": str(warehouse[0]), "stock_take_id": str(take.id),
+    }
+    if category:
+        scope += " AND p.category = :category"
+        params["category"] = category
+    if product_ids:
+        scope += " AND p.id = ANY(CAST(:product_ids AS uuid[]))"
+        params["product_ids"] = [str(uuid.UUID(str(product_id))) for product_id in product_ids]
+    db.execute(text(_SNAPSHOT_SQL.format(scope=scope)), params)
+    _refresh_counters(db, take)
+    db.commit()
+    db.refresh(take)
+    return take
+
+
+def _resolve_products(db: Session, tenant_id: str, counts: List[Dict[str, Any]]) -> Dict[str, uuid.UUID]:
+    """Map every productId / SKU / barcode in ``counts`` to the tenant's product id."""
+    ids, codes = set(), set()
+    for count in counts:
+        product_ref = count.get("productId")
+        if product_ref:
+            try:
+                ids.add(str(uuid.UUID(str(product_ref))))
+            except ValueError:
+                codes.add(str(product_ref))
+        for key in ("sku", "barcode"):
+            if count.get(key):
+                codes.add(str(count[key]))
+    if not ids and not codes:
+        return {}
+    rows = db.execute(text("""
+        SELECT id, sku, barcode FROM products
+        WHERE tenant_id = CAST(:tenant_id AS uuid)
+          AND (id = ANY(CAST(:ids AS uuid[])) OR sku = ANY(CAST(:codes AS varchar[]))
+               OR barcode = ANY(CAST(:codes AS varchar[])))
+    """), {"tenant_id": str(tenant_id), "ids": list(ids), "codes": list(codes)}).fetchall()
+    resolved: Dict[str, uuid.UUID] = {}
+    for product_id, sku, barcode in rows:
+        resolved[str(product_id)] = product_id
+        if barcode:
+            resolved.setdefault(barcode, product_id)
+        if sku:
+            resolved[sku] = product_id
+    return resolved
+
+
+def record_counts(
+    db: Session,
+    tenant_id: str,
+    stock_take_id: str,
+    user_id: str,
+    counts: Iterable[Dict[str, Any]],
+    mode: str = COUNT_SET,
+    batch_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Merge counted quantities into an open stock take. Each count names its
+    product by ``productId``, ``sku`` or ``barcode`` and may carry the
+    ``countedAt`` of the scan. With ``mode="set"`` the latest count of a
+    product wins (a handheld upload older than what is on the sheet does
+    not overwrite it); with ``"add"`` counts accumulate. A ``batch_id`` makes
+    an upload idempotent: a retried upload is ignored. Commits.
+    """
+    if mode not in COUNT_MODES:
+        raise ValueError(f"Count mode must be one of: {', '.join(COUNT_MODES)}")
+    counts = list(counts)
+    take = get_stock_take(db, tenant_id, stock_take_id, lock=True)
+    _require_open(take)
+    if batch_id and batch_id in (take.uploadBatches or []):
+        db.rollback()
+        return {"applied": 0, "unknown": [], "duplicateBatch": True}
+
+    for count in counts:
+        if count.get("productId") and _is_uuid(count["productId"]):
+            count["productId"] = str(uuid.UUID(str(count["productId"])))
+    resolved = _resolve_products(db, tenant_id, counts)
+    now = datetime.utcnow()
+    merged: Dict[uuid.UUID, Dict[str, Any]] = {}
+    unknown: List[str] = []
+    for count in counts:
+        refs = [str(count[key]) for key in ("productId", "sku", "barcode") if count.get(key)]
+        product_id = next((resolved[ref] for ref in refs if ref in resolved), None)
+        if product_id is None:
+            unknown.append(refs[0] if refs else "")
+            continue
+        quantity = int(count.get("quantity") or 0)
+        if quantity < 0:
+            raise ValueError(f"Counted quantity cannot be negative ({refs[0]})")
+        counted_at = _naive_utc(count.get("countedAt")) or now
+        entry = merged.get(product_id)
+        if entry is None:
+            merged[product_id] = {"quantity": quantity, "countedAt": counted_at}
+        elif mode == COUNT_ADD:
+            entry["quantity"] += quantity
+            entry["countedAt"] = max(entry["countedAt"], counted_at)
+        elif counted_at >= entry["countedAt"]:
+            merged[product_id] = {"quantity": quantity, "countedAt": counted_at}
+
+    if merged:
+        if mode == COUNT_ADD:
+            counted = 'COALESCE(stock_take_lines."countedQuantity", 0) + EXCLUDED."countedQuantity"'
+            where = ""
+        else:
+            counted = 'EXCLUDED."countedQuantity"'
+            where = (
+                'WHERE stock_take_lines."countedAt" IS NULL '
+                'OR EXCLUDED."countedAt" >= stock_take_lines."countedAt"'
+            )
+        db.execute(text(_COUNT_UPSERT_SQL.format(counted=counted, where=where)), {
+            "tenant_id": str(tenant_id),
+            "warehouse_id": str(take.warehouseId),
+            "stock_take_id": str(take.id),
+            "user_id": str(user_id),
+            "product_ids": [str(product_id) for product_id in merged],
+            "quantities": [entry["quantity"] for entry in merged.values()],
+            "counted_at": [entry["countedAt"] for entry in merged.values()],
+        })
+
+    if batch_id:
+        take.uploadBatches = (take.uploadBatches or []) + [batch_id]
+    _refresh_counters(db, take)
+    take.updatedAt = now
+    db.commit()
+    return {"applied": len(merged), "unknown": unknown, "duplicateBatch": False}
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Scanner timestamps as naive UTC, like the countedAt column."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _is_uuid(value: Any) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def parse_count_file(content: bytes) -> List[Dict[str, Any]]:
+    """
+    Read a handheld export: CSV with a ``sku``, ``barcode`` or ``productId``
+    column and a ``quantity`` (or ``qty`` / ``count``) column; an optional
+    ``countedAt`` column holds ISO timestamps.
+    """
+    text_content = content.decode("utf-8-sig", errors="replace")
+    reader = csv.DictReader(io.StringIO(text_content))
+    aliases = {
+        "sku": "sku", "barcode": "barcode", "productid": "productId", "product id": "productId",
+        "quantity": "quantity", "qty": "quantity", "count": "quantity", "counted": "quantity",
+        "countedat": "countedAt", "counted at": "countedAt",
+    }
+    counts = []
+    for line_number, row in enumerate(reader, start=2):
+        count: Dict[str, Any] = {}
+        for header, value in row.items():
+            field = aliases.get((header or "").strip().lower())
+            if field and value not in (None, ""):
+                count[field] = value.strip()
+        if not count:
+            continue
+        try:
+            count["quantity"] = int(float(count.get("quantity", 0)))
+            if "countedAt" in count:
+                count["countedAt"] = datetime.fromisoformat(count["countedAt"])
+        except ValueError:
+            raise ValueError(f"Invalid quantity or timestamp on line {line_number}")
+        if count["quantity"] < 0:
+            raise ValueError(f"Counted quantity cannot be negative on line {line_number}")
+        counts.append(count)
+    return counts
+
+
+def list_stock_take_lines(
+    db: Session,
+    tenant_id: str,
+    stock_take_id: str,
+    variances_only: bool = False,
+    uncounted_only: bool = False,
+    skip: int = 0,
+    limit: int = 500,
+) -> Dict[str, Any]:
+    """Count sheet lines with their variance (counted - expected) and its value."""
+    take = get_stock_take(db, tenant_id, stock_take_id)
+    where = ['l."stockTakeId" = CAST(:stock_take_id AS uuid)']
+    if variances_only:
+        where.append('l."countedQuantity" IS NOT NULL AND l."countedQuantity" <> l."expectedQuantity"')
+    if uncounted_only:
+        where.append('l."countedQuantity" IS NULL')
+    where_sql = " AND ".join(where)
+    params = {"stock_take_id": str(take.id), "skip": skip, "limit": limit}
+    total = db.execute(text(f"SELECT count(*) FROM stock_take_lines l WHERE {where_sql}"), params).scalar() or 0
+    rows = db.execute(text(f"""
+        SELECT l.id, l."productId", p.name, p.sku, p.barcode, l."expectedQuantity", l."countedQuantity",
+               l."countedQuantity" - l."expectedQuantity" AS variance, l."unitCost", l."countedAt", l."movementId"
+        FROM stock_take_lines l
+        JOIN products p ON p.id = l."productId"
+        WHERE {where_sql}
+        ORDER BY p.name, l."productId"
+        OFFSET :skip LIMIT :limit
+    """), params).fetchall()
+    lines = [
+        {
+            "id": str(row.id),
+            "productId": str(row.productId),
+            "productName": row.name,
+            "sku": row.sku,
+            "barcode": row.barcode,
+            "expectedQuantity": row.expectedQuantity,
+            "countedQuantity": row.countedQuantity,
+            "variance": row.variance,
+            "varianceValue": round(row.variance * (row.unitCost or 0.0), 2) if row.variance is not None else None,
+            "countedAt": row.countedAt,
+            "movementId": str(row.movementId) if row.movementId else None,
+        }
+        for row in rows
+    ]
+    return {"lines": lines, "total": total}
+
+
+def post_stock_take(
+    db: Session,
+    tenant_id: str,
+    stock_take_id: str,
+    user_id: str,
+    zero_uncounted: bool = False,
+) -> StockTake:
+    """
+    Book every variance as a cycle_count movement and adjust product stock,
+    all-or-nothing. ``zero_uncounted`` counts lines nobody scanned as zero
+    (full counts); otherwise they are left alone (cycle counts). A ValueError
+    is raised when a variance would take a product below zero. Commits.
+    """
+    take = get_stock_take(db, tenant_id, stock_take_id, lock=True)
+    _require_open(take)
+    now = datetime.utcnow()
+    params = {"stock_take_id": str(take.id)}
+    if zero_uncounted:
+        db.execute(text("""
+            UPDATE stock_take_lines
+            SET "countedQuantity" = 0, "countedBy" = CAST(:user_id AS uuid), "countedAt" = :now
+            WHERE "stockTakeId" = CAST(:stock_take_id AS uuid) AND "countedQuantity" IS NULL
+        """), {**params, "user_id": str(user_id), "now": now})
+
+    variances = db.execute(text(_VARIANCES_SQL), params).fetchall()
+    movements = [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": take.tenant_id,
+            "productId": str(row.productId),
+            "product_uuid": row.productId,
+            "warehouseId": take.warehouseId,
+            "movementType": "cycle_count",
+            "quantity": row.variance,
+            "unitCost": row.unitCost or 0.0,
+            "referenceNumber": take.reference,
+            "referenceType": STOCK_TAKE_REFERENCE,
+            "notes": f"Stock take {take.reference}",
+            "status": "completed",
+            "createdBy": user_id,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        for row in variances
+    ]
+    if movements:
+        try:
+            apply_movement_balances(db, [(movement, 1) for movement in movements], update_products=True)
+        except ValueError:
+            db.rollback()
+            raise
+        db.execute(insert(StockMovement), movements)
+        db.execute(text("""
+            UPDATE stock_take_lines l
+            SET "movementId" = v.movement_id
+            FROM unnest(CAST(:line_ids AS uuid[]), CAST(:movement_ids AS uuid[])) AS v(line_id, movement_id)
+            WHERE l.id = v.line_id
+        """), {
+            "line_ids": [str(row.id) for row in variances],
+            "movement_ids": [str(movement["id"]) for movement in movements],
+        })
+
+    _refresh_counters(db, take)
+    take.status = "posted"
+    take.postedBy = user_id
+    take.postedAt = now
+    take.varianceCount = len(movements)
+    take.varianceValue = round(sum(row.variance * (row.unitCost or 0.0) for row in variances), 2)
+    db.commit()
+    db.refresh(take)
+    return take
+
+
+def cancel_stock_take(db: Session, tenant_id: str, stock_take_id: str) -> StockTake:
+    take = get_stock_take(db, tenant_id, stock_take_id, lock=True)
+    _require_open(take)
+    take.status = "cancelled"
+    db.commit()
+    db.refresh(take)
+    return take
+
+
+def serialize_stock_take(take: StockTake) -> Dict[str, Any]:
+    return {
+        "id": str(take.id),
+        "reference": take.reference,
+        "warehouseId": str(take.warehouseId),
+        "status": take.status,
+        "notes": take.notes,
+        "lineCount": take.lineCount,
+        "countedCount": take.countedCount,
+        "varianceCount": take.varianceCount,
+        "varianceValue": take.varianceValue,
+        "createdBy": str(take.createdBy),
+        "postedBy": str(take.postedBy) if take.postedBy else None,
+        "createdAt": take.createdAt,
+        "updatedAt": take.updatedAt,
+        "postedAt": take.postedAt,
+    }
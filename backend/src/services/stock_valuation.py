@@ -0,0 +1,688 @@
+"""
+Inventory valuation: FIFO cost layers and moving-average cost
+
+Valuation is kept per (tenant, product, warehouse) and booked from the same
+``(movement, sign)`` pairs as stock_balances, inside the caller's
+transaction:
+
+- a receipt (positive signed quantity) opens a FIFO cost layer at the
+  movement's ``unitCost`` and re-weights the moving average;
+- an issue consumes the oldest open layers; every consumption is recorded so
+  the movement can be taken back exactly, and the average cost is unchanged;
+- taking a movement back (sign -1) removes its layers or returns what it
+  consumed.
+
+Each applied movement stores the signed change of stock value it caused in
+``fifoValue`` / ``averageValue``; for an issue, ``-fifoValue`` is its cost of
+goods sold. Value at a past date is the latest daily snapshot plus those
+per-movement changes since, so reports never replay history.
+
+Stock that goes negative in a warehouse is not layered: the shortfall is
+recorded as a consumption without a layer and later receipts settle it
+first. Editing a receipt whose layer was already consumed settles the
+difference at current layers; ``rebuild_stock_valuation`` re-derives
+everything from the ledger when an exact history is needed.
+"""
+
+import uuid
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..config.inventory_models import (
+    Product, Warehouse, StockCostLayer, StockCostConsumption, StockValuation, StockValuationSnapshot,
+)
+from .stock_balances import (
+    MOVEMENT_PRODUCT_SQL,
+    SIGNED_QUANTITY_SQL,
+    movement_signed_quantity,
+    movement_snapshot,
+)
+
+METHOD_FIFO = "fifo"
+METHOD_AVERAGE = "average"
+
+_LAYER_BATCH = 50
+
+
+def _as_uuid(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class _State:
+    """Mutable copy of one stock_valuations row while changes are applied."""
+
+    __slots__ = ("row_id", "quantity", "average_cost", "fifo_value", "fallback_cost")
+
+    def __init__(self, quantity: int, average_cost: float, fifo_value: float, fallback_cost: float):
+        self.row_id = None
+        self.quantity = quantity
+        self.average_cost = average_cost
+        self.fifo_value = fifo_value
+        self.fallback_cost = fallback_cost
+
+    @property
+    def average_value(self) -> float:
+        return max(self.quantity, 0) * self.average_cost
+
+    def issue_cost(self) -> float:
+        return self.average_cost or self.fallback_cost
+
+
+def _lock_states(db: Session, keys: List[Tuple[uuid.UUID, uuid.UUID, uuid.UUID]]) -> Dict[Tuple, _State]:
+    now = datetime.utcnow()
+    db.execute(
+        pg_insert(StockValuation)
+        .values([
+            {
+                "id": uuid.uuid4(), "tenant_id": t, "productId": p, "warehouseId": w,
+                "quantity": 0, "averageCost": 0.0, "averageValue": 0.0, "fifoValue": 0.0, "updatedAt": now,
+            }
+            for t, p, w in keys
+        ])
+        .on_conflict_do_nothing(index_elements=["tenant_id", "productId", "warehouseId"])
+    )
+    rows = db.execute(
+        select(
+            StockValuation.id, StockValuation.tenant_id, StockValuation.productId, StockValuation.warehouseId,
+            StockValuation.quantity, StockValuation.averageCost, StockValuation.fifoValue,
+            Product.costPerUnitPrice,
+        )
+        .join(Product, Product.id == StockValuation.productId)
+        .where(tuple_(
+            StockValuation.tenant_id, StockValuation.productId, StockValuation.warehouseId,
+        ).in_(keys))
+        .order_by(StockValuation.productId, StockValuation.warehouseId)
+        .with_for_update(of=StockValuation)
+    ).fetchall()
+    states: Dict[Tuple, _State] = {}
+    for row in rows:
+        state = _State(int(row.quantity), float(row.averageCost), float(row.fifoValue), float(row.costPerUnitPrice or 0.0))
+        state.row_id = row.id
+        states[(row.tenant_id, row.productId, row.warehouseId)] = state
+    return states
+
+
+def _save_states(db: Session, states: Dict[Tuple, _State]) -> None:
+    if not states:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        update(StockValuation.__table__)
+        .where(StockValuation.__table__.c.id == bindparam("row_id"))
+        .values(
+            quantity=bindparam("quantity"),
+            averageCost=bindparam("average_cost"),
+            averageValue=bindparam("average_value"),
+            fifoValue=bindparam("fifo_value"),
+            updatedAt=now,
+        ),
+        [
+            {
+                "row_id": state.row_id,
+                "quantity": state.quantity,
+                "average_cost": state.average_cost,
+                "average_value": state.average_value,
+                "fifo_value": state.fifo_value,
+            }
+            for state in states.values()
+        ],
+    )
+
+
+def _flush_layers(db: Session, layers: List[Dict[str, Any]]) -> None:
+    # Receipts are buffered so a batch of them is one INSERT; anything that
+    # reads layers flushes first.
+    if layers:
+        db.execute(insert(StockCostLayer), layers)
+        layers.clear()
+
+
+def _receive(
+    pending_layers: List[Dict[str, Any]], key: Tuple, state: _State, movement_id: uuid.UUID, quantity: int,
+    unit_cost: float, received_at: datetime,
+) -> None:
+    # Units covering an earlier shortfall are not layered
+    layered = quantity - min(quantity, max(-state.quantity, 0))
+    if layered > 0:
+        pending_layers.append({
+            "id": uuid.uuid4(), "tenant_id": key[0], "productId": key[1], "warehouseId": key[2],
+            "movementId": movement_id, "receivedAt": received_at,
+            "originalQuantity": layered, "remainingQuantity": layered, "unitCost": unit_cost,
+        })
+        state.fifo_value += layered * unit_cost
+
+    before = state.quantity
+    state.quantity += quantity
+    if state.quantity > 0:
+        if before <= 0:
+            state.average_cost = unit_cost
+        else:
+            state.average_cost = (before * state.average_cost + quantity * unit_cost) / state.quantity
+
+
+def _consume(
+    db: Session, key: Tuple, state: _State, quantity: int, movement_id: Optional[uuid.UUID],
+) -> None:
+    """Take ``quantity`` from the oldest open layers; record consumptions when ``movement_id`` is set."""
+    remaining = min(quantity, max(state.quantity, 0))
+    shortfall = quantity - remaining
+    consumptions = []
+    while remaining > 0:
+        layers = db.execute(
+            select(StockCostLayer.id, StockCostLayer.remainingQuantity, StockCostLayer.unitCost)
+            .where(
+                StockCostLayer.tenant_id == key[0],
+                StockCostLayer.productId == key[1],
+                StockCostLayer.warehouseId == key[2],
+                StockCostLayer.remainingQuantity > 0,
+            )
+            .order_by(StockCostLayer.receivedAt, StockCostLayer.id)
+            .limit(_LAYER_BATCH)
+            .with_for_update()
+        ).fetchall()
+        if not layers:
+            shortfall += remaining
+            break
+        for layer_id, available, unit_cost in layers:
+            take = min(remaining, int(available))
+            db.execute(
+                update(StockCostLayer)
+                .where(StockCostLayer.id == layer_id)
+                .values(remainingQuantity=StockCostLayer.remainingQuantity - take)
+            )
+            consumptions.append((layer_id, take, float(unit_cost)))
+            state.fifo_value -= take * float(unit_cost)
+            remaining -= take
+            if remaining == 0:
+                break
+    if shortfall:
+        consumptions.append((None, shortfall, state.issue_cost()))
+    state.quantity -= quantity
+    if state.fifo_value < 0 and state.quantity <= 0:
+        state.fifo_value = 0.0
+
+    if movement_id is not None and consumptions:
+        db.execute(insert(StockCostConsumption), [
+            {
+                "id": uuid.uuid4(), "tenant_id": key[0], "movementId": movement_id,
+                "layerId": layer_id, "quantity": take, "unitCost": unit_cost,
+            }
+            for layer_id, take, unit_cost in consumptions
+        ])
+
+
+def _reverse_receipt(db: Session, key: Tuple, state: _State, movement_id: Optional[uuid.UUID], quantity: int, value: float) -> None:
+    removed = 0
+    if movement_id is not None:
+        layers = db.execute(
+            select(StockCostLayer.id, StockCostLayer.remainingQuantity, StockCostLayer.unitCost)
+            .where(StockCostLayer.tenant_id == key[0], StockCostLayer.movementId == movement_id)
+            .with_for_update()
+        ).fetchall()
+        for _, available, unit_cost in layers:
+            take = min(quantity - removed, int(available))
+            state.fifo_value -= take * float(unit_cost)
+            removed += take
+        db.execute(delete(StockCostLayer).where(
+            StockCostLayer.tenant_id == key[0], StockCostLayer.movementId == movement_id,
+        ))
+    state.quantity -= removed
+    if quantity > removed:
+        # Part of the receipt was already issued: take it from the other layers
+        _consume(db, key, state, quantity - removed, None)
+
+    remaining_qty = state.quantity
+    if remaining_qty > 0:
+        before_value = (remaining_qty + quantity) * state.average_cost
+        state.average_cost = max(before_value - value, 0.0) / remaining_qty
+
+
+def _reverse_issue(
+    db: Session, pending_layers: List[Dict[str, Any]], key: Tuple, state: _State,
+    movement_id: Optional[uuid.UUID], quantity: int, fallback_cost: float, received_at: datetime,
+) -> None:
+    restored = 0
+    restored_value = 0.0
+    if movement_id is not None:
+        consumptions = db.execute(
+            select(StockCostConsumption.layerId, StockCostConsumption.quantity, StockCostConsumption.unitCost)
+            .where(StockCostConsumption.tenant_id == key[0], StockCostConsumption.movementId == movement_id)
+        ).fetchall()
+        for layer_id, taken, unit_cost in consumptions:
+            if layer_id is None:
+                continue
+            result = db.execute(
+                update(StockCostLayer)
+                .where(StockCostLayer.id == layer_id)
+                .values(remainingQuantity=StockCostLayer.remainingQuantity + int(taken))
+            )
+            if result.rowcount:
+                restored += int(taken)
+                restored_value += int(taken) * float(unit_cost)
+        db.execute(delete(StockCostConsumption).where(
+            StockCostConsumption.tenant_id == key[0], StockCostConsumption.movementId == movement_id,
+        ))
+
+    before = state.quantity
+    state.fifo_value += restored_value
+    state.quantity += restored
+    if restored and state.quantity > 0:
+        unit = restored_value / restored
+        state.average_cost = unit if before <= 0 else (before * state.average_cost + restored_value) / state.quantity
+    if quantity > restored:
+        _receive(pending_layers, key, state, movement_id or uuid.uuid4(), quantity - restored, fallback_cost, received_at)
+
+
+def _set_movement_values(movement: Any, fifo_value: float, average_value: float) -> None:
+    if isinstance(movement, dict):
+        movement["fifoValue"] = fifo_value
+        movement["averageValue"] = average_value
+    else:
+        movement.fifoValue = fifo_value
+        movement.averageValue = average_value
+
+
+def apply_movement_valuation(db: Session, changes: Iterable[Tuple[Any, int]]) -> None:
+    """
+    Book ``(movement, sign)`` pairs into FIFO layers and moving averages.
+
+    Applied movements (sign +1, ORM objects or dicts about to be inserted)
+    get ``fifoValue`` / ``averageValue`` set.
+    Runs inside the caller's transaction; product rows are already locked by
+    the stock update, so two documents never value the same product at once.
+    """
+    entries = []
+    for movement, sign in changes:
+        snap = movement_snapshot(movement)
+        quantity = movement_signed_quantity(
+            snap["movementType"], snap["referenceType"], snap["quantity"], snap["status"]
+        )
+        tenant_id = _as_uuid(snap["tenant_id"])
+        product_id = _as_uuid(snap["product_uuid"] or snap["productId"])
+        warehouse_id = _as_uuid(snap["warehouseId"])
+        if sign > 0:
+            if snap["id"] is None and not isinstance(movement, dict):
+                movement.id = snap["id"] = uuid.uuid4()
+            _set_movement_values(movement, 0.0, 0.0)
+        if quantity == 0 or None in (tenant_id, product_id, warehouse_id):
+            continue
+        entries.append((movement, sign, snap, quantity, (tenant_id, product_id, warehouse_id)))
+    if not entries:
+        return
+
+    keys = sorted({entry[4] for entry in entries}, key=lambda k: (str(k[0]), str(k[1]), str(k[2])))
+    existing = {
+        row[0] for row in db.execute(
+            select(Product.id).where(Product.id.in_({k[1] for k in keys}))
+        )
+    }
+    keys = [k for k in keys if k[1] in existing]
+    if not keys:
+        return
+    states = _lock_states(db, keys)
+    earliest_reversal: Dict[uuid.UUID, date] = {}
+    pending_layers: List[Dict[str, Any]] = []
+
+    for movement, sign, snap, quantity, key in entries:
+        state = states.get(key)
+        if state is None:
+            continue
+        movement_id = _as_uuid(snap["id"])
+        received_at = snap["createdAt"] or datetime.utcnow()
+        unit_cost = float(snap["unitCost"]) if snap["unitCost"] is not None else state.issue_cost()
+        fifo_before, average_before = state.fifo_value, state.average_value
+
+        if sign > 0 and quantity > 0:
+            _receive(pending_layers, key, state, movement_id, quantity, unit_cost, received_at)
+        elif sign > 0:
+            _flush_layers(db, pending_layers)
+            _consume(db, key, state, -quantity, movement_id)
+        elif quantity > 0:
+            _flush_layers(db, pending_layers)
+            value = snap["averageValue"] if snap["averageValue"] is not None else quantity * unit_cost
+            _reverse_receipt(db, key, state, movement_id, quantity, float(value))
+        else:
+            _flush_layers(db, pending_layers)
+            issued = -quantity
+            cost = -float(snap["averageValue"]) / issued if snap["averageValue"] else state.issue_cost()
+            _reverse_issue(db, pending_layers, key, state, movement_id, issued, cost, received_at)
+
+        if sign > 0:
+            _set_movement_values(movement, state.fifo_value - fifo_before, state.average_value - average_before)
+        if sign < 0 and isinstance(received_at, datetime):
+            day = received_at.date()
+            earliest_reversal[key[0]] = min(earliest_reversal.get(key[0], day), day)
+
+    _flush_layers(db, pending_layers)
+    _save_states(db, states)
+    # Snapshots taken after a changed movement no longer add up
+    for tenant_id, day in earliest_reversal.items():
+        db.execute(delete(StockValuationSnapshot).where(
+            StockValuationSnapshot.tenant_id == tenant_id, StockValuationSnapshot.snapshotDate >= day,
+        ))
+
+
+# ------------------------------------------------------------------ #
+# Reports
+# ------------------------------------------------------------------ #
+def get_stock_valuation(
+    db: Session,
+    tenant_id: str,
+    warehouse_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Current per-(product, warehouse) valuation with tenant totals."""
+    query = (
+        db.query(StockValuation, Product.name, Product.sku, Warehouse.name)
+        .join(Product, Product.id == StockValuation.productId)
+        .join(Warehouse, Warehouse.id == StockValuation.warehouseId)
+        .filter(StockValuation.tenant_id == tenant_id, StockValuation.quantity != 0)
+    )
+    if warehouse_id:
+        query = query.filter(StockValuation.warehouseId == warehouse_id)
+    if product_id:
+        query = query.filter(StockValuation.productId == product_id)
+
+    totals = query.with_entities(
+        func.count(StockValuation.id),
+        func.coalesce(func.sum(StockValuation.fifoValue), 0.0),
+        func.coalesce(func.sum(StockValuation.averageValue), 0.0),
+    ).order_by(None).one()
+    rows = query.order_by(Product.name.asc(), Warehouse.name.asc(), StockValuation.id).offset(skip).limit(limit).all()
+    return {
+        "items": [
+            {
+                "productId": str(valuation.productId),
+                "productName": product_name,
+                "productSku": product_sku,
+                "warehouseId": str(valuation.warehouseId),
+                "warehouseName": warehouse_name,
+                "quantity": valuation.quantity,
+                "averageCost": valuation.averageCost,
+                "averageValue": valuation.averageValue,
+                "fifoValue": valuation.fifoValue,
+                "updatedAt": valuation.updatedAt,
+            }
+            for valuation, product_name, product_sku, warehouse_name in rows
+        ],
+        "total": int(totals[0]),
+        "totalFifoValue": float(totals[1]),
+        "totalAverageValue": float(totals[2]),
+    }
+
+
+def get_product_stock_values(db: Session, tenant_id: str, method: str = METHOD_FIFO) -> Dict[str, float]:
+    """Current stock value per product id, summed over warehouses."""
+    column = StockValuation.fifoValue if method == METHOD_FIFO else StockValuation.averageValue
+    rows = (
+        db.query(StockValuation.productId, func.sum(column))
+        .filter(StockValuation.tenant_id == tenant_id)
+        .group_by(StockValuation.productId)
+        .all()
+    )
+    return {str(product_id): float(value or 0.0) for product_id, value in rows}
+
+
+_AS_OF_SQL = f"""
+    WITH anchor AS (
+        SELECT max("snapshotDate") AS day
+        FROM stock_valuation_snapshots
+        WHERE tenant_id = CAST(:tenant_id AS uuid) AND "snapshotDate" <= :as_of
+    ),
+    base AS (
+        SELECT s."productId" AS product_id, s."warehouseId" AS warehouse_id,
+               s.quantity, s."fifoValue" AS fifo_value, s."averageValue" AS average_value
+        FROM stock_valuation_snapshots s, anchor
+        WHERE s.tenant_id = CAST(:tenant_id AS uuid) AND s."snapshotDate" = anchor.day
+    ),
+    changes AS (
+        SELECT p.id AS product_id, m."warehouseId" AS warehouse_id,
+               SUM({SIGNED_QUANTITY_SQL}) AS quantity,
+               COALESCE(SUM(m."fifoValue"), 0) AS fifo_value,
+               COALESCE(SUM(m."averageValue"), 0) AS average_value
+        FROM stock_movements m
+        JOIN products p ON p.tenant_id = m.tenant_id AND p.id = {MOVEMENT_PRODUCT_SQL}
+        CROSS JOIN anchor
+        WHERE m.tenant_id = CAST(:tenant_id AS uuid)
+          AND m."createdAt" < :until
+          AND (anchor.day IS NULL OR m."createdAt" >= anchor.day + 1)
+        GROUP BY p.id, m."warehouseId"
+    )
+    SELECT COALESCE(b.product_id, c.product_id) AS product_id,
+           COALESCE(b.warehouse_id, c.warehouse_id) AS warehouse_id,
+           COALESCE(b.quantity, 0) + COALESCE(c.quantity, 0) AS quantity,
+           COALESCE(b.fifo_value, 0) + COALESCE(c.fifo_value, 0) AS fifo_value,
+           COALESCE(b.average_value, 0) + COALESCE(c.average_value, 0) AS average_value
+    FROM base b
+    FULL OUTER JOIN changes c ON c.product_id = b.product_id AND c.warehouse_id = b.warehouse_id
+"""
+
+
+def _valuation_as_of_rows(db: Session, tenant_id: str, as_of: date) -> List[Any]:
+    until = datetime.combine(as_of + timedelta(days=1), time.min)
+    return db.execute(
+        text(_AS_OF_SQL), {"tenant_id": str(tenant_id), "as_of": as_of, "until": until}
+    ).fetchall()
+
+
+def get_valuation_as_of(
+    db: Session, tenant_id: str, as_of: date, warehouse_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Quantity and value per (product, warehouse) at the end of ``as_of``:
+    the latest snapshot on or before that day plus the movement values since.
+    """
+    rows = _valuation_as_of_rows(db, tenant_id, as_of)
+    if warehouse_id:
+        rows = [row for row in rows if str(row.warehouse_id) == str(warehouse_id)]
+    rows = [row for row in rows if row.quantity or row.fifo_value or row.average_value]
+
+    names = {}
+    product_ids = {row.product_id for row in rows}
+    if product_ids:
+        names = {
+            product.id: (product.name, product.sku)
+            for product in db.query(Product.id, Product.name, Product.sku).filter(Product.id.in_(product_ids))
+        }
+    items = [
+        {
+            "productId": str(row.product_id),
+            "productName": names.get(row.product_id, (None, None))[0],
+            "productSku": names.get(row.product_id, (None, None))[1],
+            "warehouseId": str(row.warehouse_id),
+            "quantity": int(row.quantity),
+            "fifoValue": float(row.fifo_value),
+            "averageValue": float(row.average_value),
+        }
+        for row in rows
+    ]
+    items.sort(key=lambda item: (item["productName"] or "", item["warehouseId"]))
+    return {
+        "asOf": as_of,
+        "items": items,
+        "totalFifoValue": sum(item["fifoValue"] for item in items),
+        "totalAverageValue": sum(item["averageValue"] for item in items),
+    }
+
+
+def take_valuation_snapshot(db: Session, tenant_id: str, snapshot_date: Optional[date] = None) -> int:
+    """Persist the closing valuation of ``snapshot_date`` (default yesterday) and commit."""
+    snapshot_date = snapshot_date or (datetime.utcnow().date() - timedelta(days=1))
+    rows = _valuation_as_of_rows(db, tenant_id, snapshot_date)
+    db.execute(delete(StockValuationSnapshot).where(
+        StockValuationSnapshot.tenant_id == tenant_id, StockValuationSnapshot.snapshotDate == snapshot_date,
+    ))
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": _as_uuid(tenant_id),
+            "productId": row.product_id,
+            "warehouseId": row.warehouse_id,
+            "snapshotDate": snapshot_date,
+            "quantity": int(row.quantity),
+            "fifoValue": float(row.fifo_value),
+            "averageValue": float(row.average_value),
+            "createdAt": datetime.utcnow(),
+        }
+        for row in rows
+        if row.quantity or row.fifo_value or row.average_value
+    ]
+    if values:
+        db.execute(insert(StockValuationSnapshot), values)
+    db.commit()
+    return len(values)
+
+
+# ------------------------------------------------------------------ #
+# Rebuild
+# ------------------------------------------------------------------ #
+_REBUILD_MOVEMENTS_SQL = f"""
+    SELECT m.id, p.id AS product_id, m."warehouseId" AS warehouse_id, m."createdAt" AS created_at,
+           m."unitCost" AS unit_cost, ({SIGNED_QUANTITY_SQL}) AS quantity,
+           p."costPerUnitPrice" AS fallback_cost
+    FROM stock_movements m
+    JOIN products p ON p.tenant_id = m.tenant_id AND p.id = {MOVEMENT_PRODUCT_SQL}
+    JOIN warehouses w ON w.id = m."warehouseId"
+    WHERE m.tenant_id = CAST(:tenant_id AS uuid)
+    ORDER BY m."createdAt", m.id
+"""
+
+
+def _flush_movement_values(db: Session, values: List[Tuple]) -> None:
+    if not values:
+        return
+    rows = ", ".join(
+        f"(CAST(:i{n} AS uuid), CAST(:f{n} AS double precision), CAST(:a{n} AS double precision))"
+        for n in range(len(values))
+    )
+    params = {}
+    for n, (movement_id, fifo_value, average_value) in enumerate(values):
+        params[f"i{n}"] = str(movement_id)
+        params[f"f{n}"] = fifo_value
+        params[f"a{n}"] = average_value
+    db.execute(text(f"""
+        UPDATE stock_movements m
+        SET "fifoValue" = v.f, "averageValue" = v.a
+        FROM (VALUES {rows}) AS v(id, f, a)
+        WHERE m.id = v.id
+    """), params)
+
+
+def rebuild_stock_valuation(db: Session, tenant_id: str, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Re-derive layers, consumptions, current valuations and per-movement values
+    from the whole ledger in one ordered pass, then commit. Snapshots are
+    dropped; take new ones afterwards.
+    """
+    tenant_uuid = _as_uuid(tenant_id)
+    for model in (StockCostConsumption, StockCostLayer, StockValuation, StockValuationSnapshot):
+        db.execute(delete(model).where(model.tenant_id == tenant_uuid))
+
+    states: Dict[Tuple, Dict[str, Any]] = {}
+    pending_values: List[Tuple] = []
+    consumptions: List[Dict[str, Any]] = []
+    processed = 0
+
+    result = db.execute(
+        text(_REBUILD_MOVEMENTS_SQL).execution_options(yield_per=batch_size),
+        {"tenant_id": str(tenant_id)},
+    )
+    for row in result:
+        processed += 1
+        quantity = int(row.quantity or 0)
+        key = (row.product_id, row.warehouse_id)
+        state = states.setdefault(key, {
+            "quantity": 0, "average_cost": 0.0, "fifo_value": 0.0, "layers": deque(),
+            "fallback_cost": float(row.fallback_cost or 0.0),
+        })
+        fifo_before = state["fifo_value"]
+        average_before = max(state["quantity"], 0) * state["average_cost"]
+
+        if quantity > 0:
+            unit_cost = float(row.unit_cost) if row.unit_cost is not None else (state["average_cost"] or state["fallback_cost"])
+            layered = quantity - min(quantity, max(-state["quantity"], 0))
+            if layered > 0:
+                # [id, movement id, received at, original, remaining, unit cost]
+                state["layers"].append([uuid.uuid4(), row.id, row.created_at or datetime.utcnow(), layered, layered, unit_cost])
+                state["fifo_value"] += layered * unit_cost
+            before = state["quantity"]
+            state["quantity"] += quantity
+            if state["quantity"] > 0:
+                state["average_cost"] = unit_cost if before <= 0 else (
+                    (before * state["average_cost"] + quantity * unit_cost) / state["quantity"]
+                )
+        elif quantity < 0:
+            issued = -quantity
+            remaining = min(issued, max(state["quantity"], 0))
+            layers = state["layers"]
+            while remaining > 0 and layers:
+                layer = layers[0]
+                take = min(remaining, layer[4])
+                layer[4] -= take
+                remaining -= take
+                state["fifo_value"] -= take * layer[5]
+                consumptions.append({
+                    "id": uuid.uuid4(), "tenant_id": tenant_uuid, "movementId": row.id,
+                    "layerId": layer[0], "quantity": take, "unitCost": layer[5],
+                })
+                if layer[4] == 0:
+                    layers.popleft()
+                    state.setdefault("closed", []).append(layer)
+            shortfall = issued - min(issued, max(state["quantity"], 0)) + remaining
+            if shortfall:
+                consumptions.append({
+                    "id": uuid.uuid4(), "tenant_id": tenant_uuid, "movementId": row.id, "layerId": None,
+                    "quantity": shortfall, "unitCost": state["average_cost"] or state["fallback_cost"],
+                })
+            state["quantity"] -= issued
+            if state["fifo_value"] < 0 and state["quantity"] <= 0:
+                state["fifo_value"] = 0.0
+
+        average_after = max(state["quantity"], 0) * state["average_cost"]
+        pending_values.append((row.id, state["fifo_value"] - fifo_before, average_after - average_before))
+
+    # Write layers first (consumptions reference them), then the rest in batches
+    now = datetime.utcnow()
+    layer_rows = []
+    for (product_id, warehouse_id), state in states.items():
+        for layer in list(state.get("closed", [])) + list(state["layers"]):
+            layer_rows.append({
+                "id": layer[0], "tenant_id": tenant_uuid, "productId": product_id, "warehouseId": warehouse_id,
+                "movementId": layer[1], "receivedAt": layer[2], "originalQuantity": layer[3],
+                "remainingQuantity": layer[4], "unitCost": layer[5],
+            })
+    for start in range(0, len(layer_rows), batch_size):
+        db.execute(insert(StockCostLayer), layer_rows[start:start + batch_size])
+    for start in range(0, len(consumptions), batch_size):
+        db.execute(insert(StockCostConsumption), consumptions[start:start + batch_size])
+    valuation_rows = [
+        {
+            "id": uuid.uuid4(), "tenant_id": tenant_uuid, "productId": product_id, "warehouseId": warehouse_id,
+            "quantity": state["quantity"], "averageCost": state["average_cost"],
+            "averageValue": max(state["quantity"], 0) * state["average_cost"],
+            "fifoValue": state["fifo_value"], "updatedAt": now,
+        }
+        for (product_id, warehouse_id), state in states.items()
+    ]
+    for start in range(0, len(valuation_rows), batch_size):
+        db.execute(insert(StockValuation), valuation_rows[start:start + batch_size])
+    for start in range(0, len(pending_values), 1000):
+        _flush_movement_values(db, pending_values[start:start + 1000])
+
+    db.commit()
+    return {
+        "movements": processed,
+        "layers": len(layer_rows),
+        "consumptions": len(consumptions),
+        "valuations": len(valuation_rows),
+    }